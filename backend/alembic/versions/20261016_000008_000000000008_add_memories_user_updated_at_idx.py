@@ -0,0 +1,33 @@
+"""add_memories_user_updated_at_idx
+
+Revision ID: 000000000008
+Revises: 000000000007
+Create Date: 2026-10-16 00:00:08.000000+00:00
+
+last_n / first_n 记忆检索改为在 SQL 中按 updated_at 排序并 LIMIT：
+- 回填 updated_at 为 NULL 的旧记录（使用 created_at），保证排序可直接走索引
+- 添加 (user_id, updated_at) 复合索引
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "000000000008"
+down_revision: Union[str, None] = "000000000007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE memories SET updated_at = created_at WHERE updated_at IS NULL")
+    op.create_index(
+        "memories_user_id_updated_at_idx",
+        "memories",
+        ["user_id", "updated_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("memories_user_id_updated_at_idx", table_name="memories")
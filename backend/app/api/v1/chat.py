@@ -27,9 +27,10 @@ All events follow this JSON structure in the `data` field:
 
 import asyncio
 import uuid
-from typing import Any, AsyncGenerator, Dict
+from collections.abc import Sequence
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Dict, Optional
 
-from fastapi import APIRouter, Body, Depends, Request
+from fastapi import APIRouter, Body, Depends, Query, Request
 from fastapi.responses import StreamingResponse
 from langchain.messages import AIMessage, HumanMessage
 from langchain_core.messages.base import BaseMessage
@@ -51,8 +52,11 @@ from app.models import Conversation, Message
 from app.schemas import BaseResponse, ChatRequest, ChatResponse
 from app.services.graph_service import GraphService
 from app.utils.datetime import utc_now
+from app.utils.run_event_log import cancel_event_stream, get_run_event_log, pump_run_events, tail_run_events
+from app.utils.run_scheduler import RunPriority, RunTicket, run_scheduler
 from app.utils.stream_event_handler import StreamEventHandler, StreamState
 from app.utils.task_manager import task_manager
+from app.utils.trace_writer import TraceWriter
 
 # LangGraph 控制流异常：不将 trace 标为 FAILED
 try:
@@ -146,6 +150,61 @@ async def safe_get_state(
     raise RuntimeError("Failed to get state after all retries")
 
 
+async def resolve_run_outcome(graph: Any, config: RunnableConfig, state: StreamState, log: Any) -> bool:
+    """
+    运行结束后确定结果（中断 / 完成）与最终消息。
+
+    优先使用事件流中捕获的根图状态（StreamState.observe_graph_event）：
+    - interrupt() 暂停：中断节点为已开始未结束的根图节点，无需读取 checkpoint
+    - interrupt_before / interrupt_after 暂停：事件流中没有下一个节点的信息，读取一次 checkpoint
+    - 未捕获到根图结束事件：读取一次 checkpoint 作为兜底
+    用户停止的运行不视为中断。
+
+    Returns:
+        bool: 图是否处于中断状态
+    """
+    if state.stopped:
+        return False
+
+    values = state.final_values
+    interrupted = state.interrupt_signaled
+    next_node = state.pending_root_node if interrupted else None
+
+    if (interrupted and next_node is None) or not state.root_ended:
+        try:
+            snap = await safe_get_state(graph, config, max_retries=1, log=log)
+            if values is None:
+                values = snap.values or {}
+            if snap.tasks:
+                interrupted = interrupted or not state.root_ended
+                next_node = next_node or snap.tasks[0].name
+        except Exception as e:
+            # 读取失败不影响流程，中断状态会在 resume 时重新检查
+            log.warning(f"Failed to read final graph state: {e}")
+
+    values = values or {}
+    # 状态通道的 messages 是 AppendOnlyList（Sequence，而非 list）
+    messages = values.get("messages")
+    if isinstance(messages, Sequence) and not isinstance(messages, str) and messages:
+        state.all_messages = list(messages)
+
+    if interrupted:
+        state.interrupted = True
+        state.interrupt_node = next_node
+        state.interrupt_state = values
+    return interrupted
+
+
+def _interrupt_payload(state: StreamState, thread_id: str) -> dict[str, Any]:
+    next_node = state.interrupt_node
+    return {
+        "node_name": next_node or "unknown",
+        "node_label": next_node.replace("_", " ").title() if next_node else "Unknown Node",
+        "state": state.interrupt_state or {},
+        "thread_id": thread_id,
+    }
+
+
 # ==================== Persistence Logic ====================
 
 
@@ -158,175 +217,83 @@ async def save_run_result(
     workspace_id: str | None = None,
     user_id: str | None = None,
     graph_name: str | None = None,
+    trace_writer: TraceWriter | None = None,
+    interrupted_graph_id: str | None = None,
 ) -> None:
     """
     保存运行结果的通用逻辑。
     即使是在 finally 块中调用，也使用新的 DB Session 确保连接可用。
-    同时将 Trace + Observations 批量持久化到数据库。
+
+    助手消息、会话 updated_at 与中断标记（中断时写入 interrupted_graph_id，否则清除）
+    在同一个事务中写入。随后写入剩余的 Trace + Observations
+    （执行期间已由 trace_writer 增量写入的部分不再重复保存）。
     """
-    # --- 1. 保存消息 ---
-    if state.assistant_content or state.all_messages:
-        if not state.all_messages and state.assistant_content:
-            log.warning(f"Using fallback content accumulation for thread {thread_id}")
-            state.all_messages = [AIMessage(content=state.assistant_content)]
+    # --- 1. 保存消息 + 会话元数据 ---
+    if not state.all_messages and state.assistant_content:
+        log.warning(f"Using fallback content accumulation for thread {thread_id}")
+        state.all_messages = [AIMessage(content=state.assistant_content)]
 
-        if state.all_messages:
-            try:
-                async with AsyncSessionLocal() as session:
-                    await save_assistant_message(thread_id, state.all_messages, session, update_conversation=True)
-                    log.info(f"Persisted messages for thread {thread_id}")
-            except asyncio.CancelledError:
-                log.warning(f"Save run result cancelled for thread {thread_id}")
-            except Exception as e:
-                log.error(f"Failed to persist messages for thread {thread_id}: {e}")
+    try:
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                message = build_assistant_message(thread_id, state.all_messages) if state.all_messages else None
+                if message is not None:
+                    session.add(message)
+
+                result = await session.execute(select(Conversation).where(Conversation.thread_id == thread_id))
+                if conv := result.scalar_one_or_none():
+                    if message is not None:
+                        conv.updated_at = utc_now()
+                    meta_data = dict(conv.meta_data or {})
+                    if state.interrupted and interrupted_graph_id:
+                        meta_data["interrupted_graph_id"] = interrupted_graph_id
+                    elif not state.interrupted:
+                        meta_data.pop("interrupted_graph_id", None)
+                    if meta_data != (conv.meta_data or {}):
+                        conv.meta_data = meta_data
+        if message is not None:
+            log.info(f"Persisted messages for thread {thread_id}")
+    except asyncio.CancelledError:
+        log.warning(f"Save run result cancelled for thread {thread_id}")
+    except Exception as e:
+        log.error(f"Failed to persist run result for thread {thread_id}: {e}")
 
-    # --- 2. 持久化 Trace + Observations (事务安全) ---
-    all_observations = state.get_all_observations()
-    if all_observations:
-        try:
-            await _persist_trace_data(
-                state,
-                log,
-                observations=all_observations,
-                graph_id=graph_id,
-                workspace_id=workspace_id,
-                user_id=user_id,
-                graph_name=graph_name,
-            )
-        except asyncio.CancelledError:
-            log.debug(f"Trace persistence cancelled for thread {thread_id}")
-        except Exception as e:
-            log.warning(f"Failed to persist trace data for thread {thread_id}: {e}")
+    # --- 2. 持久化 Trace + Observations (write-behind 剩余部分 + trace 最终状态) ---
+    writer = trace_writer or TraceWriter(
+        state, graph_id=graph_id, workspace_id=workspace_id, user_id=user_id, graph_name=graph_name
+    )
+    try:
+        written = await writer.close()
+        if written:
+            log.info(f"Persisted trace {state.trace_id} with {written} observation writes | thread={thread_id}")
+    except asyncio.CancelledError:
+        log.debug(f"Trace persistence cancelled for thread {thread_id}")
+    except Exception as e:
+        log.warning(f"Failed to persist trace data for thread {thread_id}: {e}")
 
 
-async def _persist_trace_data(
+def _start_trace_writer(
     state: StreamState,
-    log,
     *,
-    observations: list | None = None,
     graph_id: str | None = None,
     workspace_id: str | None = None,
     user_id: str | None = None,
     graph_name: str | None = None,
-) -> None:
-    """
-    将 StreamState 中积累的 Observation 数据批量写入数据库。
-
-    事务安全：使用 session.begin() 确保原子性。
-    未完成的 observations 由 state.get_all_observations() 标记为 INTERRUPTED。
-    """
-    from datetime import datetime, timezone
-
-    from app.models.execution_trace import (
-        ExecutionObservation,
-        ExecutionTrace,
-        ObservationLevel,
-        ObservationStatus,
-        ObservationType,
-        TraceStatus,
-    )
-    from app.utils.stream_event_handler import ObsLevel, ObsStatus, ObsType
-
-    all_obs = observations if observations is not None else state.get_all_observations()
-    if not all_obs:
-        return
-
-    # 确定 trace 状态
-    if state.has_error:
-        trace_status = TraceStatus.FAILED
-    elif state.interrupted:
-        trace_status = TraceStatus.INTERRUPTED
-    elif state.stopped:
-        trace_status = TraceStatus.FAILED
-    else:
-        trace_status = TraceStatus.COMPLETED
-
-    now = datetime.now(timezone.utc)
-    trace_start = datetime.fromtimestamp(state.trace_start_time / 1000, tz=timezone.utc)
-    duration_ms = int(now.timestamp() * 1000 - state.trace_start_time)
-
-    # 聚合 token 统计
-    total_tokens = 0
-    for obs_rec in all_obs:
-        if obs_rec.type == ObsType.GENERATION and obs_rec.total_tokens:
-            total_tokens += obs_rec.total_tokens
-
-    # 构造 ExecutionTrace ORM 对象
-    trace_uuid = uuid.UUID(state.trace_id)
-    trace = ExecutionTrace(
-        id=trace_uuid,
-        workspace_id=uuid.UUID(workspace_id) if workspace_id else None,
-        graph_id=uuid.UUID(graph_id) if graph_id else None,
-        thread_id=state.thread_id,
+) -> TraceWriter:
+    """创建 trace 写入器；开启 write-behind 时在执行期间增量写入 observation"""
+    writer = TraceWriter(
+        state,
+        graph_id=graph_id,
+        workspace_id=workspace_id,
         user_id=user_id,
-        name=graph_name or "graph_execution",
-        status=trace_status,
-        start_time=trace_start,
-        end_time=now,
-        duration_ms=duration_ms,
-        total_tokens=total_tokens or None,
+        graph_name=graph_name,
+        batch_size=settings.trace_flush_batch_size,
+        flush_interval_ms=settings.trace_flush_interval_ms,
+        max_queue=settings.trace_flush_max_queue,
     )
-
-    # Enum 映射
-    type_map = {
-        ObsType.SPAN: ObservationType.SPAN,
-        ObsType.GENERATION: ObservationType.GENERATION,
-        ObsType.TOOL: ObservationType.TOOL,
-        ObsType.EVENT: ObservationType.EVENT,
-    }
-    level_map = {
-        ObsLevel.DEBUG: ObservationLevel.DEBUG,
-        ObsLevel.DEFAULT: ObservationLevel.DEFAULT,
-        ObsLevel.WARNING: ObservationLevel.WARNING,
-        ObsLevel.ERROR: ObservationLevel.ERROR,
-    }
-    status_map = {
-        ObsStatus.RUNNING: ObservationStatus.RUNNING,
-        ObsStatus.COMPLETED: ObservationStatus.COMPLETED,
-        ObsStatus.FAILED: ObservationStatus.FAILED,
-        ObsStatus.INTERRUPTED: ObservationStatus.INTERRUPTED,
-    }
-
-    # 构造 ExecutionObservation ORM 对象
-    db_observations = []
-    for rec in all_obs:
-        obs = ExecutionObservation(
-            id=uuid.UUID(rec.id),
-            trace_id=trace_uuid,
-            parent_observation_id=uuid.UUID(rec.parent_observation_id) if rec.parent_observation_id else None,
-            type=type_map.get(rec.type, ObservationType.EVENT),
-            name=rec.name,
-            level=level_map.get(rec.level, ObservationLevel.DEFAULT),
-            status=status_map.get(rec.status, ObservationStatus.COMPLETED),
-            status_message=rec.status_message,
-            start_time=datetime.fromtimestamp(rec.start_time / 1000, tz=timezone.utc),
-            end_time=datetime.fromtimestamp(rec.end_time / 1000, tz=timezone.utc) if rec.end_time else None,
-            duration_ms=rec.duration_ms,
-            completion_start_time=(
-                datetime.fromtimestamp(rec.completion_start_time / 1000, tz=timezone.utc)
-                if rec.completion_start_time
-                else None
-            ),
-            input=rec.input_data,
-            output=rec.output_data,
-            model_name=rec.model_name,
-            model_provider=rec.model_provider,
-            model_parameters=rec.model_parameters,
-            prompt_tokens=rec.prompt_tokens,
-            completion_tokens=rec.completion_tokens,
-            total_tokens=rec.total_tokens,
-            metadata_=rec.metadata,
-            version=rec.version,
-        )
-        db_observations.append(obs)
-
-    # 事务安全批量写入
-    async with AsyncSessionLocal() as session:
-        async with session.begin():
-            session.add(trace)
-            session.add_all(db_observations)
-        # commit 在 begin() 退出时自动执行
-    log.info(f"Persisted trace {state.trace_id} with {len(db_observations)} observations | thread={state.thread_id}")
+    if settings.trace_write_behind_enabled:
+        writer.start()
+    return writer
 
 
 # ==================== Database Operations ====================
@@ -422,14 +389,12 @@ async def save_user_message(thread_id: str, message: str, metadata: dict | None,
     await db.commit()
 
 
-async def save_assistant_message(
-    thread_id: str, messages: list[BaseMessage], db: AsyncSession, update_conversation: bool = True
-):
-    """保存助手消息，支持提取 Tool Calls"""
+def build_assistant_message(thread_id: str, messages: list[BaseMessage]) -> Message | None:
+    """根据最后一条 AI 消息构造助手消息（支持提取 Tool Calls），没有 AI 消息时返回 None"""
     # 找到最后一条 AI 消息
     ai_msg = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
     if not ai_msg:
-        return
+        return None
 
     meta_data = dict(ai_msg.additional_kwargs) if ai_msg.additional_kwargs else {}
 
@@ -442,12 +407,21 @@ async def save_assistant_message(
             tool_calls_data.append({"name": tc.get("name"), "arguments": tc.get("args"), "id": tc.get("id")})
         meta_data["tool_calls"] = tool_calls_data
 
-    message = Message(
+    return Message(
         thread_id=thread_id,
         role="assistant",
         content=str(ai_msg.content) if ai_msg.content else "",
         meta_data=meta_data,
     )
+
+
+async def save_assistant_message(
+    thread_id: str, messages: list[BaseMessage], db: AsyncSession, update_conversation: bool = True
+):
+    """保存助手消息，支持提取 Tool Calls"""
+    message = build_assistant_message(thread_id, messages)
+    if message is None:
+        return
     db.add(message)
 
     if update_conversation:
@@ -477,9 +451,159 @@ def _extract_run_ids(event_dict: dict) -> tuple[str, str | None]:
     return run_id, parent_run_id
 
 
+async def _iter_with_flush_ticks(
+    source: AsyncIterator[Any], flush_timeout: Callable[[], float | None]
+) -> AsyncGenerator[Any, None]:
+    """
+    遍历事件流；当缓冲的 content 增量到达时间预算而没有新事件到达时，产出 None 作为 flush 信号。
+
+    flush_timeout() 返回 None（没有缓冲内容）时直接等待下一个事件。
+    """
+    iterator = source.__aiter__()
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            timeout = flush_timeout()
+            if pending is None:
+                if timeout is None:
+                    try:
+                        event = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        return
+                    yield event
+                    continue
+                pending = asyncio.ensure_future(iterator.__anext__())
+
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield None
+                continue
+
+            task, pending = pending, None
+            try:
+                event = task.result()
+            except StopAsyncIteration:
+                return
+            yield event
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+def _create_stream_handler() -> StreamEventHandler:
+    """按配置创建 StreamEventHandler（可选启用 content 增量合并）"""
+    if not settings.sse_coalesce_enabled:
+        return StreamEventHandler()
+    return StreamEventHandler(
+        coalesce_window_ms=settings.sse_coalesce_window_ms,
+        coalesce_max_bytes=settings.sse_coalesce_max_bytes,
+    )
+
+
 # ==================== Endpoints ====================
 
 
+# 与 HTTP 连接解耦的后台运行（防止被 GC 回收）
+_background_runs: set[asyncio.Task] = set()
+
+
+async def _run_when_admitted(
+    thread_id: str, ticket: RunTicket, events: AsyncGenerator[bytes, None]
+) -> AsyncGenerator[bytes, None]:
+    """排队等待调度器准入（推送 queued 状态与排队位置），准入后执行事件生成器，结束时释放名额"""
+    started = False
+    try:
+        async for position in run_scheduler.wait(ticket):
+            if position:
+                yield StreamEventHandler.format_sse(
+                    "status", {"status": "queued", "position": position, "_meta": {"node_name": "system"}}, thread_id
+                )
+        started = True
+        async for frame in events:
+            try:
+                yield frame
+            except asyncio.CancelledError:
+                # 取消发生在消费端（写日志 / 发送）时：转交给生成器，走正常的停止与持久化流程
+                await cancel_event_stream(events)
+                raise
+    finally:
+        run_scheduler.release(ticket)
+        await events.aclose()
+        if not started:
+            # 排队中被取消：生成器从未开始，由这里注销任务
+            await task_manager.unregister_task(thread_id)
+
+
+async def _start_stream_run(
+    thread_id: str,
+    events: AsyncGenerator[bytes, None],
+    *,
+    user_id: str,
+    priority: int = RunPriority.NORMAL,
+) -> StreamingResponse:
+    """
+    提交到运行调度器、注册任务并返回 SSE 响应。
+
+    超过并发上限时运行在队列中等待（客户端收到 status=queued 事件），队列满时返回 429。
+    开启 SSE_RESUMABLE_ENABLED 时，图执行在后台任务中运行，事件写入按线程的事件日志，
+    客户端断线不会中断执行，可通过 GET /chat/stream/{thread_id}/events + Last-Event-ID 重连。
+    否则执行与连接绑定（断线即停止）。
+    """
+    ticket = run_scheduler.submit(user_id, priority, kind="chat")
+    admitted_events = _run_when_admitted(thread_id, ticket, events)
+    run_task: Optional[asyncio.Task] = None
+    try:
+        if not settings.sse_resumable_enabled:
+            current_task = asyncio.current_task()
+            if current_task:
+                await task_manager.register_task(thread_id, current_task)
+            return StreamingResponse(admitted_events, media_type="text/event-stream")
+
+        event_log = get_run_event_log()
+        await event_log.reset(thread_id)
+        run_task = asyncio.create_task(
+            pump_run_events(thread_id, admitted_events, event_log), name=f"chat-run-{thread_id}"
+        )
+        _background_runs.add(run_task)
+        run_task.add_done_callback(_background_runs.discard)
+        await task_manager.register_task(thread_id, run_task)
+        return StreamingResponse(tail_run_events(thread_id, event_log), media_type="text/event-stream")
+    except BaseException:
+        # 提交后启动失败（事件日志 / 任务注册异常）：释放调度名额，避免占用的槽位永不归还
+        run_scheduler.release(ticket)
+        if run_task is not None:
+            run_task.cancel()
+        else:
+            await events.aclose()
+        raise
+
+
+@router.get("/stream/{thread_id}/events", response_class=StreamingResponse)
+async def chat_stream_events(
+    request: Request,
+    thread_id: str,
+    current_user: CurrentUser,
+    last_event_id: str | None = Query(default=None, description="Resume after this event ID"),
+    db: AsyncSession = Depends(get_db),
+):
+    """重连运行中的（或最近结束的）流：回放 Last-Event-ID 之后的事件，然后跟随实时事件"""
+    log = _bind_log(request, user_id=str(current_user.id), thread_id=thread_id)
+
+    res = await db.execute(
+        select(Conversation).where(Conversation.thread_id == thread_id, Conversation.user_id == current_user.id)
+    )
+    if not res.scalar_one_or_none():
+        raise_not_found_error("Conversation not found.")
+
+    event_log = get_run_event_log()
+    if not await event_log.exists(thread_id):
+        raise_not_found_error("No active or recent run for this thread.")
+
+    resume_after = request.headers.get("last-event-id") or last_event_id
+    log.info(f"Stream reconnect | last_event_id={resume_after}")
+    return StreamingResponse(tail_run_events(thread_id, event_log, resume_after), media_type="text/event-stream")
+
+
 @router.post("/stop", response_model=BaseResponse[dict])
 async def stop_chat(
     request: Request,
@@ -668,40 +792,44 @@ async def chat_stream(
                     else:
                         initial_context[key] = value
 
-    # 2. 提前注册任务，确保停止请求能找到目标
-    current_task = asyncio.current_task()
-    if current_task:
-        await task_manager.register_task(thread_id, current_task)
-
-    async def event_generator() -> AsyncGenerator[str, None]:
-        state = StreamState(thread_id)
-        handler = StreamEventHandler()
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        state = StreamState(thread_id, model_input_delta=settings.sse_model_input_delta)
+        handler = _create_stream_handler()
+        trace_writer = _start_trace_writer(
+            state,
+            graph_id=str(payload.graph_id) if payload.graph_id else None,
+            workspace_id=graph_workspace_id,
+            user_id=str(current_user.id),
+            graph_name=graph_display_name,
+        )
 
         # 发送初始状态
         yield handler.format_sse("status", {"status": "connected", "_meta": {"node_name": "system"}}, thread_id)
 
         try:
             # 3. 创建图: 如果 graph_id 为 None，使用默认 DeepAgents 单节点，否则从数据库加载图
-            graph_service = GraphService(db)
-            if payload.graph_id is None:
-                log.info("[Chat API Stream] Using default DeepAgents single-node (graph_id is None)")
-                graph = await graph_service.create_default_deep_agents_graph(
-                    llm_model=llm_params["llm_model"],
-                    api_key=llm_params["api_key"],
-                    base_url=llm_params["base_url"],
-                    max_tokens=llm_params["max_tokens"],
-                    user_id=str(current_user.id),
-                )
-            else:
-                graph = await graph_service.create_graph_by_graph_id(
-                    graph_id=payload.graph_id,
-                    llm_model=llm_params["llm_model"],
-                    api_key=llm_params["api_key"],
-                    base_url=llm_params["base_url"],
-                    max_tokens=llm_params["max_tokens"],
-                    user_id=current_user.id,
-                    current_user=current_user,
-                )
+            # 运行可能晚于请求结束才开始（排队）或在断线后继续，不能使用请求作用域的 db 会话
+            async with AsyncSessionLocal() as run_db:
+                graph_service = GraphService(run_db)
+                if payload.graph_id is None:
+                    log.info("[Chat API Stream] Using default DeepAgents single-node (graph_id is None)")
+                    graph = await graph_service.create_default_deep_agents_graph(
+                        llm_model=llm_params["llm_model"],
+                        api_key=llm_params["api_key"],
+                        base_url=llm_params["base_url"],
+                        max_tokens=llm_params["max_tokens"],
+                        user_id=str(current_user.id),
+                    )
+                else:
+                    graph = await graph_service.create_graph_by_graph_id(
+                        graph_id=payload.graph_id,
+                        llm_model=llm_params["llm_model"],
+                        api_key=llm_params["api_key"],
+                        base_url=llm_params["base_url"],
+                        max_tokens=llm_params["max_tokens"],
+                        user_id=current_user.id,
+                        current_user=current_user,
+                    )
 
             # 5. 从 metadata 中提取文件信息并添加到消息中
             files = payload.metadata.get("files", [])
@@ -715,14 +843,23 @@ async def chat_stream(
                 enriched_message = payload.message
 
             # 6. 事件循环
-            async for event in graph.astream_events(
-                {"messages": [HumanMessage(content=enriched_message)], "context": initial_context},
-                config=config,
-                version="v2",
+            async for event in _iter_with_flush_ticks(
+                graph.astream_events(
+                    {"messages": [HumanMessage(content=enriched_message)], "context": initial_context},
+                    config=config,
+                    version="v2",
+                ),
+                handler.content_flush_timeout,
             ):
+                # 合并中的 content 到达时间预算
+                if event is None:
+                    if sse := handler.flush_content(state):
+                        yield sse
+                    continue
+
                 # log.info(f"Event: {event}")
                 # A. 停止检测
-                if await task_manager.is_stopped(thread_id):
+                if task_manager.is_stop_requested(thread_id):
                     state.stopped = True
                     log.info(f"Task stopped by user: {thread_id}")
                     break
@@ -735,6 +872,7 @@ async def chat_stream(
                 else:
                     # Convert event to dict if needed
                     event_dict = {"event": str(type(event).__name__), "data": event} if event else {}
+                state.observe_graph_event(event_dict)
                 event_type = event_dict.get("event")
                 event_name = event_dict.get("name", "")
                 metadata = event_dict.get("metadata", {}) if isinstance(event_dict.get("metadata"), dict) else {}
@@ -753,6 +891,10 @@ async def chat_stream(
                 # 提取 run_id / parent_run_id（LangGraph v2）
                 run_id, parent_run_id = _extract_run_ids(event_dict)
 
+                # 事件类型变化：先发送合并中的 content
+                if event_type != "on_chat_model_stream" and (sse := handler.flush_content(state)):
+                    yield sse
+
                 if event_type == "on_chat_model_start":
                     yield await handler.handle_chat_model_start(event_dict, state, run_id, parent_run_id)
 
@@ -773,17 +915,15 @@ async def chat_stream(
                 elif event_type == "on_chain_start" and is_node_event:
                     yield await handler.handle_node_start(event_dict, state, run_id, parent_run_id)
 
+                elif event_type == "on_custom_event":
+                    handler.handle_custom_event(event_dict, state, run_id)
+
                 elif event_type == "on_chain_end":
                     # 如果是节点结束事件，发送节点结束事件（可能返回多个事件）
                     if is_node_event:
-                        result = await handler.handle_node_end(event_dict, state, run_id, parent_run_id)
-                        # handle_node_end 返回 list[str]
-                        if isinstance(result, list):
-                            for event_str in result:
-                                if event_str and event_str.strip():
-                                    yield event_str.strip() + "\n\n"
-                        elif isinstance(result, str) and result.strip():
-                            yield result
+                        # handle_node_end 返回 list[bytes]（每个元素都是完整的 SSE 帧）
+                        for sse_frame in await handler.handle_node_end(event_dict, state, run_id, parent_run_id):
+                            yield sse_frame
 
                     # C. 收集完整消息 (但不发送 SSE，仅用于最终状态确认)
                     # LangGraph 有时会在 on_chain_end 的 output 中包含最终消息列表
@@ -794,64 +934,16 @@ async def chat_stream(
                     if output and isinstance(output, dict) and "messages" in output:
                         state.all_messages = output["messages"]
 
-            # 5. 检查是否有中断
-            interrupted = False
-            try:
-                snap = await safe_get_state(graph, config, max_retries=3, initial_delay=0.1, log=log)
-                # 检查是否有待处理的任务（中断状态）
-                if snap.tasks:
-                    # 图处于中断状态，发送 interrupt 事件
-                    next_node = snap.tasks[0].target if snap.tasks else None
-                    current_state = snap.values or {}
-
-                    # 提取节点信息
-                    node_info = {}
-                    if next_node:
-                        node_info["node_name"] = next_node
-                        node_info["node_label"] = next_node.replace("_", " ").title()
-
-                    interrupt_data = {
-                        "node_name": node_info.get("node_name", "unknown"),
-                        "node_label": node_info.get("node_label", "Unknown Node"),
-                        "state": current_state,
-                        "thread_id": thread_id,
-                    }
-
-                    log.info(f"Graph interrupted at node '{next_node}' | thread_id={thread_id}")
-                    yield handler.format_sse("interrupt", interrupt_data, thread_id)
-                    if payload.graph_id:
-                        async with AsyncSessionLocal() as session:
-                            result_query = await session.execute(
-                                select(Conversation).where(Conversation.thread_id == thread_id)
-                            )
-                            if conv := result_query.scalar_one_or_none():
-                                if not conv.meta_data:
-                                    conv.meta_data = {}
-                                conv.meta_data["interrupted_graph_id"] = str(payload.graph_id)
-                                await session.commit()
-                                log.debug(f"Stored graph_id in conversation metadata | thread_id={thread_id}")
-
-                    state.interrupted = True
-                    state.interrupt_node = next_node
-                    state.interrupt_state = current_state
-                    interrupted = True
-
-            except Exception as e:
-                # 如果查询失败（可能是连接冲突），记录警告但不影响流程
-                # 中断状态会在 resume 时重新检查
-                log.warning(f"Failed to check interrupt state (may be due to connection conflict): {e}")
+            if sse := handler.flush_content(state):
+                yield sse
 
-            # 6. 循环结束处理
-            # 尝试最后一次获取完整状态 (防止 on_chain_end 没触发或被跳过)
-            if not state.all_messages and not state.stopped and not interrupted:
-                try:
-                    snap = await safe_get_state(graph, config, max_retries=2, initial_delay=0.05, log=log)
-                    if snap.values and "messages" in snap.values:
-                        state.all_messages = snap.values["messages"]
-                except Exception as e:
-                    log.warning(f"Failed to fetch final state: {e}")
+            # 5. 确定运行结果（中断 / 完成），最终状态来自事件流
+            interrupted = await resolve_run_outcome(graph, config, state, log)
+            if interrupted:
+                log.info(f"Graph interrupted at node '{state.interrupt_node}' | thread_id={thread_id}")
+                yield handler.format_sse("interrupt", _interrupt_payload(state, thread_id), thread_id)
 
-            # 7. 发送结束信号（如果未中断）
+            # 6. 发送结束信号（如果未中断）
             if interrupted:
                 # 中断状态，不发送 done 事件，等待用户操作
                 # 事件流会在这里暂停，等待 /v1/chat/resume 端点被调用
@@ -866,7 +958,7 @@ async def chat_stream(
                 yield handler.format_sse("done", {"_meta": {"node_name": "system"}}, thread_id)
 
         except asyncio.CancelledError:
-            log.warning(f"Client disconnected: {thread_id}")
+            log.warning(f"Run cancelled or client disconnected: {thread_id}")
             state.stopped = True  # 标记为停止以便后续保存逻辑知道状态
             # 无需 yield，因为客户端已断开
         except Exception as e:
@@ -896,6 +988,8 @@ async def chat_stream(
                     workspace_id=graph_workspace_id,
                     user_id=str(current_user.id),
                     graph_name=graph_display_name,
+                    trace_writer=trace_writer,
+                    interrupted_graph_id=str(payload.graph_id) if payload.graph_id else None,
                 )
             except asyncio.CancelledError:
                 # 在请求取消/连接终止时被打断是预期行为
@@ -912,26 +1006,8 @@ async def chat_stream(
                 except Exception as e:
                     log.warning(f"[Chat API Stream] Failed to cleanup backend: {e}")
 
-            # 如果执行完成（非中断），清理 conversation 中的中断标记
-            if not state.interrupted:
-                try:
-                    async with AsyncSessionLocal() as session:
-                        result_query = await session.execute(
-                            select(Conversation).where(Conversation.thread_id == thread_id)
-                        )
-                        if conv := result_query.scalar_one_or_none():
-                            if conv.meta_data and "interrupted_graph_id" in conv.meta_data:
-                                del conv.meta_data["interrupted_graph_id"]
-                                await session.commit()
-                                log.debug(f"Cleared interrupt marker from conversation | thread_id={thread_id}")
-                except asyncio.CancelledError:
-                    log.debug(f"Clear interrupt marker cancelled for thread {thread_id} (connection closing)")
-                except Exception as e:
-                    log.warning(
-                        f"Failed to clear interrupt marker for conversation | thread_id={thread_id} | error={e}"
-                    )
-
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    # 注册任务（支持停止）并提交执行
+    return await _start_stream_run(thread_id, event_generator(), user_id=str(current_user.id))
 
 
 @router.post("/resume", response_class=StreamingResponse)
@@ -1045,24 +1121,35 @@ async def chat_resume(
 
     log.info(f"Command constructed | thread_id={thread_id} | has_update={bool(command_update)} | goto={command_goto}")
 
-    # 6. 注册任务以支持取消
-    current_task = asyncio.current_task()
-    if current_task:
-        await task_manager.register_task(thread_id, current_task)
-
-    async def event_generator() -> AsyncGenerator[str, None]:
-        state = StreamState(thread_id)
-        handler = StreamEventHandler()
+    async def event_generator() -> AsyncGenerator[bytes, None]:
+        state = StreamState(thread_id, model_input_delta=settings.sse_model_input_delta)
+        handler = _create_stream_handler()
+        trace_writer = _start_trace_writer(
+            state,
+            graph_id=str(graph_id) if graph_id else None,
+            workspace_id=graph_workspace_id,
+            user_id=str(current_user.id),
+            graph_name=graph_display_name,
+        )
 
         # 发送恢复状态
         yield handler.format_sse("status", {"status": "resumed", "_meta": {"node_name": "system"}}, thread_id)
 
         try:
             # 4. 使用 Command 继续执行
-            async for event in graph.astream_events(command, config=config, version="v2"):
+            async for event in _iter_with_flush_ticks(
+                graph.astream_events(command, config=config, version="v2"),
+                handler.content_flush_timeout,
+            ):
+                # 合并中的 content 到达时间预算
+                if event is None:
+                    if sse := handler.flush_content(state):
+                        yield sse
+                    continue
+
                 # log.info(f"Event received | thread_id={thread_id} | event={event}")
                 # A. 停止检测
-                if await task_manager.is_stopped(thread_id):
+                if task_manager.is_stop_requested(thread_id):
                     state.stopped = True
                     log.info(f"Task stopped by user: {thread_id}")
                     break
@@ -1074,6 +1161,7 @@ async def chat_resume(
                 else:
                     # Convert event to dict if needed
                     event_dict = {"event": str(type(event).__name__), "data": event} if event else {}
+                state.observe_graph_event(event_dict)
                 event_type = event_dict.get("event")
                 event_name = event_dict.get("name", "")
                 metadata = event_dict.get("metadata", {}) if isinstance(event_dict.get("metadata"), dict) else {}
@@ -1091,6 +1179,10 @@ async def chat_resume(
                 # 提取 run_id / parent_run_id（LangGraph v2）
                 run_id, parent_run_id = _extract_run_ids(event_dict)
 
+                # 事件类型变化：先发送合并中的 content
+                if event_type != "on_chat_model_stream" and (sse := handler.flush_content(state)):
+                    yield sse
+
                 if event_type == "on_chat_model_start":
                     yield await handler.handle_chat_model_start(event_dict, state, run_id, parent_run_id)
 
@@ -1110,16 +1202,14 @@ async def chat_resume(
                 elif event_type == "on_chain_start" and is_node_event:
                     yield await handler.handle_node_start(event_dict, state, run_id, parent_run_id)
 
+                elif event_type == "on_custom_event":
+                    handler.handle_custom_event(event_dict, state, run_id)
+
                 elif event_type == "on_chain_end":
                     if is_node_event:
-                        result = await handler.handle_node_end(event_dict, state, run_id, parent_run_id)
-                        # handle_node_end 返回 list[str]
-                        if isinstance(result, list):
-                            for event_str in result:
-                                if event_str and event_str.strip():
-                                    yield event_str.strip() + "\n\n"
-                        elif isinstance(result, str) and result.strip():
-                            yield result
+                        # handle_node_end 返回 list[bytes]（每个元素都是完整的 SSE 帧）
+                        for sse_frame in await handler.handle_node_end(event_dict, state, run_id, parent_run_id):
+                            yield sse_frame
 
                     data_raw: Any = event_dict.get("data", {})
                     data: Dict[str, Any] = data_raw if isinstance(data_raw, dict) else {}  # type: ignore[assignment]
@@ -1127,49 +1217,16 @@ async def chat_resume(
                     if output and isinstance(output, dict) and "messages" in output:
                         state.all_messages = output["messages"]
 
-            # 5. 检查是否有新的中断
-            interrupted = False
-            try:
-                snap = await safe_get_state(graph, config, max_retries=3, initial_delay=0.1, log=log)
-                if snap.tasks:
-                    next_node = snap.tasks[0].target if snap.tasks else None
-                    current_state = snap.values or {}
-
-                    node_info = {}
-                    if next_node:
-                        node_info["node_name"] = next_node
-                        node_info["node_label"] = next_node.replace("_", " ").title()
-
-                    interrupt_data = {
-                        "node_name": node_info.get("node_name", "unknown"),
-                        "node_label": node_info.get("node_label", "Unknown Node"),
-                        "state": current_state,
-                        "thread_id": thread_id,
-                    }
-
-                    log.info(f"Graph interrupted again at node '{next_node}' | thread_id={thread_id}")
-                    yield handler.format_sse("interrupt", interrupt_data, thread_id)
-
-                    state.interrupted = True
-                    state.interrupt_node = next_node
-                    state.interrupt_state = current_state
-                    interrupted = True
+            if sse := handler.flush_content(state):
+                yield sse
 
-            except Exception as e:
-                # 如果查询失败（可能是连接冲突），记录警告但不影响流程
-                # 中断状态会在 resume 时重新检查
-                log.warning(f"Failed to check interrupt state (may be due to connection conflict): {e}")
-
-            # 6. 获取最终状态
-            if not state.all_messages and not state.stopped and not interrupted:
-                try:
-                    snap = await safe_get_state(graph, config, max_retries=2, initial_delay=0.05, log=log)
-                    if snap.values and "messages" in snap.values:
-                        state.all_messages = snap.values["messages"]
-                except Exception as e:
-                    log.warning(f"Failed to fetch final state: {e}")
+            # 5. 确定运行结果（中断 / 完成），最终状态来自事件流
+            interrupted = await resolve_run_outcome(graph, config, state, log)
+            if interrupted:
+                log.info(f"Graph interrupted again at node '{state.interrupt_node}' | thread_id={thread_id}")
+                yield handler.format_sse("interrupt", _interrupt_payload(state, thread_id), thread_id)
 
-            # 7. 发送结束信号
+            # 6. 发送结束信号
             if interrupted:
                 pass  # 等待下一次恢复
             elif state.stopped:
@@ -1179,20 +1236,10 @@ async def chat_resume(
                     thread_id,
                 )
             else:
-                # 执行完成，清理 conversation 中的中断标记
-                async with AsyncSessionLocal() as session:
-                    result_query = await session.execute(
-                        select(Conversation).where(Conversation.thread_id == thread_id)
-                    )
-                    if conv := result_query.scalar_one_or_none():
-                        if conv.meta_data and "interrupted_graph_id" in conv.meta_data:
-                            del conv.meta_data["interrupted_graph_id"]
-                            await session.commit()
-                            log.debug(f"Cleared interrupt marker from conversation | thread_id={thread_id}")
                 yield handler.format_sse("done", {"_meta": {"node_name": "system"}}, thread_id)
 
         except asyncio.CancelledError:
-            log.warning(f"Client disconnected: {thread_id}")
+            log.warning(f"Run cancelled or client disconnected: {thread_id}")
             state.stopped = True
         except Exception as e:
             if GraphBubbleUp is not None and type(e) is GraphBubbleUp:
@@ -1211,6 +1258,8 @@ async def chat_resume(
                 workspace_id=graph_workspace_id,
                 user_id=str(current_user.id),
                 graph_name=graph_display_name,
+                trace_writer=trace_writer,
+                interrupted_graph_id=str(graph_id) if graph_id else None,
             )
             # Cleanup shared backend if exists
             if "graph" in locals() and hasattr(graph, "_cleanup_backend"):
@@ -1218,16 +1267,8 @@ async def chat_resume(
                     await graph._cleanup_backend()
                 except Exception as e:
                     log.warning(f"[Chat API Resume] Failed to cleanup backend: {e}")
-            # 如果执行完成（非中断），清理 conversation 中的中断标记
-            if not state.interrupted:
-                async with AsyncSessionLocal() as session:
-                    result_query = await session.execute(
-                        select(Conversation).where(Conversation.thread_id == thread_id)
-                    )
-                    if conv := result_query.scalar_one_or_none():
-                        if conv.meta_data and "interrupted_graph_id" in conv.meta_data:
-                            del conv.meta_data["interrupted_graph_id"]
-                            await session.commit()
-                            log.debug(f"Cleared interrupt marker from conversation | thread_id={thread_id}")
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+    # 注册任务（支持停止）并提交执行；恢复中断的运行优先调度
+    return await _start_stream_run(
+        thread_id, event_generator(), user_id=str(current_user.id), priority=RunPriority.HIGH
+    )
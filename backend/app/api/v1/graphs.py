@@ -20,6 +20,8 @@ from app.core.copilot import (
     CopilotResponse,
 )
 from app.core.database import get_db
+from app.core.graph.graph_cache import compiled_graph_cache
+from app.core.graph.node_cache import node_cache
 from app.core.redis import RedisClient
 from app.core.settings import settings
 from app.models.auth import AuthUser as User
@@ -28,6 +30,7 @@ from app.models.workspace import WorkspaceMemberRole
 from app.repositories.workspace import WorkspaceRepository
 from app.services.copilot_service import CopilotService
 from app.services.graph_service import GraphService
+from app.utils.run_scheduler import RunPriority, RunTicket, run_scheduler
 
 router = APIRouter(prefix="/v1/graphs", tags=["Graphs"])
 
@@ -443,9 +446,31 @@ async def delete_graph(
 
     await service.graph_repo.delete(graph_id)
     await db.commit()
+    compiled_graph_cache.invalidate(graph_id)
     return {"success": True}
 
 
+@router.delete("/{graph_id}/node-cache")
+async def invalidate_node_cache(
+    graph_id: uuid.UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """清除图中所有节点的结果缓存（memoize 节点，需要 member 权限）"""
+    log = _bind_log(request, user_id=str(current_user.id), graph_id=str(graph_id))
+    service = GraphService(db)
+    graph = await service.graph_repo.get(graph_id)
+    if not graph:
+        raise NotFoundException("Graph not found")
+    await service._ensure_access(graph, current_user, required_role=WorkspaceMemberRole.member)
+
+    nodes = await service.node_repo.list_by_graph(graph_id)
+    await node_cache.invalidate(str(node.id) for node in nodes)
+    log.info(f"Invalidated node result cache | nodes={len(nodes)}")
+    return {"success": True, "data": {"invalidated_nodes": len(nodes)}}
+
+
 @router.get("/{graph_id}/state")
 async def load_graph_state(
     graph_id: uuid.UUID,
@@ -725,6 +750,31 @@ async def generate_graph_actions(
     return response
 
 
+async def _run_copilot_when_admitted(
+    ticket: RunTicket,
+    service: CopilotService,
+    *,
+    session_id: str,
+    **kwargs: Any,
+) -> None:
+    """Wait for a run slot (publishing queue position), run the Copilot generation, then release the slot."""
+    try:
+        async for position in run_scheduler.wait(ticket):
+            if position:
+                await RedisClient.publish_copilot_event(
+                    session_id,
+                    {
+                        "type": "status",
+                        "stage": "queued",
+                        "position": position,
+                        "message": f"排队中（第 {position} 位）",
+                    },
+                )
+        await service.generate_actions_async(session_id=session_id, **kwargs)
+    finally:
+        run_scheduler.release(ticket)
+
+
 @router.post("/copilot/actions/create")
 async def create_copilot_task(
     request: Request,
@@ -770,10 +820,13 @@ async def create_copilot_task(
     # Initialize session in Redis
     await RedisClient.set_copilot_status(session_id, "generating")
 
-    # Start background task
+    # Submit to the run scheduler (429 when the queue is full), then start the background task
+    ticket = run_scheduler.submit(str(current_user.id), RunPriority.NORMAL, kind="copilot")
     service = CopilotService(user_id=str(current_user.id), db=db)
     background_tasks.add_task(
-        service.generate_actions_async,
+        _run_copilot_when_admitted,
+        ticket,
+        service,
         session_id=session_id,
         graph_id=payload.graph_id,
         prompt=payload.prompt,
@@ -358,8 +358,8 @@ async def update_memory(
     operation_id="optimize_memories",
     summary="Optimize User Memories",
     description=(
-        "Optimize user memories using the default summarize strategy. "
-        "This operation combines all memories into a single comprehensive summary."
+        "Optimize user memories. The default summarize strategy combines all memories into a single "
+        "comprehensive summary; the hierarchical strategy summarizes each topic cluster within a token budget."
     ),
 )
 async def optimize_memories(
@@ -367,10 +367,12 @@ async def optimize_memories(
     db_session: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> OptimizeMemoriesResponse:
-    """Optimize user memories using the default summarize strategy."""
+    """Optimize user memories using the requested strategy (summarize by default)."""
     from app.core.agent.memory.manager import MemoryManager
-    from app.core.agent.memory.strategies.summarize import SummarizeStrategy
-    from app.core.agent.memory.strategies.types import MemoryOptimizationStrategyType
+    from app.core.agent.memory.strategies.types import (
+        MemoryOptimizationStrategyFactory,
+        MemoryOptimizationStrategyType,
+    )
 
     try:
         # Create memory manager with MemoryService
@@ -384,14 +386,14 @@ async def optimize_memories(
             raise HTTPException(status_code=404, detail=f"No memories found for user {user_id}")
 
         # Count tokens before optimization
-        strategy = SummarizeStrategy()
+        strategy = MemoryOptimizationStrategyFactory.create_strategy(MemoryOptimizationStrategyType(request.strategy))
         tokens_before = strategy.count_tokens(memories_before)
         memories_before_count = len(memories_before)
 
-        # Optimize memories with default SUMMARIZE strategy
+        # Optimize memories with the requested strategy
         optimized_memories = await memory_manager.aoptimize_memories(
             user_id=user_id,
-            strategy=MemoryOptimizationStrategyType.SUMMARIZE,
+            strategy=strategy,
             apply=request.apply,
         )
 
@@ -429,6 +431,7 @@ async def optimize_memories(
             tokens_after=tokens_after,
             tokens_saved=tokens_saved,
             reduction_percentage=reduction_percentage,
+            compression_ratio=tokens_after / tokens_before if tokens_before > 0 else 1.0,
         )
 
     except HTTPException:
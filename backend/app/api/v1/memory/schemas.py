@@ -1,5 +1,5 @@
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -77,6 +77,10 @@ class OptimizeMemoriesRequest(BaseModel):
         default=True,
         description="If True, apply optimization changes to database. If False, return preview only without saving.",
     )
+    strategy: Literal["summarize", "hierarchical"] = Field(
+        default="summarize",
+        description="Optimization strategy. 'summarize' merges all memories into one summary; 'hierarchical' summarizes each topic cluster separately within a token budget.",
+    )
 
 
 class OptimizeMemoriesResponse(BaseModel):
@@ -89,3 +93,6 @@ class OptimizeMemoriesResponse(BaseModel):
     tokens_after: int = Field(..., description="Token count after optimization", ge=0)
     tokens_saved: int = Field(..., description="Number of tokens saved through optimization", ge=0)
     reduction_percentage: float = Field(..., description="Percentage of token reduction achieved", ge=0.0, le=100.0)
+    compression_ratio: float = Field(
+        1.0, description="tokens_after / tokens_before (lower means stronger compression)", ge=0.0
+    )
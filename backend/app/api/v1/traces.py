@@ -156,6 +156,49 @@ def _obs_to_schema(obs) -> ObservationSchema:
     )
 
 
+def _expand_model_inputs(observations) -> list[ObservationSchema]:
+    """
+    转换 Observations，并还原增量模式（SSE_MODEL_INPUT_DELTA）存储的模型输入。
+
+    增量模式下 GENERATION 的 input 只保存新增消息及 prefix_observation_id / prefix_length，
+    这里按引用链拼回完整的 messages 列表（引用的 observation 总在同一 Trace 内）。
+    """
+    schemas = [_obs_to_schema(o) for o in observations]
+    by_id = {schema.id: schema for schema in schemas}
+    expanded: dict[str, list] = {}
+
+    def full_messages(schema: ObservationSchema, seen: set[str]) -> Optional[list]:
+        if schema.id in expanded:
+            return expanded[schema.id]
+        payload = schema.input
+        if not isinstance(payload, dict) or not isinstance(payload.get("messages"), list):
+            return None
+        messages = payload["messages"]
+        prefix_id = payload.get("prefix_observation_id")
+        if prefix_id:
+            prefix = by_id.get(str(prefix_id))
+            prefix_messages = (
+                full_messages(prefix, seen | {schema.id}) if prefix is not None and prefix.id not in seen else None
+            )
+            if prefix_messages is None:
+                return None  # 引用缺失：保留增量形式
+            messages = prefix_messages[: int(payload.get("prefix_length") or 0)] + messages
+        expanded[schema.id] = messages
+        return messages
+
+    for schema in schemas:
+        payload = schema.input
+        if isinstance(payload, dict) and payload.get("prefix_observation_id"):
+            messages = full_messages(schema, set())
+            if messages is not None:
+                schema.input = {
+                    key: value
+                    for key, value in payload.items()
+                    if key not in ("prefix_observation_id", "prefix_length")
+                } | {"messages": messages}
+    return schemas
+
+
 # ==================== Endpoints ====================
 
 
@@ -223,7 +266,7 @@ async def get_trace_detail(
         msg="ok",
         data={
             "trace": _trace_to_schema(trace).model_dump(mode="json"),
-            "observations": [_obs_to_schema(o).model_dump(mode="json") for o in observations],
+            "observations": [o.model_dump(mode="json") for o in _expand_model_inputs(observations)],
         },
     )
 
@@ -248,6 +291,6 @@ async def get_trace_observations(
         code=200,
         msg="ok",
         data={
-            "observations": [_obs_to_schema(o).model_dump(mode="json") for o in observations],
+            "observations": [o.model_dump(mode="json") for o in _expand_model_inputs(observations)],
         },
     )
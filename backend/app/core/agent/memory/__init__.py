@@ -9,6 +9,7 @@ from app.schemas.memory import UserMemory
 
 from .manager import MemoryManager
 from .strategies import (
+    HierarchicalSummarizeStrategy,
     MemoryOptimizationStrategy,
     MemoryOptimizationStrategyFactory,
     MemoryOptimizationStrategyType,
@@ -22,4 +23,5 @@ __all__ = [
     "MemoryOptimizationStrategyType",
     "MemoryOptimizationStrategyFactory",
     "SummarizeStrategy",
+    "HierarchicalSummarizeStrategy",
 ]
@@ -0,0 +1,191 @@
+"""
+记忆抽取队列
+
+记忆写入（acreate_user_memories → acreate_or_update_memories）需要一轮额外的 LLM + 工具调用，
+放在模型调用链路中会直接拖慢用户可见的响应。本队列把写入移到后台：
+
+- 模型响应返回后入队，立即返回，不等待抽取
+- 防抖合并：同一 (MemoryManager, user_id, thread_id) 在窗口内的连续轮次合并为一次抽取
+  （工具循环中重复出现的同一条用户输入只保留一次）；持续对话最迟在 max_wait 后抽取
+- 到期的抽取（可来自多个用户）在有并发上限的协程池中执行
+- 抽取失败只记日志，不影响对话
+
+按进程计算（每个 worker 独立），与 RunScheduler 一样为模块级单例。
+"""
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, List, Optional, Set, Tuple
+
+from langchain_core.messages.chat import ChatMessage as Message
+from loguru import logger
+
+from app.core.settings import settings
+
+if TYPE_CHECKING:
+    from app.core.agent.memory.manager import MemoryManager
+
+LOG_PREFIX = "[MemoryExtractionQueue]"
+
+PendingKey = Tuple[int, str, str]
+
+
+@dataclass(eq=False)
+class PendingExtraction:
+    """一次待执行的（合并后的）记忆抽取"""
+
+    manager: "MemoryManager"
+    user_id: str
+    thread_id: str
+    first_enqueued_at: float
+    due_at: float
+    messages: List[str] = field(default_factory=list)
+
+
+class MemoryExtractionQueue:
+    """防抖合并 + 并发上限的后台记忆抽取队列"""
+
+    def __init__(
+        self,
+        debounce_seconds: float = 5.0,
+        max_wait_seconds: float = 30.0,
+        max_concurrency: int = 4,
+        max_pending: int = 1024,
+        max_messages: int = 20,
+    ):
+        self.debounce_seconds = debounce_seconds
+        self.max_wait_seconds = max(max_wait_seconds, debounce_seconds)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_pending = max(1, max_pending)
+        self.max_messages = max(1, max_messages)
+        self._pending: "OrderedDict[PendingKey, PendingExtraction]" = OrderedDict()
+        self._running: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    # ==================== Enqueue ====================
+
+    def enqueue(
+        self,
+        manager: "MemoryManager",
+        user_id: str,
+        message: str,
+        thread_id: Optional[str] = None,
+    ) -> None:
+        """登记一轮对话的抽取（需在事件循环中调用；不阻塞）"""
+        loop = self._ensure_started()
+        now = loop.time()
+        key: PendingKey = (id(manager), user_id, thread_id or "")
+
+        pending = self._pending.get(key)
+        if pending is None:
+            if len(self._pending) >= self.max_pending:
+                # 队列已满：最早登记的抽取立即执行，而不是丢弃
+                _, oldest = self._pending.popitem(last=False)
+                self._launch(oldest)
+            pending = PendingExtraction(
+                manager=manager,
+                user_id=user_id,
+                thread_id=thread_id or "",
+                first_enqueued_at=now,
+                due_at=now,
+            )
+            self._pending[key] = pending
+
+        if not pending.messages or pending.messages[-1] != message:
+            pending.messages.append(message)
+            del pending.messages[: -self.max_messages]
+        pending.due_at = min(now + self.debounce_seconds, pending.first_enqueued_at + self.max_wait_seconds)
+        self._wakeup.set()  # type: ignore[union-attr]
+
+    # ==================== Dispatch ====================
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._dispatcher is None or self._dispatcher.done():
+            if self._loop is not None and self._loop is not loop and self._pending:
+                logger.warning(f"{LOG_PREFIX} Event loop changed, dropping {len(self._pending)} pending extractions")
+                self._pending.clear()
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._dispatcher = loop.create_task(self._dispatch_loop())
+        return loop
+
+    async def _dispatch_loop(self) -> None:
+        assert self._wakeup is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            self._wakeup.clear()
+            now = loop.time()
+            for key in [k for k, p in self._pending.items() if p.due_at <= now]:
+                self._launch(self._pending.pop(key))
+
+            timeout = min(p.due_at for p in self._pending.values()) - now if self._pending else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _launch(self, pending: PendingExtraction) -> None:
+        task = asyncio.get_running_loop().create_task(self._extract(pending))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _extract(self, pending: PendingExtraction) -> None:
+        assert self._semaphore is not None
+        async with self._semaphore:
+            try:
+                await pending.manager.acreate_user_memories(
+                    messages=[Message(role="user", content=message) for message in pending.messages],
+                    user_id=pending.user_id,
+                )
+                logger.debug(
+                    f"{LOG_PREFIX} Extracted memories | user_id={pending.user_id} | "
+                    f"thread_id={pending.thread_id} | turns={len(pending.messages)}"
+                )
+            except Exception as e:
+                logger.warning(
+                    f"{LOG_PREFIX} Memory extraction failed | user_id={pending.user_id} | "
+                    f"thread_id={pending.thread_id} | error={type(e).__name__}: {e}"
+                )
+
+    # ==================== Lifecycle ====================
+
+    async def flush(self) -> None:
+        """立即执行所有待抽取项并等待完成（关闭前调用；也便于测试）"""
+        if self._loop is asyncio.get_running_loop():
+            while self._pending:
+                _, pending = self._pending.popitem(last=False)
+                self._launch(pending)
+        if self._running:
+            await asyncio.gather(*list(self._running), return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._dispatcher is not None and not self._dispatcher.done():
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except (asyncio.CancelledError, RuntimeError):
+                pass
+        self._dispatcher = None
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+
+memory_extraction_queue = MemoryExtractionQueue(
+    debounce_seconds=settings.memory_extraction_debounce_seconds,
+    max_wait_seconds=settings.memory_extraction_max_wait_seconds,
+    max_concurrency=settings.memory_extraction_max_concurrency,
+    max_pending=settings.memory_extraction_max_pending,
+)
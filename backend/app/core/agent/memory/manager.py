@@ -8,6 +8,7 @@ from langchain_openai import ChatOpenAI
 from loguru import logger
 from pydantic import BaseModel, Field
 
+from app.core.agent.memory.semantic_index import memory_index
 from app.core.agent.memory.strategies import (
     MemoryOptimizationStrategy,
     MemoryOptimizationStrategyFactory,
@@ -24,6 +25,9 @@ from app.utils.datetime import utc_now
 from app.utils.prompts import get_json_output_prompt
 from app.utils.string import parse_response_model_str
 
+# Top-k used by semantic search when no limit is given
+SEMANTIC_SEARCH_DEFAULT_LIMIT = 10
+
 
 class MemorySearchResponse(BaseModel):
     """Model for Memory Search Response."""
@@ -742,19 +746,22 @@ class MemoryManager:
         self,
         query: Optional[str] = None,
         limit: Optional[int] = None,
-        retrieval_method: Optional[Literal["last_n", "first_n", "agentic"]] = None,
+        retrieval_method: Optional[Literal["last_n", "first_n", "agentic", "semantic"]] = None,
         user_id: Optional[str] = None,
+        rerank: bool = False,
     ) -> List[UserMemory]:
         """Search through user memories using the specified retrieval method.
 
         Args:
-            query: The search query for agentic search. Required if retrieval_method is "agentic".
+            query: The search query. Required if retrieval_method is "agentic" or "semantic".
             limit: Maximum number of memories to return. Defaults to self.retrieval_limit if not specified. Optional.
             retrieval_method: The method to use for retrieving memories. Defaults to self.retrieval if not specified.
                 - "last_n": Return the most recent memories
                 - "first_n": Return the oldest memories
                 - "agentic": Return memories most similar to the query, but using an agentic approach
+                - "semantic": Return the top memories from the local BM25 index, without a model call
             user_id: The user to search for. Optional.
+            rerank: With "semantic", let the model reorder/filter the retrieved top memories only.
 
         Returns:
             A list of UserMemory objects matching the search criteria.
@@ -765,19 +772,13 @@ class MemoryManager:
 
         self.set_log_level()
 
-        memories = self.read_from_db(user_id=user_id)
-        if memories is None:
-            memories = {}
-
-        if not memories:
-            return []
-
-        # Use default retrieval method if not specified
-        retrieval_method = retrieval_method
-        # Use default limit if not specified
-        limit = limit
+        if retrieval_method == "semantic":
+            if not query:
+                raise ValueError("Query is required for semantic search")
+            # 索引已加载时无需全量读取用户记忆
+            return self._search_user_memories_semantic(user_id=user_id, query=query, limit=limit, rerank=rerank)
 
-        # Handle different retrieval methods
+        # Handle different retrieval methods (each reads the user's memories once, via the MemoryService read cache)
         if retrieval_method == "agentic":
             if not query:
                 raise ValueError("Query is required for agentic search")
@@ -809,14 +810,19 @@ class MemoryManager:
         if not memories:
             return []
 
-        model = self.get_model()
-
-        response_format = self._get_response_format()
-
         logger.debug("Searching for memories", center=True)
 
         # Get all memories as a list
         user_memories: List[UserMemory] = memories[user_id]
+        memory_search = self._invoke_memory_search(user_memories, query)
+        if memory_search is None:
+            return []
+        return self._select_searched_memories(memory_search, user_memories, limit)
+
+    def _build_memory_search_messages(self, user_memories: List[UserMemory], query: str) -> List[Message]:
+        """Prompt asking the model for the IDs of the given memories related to the query."""
+        response_format = self._get_response_format()
+
         system_message_str = "Your task is to search through user memories and return the IDs of the memories that are related to the query.\n"
         system_message_str += "\n<user_memories>\n"
         for memory in user_memories:
@@ -833,7 +839,7 @@ class MemoryManager:
             # MemorySearchResponse is a class, not a type, so pass it directly
             system_message_str += "\n" + get_json_output_prompt(MemorySearchResponse)  # type: ignore[arg-type]  # type: ignore
 
-        messages_for_model = [
+        return [
             Message(role="system", content=system_message_str),
             Message(
                 role="user",
@@ -841,6 +847,11 @@ class MemoryManager:
             ),
         ]
 
+    def _invoke_memory_search(self, user_memories: List[UserMemory], query: str) -> Optional[MemorySearchResponse]:
+        """Ask the model which of the given memories relate to the query (None on failure)."""
+        model = self.get_model()
+        messages_for_model = self._build_memory_search_messages(user_memories, query)
+
         # Generate a response from the Model using LangChain API
         # Use with_structured_output for structured responses
         memory_search: Optional[MemorySearchResponse] = None
@@ -863,20 +874,42 @@ class MemoryManager:
                     memory_search = None
             except Exception as e:
                 logger.warning(f"Failed to search memories: {e}")
-                return []
+                return None
 
         if memory_search is None:
             logger.warning("Failed to convert memory_search response to MemorySearchResponse")
-            return []
+        return memory_search
 
-        memories_to_return = []
-        if memory_search:
-            for memory_id in memory_search.memory_ids:
-                for memory in user_memories:
-                    if memory.memory_id == memory_id:
-                        memories_to_return.append(memory)
+    @staticmethod
+    def _select_searched_memories(
+        memory_search: MemorySearchResponse, user_memories: List[UserMemory], limit: Optional[int] = None
+    ) -> List[UserMemory]:
+        """Memories in the order of the model's returned IDs."""
+        memories_by_id = {memory.memory_id: memory for memory in user_memories}
+        memories_to_return = [
+            memories_by_id[memory_id] for memory_id in memory_search.memory_ids if memory_id in memories_by_id
+        ]
         return memories_to_return[:limit]
 
+    def _search_user_memories_semantic(
+        self, user_id: str, query: str, limit: Optional[int] = None, rerank: bool = False
+    ) -> List[UserMemory]:
+        """Search through user memories with the local BM25 index; the model only sees the top-k when reranking."""
+        top_k = limit if limit is not None and limit > 0 else SEMANTIC_SEARCH_DEFAULT_LIMIT
+        candidates = memory_index.search(user_id, query, top_k)
+        if candidates is None:
+            memories = self.read_from_db(user_id=user_id)
+            if memories is None:
+                return []
+            memory_index.load(user_id, memories.get(user_id, []))
+            candidates = memory_index.search(user_id, query, top_k) or []
+
+        if rerank and len(candidates) > 1:
+            memory_search = self._invoke_memory_search(candidates, query)
+            if memory_search is not None:
+                return self._select_searched_memories(memory_search, candidates, top_k)
+        return candidates
+
     def _get_last_n_memories(self, user_id: str, limit: Optional[int] = None) -> List[UserMemory]:
         """Get the most recent user memories.
 
@@ -884,29 +917,10 @@ class MemoryManager:
             limit: Maximum number of memories to return.
 
         Returns:
-            A list of the most recent UserMemory objects.
+            A list of the most recent UserMemory objects (oldest first).
         """
-        memories = self.read_from_db(user_id=user_id)
-        if memories is None:
-            memories = {}
-
-        memories_list = memories.get(user_id, [])
-
-        # Sort memories by updated_at timestamp if available
-        if memories_list:
-            # Sort memories by updated_at timestamp (newest first)
-            # If updated_at is None, place at the beginning of the list
-            sorted_memories_list = sorted(
-                memories_list,
-                key=lambda m: m.updated_at if m.updated_at is not None else 0,
-            )
-        else:
-            sorted_memories_list = []
-
-        if limit is not None and limit > 0:
-            sorted_memories_list = sorted_memories_list[-limit:]
-
-        return sorted_memories_list
+        # Newest first from the database, then flipped back to chronological order
+        return list(reversed(self._get_ordered_memories(user_id=user_id, limit=limit, sort_order="desc")))
 
     def _get_first_n_memories(self, user_id: str, limit: Optional[int] = None) -> List[UserMemory]:
         """Get the oldest user memories.
@@ -917,47 +931,38 @@ class MemoryManager:
         Returns:
             A list of the oldest UserMemory objects.
         """
-        memories = self.read_from_db(user_id=user_id)
-        if memories is None:
-            memories = {}
-
-        MAX_UNIX_TS = 2**63 - 1
-        memories_list = memories.get(user_id, [])
-        # Sort memories by updated_at timestamp if available
-        if memories_list:
-            # Sort memories by updated_at timestamp (oldest first)
-            # If updated_at is None, place at the end of the list
-            sorted_memories_list = sorted(
-                memories_list,
-                key=lambda m: m.updated_at if m.updated_at is not None else MAX_UNIX_TS,
-            )
+        return self._get_ordered_memories(user_id=user_id, limit=limit, sort_order="asc")
 
-        else:
-            sorted_memories_list = []
-
-        if limit is not None and limit > 0:
-            sorted_memories_list = sorted_memories_list[:limit]
-
-        return sorted_memories_list
+    def _get_ordered_memories(self, user_id: str, limit: Optional[int], sort_order: str) -> List[UserMemory]:
+        """Read a user's memories ordered by updated_at, with ordering and limit pushed down to SQL."""
+        if not self.db:
+            return []
+        memories_list = self.db.get_user_memories(  # type: ignore[call-overload]
+            user_id=user_id, limit=limit if limit and limit > 0 else None, sort_by="updated_at", sort_order=sort_order
+        )
+        return list(memories_list or [])
 
     # -*- Async Utility Functions for search_user_memories
     async def asearch_user_memories(
         self,
         query: Optional[str] = None,
         limit: Optional[int] = None,
-        retrieval_method: Optional[Literal["last_n", "first_n", "agentic"]] = None,
+        retrieval_method: Optional[Literal["last_n", "first_n", "agentic", "semantic"]] = None,
         user_id: Optional[str] = None,
+        rerank: bool = False,
     ) -> List[UserMemory]:
         """Async version: Search through user memories using the specified retrieval method.
 
         Args:
-            query: The search query for agentic search. Required if retrieval_method is "agentic".
+            query: The search query. Required if retrieval_method is "agentic" or "semantic".
             limit: Maximum number of memories to return. Defaults to self.retrieval_limit if not specified. Optional.
             retrieval_method: The method to use for retrieving memories. Defaults to self.retrieval if not specified.
                 - "last_n": Return the most recent memories
                 - "first_n": Return the oldest memories
                 - "agentic": Return memories most similar to the query, but using an agentic approach
+                - "semantic": Return the top memories from the local BM25 index, without a model call
             user_id: The user to search for. Optional.
+            rerank: With "semantic", let the model reorder/filter the retrieved top memories only.
 
         Returns:
             A list of UserMemory objects matching the search criteria.
@@ -967,14 +972,13 @@ class MemoryManager:
 
         self.set_log_level()
 
-        memories = await self.aread_from_db(user_id=user_id)
-        if memories is None:
-            memories = {}
-
-        if not memories:
-            return []
+        if retrieval_method == "semantic":
+            if not query:
+                raise ValueError("Query is required for semantic search")
+            # 索引已加载时无需全量读取用户记忆
+            return await self._asearch_user_memories_semantic(user_id=user_id, query=query, limit=limit, rerank=rerank)
 
-        # Handle different retrieval methods
+        # Handle different retrieval methods (each reads the user's memories once, via the MemoryService read cache)
         if retrieval_method == "agentic":
             if not query:
                 raise ValueError("Query is required for agentic search")
@@ -989,46 +993,28 @@ class MemoryManager:
 
     async def _aget_last_n_memories(self, user_id: str, limit: Optional[int] = None) -> List[UserMemory]:
         """Async version: Get the most recent user memories."""
-        memories = await self.aread_from_db(user_id=user_id)
-        if memories is None:
-            memories = {}
-
-        memories_list = memories.get(user_id, [])
-
-        if memories_list:
-            sorted_memories_list = sorted(
-                memories_list,
-                key=lambda m: m.updated_at if m.updated_at is not None else 0,
-            )
-        else:
-            sorted_memories_list = []
-
-        if limit is not None and limit > 0:
-            sorted_memories_list = sorted_memories_list[-limit:]
-
-        return sorted_memories_list
+        memories_list = await self._aget_ordered_memories(user_id=user_id, limit=limit, sort_order="desc")
+        return list(reversed(memories_list))
 
     async def _aget_first_n_memories(self, user_id: str, limit: Optional[int] = None) -> List[UserMemory]:
         """Async version: Get the oldest user memories."""
-        memories = await self.aread_from_db(user_id=user_id)
-        if memories is None:
-            memories = {}
+        return await self._aget_ordered_memories(user_id=user_id, limit=limit, sort_order="asc")
 
-        MAX_UNIX_TS = 2**63 - 1
-        memories_list = memories.get(user_id, [])
-
-        if memories_list:
-            sorted_memories_list = sorted(
-                memories_list,
-                key=lambda m: m.updated_at if m.updated_at is not None else MAX_UNIX_TS,
-            )
+    async def _aget_ordered_memories(self, user_id: str, limit: Optional[int], sort_order: str) -> List[UserMemory]:
+        """Read a user's memories ordered by updated_at, with ordering and limit pushed down to SQL."""
+        if not self.db:
+            return []
+        kwargs: Dict[str, Any] = {
+            "user_id": user_id,
+            "limit": limit if limit and limit > 0 else None,
+            "sort_by": "updated_at",
+            "sort_order": sort_order,
+        }
+        if isinstance(self.db, MemoryService):
+            memories_list = await self.db.get_user_memories(**kwargs)
         else:
-            sorted_memories_list = []
-
-        if limit is not None and limit > 0:
-            sorted_memories_list = sorted_memories_list[:limit]
-
-        return sorted_memories_list
+            memories_list = self.db.get_user_memories(**kwargs)  # type: ignore[call-overload]
+        return list(memories_list or [])  # type: ignore[arg-type]
 
     async def _asearch_user_memories_agentic(
         self, user_id: str, query: str, limit: Optional[int] = None
@@ -1041,38 +1027,23 @@ class MemoryManager:
         if not memories:
             return []
 
-        model = self.get_model()
-        response_format = self._get_response_format()
-
         logger.debug("Searching for memories (async)", center=True)
 
         user_memories: List[UserMemory] = memories.get(user_id, [])
         if not user_memories:
             return []
 
-        system_message_str = "Your task is to search through user memories and return the IDs of the memories that are related to the query.\n"
-        system_message_str += "\n<user_memories>\n"
-        for memory in user_memories:
-            system_message_str += f"ID: {memory.memory_id}\n"
-            system_message_str += f"Memory: {memory.memory}\n"
-            if memory.topics:
-                system_message_str += f"Topics: {','.join(memory.topics)}\n"
-            system_message_str += "\n"
-        system_message_str = system_message_str.strip()
-        system_message_str += "\n</user_memories>\n\n"
-        system_message_str += "REMEMBER: Only return the IDs of the memories that are related to the query."
-
-        if response_format == {"type": "json_object"}:
-            # MemorySearchResponse is a class, not a type, so pass it directly
-            system_message_str += "\n" + get_json_output_prompt(MemorySearchResponse)  # type: ignore[arg-type]
+        memory_search = await self._ainvoke_memory_search(user_memories, query)
+        if memory_search is None:
+            return []
+        return self._select_searched_memories(memory_search, user_memories, limit)
 
-        messages_for_model = [
-            Message(role="system", content=system_message_str),
-            Message(
-                role="user",
-                content=f"Return the IDs of the memories related to the following query: {query}",
-            ),
-        ]
+    async def _ainvoke_memory_search(
+        self, user_memories: List[UserMemory], query: str
+    ) -> Optional[MemorySearchResponse]:
+        """Async version: Ask the model which of the given memories relate to the query (None on failure)."""
+        model = self.get_model()
+        messages_for_model = self._build_memory_search_messages(user_memories, query)
 
         # Generate a response from the Model using LangChain API
         # Use with_structured_output for structured responses
@@ -1100,19 +1071,30 @@ class MemoryManager:
                     memory_search = None
             except Exception as e:
                 logger.warning(f"Failed to search memories (async): {e}")
-                return []
+                return None
 
         if memory_search is None:
             logger.warning("Failed to convert memory_search response to MemorySearchResponse")
-            return []
+        return memory_search
 
-        memories_to_return = []
-        if memory_search:
-            for memory_id in memory_search.memory_ids:
-                for memory in user_memories:
-                    if memory.memory_id == memory_id:
-                        memories_to_return.append(memory)
-        return memories_to_return[:limit]
+    async def _asearch_user_memories_semantic(
+        self, user_id: str, query: str, limit: Optional[int] = None, rerank: bool = False
+    ) -> List[UserMemory]:
+        """Async version: Search through user memories with the local BM25 index."""
+        top_k = limit if limit is not None and limit > 0 else SEMANTIC_SEARCH_DEFAULT_LIMIT
+        candidates = memory_index.search(user_id, query, top_k)
+        if candidates is None:
+            memories = await self.aread_from_db(user_id=user_id)
+            if memories is None:
+                return []
+            memory_index.load(user_id, memories.get(user_id, []))
+            candidates = memory_index.search(user_id, query, top_k) or []
+
+        if rerank and len(candidates) > 1:
+            memory_search = await self._ainvoke_memory_search(candidates, query)
+            if memory_search is not None:
+                return self._select_searched_memories(memory_search, candidates, top_k)
+        return candidates
 
     def optimize_memories(
         self,
@@ -0,0 +1,191 @@
+"""
+Memory Index - Offline BM25 index over user memories.
+
+``retrieval_method="agentic"`` stuffs every memory of a user into a prompt and
+asks the model to pick IDs: cost and latency grow with the memory count. This
+module keeps a per-user inverted index in-process so ``"semantic"`` retrieval
+returns the top-k memories without any model call (an optional LLM rerank only
+sees those k).
+
+- Scoring is Okapi BM25 over memory text + topics; no embedding model or
+  network access is needed.
+- Tokenizer: lowercase ASCII words, CJK runs as character unigrams + bigrams
+  (Chinese text has no whitespace word boundaries).
+- A user's index is built lazily from the database on first search, then kept
+  current by ``MemoryService`` write paths (upsert / delete / clear).
+- Writes made by other workers are picked up when the index ages out
+  (``memory_index_max_age_seconds``).
+"""
+
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.settings import settings
+from app.schemas.memory import UserMemory
+
+# BM25 parameters (standard defaults)
+_K1 = 1.2
+_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9_]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+
+def _is_cjk(token: str) -> bool:
+    return not token[0].isascii()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into index terms (ASCII words; CJK unigrams and bigrams)."""
+    tokens: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if _is_cjk(token):
+            tokens.extend(token)
+            tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+def memory_text(memory: UserMemory) -> str:
+    text = memory.memory if isinstance(memory.memory, str) else repr(memory.memory)
+    if memory.topics:
+        text = f"{text} {' '.join(memory.topics)}"
+    return text
+
+
+class _UserIndex:
+    """Inverted index over one user's memories."""
+
+    def __init__(self) -> None:
+        self.memories: Dict[str, UserMemory] = {}
+        self.lengths: Dict[str, int] = {}
+        # term -> {memory_id: term frequency}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.total_length = 0
+        self.built_at = time.monotonic()
+
+    def add(self, memory: UserMemory) -> None:
+        memory_id = str(memory.memory_id)
+        self.remove(memory_id)
+        counts = Counter(tokenize(memory_text(memory)))
+        for term, tf in counts.items():
+            self.postings.setdefault(term, {})[memory_id] = tf
+        length = sum(counts.values())
+        self.memories[memory_id] = memory
+        self.lengths[memory_id] = length
+        self.total_length += length
+
+    def remove(self, memory_id: str) -> None:
+        memory = self.memories.pop(memory_id, None)
+        if memory is None:
+            return
+        self.total_length -= self.lengths.pop(memory_id, 0)
+        for term in set(tokenize(memory_text(memory))):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(memory_id, None)
+                if not posting:
+                    del self.postings[term]
+
+    def search(self, query: str, limit: int) -> List[Tuple[float, UserMemory]]:
+        doc_count = len(self.memories)
+        if doc_count == 0:
+            return []
+        avg_length = self.total_length / doc_count or 1.0
+        scores: Dict[str, float] = {}
+        # Only the postings of query terms are visited, not every memory
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+            for memory_id, tf in posting.items():
+                norm = _K1 * (1.0 - _B + _B * self.lengths[memory_id] / avg_length)
+                scores[memory_id] = scores.get(memory_id, 0.0) + idf * tf * (_K1 + 1.0) / (tf + norm)
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self.memories[memory_id]) for memory_id, score in top]
+
+
+class MemoryIndex:
+    """Per-user BM25 indexes with LRU eviction and age-based rebuilds."""
+
+    def __init__(self, max_users: int = 1024, max_age: float = 300.0):
+        self.max_users = max(1, max_users)
+        self.max_age = max_age
+        self._users: "OrderedDict[str, _UserIndex]" = OrderedDict()
+        # The sync MemoryManager tools write from helper threads
+        self._lock = threading.RLock()
+
+    def _get(self, user_id: str) -> Optional[_UserIndex]:
+        index = self._users.get(user_id)
+        if index is None:
+            return None
+        if self.max_age > 0 and time.monotonic() - index.built_at > self.max_age:
+            del self._users[user_id]
+            return None
+        self._users.move_to_end(user_id)
+        return index
+
+    def is_loaded(self, user_id: str) -> bool:
+        with self._lock:
+            return self._get(user_id) is not None
+
+    def load(self, user_id: str, memories: Iterable[UserMemory]) -> None:
+        """(Re)build a user's index from the full list of their memories."""
+        index = _UserIndex()
+        for memory in memories:
+            if memory.memory_id is not None:
+                index.add(memory)
+        with self._lock:
+            self._users[user_id] = index
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def upsert(self, memory: UserMemory) -> None:
+        """Index a written memory; users not loaded yet pick it up on their lazy build."""
+        if memory.user_id is None or memory.memory_id is None:
+            return
+        with self._lock:
+            index = self._get(memory.user_id)
+            if index is not None:
+                index.add(memory)
+
+    def remove(self, user_id: str, memory_ids: Iterable[str]) -> None:
+        with self._lock:
+            index = self._get(user_id)
+            if index is not None:
+                for memory_id in memory_ids:
+                    index.remove(str(memory_id))
+
+    def drop(self, user_id: Optional[str] = None) -> None:
+        """Forget one user's index (or every index when ``user_id`` is None)."""
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+    def search(self, user_id: str, query: str, limit: int) -> Optional[List[UserMemory]]:
+        """Top ``limit`` memories by BM25 score, or None when the user's index is not loaded."""
+        with self._lock:
+            index = self._get(user_id)
+            if index is None:
+                return None
+            return [memory for _, memory in index.search(query, max(1, limit))]
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+
+memory_index = MemoryIndex(
+    max_users=settings.memory_index_max_users,
+    max_age=settings.memory_index_max_age_seconds,
+)
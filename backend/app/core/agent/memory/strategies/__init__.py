@@ -1,6 +1,7 @@
 """Memory optimization strategy implementations."""
 
 from app.core.agent.memory.strategies.base import MemoryOptimizationStrategy
+from app.core.agent.memory.strategies.hierarchical import HierarchicalSummarizeStrategy, OptimizationReport
 from app.core.agent.memory.strategies.summarize import SummarizeStrategy
 from app.core.agent.memory.strategies.types import (
     MemoryOptimizationStrategyFactory,
@@ -8,8 +9,10 @@ from app.core.agent.memory.strategies.types import (
 )
 
 __all__ = [
+    "HierarchicalSummarizeStrategy",
     "MemoryOptimizationStrategy",
     "MemoryOptimizationStrategyFactory",
     "MemoryOptimizationStrategyType",
+    "OptimizationReport",
     "SummarizeStrategy",
 ]
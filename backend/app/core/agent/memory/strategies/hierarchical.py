@@ -0,0 +1,371 @@
+"""Hierarchical strategy: summarize topic clusters map-reduce style within a token budget."""
+
+import asyncio
+import hashlib
+import json
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from textwrap import dedent
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages.chat import ChatMessage as Message
+from loguru import logger
+
+from app.core.agent.memory.semantic_index import tokenize
+from app.core.agent.memory.strategies import MemoryOptimizationStrategy
+from app.schemas.memory import UserMemory
+from app.utils.datetime import utc_now
+from app.utils.tokens import count_tokens as count_text_tokens
+
+# Cluster content hash -> summary, so re-running on unchanged clusters makes no model call
+_SUMMARY_CACHE_MAX_ENTRIES = 256
+_summary_cache: "OrderedDict[str, str]" = OrderedDict()
+
+
+@dataclass
+class OptimizationReport:
+    """Outcome of one hierarchical optimization run."""
+
+    memories_before: int
+    memories_after: int
+    tokens_before: int
+    tokens_after: int
+    clusters: int
+    clusters_summarized: int  # summarized by the model in this run
+    clusters_kept: int  # single-memory clusters passed through untouched
+    clusters_reused: int  # summary served from the cache (cluster unchanged since a previous run)
+    model_calls: int
+
+    @property
+    def compression_ratio(self) -> float:
+        """tokens_after / tokens_before (1.0 when nothing was compressed)."""
+        return self.tokens_after / self.tokens_before if self.tokens_before else 1.0
+
+
+@dataclass
+class _Cluster:
+    memories: List[UserMemory]
+    topics: List[str]
+    label: str
+
+
+class HierarchicalSummarizeStrategy(MemoryOptimizationStrategy):
+    """Cluster memories by topic/similarity and summarize each cluster separately.
+
+    Unlike SummarizeStrategy, no model call sees more than ``max_input_tokens`` of memories:
+    a large cluster is split into chunks that are summarized in parallel (map), and the chunk
+    summaries are summarized again until one remains (reduce). A memory longer than the budget
+    is split into pieces, and summaries are cut to ``max_summary_tokens`` (at most half the
+    budget, so every reduce level merges at least two summaries per call). Topic structure
+    survives as one memory per cluster. A cluster that is a single memory is kept as is, and
+    unchanged clusters reuse their cached summary, so after one run only clusters that received
+    new memories are re-summarized. ``last_report`` holds the result of the latest run,
+    including the compression ratio.
+    """
+
+    def __init__(
+        self,
+        max_input_tokens: int = 2000,
+        max_summary_tokens: int = 300,
+        max_concurrency: int = 4,
+        similarity_threshold: float = 0.2,
+    ):
+        self.max_input_tokens = max(2, max_input_tokens)
+        self.max_summary_tokens = max(1, min(max_summary_tokens, self.max_input_tokens // 2))
+        self.max_concurrency = max(1, max_concurrency)
+        self.similarity_threshold = similarity_threshold
+        self.last_report: Optional[OptimizationReport] = None
+
+    def _get_system_prompt(self) -> str:
+        """Get system prompt for summarizing one cluster of memories.
+
+        Returns:
+            System prompt string for LLM
+        """
+        return dedent(f"""\
+            You are a memory compression assistant. Your task is to summarize related memories about a user
+            (all on the same topic) into a single summary while preserving all key facts.
+
+            Requirements:
+            - Preserve all factual information
+            - Remove redundancy and consolidate repeated facts
+            - Maintain third-person perspective
+            - Do not add information not present in the original memories
+            - Use at most {self.max_summary_tokens} tokens
+
+            Return only the summarized memory text, nothing else.\
+        """)
+
+    # -*- Clustering
+
+    @staticmethod
+    def _memory_text(memory: UserMemory) -> str:
+        return memory.memory if isinstance(memory.memory, str) else repr(memory.memory)
+
+    def cluster(self, memories: List[UserMemory]) -> List[_Cluster]:
+        """Group memories by their most common topic; untagged memories by token overlap."""
+        topic_counts = Counter(topic for mem in memories for topic in (mem.topics or []))
+        by_topic: Dict[str, List[UserMemory]] = {}
+        untagged: List[UserMemory] = []
+        for mem in memories:
+            if mem.topics:
+                # The memory's most widely shared topic decides its cluster
+                primary = min(mem.topics, key=lambda topic: (-topic_counts[topic], topic))
+                by_topic.setdefault(primary, []).append(mem)
+            else:
+                untagged.append(mem)
+
+        clusters = [
+            _Cluster(
+                memories=group,
+                topics=sorted({topic for mem in group for topic in (mem.topics or [])}),
+                label=topic,
+            )
+            for topic, group in by_topic.items()
+        ]
+
+        # Greedy single pass: join the most similar cluster (Jaccard over index terms) above the threshold
+        similarity_groups: List[Tuple[Set[str], List[UserMemory]]] = []
+        for mem in untagged:
+            terms = set(tokenize(self._memory_text(mem)))
+            best: Optional[Tuple[Set[str], List[UserMemory]]] = None
+            best_score = self.similarity_threshold
+            for group_terms, group in similarity_groups:
+                union = len(terms | group_terms)
+                score = len(terms & group_terms) / union if union else 0.0
+                if score >= best_score:
+                    best, best_score = (group_terms, group), score
+            if best is None:
+                similarity_groups.append((terms, [mem]))
+            else:
+                best[0].update(terms)
+                best[1].append(mem)
+        clusters.extend(_Cluster(memories=group, topics=[], label="general") for _, group in similarity_groups)
+        return clusters
+
+    # -*- Map-reduce planning
+
+    @classmethod
+    def _split_text(cls, text: str, max_tokens: int) -> List[str]:
+        """Split text into pieces of at most max_tokens, preferring whitespace near the middle."""
+        if len(text) <= 1 or count_text_tokens(text) <= max_tokens:
+            return [text]
+        middle = len(text) // 2
+        cut = text.rfind(" ", 0, middle)
+        if cut <= 0:
+            cut = middle
+        return cls._split_text(text[:cut].strip() or text[:cut], max_tokens) + cls._split_text(
+            text[cut:].strip() or text[cut:], max_tokens
+        )
+
+    def _chunk(self, texts: List[str]) -> List[List[str]]:
+        """Pack texts into chunks of at most max_input_tokens; texts over the budget are split first."""
+        chunks: List[List[str]] = []
+        current: List[str] = []
+        current_tokens = 0
+        for text in texts:
+            for piece in self._split_text(text, self.max_input_tokens):
+                tokens = count_text_tokens(piece)
+                if current and current_tokens + tokens > self.max_input_tokens:
+                    chunks.append(current)
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _cache_key(self, cluster: _Cluster) -> str:
+        payload = {
+            "texts": sorted(self._memory_text(mem) for mem in cluster.memories),
+            "label": cluster.label,
+            "max_input_tokens": self.max_input_tokens,
+            "max_summary_tokens": self.max_summary_tokens,
+        }
+        return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode()).hexdigest()
+
+    def _summary_messages(self, label: str, texts: List[str]) -> List[Message]:
+        combined_content = "\n\n".join(f"Memory {i + 1}: {text}" for i, text in enumerate(texts))
+        return [
+            Message(role="system", content=self._get_system_prompt()),
+            Message(
+                role="user",
+                content=f"Summarize these memories (topic: {label}) into a single summary:\n\n{combined_content}",
+            ),
+        ]
+
+    def _response_text(self, response: object, texts: List[str]) -> str:
+        content = getattr(response, "content", None)
+        if isinstance(content, list):
+            content = " ".join(str(item) for item in content)
+        content_str = str(content).strip() if content else ""
+        # Cut overlong summaries so the next reduce level still fits two per call
+        return self._split_text(content_str or " ".join(texts), self.max_summary_tokens)[0]
+
+    # -*- Optimize
+
+    def _prepare(self, memories: List[UserMemory]) -> Tuple[List[_Cluster], Dict[int, str], Dict[int, List[str]]]:
+        """Split clusters into reused ones (single memory or cached summary) and ones needing the model."""
+        # Validate memories list
+        if not memories:
+            raise ValueError("No Memories found")
+        if memories[0].user_id is None:
+            raise ValueError("Cannot determine user_id: first memory does not have a valid user_id or is None")
+
+        clusters = self.cluster(memories)
+        cached: Dict[int, str] = {}
+        work: Dict[int, List[str]] = {}
+        for index, cluster in enumerate(clusters):
+            if len(cluster.memories) == 1:
+                continue
+            key = self._cache_key(cluster)
+            summary = _summary_cache.get(key)
+            if summary is not None:
+                _summary_cache.move_to_end(key)
+                cached[index] = summary
+            else:
+                work[index] = [self._memory_text(mem) for mem in cluster.memories]
+        return clusters, cached, work
+
+    def _plan_level(self, work: Dict[int, List[str]]) -> List[Tuple[int, List[str]]]:
+        """Model calls of one map/reduce level: (cluster index, chunk of texts)."""
+        return [(index, chunk) for index, texts in work.items() for chunk in self._chunk(texts)]
+
+    def _collect_level(
+        self,
+        clusters: List[_Cluster],
+        jobs: List[Tuple[int, List[str]]],
+        results: List[str],
+        summaries: Dict[int, str],
+    ) -> Dict[int, List[str]]:
+        """Record clusters reduced to one summary; return the ones that need another level."""
+        next_work: Dict[int, List[str]] = {}
+        for (index, _), result in zip(jobs, results):
+            next_work.setdefault(index, []).append(result)
+        for index in [index for index, texts in next_work.items() if len(texts) == 1]:
+            summary = next_work.pop(index)[0]
+            summaries[index] = summary
+            _summary_cache[self._cache_key(clusters[index])] = summary
+            while len(_summary_cache) > _SUMMARY_CACHE_MAX_ENTRIES:
+                _summary_cache.popitem(last=False)
+        return next_work
+
+    def _finish(
+        self,
+        memories: List[UserMemory],
+        clusters: List[_Cluster],
+        summaries: Dict[int, str],
+        cached: Dict[int, str],
+        model_calls: int,
+    ) -> List[UserMemory]:
+        user_id = memories[0].user_id
+        optimized: List[UserMemory] = []
+        for index, cluster in enumerate(clusters):
+            if len(cluster.memories) == 1:
+                # Unchanged since the last run (or nothing to merge): keep the memory itself
+                optimized.append(cluster.memories[0])
+                continue
+            agent_ids = {mem.agent_id for mem in cluster.memories if mem.agent_id}
+            team_ids = {mem.team_id for mem in cluster.memories if mem.team_id}
+            optimized.append(
+                UserMemory(
+                    memory_id=str(uuid4()),
+                    memory=cached.get(index) or summaries[index],
+                    topics=cluster.topics or None,
+                    user_id=user_id,
+                    agent_id=next(iter(agent_ids)) if len(agent_ids) == 1 else None,
+                    team_id=next(iter(team_ids)) if len(team_ids) == 1 else None,
+                    updated_at=int(utc_now().timestamp()),
+                )
+            )
+
+        kept = sum(1 for cluster in clusters if len(cluster.memories) == 1)
+        self.last_report = OptimizationReport(
+            memories_before=len(memories),
+            memories_after=len(optimized),
+            tokens_before=self.count_tokens(memories),
+            tokens_after=self.count_tokens(optimized),
+            clusters=len(clusters),
+            clusters_summarized=len(summaries),
+            clusters_kept=kept,
+            clusters_reused=len(cached),
+            model_calls=model_calls,
+        )
+        logger.debug(
+            f"Hierarchically summarized {len(memories)} memories into {len(optimized)}: "
+            f"{self.last_report.tokens_before} -> {self.last_report.tokens_after} tokens "
+            f"(ratio {self.last_report.compression_ratio:.2f}, clusters={len(clusters)}, "
+            f"summarized={len(summaries)}, kept={kept}, reused={len(cached)}, model_calls={model_calls})"
+        )
+        return optimized
+
+    def optimize(
+        self,
+        memories: List[UserMemory],
+        model: BaseChatModel,  # type: ignore[override]
+    ) -> List[UserMemory]:
+        """Summarize each topic cluster into one memory, calling the model in parallel threads.
+
+        Args:
+            memories: List of UserMemory objects to summarize
+            model: Model to use for summarization
+
+        Returns:
+            One UserMemory per cluster
+
+        Raises:
+            ValueError: If memories list is empty or if user_id cannot be determined
+        """
+        clusters, cached, work = self._prepare(memories)
+
+        def summarize(job: Tuple[int, List[str]]) -> str:
+            index, texts = job
+            response = model.invoke(self._summary_messages(clusters[index].label, texts))
+            return self._response_text(response, texts)
+
+        summaries: Dict[int, str] = {}
+        model_calls = 0
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while work:
+                jobs = self._plan_level(work)
+                results = list(executor.map(summarize, jobs))
+                model_calls += len(jobs)
+                work = self._collect_level(clusters, jobs, results, summaries)
+        return self._finish(memories, clusters, summaries, cached, model_calls)
+
+    async def aoptimize(
+        self,
+        memories: List[UserMemory],
+        model: BaseChatModel,  # type: ignore[override]
+    ) -> List[UserMemory]:
+        """Async version: Summarize each topic cluster into one memory, calling the model concurrently.
+
+        Args:
+            memories: List of UserMemory objects to summarize
+            model: Model to use for summarization
+
+        Returns:
+            One UserMemory per cluster
+
+        Raises:
+            ValueError: If memories list is empty or if user_id cannot be determined
+        """
+        clusters, cached, work = self._prepare(memories)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        summaries: Dict[int, str] = {}
+        model_calls = 0
+
+        async def summarize(index: int, texts: List[str]) -> str:
+            async with semaphore:
+                response = await model.ainvoke(self._summary_messages(clusters[index].label, texts))
+            return self._response_text(response, texts)
+
+        while work:
+            jobs = self._plan_level(work)
+            results = await asyncio.gather(*(summarize(index, chunk) for index, chunk in jobs))
+            model_calls += len(jobs)
+            work = self._collect_level(clusters, jobs, list(results), summaries)
+        return self._finish(memories, clusters, summaries, cached, model_calls)
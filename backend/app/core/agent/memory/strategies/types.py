@@ -9,6 +9,7 @@ class MemoryOptimizationStrategyType(str, Enum):
     """Enumeration of available memory optimization strategies."""
 
     SUMMARIZE = "summarize"
+    HIERARCHICAL = "hierarchical"
 
 
 class MemoryOptimizationStrategyFactory:
@@ -27,6 +28,7 @@ class MemoryOptimizationStrategyFactory:
         """
         strategy_map = {
             MemoryOptimizationStrategyType.SUMMARIZE: cls._create_summarize_strategy,
+            MemoryOptimizationStrategyType.HIERARCHICAL: cls._create_hierarchical_strategy,
         }
         return strategy_map[strategy_type](**kwargs)
 
@@ -35,3 +37,9 @@ class MemoryOptimizationStrategyFactory:
         from app.core.agent.memory.strategies.summarize import SummarizeStrategy
 
         return SummarizeStrategy(**kwargs)
+
+    @classmethod
+    def _create_hierarchical_strategy(cls, **kwargs) -> MemoryOptimizationStrategy:
+        from app.core.agent.memory.strategies.hierarchical import HierarchicalSummarizeStrategy
+
+        return HierarchicalSummarizeStrategy(**kwargs)
@@ -15,6 +15,8 @@ from deepagents.backends.protocol import BackendProtocol
 from langchain.agents.middleware.types import AgentMiddleware, AgentState, ModelRequest, ModelResponse
 from typing_extensions import NotRequired
 
+from app.utils.message_serializer import bounded_serialize
+
 
 class LoggingState(AgentState):
     """日志记录中间件的状态"""
@@ -168,9 +170,9 @@ class LoggingMiddleware(AgentMiddleware):
             "success": error is None,
         }
 
-        # 如果结果很大，只记录摘要
-        if result and len(str(result)) > 1000:
-            entry["result_summary"] = f"{type(result).__name__} object, size: {len(str(result))} chars"
+        # 如果结果很大，只记录摘要（有界测量，不生成完整文本）
+        if result and (bounded := bounded_serialize(result, 1000)).truncated:
+            entry["result_summary"] = f"{type(result).__name__} object, size: {bounded.original_size} chars"
         else:
             entry["result"] = result
 
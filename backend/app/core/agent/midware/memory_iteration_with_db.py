@@ -1,11 +1,12 @@
 """MemoryManager 驱动的记忆中间件
 
 在模型调用前：
-- 根据当前用户输入检索用户的相关长期记忆（支持 last_n / first_n / agentic）
+- 根据当前用户输入检索用户的相关长期记忆（支持 last_n / first_n / agentic / semantic）
 - 将检索到的记忆以结构化片段注入到系统提示，增强上下文
 
 在模型调用后：
 - 将本次用户输入提交给 MemoryManager，由其根据捕获规则判定是否新增/更新/删除记忆
+  （异步版本默认放入后台记忆抽取队列，不阻塞响应）
 """
 
 import asyncio
@@ -17,7 +18,9 @@ from langchain_core.messages import AIMessage, HumanMessage
 from loguru import logger
 from typing_extensions import NotRequired
 
+from app.core.agent.memory.extraction_queue import memory_extraction_queue
 from app.core.agent.memory.manager import MemoryManager
+from app.core.settings import settings
 from app.schemas.memory import UserMemory
 
 if TYPE_CHECKING:
@@ -39,11 +42,14 @@ class AgentMemoryIterationMiddleware(AgentMiddleware):
 
     Args:
         memory_manager: 已配置的 MemoryManager 实例（需提供 model/db）
-        retrieval_method: 检索方式，支持 "last_n" | "first_n" | "agentic"
+        retrieval_method: 检索方式，支持 "last_n" | "first_n" | "agentic" | "semantic"
         retrieval_limit: 检索条数限制
+        rerank: "semantic" 检索时是否由模型对召回的 top-k 记忆重排
         context_header: 注入系统提示时的记忆片段标题
         enable_writeback: 是否在模型调用后写入记忆
         capture_source: 写入记忆时的来源，"user" 或 "assistant"，默认 "user"
+        background_writeback: 异步调用时是否经后台队列（防抖合并）写入记忆，
+            默认取 settings.memory_extraction_async_enabled
     """
 
     priority = 50  # 中等优先级，与技能中间件并行执行
@@ -55,18 +61,24 @@ class AgentMemoryIterationMiddleware(AgentMiddleware):
         memory_manager: MemoryManager,
         retrieval_method: str = "last_n",
         retrieval_limit: int = 5,
+        rerank: bool = False,
         context_header: str = "## 相关用户记忆",
         enable_writeback: bool = True,
         capture_source: str = "user",
         user_id: Optional[str] = None,
+        background_writeback: Optional[bool] = None,
     ) -> None:
         self.memory_manager = memory_manager
         self.retrieval_method = retrieval_method
         self.retrieval_limit = retrieval_limit
+        self.rerank = rerank
         self.context_header = context_header
         self.enable_writeback = enable_writeback
         self.capture_source = capture_source
         self.user_id = user_id
+        self.background_writeback = (
+            settings.memory_extraction_async_enabled if background_writeback is None else background_writeback
+        )
 
         if self.memory_manager is None:
             raise ValueError("AgentMemoryManagerMiddleware requires a MemoryManager instance")
@@ -91,6 +103,17 @@ class AgentMemoryIterationMiddleware(AgentMiddleware):
             logger.warning("No user_id configured in middleware instance")
         return self.user_id
 
+    @staticmethod
+    def _get_thread_id() -> Optional[str]:
+        """当前运行的 thread_id（用于合并同一会话的连续轮次），不在图运行中时返回 None"""
+        try:
+            from langgraph.config import get_config
+
+            thread_id = (get_config().get("configurable") or {}).get("thread_id")
+            return str(thread_id) if thread_id is not None else None
+        except Exception:
+            return None
+
     def _extract_user_input(self, request: ModelRequest) -> Optional[str]:
         """从请求中提取用户输入文本（LangGraph ModelRequest 格式）"""
         # 从消息列表中取最后一个 HumanMessage 消息
@@ -238,10 +261,10 @@ class AgentMemoryIterationMiddleware(AgentMiddleware):
     async def _build_memory_context(self, request: ModelRequest, user_id: str) -> str:
         """按配置从 MemoryManager 检索记忆并构建上下文（统一使用异步方式）"""
         query: Optional[str] = None
-        if self.retrieval_method == "agentic":
+        if self.retrieval_method in ("agentic", "semantic"):
             query = self._extract_user_input(request)
             logger.info(
-                f"Retrieving memories with agentic method for user_id={user_id}, "
+                f"Retrieving memories with {self.retrieval_method} method for user_id={user_id}, "
                 f"query={query[:100] if query else None}..."
             )
         else:
@@ -251,14 +274,15 @@ class AgentMemoryIterationMiddleware(AgentMiddleware):
             )
 
         try:
-            retrieval_method_literal: Literal["last_n", "first_n", "agentic"] | None = None
-            if self.retrieval_method in ("last_n", "first_n", "agentic"):
+            retrieval_method_literal: Literal["last_n", "first_n", "agentic", "semantic"] | None = None
+            if self.retrieval_method in ("last_n", "first_n", "agentic", "semantic"):
                 retrieval_method_literal = self.retrieval_method  # type: ignore[assignment]
             memories = await self.memory_manager.asearch_user_memories(
                 query=query,
                 limit=self.retrieval_limit,
                 retrieval_method=retrieval_method_literal,
                 user_id=user_id,
+                rerank=self.rerank,
             )
             memory_count = len(memories) if memories else 0
             logger.info(f"Memory retrieval completed for user_id={user_id}: found {memory_count} memories")
@@ -412,7 +436,16 @@ class AgentMemoryIterationMiddleware(AgentMiddleware):
                     # 默认从用户输入捕获
                     message_text = self._extract_user_input(request)
 
-                if message_text and message_text.strip():
+                if message_text and message_text.strip() and self.background_writeback:
+                    # 响应已生成：登记到后台队列后立即返回，抽取在防抖窗口后执行
+                    memory_extraction_queue.enqueue(
+                        self.memory_manager,
+                        user_id,
+                        message_text,
+                        thread_id=self._get_thread_id(),
+                    )
+                    logger.debug(f"Memory writeback queued for user_id={user_id}")
+                elif message_text and message_text.strip():
                     logger.info(
                         f"Writing memory for user_id={user_id}, "
                         f"message_length={len(message_text)}, capture_source={self.capture_source}"
@@ -8,11 +8,12 @@ and graph structure analysis.
 import logging
 import uuid
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Set, Type
+from typing import Any, Dict, List, Optional, Type
 
 from langgraph.graph.state import CompiledStateGraph
 
 from app.core.agent.sample_agent import get_default_model
+from app.core.graph.graph_topology import GraphTopology
 from app.core.graph.node_executors import (
     AgentNodeExecutor,
     AggregatorNodeExecutor,
@@ -106,6 +107,12 @@ class BaseGraphBuilder(ABC):
                 self._incoming_edges[edge.target_node_id] = []
             self._incoming_edges[edge.target_node_id].append(edge.source_node_id)
 
+        # Outgoing edge objects per source (validation reads edge data)
+        self._outgoing_edge_objects: Dict[uuid.UUID, List[GraphEdge]] = {}
+        for edge in edges:
+            self._outgoing_edge_objects.setdefault(edge.source_node_id, []).append(edge)
+        self._loop_back_topology: Optional[GraphTopology] = None
+
     # ==================== Node Utilities ====================
 
     def _get_node_type(self, node: GraphNode) -> str:
@@ -944,7 +951,7 @@ class BaseGraphBuilder(ABC):
             node_type = self._get_node_type(node)
             if node_type == "router_node":
                 # Check that router has outgoing edges
-                router_edges = [e for e in self.edges if e.source_node_id == node.id]
+                router_edges = self._outgoing_edge_objects.get(node.id, [])
                 if not router_edges:
                     label = (node.data or {}).get("label", str(node.id))
                     errors.append(f"Router node '{label}' has no outgoing edges")
@@ -961,7 +968,7 @@ class BaseGraphBuilder(ABC):
             node_type = self._get_node_type(node)
             if node_type == "loop_condition_node":
                 # Check that loop has continue_loop and exit_loop edges
-                loop_edges = [e for e in self.edges if e.source_node_id == node.id]
+                loop_edges = self._outgoing_edge_objects.get(node.id, [])
                 route_keys = {e.data.get("route_key") for e in loop_edges if e.data}
 
                 if "continue_loop" not in route_keys and "exit_loop" not in route_keys:
@@ -990,33 +997,23 @@ class BaseGraphBuilder(ABC):
 
         return errors
 
-    def _detect_potential_cycles(self, start_node_id: uuid.UUID, visited: Optional[Set[str]] = None) -> bool:
+    def _detect_potential_cycles(self, start_node_id: uuid.UUID) -> bool:
         """
         Detect potential cycles starting from a node.
-        This is a simplified cycle detection for loop validation.
+        This is a simplified cycle detection for loop validation: a cycle made of
+        loop_back edges between loop condition nodes that is reachable from the node.
+        Adjacency and SCCs are computed once per builder, so each check is O(1).
         """
-        if visited is None:
-            visited = set()
-
-        node_key = str(start_node_id)
-        if node_key in visited:
-            return True
-
-        visited.add(node_key)
-
-        # Check outgoing edges
-        for edge in self.edges:
-            if edge.source_node_id == start_node_id:
-                # For loop back edges, check if they lead back to potential loop starters
+        if self._loop_back_topology is None:
+            loop_back_edges = []
+            for edge in self.edges:
                 edge_data = edge.data or {}
                 if edge_data.get("edge_type") == "loop_back":
                     target_node = self._node_map.get(edge.target_node_id)
                     if target_node and self._get_node_type(target_node) == "loop_condition_node":
-                        if self._detect_potential_cycles(edge.target_node_id, visited.copy()):
-                            return True
-
-        visited.remove(node_key)
-        return False
+                        loop_back_edges.append((edge.source_node_id, edge.target_node_id))
+            self._loop_back_topology = GraphTopology(self._node_map, loop_back_edges)
+        return start_node_id in self._loop_back_topology.nodes_reaching_cycle()
 
     def validate_handle_to_route_mapping(self) -> List[str]:
         """
@@ -1031,7 +1028,7 @@ class BaseGraphBuilder(ABC):
             node_type = self._get_node_type(node)
             if node_type in ["router_node", "condition"]:
                 # Collect edges from this node
-                node_edges = [e for e in self.edges if e.source_node_id == node.id]
+                node_edges = self._outgoing_edge_objects.get(node.id, [])
 
                 # Check handle_id to route_key consistency
                 handle_to_route: Dict[str, str] = {}
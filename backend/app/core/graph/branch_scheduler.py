@@ -0,0 +1,187 @@
+"""
+Branch Scheduler - Concurrency limits for parallel fan-out branches.
+
+Without limits, a fan-out over 50 agent nodes starts 50 LLM calls at once.
+Branch nodes (targets of a fan-out) acquire a slot before their executor runs:
+
+1. Per run (graph-level, from ``GraphSchema.concurrency``):
+   ``max_parallel_branches`` and ``group_limits`` (by node type or group).
+2. Per process (shared by all runs): one pool per concurrency group
+   (``llm`` / ``tool``) sized by settings. Waiting runs are served by start-time
+   fair queueing weighted by ``ConcurrencySchema.weight``, so one run with a
+   huge fan-out cannot starve the others.
+
+Slots only delay *when* a branch executes inside its LangGraph super-step;
+writes are still applied in LangGraph's deterministic task order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+from loguru import logger
+
+from app.core.graph.graph_schema import ConcurrencySchema
+from app.core.settings import settings
+
+
+class _Flow:
+    """Waiters of one run in a fair pool; ``tag`` is its virtual start time."""
+
+    __slots__ = ("waiters", "weight", "tag")
+
+    def __init__(self, weight: float, tag: float):
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.weight = weight
+        self.tag = tag
+
+
+class FairPool:
+    """Counting semaphore whose waiters are served by weighted fair queueing across flows."""
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = capacity
+        self.active = 0
+        self._flows: Dict[str, _Flow] = {}
+        self._vtime = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(flow.waiters) for flow in self._flows.values())
+
+    async def acquire(self, flow_key: str, weight: float = 1.0) -> None:
+        if self.active < self.capacity and not self._flows:
+            self.active += 1
+            return
+
+        flow = self._flows.get(flow_key)
+        if flow is None:
+            # New flows start at the current virtual time: no burst credit, no starvation
+            flow = self._flows[flow_key] = _Flow(weight, self._vtime)
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        flow.waiters.append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just before cancellation: hand it on
+                self.release()
+            else:
+                self._discard(flow_key, future)
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._dispatch()
+
+    def _discard(self, flow_key: str, future: asyncio.Future) -> None:
+        flow = self._flows.get(flow_key)
+        if flow is None:
+            return
+        try:
+            flow.waiters.remove(future)
+        except ValueError:
+            pass
+        if not flow.waiters:
+            del self._flows[flow_key]
+
+    def _dispatch(self) -> None:
+        while self.active < self.capacity and self._flows:
+            flow_key, flow = min(self._flows.items(), key=lambda item: item[1].tag)
+            future = flow.waiters.popleft()
+            if not flow.waiters:
+                del self._flows[flow_key]
+            if future.done():
+                continue
+            self._vtime = flow.tag
+            flow.tag += 1.0 / flow.weight
+            self.active += 1
+            future.set_result(None)
+
+
+class _RunGates:
+    """Per-run semaphores, created lazily and dropped when the run has no branches in flight."""
+
+    __slots__ = ("semaphores", "users")
+
+    def __init__(self) -> None:
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.users = 0
+
+    def gate(self, key: str, limit: int) -> asyncio.Semaphore:
+        semaphore = self.semaphores.get(key)
+        if semaphore is None:
+            semaphore = self.semaphores[key] = asyncio.Semaphore(limit)
+        return semaphore
+
+
+class BranchScheduler:
+    """Acquire per-run and per-process slots for parallel branch nodes."""
+
+    def __init__(self, group_capacities: Dict[str, int]):
+        # Capacity <= 0 disables the shared pool for that group
+        self.pools: Dict[str, FairPool] = {
+            group: FairPool(group, capacity) for group, capacity in group_capacities.items() if capacity > 0
+        }
+        self._runs: Dict[str, _RunGates] = {}
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        run_key: str,
+        node_type: str,
+        group: Optional[str],
+        limits: Optional[ConcurrencySchema] = None,
+    ) -> AsyncIterator[None]:
+        run = self._runs.get(run_key)
+        if run is None:
+            run = self._runs[run_key] = _RunGates()
+        run.users += 1
+
+        semaphores: List[asyncio.Semaphore] = []
+        pool: Optional[FairPool] = None
+        try:
+            # Fixed acquisition order (run -> type/group -> shared pool) avoids deadlocks
+            if limits is not None:
+                if limits.max_parallel_branches:
+                    semaphores.append(run.gate("*", limits.max_parallel_branches))
+                limit_key = node_type if node_type in limits.group_limits else group
+                if limit_key and limit_key in limits.group_limits:
+                    semaphores.append(run.gate(limit_key, limits.group_limits[limit_key]))
+            held: List[asyncio.Semaphore] = []
+            try:
+                for semaphore in semaphores:
+                    await semaphore.acquire()
+                    held.append(semaphore)
+                candidate = self.pools.get(group) if group else None
+                if candidate is not None:
+                    if candidate.active >= candidate.capacity:
+                        logger.debug(
+                            f"[BranchScheduler] Waiting for {candidate.name} slot | run={run_key} | "
+                            f"active={candidate.active} | waiting={candidate.waiting}"
+                        )
+                    await candidate.acquire(run_key, limits.weight if limits is not None else 1.0)
+                    pool = candidate
+                yield
+            finally:
+                if pool is not None:
+                    pool.release()
+                for semaphore in reversed(held):
+                    semaphore.release()
+        finally:
+            run.users -= 1
+            if run.users == 0 and self._runs.get(run_key) is run:
+                del self._runs[run_key]
+
+
+branch_scheduler = BranchScheduler(
+    {
+        "llm": settings.graph_branch_llm_concurrency,
+        "tool": settings.graph_branch_tool_concurrency,
+    }
+)
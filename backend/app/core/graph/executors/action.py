@@ -2,12 +2,14 @@
 Action Executors - Executors for simple actions (Reply, Input, HTTP).
 """
 
-from typing import Any, Dict
+import json
+from typing import Any, Dict, Optional
 
 from langchain_core.messages import AIMessage, HumanMessage
 from loguru import logger
 
 from app.core.graph.graph_state import GraphState
+from app.core.graph.http_node_client import send_request
 from app.models.graph import GraphNode
 
 
@@ -29,6 +31,10 @@ class DirectReplyNodeExecutor:
         template = config.get("template", "")
         return str(template) if template is not None else ""
 
+    def memo_inputs(self, state: GraphState) -> Optional[Dict[str, Any]]:
+        """Inputs that determine the result (node memoization key): the template context."""
+        return {"context": state.get("context", {})}
+
     async def __call__(self, state: GraphState) -> Dict[str, Any]:
         """Return the template message."""
         content = self.template
@@ -71,6 +77,26 @@ class HumanInputNodeExecutor:
         return {"current_node": self.node_id}
 
 
+def _normalize_headers(headers: Any) -> Dict[str, str]:
+    """Accept headers as a dict or as the frontend's [{key, value}] list."""
+    if isinstance(headers, dict):
+        return {str(k): str(v) for k, v in headers.items()}
+    if isinstance(headers, list):
+        return {
+            str(item["key"]): str(item.get("value", ""))
+            for item in headers
+            if isinstance(item, dict) and item.get("key")
+        }
+    return {}
+
+
+def _as_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
 class HttpRequestNodeExecutor:
     """Executor for HTTP Request node.
 
@@ -87,45 +113,62 @@ class HttpRequestNodeExecutor:
         data = self.node.data or {}
         self.config = data.get("config", {})
         self.url = self.config.get("url")
-        self.method = self.config.get("method", "GET")
-        self.headers = self.config.get("headers", {})
+        self.method = str(self.config.get("method", "GET")).upper()
+        self.headers = _normalize_headers(self.config.get("headers", {}))
         self.body = self.config.get("body", "")
+        self.timeout = _as_float(self.config.get("timeout"), 30.0)
+        self.max_retries = int(_as_float(self.config.get("max_retries"), 3))
+        self.max_response_bytes = int(_as_float(self.config.get("max_response_bytes"), 0)) or None
+        # Opt-in: GET responses honoring Cache-Control / ETag are reused across calls
+        self.cache_enabled = bool(self.config.get("cache_enabled", False)) and self.method == "GET"
 
-    async def __call__(self, state: GraphState) -> Dict[str, Any]:
-        import httpx
+    def memo_inputs(self, state: GraphState) -> Optional[Dict[str, Any]]:
+        """Inputs that determine the result (node memoization key).
 
+        Only GET requests are memoizable; the request is fully described by the node config.
+        """
+        return {} if self.method == "GET" else None
+
+    async def __call__(self, state: GraphState) -> Dict[str, Any]:
         logger.info(f"[HttpRequestNode] >>> {self.method} {self.url} | node_id={self.node_id}")
 
         try:
             # Resolve template variables in URL/Body/Headers
             # For simplicity, skipping deep template resolution here, but should be done.
 
-            async with httpx.AsyncClient() as client:
-                response = await client.request(
-                    method=self.method,
-                    url=self.url,
-                    headers=self.headers,
-                    content=self.body if self.body else None,
-                    timeout=30.0,
-                )
-
-                result_data = {
-                    "status_code": response.status_code,
-                    "text": response.text,
-                    "headers": dict(response.headers),
-                    "json": None,
-                }
-
-                try:
-                    result_data["json"] = response.json()
-                except Exception:
-                    pass
-
-                logger.info(f"[HttpRequestNode] <<< Status: {response.status_code}")
-
-                return_dict = {"current_node": self.node_id, "result": result_data}
-
-                return return_dict
+            # Shared per-host pooled client (keep-alive / HTTP/2) with retries and size cutoff
+            response = await send_request(
+                method=self.method,
+                url=self.url,
+                headers=self.headers,
+                content=self.body if self.body else None,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                max_response_bytes=self.max_response_bytes,
+                use_cache=self.cache_enabled,
+            )
+
+            result_data = {
+                "status_code": response.status_code,
+                "text": response.text,
+                "headers": response.headers,
+                "json": None,
+                "cached": response.cached,
+            }
+
+            try:
+                result_data["json"] = json.loads(response.content)
+            except Exception:
+                pass
+
+            logger.info(
+                f"[HttpRequestNode] <<< Status: {response.status_code} | "
+                f"attempts={response.attempts} | cached={response.cached}"
+            )
+
+            return_dict = {"current_node": self.node_id, "result": result_data}
+
+            return return_dict
 
         except Exception as e:
             logger.error(f"[HttpRequestNode] Request failed: {e}")
@@ -15,7 +15,7 @@ except ImportError:
     COMMAND_AVAILABLE = False
     Command = None  # type: ignore[assignment,misc]
 
-from app.core.graph.expression_evaluator import StateWrapper, validate_condition_expression
+from app.core.graph.expression_evaluator import CompiledExpression, StateWrapper, compile_condition_expression
 from app.core.graph.graph_state import GraphState
 from app.core.graph.route_types import RouteKey
 from app.models.graph import GraphNode
@@ -56,9 +56,11 @@ class ConditionNodeExecutor:
         self.node_id = node_id
         self.expression = self._get_expression()
 
-        # Pre-validate expression for safety
-        if not validate_condition_expression(self.expression):
-            raise ValueError(f"Invalid condition expression in node '{node_id}': {self.expression}")
+        # Validate and compile once at build time (raises for unsafe / invalid expressions)
+        try:
+            self.compiled: CompiledExpression = compile_condition_expression(self.expression)
+        except ValueError:
+            raise ValueError(f"Invalid condition expression in node '{node_id}': {self.expression}") from None
 
         # Map handle IDs to route keys (set during graph building)
         self.handle_to_route_map: Dict[str, str] = {}
@@ -91,54 +93,18 @@ class ConditionNodeExecutor:
             return False
 
         try:
-            # Convert state to dict for debugging and wrapping
-            state_dict = dict(state)
-
-            # Debug: Print state keys and loop_count value
-            logger.debug(
-                f"[ConditionNodeExecutor] State keys | "
-                f"node_id={self.node_id} | keys={list(state_dict.keys())} | "
-                f"loop_count={state_dict.get('loop_count', 'NOT_PRESENT')} | "
-                f"loop_count_type={type(state_dict.get('loop_count'))}"
+            # Lazy read-only view: no per-call copy of the state
+            result = self.compiled.evaluate(
+                {
+                    "state": StateWrapper(state),
+                    "context": state.get("context", {}),
+                    "messages": state.get("messages", []),
+                    "current_node": state.get("current_node"),
+                    "loop_count": state.get("loop_count", 0),
+                    "route_decision": state.get("route_decision"),
+                }
             )
-
-            # Create a safe evaluation context
-            # Use StateWrapper to support dot notation access (e.g., state.loop_count)
-            wrapped_state = StateWrapper(state_dict)
-            eval_context = {
-                "state": wrapped_state,
-                "context": state.get("context", {}),
-                "messages": state.get("messages", []),
-                "current_node": state.get("current_node"),
-                "loop_count": state.get("loop_count", 0),
-                "route_decision": state.get("route_decision"),
-            }
-
-            # Debug: Test attribute access before evaluation
-            try:
-                loop_count_attr = getattr(wrapped_state, "loop_count", "NOT_FOUND")
-                logger.debug(
-                    f"[ConditionNodeExecutor] StateWrapper attribute test | "
-                    f"node_id={self.node_id} | wrapped_state.loop_count={loop_count_attr} | "
-                    f"type={type(loop_count_attr)}"
-                )
-            except Exception as attr_e:
-                logger.warning(
-                    f"[ConditionNodeExecutor] Failed to access loop_count attribute | "
-                    f"node_id={self.node_id} | error={attr_e}"
-                )
-
-            # Evaluate the expression
-            result = eval(self.expression, {"__builtins__": {}}, eval_context)
-            bool_result = bool(result)
-
-            # Print expression and result for debugging
-            logger.info(
-                f"[ConditionNodeExecutor] Expression evaluation | "
-                f"node_id={self.node_id} | expression='{self.expression}' | result={bool_result} | raw_result={result}"
-            )
-
-            return bool_result
+            return bool(result)
         except Exception as e:
             logger.error(
                 f"[ConditionNodeExecutor] Error evaluating expression '{self.expression}' | "
@@ -219,13 +185,22 @@ class RouterNodeExecutor:
         self.node_id = node_id
         self.rules = self._get_rules()
 
-        # Pre-validate all rule conditions for safety
+        # Validate and compile all rule conditions once at build time
+        # (rule, compiled condition, target route key); rules without condition or target are skipped
+        self.compiled_rules: List[tuple[Dict[str, Any], CompiledExpression, str]] = []
         for rule in self.rules:
             condition = rule.get("condition", "")
-            if condition and not validate_condition_expression(condition):
+            if not condition:
+                continue
+            try:
+                compiled = compile_condition_expression(condition)
+            except ValueError:
                 raise ValueError(
                     f"Invalid condition expression in router rule '{rule.get('id', 'unknown')}': {condition}"
-                )
+                ) from None
+            target_edge_key = rule.get("targetEdgeKey")
+            if target_edge_key:
+                self.compiled_rules.append((rule, compiled, target_edge_key))
 
         # Map handle IDs to route keys (set during graph building)
         self.handle_to_route_map: Dict[str, str] = {}
@@ -259,11 +234,9 @@ class RouterNodeExecutor:
         start_time = time.time()
         logger.info(f"[RouterNodeExecutor] >>> Evaluating router node '{self.node_id}' | rules_count={len(self.rules)}")
 
-        # Create evaluation context once
-        state_dict = dict(state)
-        wrapped_state = StateWrapper(state_dict)
+        # Create evaluation context once (lazy read-only state view, no copy)
         eval_context = {
-            "state": wrapped_state,
+            "state": StateWrapper(state),
             "context": state.get("context", {}),
             "messages": state.get("messages", []),
             "current_node": state.get("current_node"),
@@ -276,26 +249,19 @@ class RouterNodeExecutor:
         default_route = config.get("defaultRoute", "default")
 
         # Evaluate rules in order
-        for rule in self.rules:
-            condition = rule.get("condition")
-            target_edge_key = rule.get("targetEdgeKey")
-
-            if not condition or not target_edge_key:
-                continue
-
+        for rule, compiled, target_edge_key in self.compiled_rules:
             try:
-                result = eval(condition, {"__builtins__": {}}, eval_context)
-                if bool(result):
+                if compiled.evaluate(eval_context):
                     selected_route_key = target_edge_key
                     logger.info(
                         f"[RouterNodeExecutor] Matched rule '{rule.get('label')}' | "
-                        f"condition='{condition}' | route_key={selected_route_key}"
+                        f"condition='{compiled.source}' | route_key={selected_route_key}"
                     )
                     break
             except Exception as e:
                 logger.error(
                     f"[RouterNodeExecutor] Error evaluating rule '{rule.get('id')}' | "
-                    f"condition='{condition}' | error={e}"
+                    f"condition='{compiled.source}' | error={e}"
                 )
 
         # Fallback to default if no rules matched
@@ -344,6 +310,14 @@ class LoopConditionNodeExecutor:
         self.list_variable = self.config.get("listVariable")
         self.condition = self.config.get("condition", "")
 
+        # Validate and compile the while / doWhile condition once at build time
+        self.compiled_condition: Optional[CompiledExpression] = None
+        if self.condition_type in ("while", "doWhile") and self.condition:
+            try:
+                self.compiled_condition = compile_condition_expression(self.condition)
+            except ValueError:
+                raise ValueError(f"Invalid loop condition in node '{node_id}': {self.condition}") from None
+
     def route(self, state: GraphState) -> str:
         """Return the routing decision from state."""
         return str(state.get("route_decision", "default"))
@@ -380,7 +354,7 @@ class LoopConditionNodeExecutor:
 
                 # Get list from state
                 # Use StateWrapper to handle dot notation if list_variable is like "data.items"
-                state_wrapper = StateWrapper(dict(state))
+                state_wrapper = StateWrapper(state)
 
                 # Simple recursive get helper for dot notation
                 items = self._get_value_by_path(state_wrapper, self.list_variable)
@@ -399,20 +373,19 @@ class LoopConditionNodeExecutor:
                     should_continue = False
 
             elif self.condition_type in ("while", "doWhile"):
-                # Evaluate python condition
-                if not self.condition:
+                # Evaluate the compiled condition against a lazy read-only state view
+                if self.compiled_condition is None:
                     should_continue = False  # No condition = stop
                 else:
-                    # Eval context
-                    # Use StateWrapper
-                    wrapped_state = StateWrapper(dict(state))
-                    eval_context = {
-                        "state": wrapped_state,
-                        "context": state.get("context", {}),
-                        "loop_count": iteration_count,  # Use local count
-                        "loop_item": state.get("context", {}).get("loop_item"),
-                    }
-                    result = eval(self.condition, {"__builtins__": {}}, eval_context)
+                    context = state.get("context", {}) or {}
+                    result = self.compiled_condition.evaluate(
+                        {
+                            "state": StateWrapper(state),
+                            "context": context,
+                            "loop_count": iteration_count,  # Use local count
+                            "loop_item": context.get("loop_item"),
+                        }
+                    )
                     should_continue = bool(result)
 
             else:
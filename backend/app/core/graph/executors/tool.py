@@ -17,10 +17,35 @@ except ImportError:
     Command = None  # type: ignore[assignment,misc]
 
 from app.core.graph.expression_evaluator import StateWrapper
+from app.core.graph.function_runtime import CompiledFunction, compile_function_code, function_pool
 from app.core.graph.graph_state import GraphState
+from app.core.graph.state_channels import AppendOnlyList
+from app.core.settings import settings
 from app.models.graph import GraphNode
 
 
+def _portable(value: Any) -> Any:
+    """Convert in-process state containers to plain types before sending them to a worker."""
+    if isinstance(value, AppendOnlyList):
+        return value.snapshot()
+    if isinstance(value, StateWrapper):
+        return {key: _portable(item) for key, item in value.items()}
+    return value
+
+
+def _plain_result(value: Any) -> Any:
+    """Custom code result as plain data (in-process twin of the worker's result conversion)."""
+    if isinstance(value, (StateWrapper, AppendOnlyList)):
+        value = _portable(value)
+    if isinstance(value, list):
+        return [_plain_result(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_plain_result(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _plain_result(item) for key, item in value.items()}
+    return value
+
+
 class ToolNodeExecutor:
     """Executor for a Tool node in the graph.
 
@@ -73,6 +98,34 @@ class ToolNodeExecutor:
 
         return target_tool
 
+    def _resolve_args(self, state: GraphState) -> Dict[str, Any]:
+        """Resolve tool arguments from the input mapping."""
+        tool_args: Dict[str, Any] = {}
+        state_wrapper = StateWrapper(state)
+
+        for mapping in self.input_mapping:
+            param_name = mapping.get("key")
+            source_type = mapping.get("type", "static")  # static or variable
+            source_value = mapping.get("value")
+
+            if not param_name:
+                continue
+
+            if source_type == "variable":
+                # Fetch from state
+                # Simple support for 'message.content' or 'context.foo'
+                tool_args[param_name] = self._get_value_by_path(state_wrapper, source_value)
+            else:
+                # Static value
+                tool_args[param_name] = source_value
+        return tool_args
+
+    def memo_inputs(self, state: GraphState) -> Optional[Dict[str, Any]]:
+        """Inputs that determine the result (node memoization key): the resolved tool arguments."""
+        if not self.tool_name:
+            return None
+        return {"user_id": self.user_id, "tool": self.tool_name, "args": self._resolve_args(state)}
+
     async def __call__(self, state: GraphState) -> Dict[str, Any]:
         """Execute the tool."""
         start_time = time.time()
@@ -88,26 +141,7 @@ class ToolNodeExecutor:
                 raise ValueError(f"Tool '{self.tool_name}' not found or not available for this node.")
 
             # Prepare arguments from input mapping
-            tool_args = {}
-            state_wrapper = StateWrapper(dict(state))
-
-            # Resolve arguments
-            for mapping in self.input_mapping:
-                param_name = mapping.get("key")
-                source_type = mapping.get("type", "static")  # static or variable
-                source_value = mapping.get("value")
-
-                if not param_name:
-                    continue
-
-                if source_type == "variable":
-                    # Fetch from state
-                    # Simple support for 'message.content' or 'context.foo'
-                    val = self._get_value_by_path(state_wrapper, source_value)
-                    tool_args[param_name] = val
-                else:
-                    # Static value
-                    tool_args[param_name] = source_value
+            tool_args = self._resolve_args(state)
 
             logger.info(f"[ToolNodeExecutor] Invoking tool with args: {tool_args}")
 
@@ -181,6 +215,22 @@ class FunctionNodeExecutor:
         self.function_name = self.config.get("function_name")
         self.function_code = self.config.get("function_code")
 
+        # Compile custom code once at build time (raises for invalid code)
+        self.compiled: Optional[CompiledFunction] = None
+        if self.execution_mode == "custom" and self.function_code:
+            try:
+                self.compiled = compile_function_code(self.function_code)
+            except ValueError as e:
+                raise ValueError(f"Invalid custom code in function node '{node_id}': {e}") from None
+
+        # Lightweight code may opt into the in-process fast path (no timeout / memory protection)
+        self.in_process = bool(self.config.get("in_process", False)) or not settings.function_node_isolation_enabled
+        self.timeout_seconds = self._capped(self.config.get("timeout_seconds"), settings.function_node_timeout_seconds)
+        self.memory_limit_mb = int(
+            self._capped(self.config.get("memory_limit_mb"), settings.function_node_memory_limit_mb)
+        )
+        self.cpu_seconds = min(settings.function_node_cpu_seconds, self.timeout_seconds)
+
         # Predefined functions registry
         self.PREDEFINED_FUNCTIONS = {
             "math_add": lambda a, b: float(a) + float(b),
@@ -190,6 +240,15 @@ class FunctionNodeExecutor:
             "dict_set": self._dict_set,
         }
 
+    @staticmethod
+    def _capped(value: Any, limit: float) -> float:
+        """Node-level limits may only tighten the server-wide limit."""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return limit
+        return min(value, limit) if value > 0 else limit
+
     def _dict_set(self, d, k, v):
         if not isinstance(d, dict):
             return {}
@@ -197,6 +256,79 @@ class FunctionNodeExecutor:
         new_d[k] = v
         return new_d
 
+    def _build_scope(self, state: GraphState) -> Dict[str, Any]:
+        """Local variables for custom code: state views plus input-mapped variables."""
+        wrapped_state = StateWrapper(state)
+        local_scope: Dict[str, Any] = {
+            "state": wrapped_state,
+            "context": state.get("context", {}),
+            "messages": state.get("messages", []),
+            "result": None,  # Output variable
+        }
+
+        # Setup mapped variables
+        input_mapping = self.config.get("input_mapping", [])
+        missing_vars = []
+        for mapping in input_mapping:
+            param_name = mapping.get("key")
+            source_type = mapping.get("type", "static")  # static or variable
+            source_value = mapping.get("value")
+
+            if not param_name:
+                continue
+
+            if source_type == "variable":
+                # Fetch from state
+                try:
+                    val = self._get_value_by_path(wrapped_state, source_value)
+                    local_scope[param_name] = val
+                except Exception as e:
+                    logger.warning(f"[FunctionNodeExecutor] Failed to resolve variable path '{source_value}': {e}")
+                    missing_vars.append(source_value)
+                    local_scope[param_name] = None
+            else:
+                # Static value
+                local_scope[param_name] = source_value
+
+        if missing_vars:
+            logger.warning(f"[FunctionNodeExecutor] Some mapped variables could not be resolved: {missing_vars}")
+        return local_scope
+
+    def memo_inputs(self, state: GraphState) -> Optional[Dict[str, Any]]:
+        """Inputs that determine the result (node memoization key).
+
+        Custom code: only the variables the compiled code references.
+        Predefined functions: fully determined by the node config.
+        """
+        if self.execution_mode != "custom":
+            return {}
+        if self.compiled is None:
+            return None
+        scope = self._build_scope(state)
+        return {
+            name: _portable(value) for name, value in scope.items() if name != "result" and name in self.compiled.names
+        }
+
+    async def _run_isolated(self, compiled: CompiledFunction, local_scope: Dict[str, Any]) -> Any:
+        """Run in the worker pool; only variables the code references are serialized."""
+        variables: Dict[str, Any] = {}
+        views = []
+        for name, value in local_scope.items():
+            if name != "result" and name not in compiled.names:
+                continue
+            if isinstance(value, StateWrapper):
+                # Re-wrapped as a read-only view in the worker
+                views.append(name)
+            variables[name] = _portable(value)
+        return await function_pool.run(
+            compiled,
+            variables,
+            views=views,
+            cpu_seconds=self.cpu_seconds,
+            wall_seconds=self.timeout_seconds,
+            memory_mb=self.memory_limit_mb,
+        )
+
     async def __call__(self, state: GraphState) -> Dict[str, Any]:
         """Execute the function."""
         logger.info(f"[FunctionNodeExecutor] >>> Executing function '{self.execution_mode}' | node_id={self.node_id}")
@@ -205,71 +337,26 @@ class FunctionNodeExecutor:
 
         try:
             if self.execution_mode == "custom":
-                # Execute custom python code
-                if not self.function_code:
+                # Execute custom python code (compiled at build time)
+                if self.compiled is None:
                     raise ValueError("No custom code provided")
 
-                # Sandbox execution similar to condition evaluator
-                # BUT: Code execution is dangerous.
-                # Ideally we restrict this heavily or use a proper sandbox.
-                # For this implementation, we use the same restrictive eval/exec as condition,
-                # but maybe slightly more permissive to allow logic?
-                # Using 'exec' allows statements, 'eval' only expressions.
-                # The prompt says 'Use "result" variable for output' -> implies exec.
-
-                # Using StateWrapper for easier access
-                wrapped_state = StateWrapper(dict(state))
-
-                # Local scope for execution
-                local_scope = {
-                    "state": wrapped_state,
-                    "context": state.get("context", {}),
-                    "messages": state.get("messages", []),
-                    "result": None,  # Output variable
-                }
-
-                # Setup mapped variables
-                input_mapping = self.config.get("input_mapping", [])
-                missing_vars = []
-                for mapping in input_mapping:
-                    param_name = mapping.get("key")
-                    source_type = mapping.get("type", "static")  # static or variable
-                    source_value = mapping.get("value")
-
-                    if not param_name:
-                        continue
-
-                    if source_type == "variable":
-                        # Fetch from state
-                        try:
-                            val = self._get_value_by_path(wrapped_state, source_value)
-                            local_scope[param_name] = val
-                        except Exception as e:
-                            logger.warning(
-                                f"[FunctionNodeExecutor] Failed to resolve variable path '{source_value}': {e}"
-                            )
-                            missing_vars.append(source_value)
-                            local_scope[param_name] = None
-                    else:
-                        # Static value
-                        local_scope[param_name] = source_value
-
-                if missing_vars:
-                    logger.warning(
-                        f"[FunctionNodeExecutor] Some mapped variables could not be resolved: {missing_vars}"
-                    )
+                local_scope = self._build_scope(state)
 
-                # We need to trust the user here or sandbox strictly.
-                # For now, we execute with limited builtins.
+                # Custom code runs with no builtins; by default in an isolated worker
+                # process with CPU / wall-clock / memory limits
                 try:
-                    exec(self.function_code, {"__builtins__": {}}, local_scope)
+                    if self.in_process:
+                        exec(self.compiled.code, {"__builtins__": {}}, local_scope)
+                        # Same result types as the isolated path: views and channels as plain data
+                        result = _plain_result(local_scope.get("result"))
+                    else:
+                        result = await self._run_isolated(self.compiled, local_scope)
                 except Exception as e:
                     error_msg = f"Runtime Error in Custom Code: {str(e)}"
-                    logger.error(f"[FunctionNodeExecutor] {error_msg}")
+                    logger.error(f"[FunctionNodeExecutor] {error_msg} | node_id={self.node_id}")
                     return {"messages": [AIMessage(content=error_msg)]}
 
-                result = local_scope.get("result")
-
             else:
                 # Predefined function
                 if not self.function_name:
@@ -4,7 +4,7 @@ Transform Executors - Executors for data transformation (JSON, Aggregator).
 
 import json
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from langchain_core.messages import AIMessage
 from loguru import logger
@@ -30,12 +30,10 @@ class JSONParserNodeExecutor:
         self.config = data.get("config", {})
         self.source_field = self.config.get("sourceField", "messages[-1].content")
 
-    async def __call__(self, state: GraphState) -> Dict[str, Any]:
-        """Parse JSON."""
-        # Resolve source value...
+    def _source_content(self, state: GraphState) -> str:
+        """Resolve the source string to parse."""
         # Needs logic similar to StateWrapper access.
         # For now assuming it grabs last message content if not specified or simple path.
-
         content = ""
         # Simplified retrieval:
         if self.source_field == "messages[-1].content":
@@ -45,6 +43,15 @@ class JSONParserNodeExecutor:
         else:
             # TODO: Use StateWrapper/expression evaluator to fetch arbitrary path
             content = "{}"
+        return content
+
+    def memo_inputs(self, state: GraphState) -> Optional[Dict[str, Any]]:
+        """Inputs that determine the result (node memoization key): the source string."""
+        return {"content": self._source_content(state)}
+
+    async def __call__(self, state: GraphState) -> Dict[str, Any]:
+        """Parse JSON."""
+        content = self._source_content(state)
 
         cleaned_content = content.replace("```json", "").replace("```", "").strip()
 
@@ -59,6 +66,15 @@ class JSONParserNodeExecutor:
             return {"messages": [AIMessage(content=f"JSON Parse Error: {e}")]}
 
 
+def ordered_task_results(task_results: Any) -> List[Dict[str, Any]]:
+    """Order parallel results by fan-out branch position (stable; unindexed results keep their order last)."""
+    results = list(task_results or [])
+    return sorted(
+        results,
+        key=lambda r: r.get("branch_index", float("inf")) if isinstance(r, dict) else float("inf"),
+    )
+
+
 class AggregatorNodeExecutor:
     """Executor for an Aggregator node in the graph (Fan-In).
 
@@ -87,7 +103,7 @@ class AggregatorNodeExecutor:
 
     def _aggregate_results(self, state: GraphState) -> Dict[str, Any]:
         """Aggregate results from parallel branches (Fan-In logic)."""
-        task_results = state.get("task_results", [])
+        task_results = ordered_task_results(state.get("task_results", []))
         state.get("parallel_results", [])
 
         # Check for errors
@@ -126,6 +142,8 @@ class AggregatorNodeExecutor:
         values = []
         for source in self.source_variables:
             val = state.get(source)
+            if source == "task_results":
+                val = ordered_task_results(val)
             if val is not None:
                 if isinstance(val, list):
                     values.extend(val)
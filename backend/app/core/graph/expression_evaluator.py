@@ -3,16 +3,47 @@ Expression Evaluator - Safe evaluation of Python expressions in the graph.
 
 This module provides utilities to:
 1. Validate Python expressions for safety (AST analysis).
-2. Wrap state objects to support dot-notation access in expressions.
-3. Safe execution context for conditions and custom functions.
+2. Compile validated expressions once and evaluate the cached code objects.
+3. Wrap state objects (lazily, without copying) to support dot-notation access.
+4. Safe execution context for conditions and custom functions.
 """
 
 import ast
+import builtins
 import re
-from typing import Any, Dict, Set
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple, Union
 
 from loguru import logger
 
+# Builtin functions allowed in condition / router / loop expressions
+SAFE_FUNCTIONS = frozenset(
+    {
+        "len",
+        "str",
+        "int",
+        "float",
+        "bool",
+        "abs",
+        "min",
+        "max",
+        "sum",
+        "any",
+        "all",
+        "sorted",
+        "reversed",
+        "enumerate",
+        "range",
+        "list",
+        "dict",
+        "set",
+        "tuple",
+    }
+)
+
+_SAFE_GLOBALS: Dict[str, Any] = {"__builtins__": {name: getattr(builtins, name) for name in SAFE_FUNCTIONS}}
+
 
 def validate_condition_expression(expr: str) -> bool:
     """
@@ -39,28 +70,7 @@ def validate_condition_expression(expr: str) -> bool:
             if isinstance(node, ast.Call):
                 if isinstance(node.func, ast.Name):
                     # Allow specific safe builtin functions
-                    safe_functions = {
-                        "len",
-                        "str",
-                        "int",
-                        "float",
-                        "bool",
-                        "abs",
-                        "min",
-                        "max",
-                        "sum",
-                        "any",
-                        "all",
-                        "sorted",
-                        "reversed",
-                        "enumerate",
-                        "range",
-                        "list",
-                        "dict",
-                        "set",
-                        "tuple",
-                    }
-                    if node.func.id not in safe_functions:
+                    if node.func.id not in SAFE_FUNCTIONS:
                         logger.warning(f"[ConditionValidator] Disallowed function call: {node.func.id}")
                         return False
                 elif isinstance(node.func, ast.Attribute):
@@ -158,44 +168,67 @@ def validate_condition_expression(expr: str) -> bool:
         return False
 
 
+class CompiledExpression:
+    """A validated expression compiled to a code object once, evaluated many times.
+
+    Condition, router and loop nodes compile their expressions at graph build
+    time; each routing decision is a single ``eval`` of the cached code object.
+    """
+
+    __slots__ = ("source", "code")
+
+    def __init__(self, source: str, code: CodeType):
+        self.source = source
+        self.code = code
+
+    def evaluate(self, namespace: Dict[str, Any]) -> Any:
+        """Evaluate against the given names (safe builtins only)."""
+        return eval(self.code, _SAFE_GLOBALS, namespace)
+
+    def __repr__(self) -> str:
+        return f"CompiledExpression({self.source!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_condition_expression(expr: str) -> CompiledExpression:
+    """Validate and compile an expression (cached per source string).
+
+    Raises:
+        ValueError: If the expression is empty, unsafe or not valid Python.
+    """
+    if not validate_condition_expression(expr):
+        raise ValueError(f"Invalid expression: {expr}")
+    return CompiledExpression(expr, compile(expr.strip(), "<expression>", "eval"))
+
+
 class StateWrapper:
-    """Wrapper that allows both dot notation and dict access to state.
+    """Read-only view that allows both dot notation and dict access to state.
 
     This class enables expressions like 'state.loop_count>1' to work,
     while still supporting dict-style access like 'state.get("loop_count")'.
+    The view is lazy: nothing is copied on construction and nested dicts are
+    wrapped only when accessed, so wrapping the state is O(1) per evaluation.
     """
 
-    def __init__(self, state_dict: Dict[str, Any]):
+    __slots__ = ("_state",)
+
+    def __init__(self, state_dict: Mapping[str, Any]):
         self._state = state_dict
-        # Set attributes for direct dot notation access
-        for key, value in state_dict.items():
-            if isinstance(value, dict):
-                # Recursively wrap nested dictionaries
-                setattr(self, key, StateWrapper(value))
-            else:
-                setattr(self, key, value)
 
     def __getattr__(self, name: str) -> Any:
-        """Handle attribute access for keys that may not exist in the dict.
+        """Attribute access maps to state keys.
 
-        This allows accessing optional fields like loop_count even if they
-        weren't in the original dict when StateWrapper was created.
+        Missing keys return None, which allows accessing optional fields like
+        loop_count even if they are not present in the state.
         """
         if name.startswith("_"):
             # Don't interfere with private attributes
             raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
-        # Try to get from the underlying dict
-        if name in self._state:
-            value = self._state[name]
-            # If it's a dict, wrap it (in case it was added after initialization)
-            if isinstance(value, dict):
-                return StateWrapper(value)
-            return value
-
-        # Return None for missing attributes (allows expressions like state.loop_count > 1)
-        # This is safer than raising AttributeError for optional fields
-        return None
+        value = self._state.get(name)
+        if isinstance(value, dict):
+            return StateWrapper(value)
+        return value
 
     def get(self, key: str, default: Any = None) -> Any:
         """Support dict.get() method for backward compatibility."""
@@ -209,6 +242,10 @@ class StateWrapper:
         """Support 'in' operator."""
         return key in self._state
 
+    def __iter__(self):
+        """Support iteration over keys."""
+        return iter(self._state)
+
     def keys(self):
         """Support dict.keys() method."""
         return self._state.keys()
@@ -239,11 +276,145 @@ _STATE_DOT_PATTERN = re.compile(r"state\.(\w+)")
 _RESULT_DOT_PATTERN = re.compile(r"result\.(\w+)")
 # 4. {NodeLabel.output} style (curly-brace variable references from auto-wiring)
 _CURLY_REF_PATTERN = re.compile(r"\{(\w+)\.(\w+)\}")
+# All four in one pass, in the order they take precedence
+_TEMPLATE_PATTERN = re.compile(
+    "|".join(
+        f"(?:{p.pattern})" for p in (_STATE_GET_PATTERN, _CURLY_REF_PATTERN, _RESULT_DOT_PATTERN, _STATE_DOT_PATTERN)
+    )
+)
+
+_REF_STATE = "state"
+_REF_RESULT = "result"
+_REF_NODE = "node"
+
+
+class VariableRef:
+    """A single Data Pill reference: ``state.<key>``, ``result.<key>`` or ``{<key>.<field>}``."""
+
+    __slots__ = ("kind", "key", "field", "source")
+
+    def __init__(self, kind: str, key: str, field: Optional[str], source: str):
+        self.kind = kind
+        self.key = key
+        self.field = field
+        self.source = source
+
+    def lookup(self, state: Mapping[str, Any], upstream_result: Any, default: Any = None) -> Any:
+        if self.kind == _REF_STATE:
+            return state.get(self.key, default)
+        if self.kind == _REF_RESULT:
+            if isinstance(upstream_result, dict):
+                return upstream_result.get(self.key, default)
+            return getattr(upstream_result, self.key, default)
+        node_outputs = state.get("node_outputs", {})
+        if isinstance(node_outputs, dict):
+            node_data = node_outputs.get(self.key, {})
+            if isinstance(node_data, dict):
+                return node_data.get(self.field, default)
+        return None if default is None else ""
+
+    def __repr__(self) -> str:
+        return f"VariableRef({self.source!r})"
+
+
+class CompiledTemplate:
+    """A Data Pill string parsed once into static segments and variable references.
+
+    A string that is exactly one expression keeps the referenced value's type;
+    otherwise the references are interpolated as strings.
+    """
+
+    __slots__ = ("source", "segments", "whole")
+
+    def __init__(self, source: str, segments: Tuple[Union[str, VariableRef], ...], whole: Optional[VariableRef]):
+        self.source = source
+        self.segments = segments
+        self.whole = whole
+
+    def render(self, state: Mapping[str, Any], upstream_result: Any = None) -> Any:
+        whole = self.whole
+        if whole is not None:
+            if whole.kind == _REF_RESULT and upstream_result is None:
+                return self.source
+            return whole.lookup(state, upstream_result)
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+            elif segment.kind == _REF_RESULT and upstream_result is None:
+                parts.append(segment.source)
+            else:
+                val = segment.lookup(state, upstream_result, "")
+                parts.append(str(val) if val is not None else "")
+        return "".join(parts)
+
+    def __repr__(self) -> str:
+        return f"CompiledTemplate({self.source!r})"
+
+
+def _make_ref(m: re.Match) -> VariableRef:
+    get_key, node_label, output_key, result_field, dot_key = m.groups()
+    if get_key is not None:
+        return VariableRef(_REF_STATE, get_key, None, m.group(0))
+    if node_label is not None:
+        return VariableRef(_REF_NODE, node_label, output_key, m.group(0))
+    if result_field is not None:
+        return VariableRef(_REF_RESULT, result_field, None, m.group(0))
+    return VariableRef(_REF_STATE, dot_key, None, m.group(0))
+
+
+def _may_contain_expression(expr: str) -> bool:
+    return "state." in expr or "result." in expr or ("{" in expr and "}" in expr)
+
+
+# Configured templates are short; longer strings (JSON tool output, LLM text) are parsed
+# without caching so the cache never pins large runtime values
+_MAX_CACHED_TEMPLATE_CHARS = 4096
+
+
+def _compile_template(expr: str) -> Optional[CompiledTemplate]:
+    stripped = expr.strip()
+    m = _TEMPLATE_PATTERN.fullmatch(stripped)
+    if m:
+        return CompiledTemplate(expr, (), _make_ref(m))
+
+    segments: List[Union[str, VariableRef]] = []
+    last = 0
+    for m in _TEMPLATE_PATTERN.finditer(expr):
+        if m.group(5) == "get":
+            # Bare "state.get" without a quoted key is plain text
+            continue
+        if m.start() > last:
+            segments.append(expr[last : m.start()])
+        segments.append(_make_ref(m))
+        last = m.end()
+    if last == 0 and not segments:
+        return None
+    if last < len(expr):
+        segments.append(expr[last:])
+    return CompiledTemplate(expr, tuple(segments), None)
+
+
+_compile_template_cached = lru_cache(maxsize=4096)(_compile_template)
+
+
+def compile_template(expr: str) -> Optional[CompiledTemplate]:
+    """Parse a Data Pill string (cached per source string); None if it has no references.
+
+    Strings without any expression marker are rejected before the cache, and strings
+    longer than ``_MAX_CACHED_TEMPLATE_CHARS`` are parsed uncached, so large runtime
+    values never occupy cache slots.
+    """
+    if not _may_contain_expression(expr):
+        return None
+    if len(expr) > _MAX_CACHED_TEMPLATE_CHARS:
+        return _compile_template(expr)
+    return _compile_template_cached(expr)
 
 
 def resolve_variable_expressions(
     value: Any,
-    state: Dict[str, Any],
+    state: Mapping[str, Any],
     upstream_result: Any = None,
 ) -> Any:
     """Recursively resolve Data Pill variable expressions in config values.
@@ -258,12 +429,17 @@ def resolve_variable_expressions(
     - ``result.field``               → ``upstream_result["field"]``
     - ``{NodeLabel.output}``         → ``state["node_outputs"]["NodeLabel"]["output"]``
 
+    Each string is compiled once (see ``compile_template``); the state is only
+    read for the keys that are referenced. Containers without any reference are
+    returned as-is (same object), so callers can detect "nothing to resolve"
+    with an identity check.
+
     Parameters
     ----------
     value : Any
         The config value to resolve. Can be a string, dict, list, or primitive.
-    state : Dict[str, Any]
-        The current graph state (contains ``node_outputs``, etc).
+    state : Mapping[str, Any]
+        The current graph state (contains ``node_outputs``, etc). Read-only.
     upstream_result : Any, optional
         The result from the immediately upstream node execution.
 
@@ -273,114 +449,22 @@ def resolve_variable_expressions(
         The resolved value with all expressions replaced by actual values.
     """
     if isinstance(value, str):
-        return _resolve_string_expression(value, state, upstream_result)
+        template = compile_template(value)
+        return value if template is None else template.render(state, upstream_result)
     elif isinstance(value, dict):
-        return {k: resolve_variable_expressions(v, state, upstream_result) for k, v in value.items()}
+        resolved_dict = None
+        for k, v in value.items():
+            resolved = resolve_variable_expressions(v, state, upstream_result)
+            if resolved is not v and resolved_dict is None:
+                resolved_dict = dict(value)
+            if resolved_dict is not None:
+                resolved_dict[k] = resolved
+        return value if resolved_dict is None else resolved_dict
     elif isinstance(value, list):
-        return [resolve_variable_expressions(item, state, upstream_result) for item in value]
+        resolved_list = [resolve_variable_expressions(item, state, upstream_result) for item in value]
+        if all(new is old for new, old in zip(resolved_list, value)):
+            return value
+        return resolved_list
     else:
         # Primitives (int, float, bool, None) pass through unchanged
         return value
-
-
-def _resolve_string_expression(
-    expr: str,
-    state: Dict[str, Any],
-    upstream_result: Any = None,
-) -> Any:
-    """Resolve a single string expression.
-
-    If the entire string is a single expression (e.g. "state.get('count')"),
-    return the raw value (preserving type). If the string contains embedded
-    expressions mixed with text, perform string interpolation.
-    """
-    stripped = expr.strip()
-
-    # --- Whole-string match (preserve original type) ---
-
-    # state.get('var')
-    m = _STATE_GET_PATTERN.fullmatch(stripped)
-    if m:
-        key = m.group(1)
-        return state.get(key)
-
-    # state.var
-    m = _STATE_DOT_PATTERN.fullmatch(stripped)
-    if m:
-        key = m.group(1)
-        return state.get(key)
-
-    # result.field
-    m = _RESULT_DOT_PATTERN.fullmatch(stripped)
-    if m and upstream_result is not None:
-        field = m.group(1)
-        if isinstance(upstream_result, dict):
-            return upstream_result.get(field)
-        return getattr(upstream_result, field, None)
-
-    # {NodeLabel.output}
-    m = _CURLY_REF_PATTERN.fullmatch(stripped)
-    if m:
-        node_label = m.group(1)
-        output_key = m.group(2)
-        node_outputs = state.get("node_outputs", {})
-        if isinstance(node_outputs, dict):
-            node_data = node_outputs.get(node_label, {})
-            if isinstance(node_data, dict):
-                return node_data.get(output_key)
-        return None
-
-    # --- Inline interpolation (embedded expressions within text) ---
-    # Only do this if there are potential expression markers in the string
-    has_expressions = "state.get(" in expr or "state." in expr or "result." in expr or ("{" in expr and "}" in expr)
-    if not has_expressions:
-        return expr
-
-    result = expr
-
-    # Replace state.get('var') with value as string
-    def _replace_state_get(m: re.Match) -> str:
-        val = state.get(m.group(1), "")
-        return str(val) if val is not None else ""
-
-    result = _STATE_GET_PATTERN.sub(_replace_state_get, result)
-
-    # Replace {NodeLabel.output} with value as string
-    def _replace_curly_ref(m: re.Match) -> str:
-        node_label = m.group(1)
-        output_key = m.group(2)
-        node_outputs = state.get("node_outputs", {})
-        if isinstance(node_outputs, dict):
-            node_data = node_outputs.get(node_label, {})
-            if isinstance(node_data, dict):
-                val = node_data.get(output_key, "")
-                return str(val) if val is not None else ""
-        return ""
-
-    result = _CURLY_REF_PATTERN.sub(_replace_curly_ref, result)
-
-    # Replace result.field with value (only if upstream_result is available)
-    if upstream_result is not None:
-
-        def _replace_result_dot(m: re.Match) -> str:
-            field = m.group(1)
-            if isinstance(upstream_result, dict):
-                val = upstream_result.get(field, "")
-            else:
-                val = getattr(upstream_result, field, "")
-            return str(val) if val is not None else ""
-
-        result = _RESULT_DOT_PATTERN.sub(_replace_result_dot, result)
-
-    # Replace state.var with value (do this LAST to avoid partial matches with state.get)
-    def _replace_state_dot(m: re.Match) -> str:
-        key = m.group(1)
-        # Avoid replacing 'state.get' as it was already handled
-        if key == "get":
-            return str(m.group(0))
-        val = state.get(key, "")
-        return str(val) if val is not None else ""
-
-    result = _STATE_DOT_PATTERN.sub(_replace_state_dot, result)
-
-    return result
@@ -0,0 +1,327 @@
+"""
+Function Runtime - Compile-once, process-isolated execution of Function node code.
+
+Custom code used to be re-``exec``'d from its source string on every call,
+inside the event loop and without limits, so one runaway function stalled every
+stream served by the worker. This module provides:
+
+1. ``compile_function_code``: compile a node's code once at graph build time.
+2. ``FunctionProcessPool``: a pool of pre-spawned worker subprocesses
+   (``function_worker.py``) that run the compiled code with per-call CPU and
+   wall-clock timeouts and a memory cap. A worker that does not answer within
+   its deadline is killed and replaced without affecting the others.
+
+Serialization: code objects are marshalled and sent once per worker (then
+referenced by hash); variables go in as pickle; results come back as pickle
+restricted to built-in data types and LangChain messages, so a compromised
+worker cannot make the server unpickle arbitrary objects.
+"""
+
+import asyncio
+import hashlib
+import io
+import marshal
+import os
+import pickle
+import struct
+import sys
+from functools import lru_cache
+from types import CodeType
+from typing import Any, Dict, FrozenSet, Iterable, Optional
+
+from langchain_core.messages import BaseMessage
+from loguru import logger
+
+from app.core.settings import settings
+
+_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "function_worker.py")
+_HEADER = struct.Struct(">I")
+_KILL_GRACE_SECONDS = 2.0
+_IDLE_POLL_SECONDS = 5.0
+_MAX_RESULT_BYTES = 64 * 1024 * 1024
+_WORKER_ENV_KEYS = ("PATH", "LANG", "LC_ALL", "TZ")
+
+
+class CompiledFunction:
+    """Function node code compiled once; ``names`` lists the free names it reads."""
+
+    __slots__ = ("source", "code", "code_id", "payload", "names")
+
+    def __init__(self, source: str, code: CodeType):
+        self.source = source
+        self.code = code
+        self.code_id = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self.payload = marshal.dumps(code)
+        self.names: FrozenSet[str] = frozenset(_referenced_names(code))
+
+    def __repr__(self) -> str:
+        return f"CompiledFunction({self.code_id[:12]})"
+
+
+def _referenced_names(code: CodeType) -> Iterable[str]:
+    yield from code.co_names
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            yield from _referenced_names(const)
+
+
+@lru_cache(maxsize=512)
+def compile_function_code(source: str) -> CompiledFunction:
+    """Compile custom function code (cached per source string).
+
+    Raises:
+        ValueError: If the code is empty or not valid Python.
+    """
+    if not source or not source.strip():
+        raise ValueError("No custom code provided")
+    try:
+        code = compile(source, "<function_node>", "exec")
+    except SyntaxError as e:
+        raise ValueError(f"Syntax error in custom code (line {e.lineno}): {e.msg}") from None
+    return CompiledFunction(source, code)
+
+
+class FunctionExecutionError(Exception):
+    """Custom code failed, timed out or exceeded its memory limit."""
+
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f"{error_type}: {message}" if message else error_type)
+        self.error_type = error_type
+        self.message = message
+
+
+class _ResultUnpickler(pickle.Unpickler):
+    """Only allow results made of built-in data types (plus LangChain messages, as read from state)."""
+
+    _ALLOWED = frozenset(
+        {
+            ("builtins", "set"),
+            ("builtins", "frozenset"),
+            ("builtins", "bytearray"),
+            ("builtins", "complex"),
+            ("builtins", "slice"),
+            ("builtins", "range"),
+            ("collections", "OrderedDict"),
+            ("datetime", "datetime"),
+            ("datetime", "date"),
+            ("datetime", "time"),
+            ("datetime", "timedelta"),
+            ("datetime", "timezone"),
+            ("decimal", "Decimal"),
+        }
+    )
+
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in self._ALLOWED:
+            return super().find_class(module, name)
+        if module.startswith("langchain_core.messages."):
+            cls = super().find_class(module, name)
+            if isinstance(cls, type) and issubclass(cls, BaseMessage):
+                return cls
+        raise pickle.UnpicklingError(f"Result type {module}.{name} is not allowed; return built-in data types")
+
+
+def _load_result(payload: bytes) -> Any:
+    return _ResultUnpickler(io.BytesIO(payload)).load()
+
+
+class _Worker:
+    __slots__ = ("process", "known_codes")
+
+    def __init__(self, process: asyncio.subprocess.Process):
+        self.process = process
+        self.known_codes: set[str] = set()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None
+
+    def kill(self) -> None:
+        if self.process.returncode is None:
+            try:
+                self.process.kill()
+            except ProcessLookupError:
+                pass
+
+
+class FunctionProcessPool:
+    """Pre-spawned worker subprocesses for Function node custom code."""
+
+    def __init__(self, size: int = 2):
+        self.size = max(1, size)
+        self._idle: Optional[asyncio.Queue[_Worker]] = None
+        self._workers: set[_Worker] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._background: set[asyncio.Task] = set()
+        self._respawning = 0
+
+    @property
+    def started(self) -> bool:
+        return self._idle is not None and self._loop is asyncio.get_running_loop()
+
+    async def start(self) -> None:
+        """Spawn all workers (idempotent; restarts if bound to a different event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._start_lock is None or self._loop is not loop:
+            self._discard_workers()
+            self._loop = loop
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            idle: asyncio.Queue[_Worker] = asyncio.Queue()
+            workers = await asyncio.gather(*(self._spawn() for _ in range(self.size)))
+            for worker in workers:
+                idle.put_nowait(worker)
+            self._idle = idle
+            logger.info(f"[FunctionProcessPool] Started {self.size} function workers")
+
+    async def close(self) -> None:
+        """Terminate all workers."""
+        workers = list(self._workers)
+        self._discard_workers()
+        for worker in workers:
+            try:
+                await worker.process.wait()
+            except Exception:
+                pass
+
+    def _discard_workers(self) -> None:
+        for worker in self._workers:
+            worker.kill()
+        self._workers.clear()
+        self._idle = None
+
+    async def _spawn(self) -> _Worker:
+        env = {key: os.environ[key] for key in _WORKER_ENV_KEYS if key in os.environ}
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-I",  # isolated: ignore PYTHON* env and user site-packages
+            _WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        worker = _Worker(process)
+        self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a worker in an unknown state and spawn its replacement in the background."""
+        worker.kill()
+        self._workers.discard(worker)
+        idle = self._idle
+        self._respawning += 1
+
+        async def respawn() -> None:
+            try:
+                replacement = await self._spawn()
+            except Exception as e:
+                # The slot is refilled by the next call that finds the pool short (see _acquire)
+                logger.error(f"[FunctionProcessPool] Failed to respawn function worker: {e}")
+                return
+            finally:
+                self._respawning -= 1
+            if self._idle is idle and idle is not None:
+                idle.put_nowait(replacement)
+            else:
+                replacement.kill()
+
+        task = asyncio.get_running_loop().create_task(respawn())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _acquire(self) -> _Worker:
+        """Take an idle worker, spawning one when a failed respawn left the pool short."""
+        assert self._idle is not None
+        while True:
+            if self._idle.empty() and len(self._workers) + self._respawning < self.size:
+                try:
+                    return await self._spawn()
+                except Exception as e:
+                    raise FunctionExecutionError("WorkerUnavailable", f"Cannot start a function worker: {e}") from None
+            try:
+                worker = await asyncio.wait_for(self._idle.get(), _IDLE_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                continue  # re-check for lost slots while all workers are busy
+            if worker.alive:
+                return worker
+            self._replace(worker)
+
+    async def run(
+        self,
+        compiled: CompiledFunction,
+        variables: Dict[str, Any],
+        views: Iterable[str] = (),
+        cpu_seconds: float = 0,
+        wall_seconds: float = 0,
+        memory_mb: int = 0,
+    ) -> Any:
+        """Execute compiled code in a worker and return its ``result`` variable.
+
+        Raises:
+            FunctionExecutionError: The code raised, hit a limit, or the worker died.
+        """
+        if not self.started:
+            await self.start()
+        assert self._idle is not None
+        worker = await self._acquire()
+
+        send_code = compiled.code_id not in worker.known_codes
+        request = {
+            "code_id": compiled.code_id,
+            "code": compiled.payload if send_code else None,
+            "variables": variables,
+            "views": tuple(views),
+            "cpu_seconds": cpu_seconds,
+            "wall_seconds": wall_seconds,
+            "memory_mb": memory_mb,
+        }
+        try:
+            payload = pickle.dumps(request, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self._idle.put_nowait(worker)
+            raise FunctionExecutionError("SerializationError", f"Input variables cannot be serialized: {e}") from e
+
+        deadline = wall_seconds + _KILL_GRACE_SECONDS if wall_seconds > 0 else None
+        try:
+            response_payload = await asyncio.wait_for(self._roundtrip(worker, payload), deadline)
+        except asyncio.TimeoutError:
+            self._replace(worker)
+            raise FunctionExecutionError(
+                "TimeoutError", f"Function did not finish within {wall_seconds}s and was terminated"
+            ) from None
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            self._replace(worker)
+            raise FunctionExecutionError("WorkerCrashed", f"Function worker exited unexpectedly: {e}") from None
+        except BaseException:
+            # Cancelled mid-request: the worker may still be running the code
+            self._replace(worker)
+            raise
+
+        if send_code:
+            worker.known_codes.add(compiled.code_id)
+        self._idle.put_nowait(worker)
+
+        try:
+            response = _load_result(response_payload)
+        except Exception as e:
+            raise FunctionExecutionError("SerializationError", str(e)) from None
+        if response[0] == "ok":
+            return response[1]
+        raise FunctionExecutionError(response[1], response[2])
+
+    @staticmethod
+    async def _roundtrip(worker: _Worker, payload: bytes) -> bytes:
+        process = worker.process
+        assert process.stdin is not None and process.stdout is not None
+        process.stdin.write(_HEADER.pack(len(payload)) + payload)
+        await process.stdin.drain()
+        (size,) = _HEADER.unpack(await process.stdout.readexactly(_HEADER.size))
+        if size > _MAX_RESULT_BYTES:
+            raise ValueError(f"result of {size} bytes exceeds {_MAX_RESULT_BYTES} bytes")
+        return await process.stdout.readexactly(size)
+
+
+function_pool = FunctionProcessPool(size=settings.function_node_pool_size)
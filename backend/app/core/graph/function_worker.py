@@ -0,0 +1,229 @@
+"""
+Function Worker - Subprocess entry point for Function node custom code.
+
+Run as a standalone script (``python function_worker.py``) by the process pool
+in ``function_runtime``: it imports nothing from ``app`` so each worker stays a
+small, quick-to-spawn interpreter without application settings or secrets.
+
+Protocol (stdin / stdout, one request at a time):
+- Frame: 4-byte big-endian length + pickle payload
+- Request: {"code_id", "code" (marshal bytes, only the first time a worker sees
+  the code), "variables", "views", "cpu_seconds", "wall_seconds", "memory_mb"}
+- Response: ("ok", result) or ("error", error_type, message); state views in
+  the result are returned as plain dicts
+
+Limits are applied per call: SIGPROF (CPU time) / SIGALRM (wall time) timers
+raise inside the user code, and RLIMIT_AS caps additional address space.
+"""
+
+import marshal
+import os
+import pickle
+import signal
+import struct
+import sys
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Mapping, Optional
+
+try:
+    import resource
+
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+    resource = None  # type: ignore[assignment]
+
+_HEADER = struct.Struct(">I")
+_MAX_CACHED_CODES = 256
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class FunctionTimeout(Exception):
+    """Raised inside user code when a CPU or wall-clock limit expires."""
+
+
+class StateView:
+    """Read-only dot / dict access to state (worker-side twin of StateWrapper)."""
+
+    __slots__ = ("_state",)
+
+    def __init__(self, state_dict: Mapping[str, Any]):
+        self._state = state_dict
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        value = self._state.get(name)
+        if isinstance(value, dict):
+            return StateView(value)
+        return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._state.get(key, default)
+
+    def __getitem__(self, key: str) -> Any:
+        return self._state[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._state
+
+    def __iter__(self):
+        return iter(self._state)
+
+    def keys(self):
+        return self._state.keys()
+
+    def values(self):
+        return self._state.values()
+
+    def items(self):
+        return self._state.items()
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+
+def _plain_result(value: Any) -> Any:
+    """State views are worker-only types: return them as the dicts they wrap."""
+    if isinstance(value, StateView):
+        return {key: _plain_result(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain_result(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_plain_result(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _plain_result(item) for key, item in value.items()}
+    return value
+
+
+def _on_timer(signum: int, _frame: Any) -> None:
+    kind = "CPU" if signum == getattr(signal, "SIGPROF", None) else "wall-clock"
+    raise FunctionTimeout(f"Function exceeded its {kind} time limit")
+
+
+def _address_space() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _Limits:
+    """Arm / disarm per-call timers and memory cap."""
+
+    def __init__(self, cpu_seconds: float, wall_seconds: float, memory_mb: int):
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.memory_mb = memory_mb
+        self._restore_as: Optional[tuple] = None
+
+    def __enter__(self) -> "_Limits":
+        if RESOURCE_AVAILABLE and self.memory_mb > 0:
+            soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+            baseline = _address_space()
+            if baseline is not None:
+                limit = baseline + self.memory_mb * 1024 * 1024
+                if hard != resource.RLIM_INFINITY:
+                    limit = min(limit, hard)
+                resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+                self._restore_as = (soft, hard)
+        if hasattr(signal, "setitimer"):
+            if self.cpu_seconds > 0:
+                signal.setitimer(signal.ITIMER_PROF, self.cpu_seconds)
+            if self.wall_seconds > 0:
+                signal.setitimer(signal.ITIMER_REAL, self.wall_seconds)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_PROF, 0)
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        if self._restore_as is not None:
+            resource.setrlimit(resource.RLIMIT_AS, self._restore_as)
+            self._restore_as = None
+
+
+def _read_frame(stream: BinaryIO) -> Optional[bytes]:
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    (size,) = _HEADER.unpack(header)
+    payload = stream.read(size)
+    if len(payload) < size:
+        return None
+    return payload
+
+
+def _write_frame(stream: BinaryIO, payload: bytes) -> None:
+    stream.write(_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def run_request(request: Dict[str, Any], codes: "OrderedDict[str, Any]") -> tuple:
+    """Execute one request against the code cache and return the response tuple."""
+    code_id = request["code_id"]
+    code = codes.get(code_id)
+    if code is None:
+        payload = request.get("code")
+        if payload is None:
+            return ("error", "LookupError", f"Unknown code id: {code_id}")
+        code = marshal.loads(payload)
+        codes[code_id] = code
+        if len(codes) > _MAX_CACHED_CODES:
+            codes.popitem(last=False)
+    else:
+        codes.move_to_end(code_id)
+
+    local_scope: Dict[str, Any] = dict(request.get("variables") or {})
+    for name in request.get("views") or ():
+        value = local_scope.get(name)
+        if isinstance(value, Mapping):
+            local_scope[name] = StateView(value)
+    local_scope.setdefault("result", None)
+
+    try:
+        with _Limits(
+            float(request.get("cpu_seconds") or 0),
+            float(request.get("wall_seconds") or 0),
+            int(request.get("memory_mb") or 0),
+        ):
+            exec(code, {"__builtins__": {}}, local_scope)
+    except FunctionTimeout as e:
+        return ("error", "TimeoutError", str(e))
+    except MemoryError:
+        return ("error", "MemoryError", "Function exceeded its memory limit")
+    except BaseException as e:  # noqa: BLE001 - user code may raise anything, including SystemExit
+        return ("error", type(e).__name__, str(e))
+    return ("ok", _plain_result(local_scope.get("result")))
+
+
+def main() -> None:
+    # Keep the protocol channel private: anything written to fd 1 goes to stderr
+    requests = os.fdopen(os.dup(sys.stdin.fileno()), "rb")
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    devnull = os.open(os.devnull, os.O_RDONLY)
+    os.dup2(devnull, sys.stdin.fileno())
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGPROF"):
+        signal.signal(signal.SIGPROF, _on_timer)
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _on_timer)
+
+    codes: "OrderedDict[str, Any]" = OrderedDict()
+    while True:
+        frame = _read_frame(requests)
+        if frame is None:
+            return
+        try:
+            response = run_request(pickle.loads(frame), codes)
+            payload = pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            payload = pickle.dumps(("error", type(e).__name__, str(e)), protocol=pickle.HIGHEST_PROTOCOL)
+        _write_frame(responses, payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -62,6 +62,10 @@ class GraphBuilder:
                 return True
         return False
 
+    def supports_compiled_cache(self) -> bool:
+        """是否可以跨请求复用编译结果（DeepAgents 图绑定单次运行的 backend，不可复用）。"""
+        return not self._has_deep_agents_nodes()
+
     def _create_builder(self) -> BaseGraphBuilder:
         """创建合适的构建器实例。"""
         if self._has_deep_agents_nodes():
@@ -0,0 +1,204 @@
+"""
+Compiled Graph Cache - Process-wide cache of compiled LangGraph graphs.
+
+Building a graph from the database (GraphBuilder → compile_from_schema) resolves
+models, tools and middleware and recompiles the StateGraph on every request.
+This module keeps compiled graphs around across requests, keyed by:
+
+- graph_id
+- content hash of the graph definition (nodes / edges / variables)
+- user scope (tools, sandboxes and credentials are resolved per user)
+- LLM parameter fingerprint (model / base_url / max_tokens / api_key hash,
+  plus the version of the model / credential configuration in the database)
+
+Because the content hash is part of the key, an edited graph can never hit a
+stale entry.  Explicit invalidation (save / deploy / revert / delete) only
+exists to free memory early.
+"""
+
+import asyncio
+import hashlib
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from loguru import logger
+
+try:
+    from cachetools import TTLCache  # type: ignore[import-untyped]
+
+    CACHE_AVAILABLE = True
+except ImportError:
+    TTLCache = None  # type: ignore[assignment, misc]
+    CACHE_AVAILABLE = False
+    logger.warning("[CompiledGraphCache] cachetools not available, compiled graph cache disabled")
+
+from app.core.settings import settings
+from app.models.graph import AgentGraph, GraphEdge, GraphNode
+
+CacheKey = Tuple[str, str, str, str]
+
+# 仅影响画布展示、不影响执行的变量
+_LAYOUT_ONLY_VARIABLES = frozenset({"viewport"})
+
+
+def _definition_payload(nodes: List[GraphNode], edges: List[GraphEdge]) -> Dict[str, Any]:
+    return {
+        "nodes": sorted(
+            (
+                {
+                    "id": str(node.id),
+                    "type": node.type,
+                    "prompt": node.prompt or "",
+                    "tools": node.tools or {},
+                    "memory": node.memory or {},
+                    "data": node.data or {},
+                }
+                for node in nodes
+            ),
+            key=lambda n: n["id"],
+        ),
+        "edges": sorted(
+            (
+                {
+                    "source": str(edge.source_node_id),
+                    "target": str(edge.target_node_id),
+                    "data": edge.data or {},
+                }
+                for edge in edges
+            ),
+            key=lambda e: (e["source"], e["target"]),
+        ),
+    }
+
+
+def _hash_payload(payload: Dict[str, Any]) -> str:
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def compute_graph_content_hash(graph: AgentGraph, nodes: List[GraphNode], edges: List[GraphEdge]) -> str:
+    """计算图定义的内容 hash（忽略位置、尺寸等纯布局字段）。"""
+    variables = graph.variables or {}
+    payload = {
+        "name": graph.name,
+        "variables": {k: v for k, v in variables.items() if k not in _LAYOUT_ONLY_VARIABLES},
+        **_definition_payload(nodes, edges),
+    }
+    return _hash_payload(payload)
+
+
+def compute_nodes_edges_hash(nodes: List[GraphNode], edges: List[GraphEdge]) -> str:
+    """只基于节点与边的内容 hash（不需要 AgentGraph 的分析场景使用）。"""
+    return _hash_payload(_definition_payload(nodes, edges))
+
+
+def compute_llm_fingerprint(
+    llm_model: Optional[str],
+    api_key: Optional[str],
+    base_url: Optional[str],
+    max_tokens: int,
+    model_config_version: str = "",
+) -> str:
+    """LLM 参数指纹，凭据变更后自动失效（不在 key 中保留明文 api_key）。
+
+    model_config_version 来自数据库中的模型 / 凭据配置（节点按名称解析的模型在构建时已绑定）。
+    """
+    raw = "|".join([llm_model or "", base_url or "", str(max_tokens), api_key or "", model_config_version])
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+class CompiledGraphCache:
+    """进程级已编译图缓存（LRU + TTL），带 single-flight 构建。"""
+
+    def __init__(self, maxsize: int = 128, ttl: int = 600, enabled: bool = True):
+        self._enabled = enabled and CACHE_AVAILABLE
+        self._cache: Any = TTLCache(maxsize=maxsize, ttl=ttl) if self._enabled else {}
+        self._build_locks: Dict[Hashable, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @staticmethod
+    def make_key(
+        graph_id: uuid.UUID | str,
+        content_hash: str,
+        user_scope: Optional[Any],
+        llm_fingerprint: str,
+    ) -> CacheKey:
+        return (str(graph_id), content_hash, str(user_scope or ""), llm_fingerprint)
+
+    def get(self, key: CacheKey) -> Optional[Any]:
+        if not self._enabled:
+            return None
+        compiled = self._cache.get(key)
+        if compiled is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return compiled
+
+    def put(self, key: CacheKey, compiled_graph: Any) -> None:
+        if not self._enabled:
+            return
+        # DeepAgents 图绑定了单次运行的共享 backend（_cleanup_backend），不可跨请求复用
+        if hasattr(compiled_graph, "_cleanup_backend"):
+            logger.debug(f"[CompiledGraphCache] Skip caching graph with per-run backend | graph_id={key[0]}")
+            return
+        self._cache[key] = compiled_graph
+
+    async def get_or_build(self, key: CacheKey, build: Callable[[], Awaitable[Any]]) -> Any:
+        """命中则直接返回；否则同一 key 只构建一次（并发请求等待同一次构建）。"""
+        if not self._enabled:
+            return await build()
+
+        cached = self.get(key)
+        if cached is not None:
+            logger.debug(f"[CompiledGraphCache] Hit | graph_id={key[0]} | hash={key[1][:12]}")
+            return cached
+
+        lock = self._build_locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    return cached
+                compiled_graph = await build()
+                self.put(key, compiled_graph)
+                return compiled_graph
+        finally:
+            if not lock.locked():
+                self._build_locks.pop(key, None)
+
+    def invalidate(self, graph_id: uuid.UUID | str) -> int:
+        """移除某个图的所有缓存条目，返回移除数量。"""
+        graph_id_str = str(graph_id)
+        stale_keys = [key for key in list(self._cache.keys()) if key[0] == graph_id_str]
+        for key in stale_keys:
+            self._cache.pop(key, None)
+        if stale_keys:
+            logger.debug(f"[CompiledGraphCache] Invalidated {len(stale_keys)} entries | graph_id={graph_id_str}")
+        return len(stale_keys)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._build_locks.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._enabled,
+            "size": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局已编译图缓存实例
+compiled_graph_cache = CompiledGraphCache(
+    maxsize=settings.graph_cache_max_size,
+    ttl=settings.graph_cache_ttl_seconds,
+    enabled=settings.graph_cache_enabled,
+)
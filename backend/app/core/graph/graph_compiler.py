@@ -43,6 +43,7 @@ from app.core.graph.node_executors import (
     LoopConditionNodeExecutor,
     RouterNodeExecutor,
 )
+from app.core.graph.node_type_registry import NodeTypeRegistry
 from app.core.graph.node_wrapper import NodeExecutionWrapper
 
 # ---------------------------------------------------------------------------
@@ -113,6 +114,8 @@ class _CompilerSession:
         self.condition_node_ids: Set[str] = set()
         self.loop_node_ids: Set[str] = set()
         self.edges_by_source: Dict[str, List] = {}
+        # fan-out target node id -> branch position (scheduling + task_results order)
+        self.parallel_branches: Dict[str, int] = {}
 
         self.executors: Dict[str, Any] = {}
         self.workflow: Any = None
@@ -208,6 +211,7 @@ class _CompilerSession:
     def _identify_node_classifications(self):
         loop_body_map = _identify_loop_bodies(self.schema)
         parallel_nodes = _identify_parallel_nodes(self.schema)
+        self.parallel_branches = _identify_parallel_branches(self.schema, parallel_nodes)
 
         logger.info(
             f"[GraphCompiler] Identified {len(loop_body_map)} loop body nodes | {len(parallel_nodes)} parallel nodes"
@@ -241,17 +245,26 @@ class _CompilerSession:
                 self.node_name_map,
             )
 
+            has_aggregator = any(node.type == "aggregator_node" for node in self.schema.nodes)
             for node in self.schema.nodes:
                 name = self.node_name_map[node.id]
                 executor = self.executors.get(node.id)
                 if executor:
+                    metadata = node.metadata
+                    branch_index = self.parallel_branches.get(node.id)
+                    if branch_index is not None and has_aggregator and "is_parallel_node" not in metadata:
+                        # Fan-out branches report into task_results for the aggregator
+                        metadata = {**metadata, "is_parallel_node": True}
                     wrapped = NodeExecutionWrapper(
                         executor,
                         node_id=str(node.id),
                         node_type=node.type,
-                        metadata=node.metadata,
+                        metadata=metadata,
                         node_config=node.config,
                         fallback_node_name=fallback_node_name if node.id != self.schema.fallback_node_id else None,
+                        branch_index=branch_index,
+                        concurrency_group=node.concurrency_group or NodeTypeRegistry.get_concurrency_group(node.type),
+                        concurrency=self.schema.concurrency,
                     )
                     self.workflow.add_node(name, wrapped)
         else:
@@ -513,3 +526,15 @@ def _identify_parallel_nodes(schema: GraphSchema) -> Set[str]:
         if edge.edge_type == EdgeType.NORMAL:
             out_counts[edge.source] = out_counts.get(edge.source, 0) + 1
     return {nid for nid, cnt in out_counts.items() if cnt > 1}
+
+
+def _identify_parallel_branches(schema: GraphSchema, parallel_nodes: Set[str]) -> Dict[str, int]:
+    """Map each fan-out target to its position among its fan-out node's outgoing edges."""
+    branches: Dict[str, int] = {}
+    next_index: Dict[str, int] = {}
+    for edge in schema.edges:
+        if edge.edge_type == EdgeType.NORMAL and edge.source in parallel_nodes:
+            index = next_index.get(edge.source, 0)
+            next_index[edge.source] = index + 1
+            branches.setdefault(edge.target, index)
+    return branches
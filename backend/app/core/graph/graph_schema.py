@@ -147,6 +147,12 @@ class NodeSchema(BaseModel):
     interrupt_before: bool = Field(default=False)
     interrupt_after: bool = Field(default=False)
 
+    # -- Scheduling ----------------------------------------------------------
+    concurrency_group: Optional[str] = Field(
+        default=None,
+        description="Concurrency group when running as a parallel branch (default: the node type's group)",
+    )
+
 
 # ---------------------------------------------------------------------------
 # Edge schema
@@ -175,6 +181,44 @@ class EdgeSchema(BaseModel):
     )
 
 
+# ---------------------------------------------------------------------------
+# Concurrency schema
+# ---------------------------------------------------------------------------
+
+
+class ConcurrencySchema(BaseModel):
+    """Concurrency limits for parallel fan-out branches of one graph run.
+
+    ``group_limits`` keys may be a node type (``"agent"``) or a concurrency
+    group (``"llm"``, ``"tool"``); a node-type key takes precedence.
+    ``weight`` is this graph's share of the process-wide group pools relative
+    to other concurrently running graphs.
+    """
+
+    max_parallel_branches: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Max branches of one run executing at the same time (None = unlimited)",
+    )
+    group_limits: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per node type / concurrency group limits within one run",
+    )
+    weight: float = Field(
+        default=1.0,
+        gt=0,
+        description="Weighted fair share in the shared LLM / tool pools",
+    )
+
+    @field_validator("group_limits")
+    @classmethod
+    def validate_group_limits(cls, v: Dict[str, int]) -> Dict[str, int]:
+        for key, limit in v.items():
+            if not isinstance(limit, int) or limit < 1:
+                raise ValueError(f"Concurrency limit for {key!r} must be a positive integer, got: {limit!r}")
+        return v
+
+
 # ---------------------------------------------------------------------------
 # Graph schema (top-level)
 # ---------------------------------------------------------------------------
@@ -213,6 +257,10 @@ class GraphSchema(BaseModel):
         default=None,
         description="Node ID to jump to if an unhandled exception occurs in any node",
     )
+    concurrency: ConcurrencySchema = Field(
+        default_factory=ConcurrencySchema,
+        description="Concurrency limits for parallel fan-out branches",
+    )
 
     # -- Metadata -----------------------------------------------------------
     metadata: Dict[str, Any] = Field(
@@ -297,6 +345,7 @@ class GraphSchema(BaseModel):
                     },
                     interrupt_before=config.get("interrupt_before", False),
                     interrupt_after=config.get("interrupt_after", False),
+                    concurrency_group=config.get("concurrency_group"),
                 )
             )
 
@@ -343,6 +392,13 @@ class GraphSchema(BaseModel):
             except Exception:
                 pass  # Skip malformed definitions
 
+        concurrency = ConcurrencySchema()
+        if isinstance(variables.get("concurrency"), dict):
+            try:
+                concurrency = ConcurrencySchema(**variables["concurrency"])
+            except Exception:
+                pass  # Ignore malformed limits
+
         return cls(
             name=getattr(graph, "name", "Untitled Graph"),
             description=getattr(graph, "description", None),
@@ -350,6 +406,7 @@ class GraphSchema(BaseModel):
             use_default_state=True,
             nodes=node_schemas,
             edges=edge_schemas,
+            concurrency=concurrency,
             metadata={
                 "graph_id": str(graph.id) if hasattr(graph, "id") else None,
                 "color": getattr(graph, "color", None),
@@ -5,61 +5,72 @@ Defines the state schema for LangGraph workflows.
 """
 
 import operator
+from collections.abc import Sequence
 from typing import Any, Dict, List, Optional
 
 from langchain_core.messages import BaseMessage
-from langgraph.graph import MessagesState
 from typing_extensions import Annotated, TypedDict
 
+from app.core.graph.state_channels import AppendOnlyChannel
 
-def add_messages(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
-    """Reducer function to combine message lists."""
-    return left + right
+
+def _concat(left: Optional[Sequence[Any]], right: Optional[Sequence[Any]]) -> List[Any]:
+    # Plain reducers feed BinaryOperatorAggregate channels, which are checkpointed as-is:
+    # the result must stay a plain list (only AppendOnlyChannel may hold an AppendOnlyList)
+    if not right:
+        return left if isinstance(left, list) else list(left or [])
+    return [*(left or ()), *right]
+
+
+def add_messages(left: Sequence[BaseMessage], right: Sequence[BaseMessage]) -> List[BaseMessage]:
+    """Reducer function to combine message lists (for plain reducer channels; GraphState uses AppendOnlyChannel)."""
+    return _concat(left, right)
 
 
-def add_todos(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def add_todos(left: Sequence[Dict[str, Any]], right: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Reducer function to combine todo lists.
 
     Simply combines the lists. TodoListMiddleware handles the actual todo management logic.
     """
-    if not left:
-        return right if right else []
-    if not right:
-        return left
-    # Combine both lists - TodoListMiddleware will handle deduplication and updates
-    return left + right
+    return _concat(left, right)
 
 
 def merge_dicts(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
-    """Merge two dictionaries, with right taking precedence for conflicts."""
-    result = left.copy() if left else {}
-    if right:
-        result.update(right)
-    return result
+    """Merge two dictionaries, with right taking precedence for conflicts.
+
+    Values are shared with the inputs (shallow merge); an empty side returns the other unchanged.
+    """
+    if not right:
+        return left if left is not None else {}
+    if not left:
+        return right
+    return {**left, **right}
 
 
-def add_task_results(left: List[Dict[str, Any]], right: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def add_task_results(left: Sequence[Dict[str, Any]], right: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Reducer function to combine task results for parallel execution."""
-    if not left:
-        return right if right else []
-    if not right:
-        return left
-    return left + right
+    return _concat(left, right)
 
 
 def merge_loop_states(left: Dict[str, Dict[str, Any]], right: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
     """Deep merge loop states to avoid concurrent write conflicts.
 
     Merges nested dictionaries, with right taking precedence for conflicts.
+    Structural sharing: only the entries present in ``right`` are rebuilt, all other
+    nested dicts are shared with ``left``.
     """
-    result = left.copy() if left else {}
-    if right:
-        for key, value in right.items():
-            if key in result:
-                # Deep merge nested dictionaries
-                result[key] = {**result[key], **value}
-            else:
-                result[key] = value.copy() if isinstance(value, dict) else value
+    if not right:
+        return left if left is not None else {}
+    if not left:
+        return right
+    result = left.copy()
+    for key, value in right.items():
+        current = result.get(key)
+        if isinstance(current, dict) and isinstance(value, dict):
+            # Deep merge nested dictionaries
+            result[key] = {**current, **value}
+        else:
+            result[key] = value
     return result
 
 
@@ -81,11 +92,12 @@ class BusinessState(TypedDict, total=False):
 
     Attributes:
         context: 业务上下文数据（用户输入、处理结果等）
-        messages: 消息列表（继承自 MessagesState）
+        messages: 消息列表（追加写入的 AppendOnlyChannel）
     """
 
     context: Dict[str, Any]
-    # 注意：messages 继承自 MessagesState，属于业务数据
+    # 不继承 MessagesState：messages 使用追加式通道，节点更新不再复制整段历史
+    messages: Annotated[List[BaseMessage], AppendOnlyChannel]
 
 
 class ExecutionState(TypedDict, total=False):
@@ -119,7 +131,8 @@ class ExecutionState(TypedDict, total=False):
     max_loop_iterations: int
 
     # Parallel Execution
-    task_results: Annotated[List[Dict[str, Any]], add_task_results]
+    # Append-only channels: appends are amortized O(1), nodes read without copying
+    task_results: Annotated[List[Dict[str, Any]], AppendOnlyChannel]
     parallel_results: Annotated[List[Any], operator.add]
 
     # State Isolation (Scoped State)
@@ -129,10 +142,10 @@ class ExecutionState(TypedDict, total=False):
     node_outputs: Annotated[Dict[str, Any], merge_dicts]
 
     # Todos for TodoListMiddleware
-    todos: Annotated[List[Dict[str, Any]], add_todos]
+    todos: Annotated[List[Dict[str, Any]], AppendOnlyChannel]
 
 
-class GraphState(MessagesState, BusinessState, ExecutionState):  # type: ignore[misc]
+class GraphState(BusinessState, ExecutionState):  # type: ignore[misc]
     """工作流图状态：组合业务状态和执行状态。
 
     这个类组合了 BusinessState（业务数据）和 ExecutionState（执行元数据），
@@ -173,13 +186,13 @@ _TYPE_MAP: Dict[str, type] = {
     "any": Any,
 }
 
-# Mapping from reducer type names to reducer callables
+# Mapping from reducer type names to reducer callables (or LangGraph channel classes)
 _REDUCER_MAP: Dict[str, Any] = {
     "replace": None,  # No reducer = replace semantics
     "add": operator.add,
     "append": operator.add,
     "merge": merge_dicts,
-    "add_messages": add_messages,
+    "add_messages": AppendOnlyChannel,
 }
 
 
@@ -0,0 +1,141 @@
+"""
+Graph Topology - Adjacency lists and linear-time structural queries.
+
+Validation and variable analysis used to rescan every edge per node (and per
+recursion level), which is quadratic on large graphs. ``GraphTopology`` builds
+successor / predecessor lists once; every query below is O(V + E) on first use
+and cached afterwards:
+
+- strongly connected components (iterative Tarjan, no recursion limit)
+- nodes lying on a cycle / nodes from which a cycle is reachable
+- ancestors (all upstream nodes) of a node
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+NodeKey = Hashable
+
+
+class GraphTopology:
+    """Immutable directed graph view with cached SCC and reachability queries."""
+
+    def __init__(self, node_ids: Iterable[NodeKey], edges: Iterable[Tuple[NodeKey, NodeKey]]):
+        self.successors: Dict[NodeKey, List[NodeKey]] = {}
+        self.predecessors: Dict[NodeKey, List[NodeKey]] = {}
+        for node_id in node_ids:
+            self.successors.setdefault(node_id, [])
+            self.predecessors.setdefault(node_id, [])
+        for source, target in edges:
+            for node_id in (source, target):
+                if node_id not in self.successors:
+                    self.successors[node_id] = []
+                    self.predecessors[node_id] = []
+            self.successors[source].append(target)
+            self.predecessors[target].append(source)
+        self._components: Optional[List[List[NodeKey]]] = None
+        self._cyclic: Optional[Set[NodeKey]] = None
+        self._reaches_cycle: Optional[Set[NodeKey]] = None
+        self._ancestors: Dict[NodeKey, List[NodeKey]] = {}
+
+    def strongly_connected_components(self) -> List[List[NodeKey]]:
+        """SCCs in reverse topological order (every component comes after the ones it points to)."""
+        if self._components is not None:
+            return self._components
+
+        index: Dict[NodeKey, int] = {}
+        lowlink: Dict[NodeKey, int] = {}
+        on_stack: Set[NodeKey] = set()
+        stack: List[NodeKey] = []
+        components: List[List[NodeKey]] = []
+        counter = 0
+
+        for root in self.successors:
+            if root in index:
+                continue
+            # Explicit DFS stack of (node, next successor position)
+            work: List[Tuple[NodeKey, int]] = [(root, 0)]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, position = work[-1]
+                successors = self.successors[node]
+                if position < len(successors):
+                    work[-1] = (node, position + 1)
+                    child = successors[position]
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, 0))
+                    elif child in on_stack:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+
+        self._components = components
+        return components
+
+    def cyclic_nodes(self) -> Set[NodeKey]:
+        """Nodes that lie on at least one cycle (including self-loops)."""
+        if self._cyclic is None:
+            cyclic: Set[NodeKey] = set()
+            for component in self.strongly_connected_components():
+                if len(component) > 1 or component[0] in self.successors[component[0]]:
+                    cyclic.update(component)
+            self._cyclic = cyclic
+        return self._cyclic
+
+    def nodes_reaching_cycle(self) -> Set[NodeKey]:
+        """Nodes from which some cycle is reachable (cyclic nodes included)."""
+        if self._reaches_cycle is None:
+            cyclic = self.cyclic_nodes()
+            reaches: Set[NodeKey] = set()
+            # Reverse topological order: successors' components are already decided
+            for component in self.strongly_connected_components():
+                if component[0] in cyclic or any(
+                    child in reaches for member in component for child in self.successors[member]
+                ):
+                    reaches.update(component)
+            self._reaches_cycle = reaches
+        return self._reaches_cycle
+
+    def ancestors(self, node_id: NodeKey) -> List[NodeKey]:
+        """All upstream nodes of ``node_id`` in depth-first order over incoming edges.
+
+        The node itself is included when it lies on a cycle (e.g. a loop body sees its own outputs).
+        """
+        cached = self._ancestors.get(node_id)
+        if cached is not None:
+            return cached
+        result: List[NodeKey] = []
+        seen: Set[NodeKey] = set()
+        work: List[Tuple[NodeKey, int]] = [(node_id, 0)]
+        while work:
+            node, position = work[-1]
+            predecessors = self.predecessors.get(node, [])
+            if position >= len(predecessors):
+                work.pop()
+                continue
+            work[-1] = (node, position + 1)
+            parent = predecessors[position]
+            if parent not in seen:
+                seen.add(parent)
+                result.append(parent)
+                work.append((parent, 0))
+        self._ancestors[node_id] = result
+        return result
@@ -0,0 +1,379 @@
+"""
+HTTP Node Client - Pooled, retrying, cache-aware HTTP client for HTTP Request nodes.
+
+- Connection pool: one shared ``httpx.AsyncClient`` per scheme/host/port, so
+  repeated calls reuse connections and TLS sessions (HTTP/2 when ``h2`` is
+  installed). The pool is LRU-bounded; evicted clients are closed.
+- Retries: exponential backoff with jitter for transport errors and
+  429 / 502 / 503 / 504 (``Retry-After`` honored). Non-idempotent methods are
+  only retried on connect failures and 429 / 503, where the server did not
+  process the request.
+- Size cutoff: bodies are streamed and the request is aborted once the
+  configured maximum is exceeded.
+- Caching (opt-in per node, GET only): fresh responses (``Cache-Control:
+  max-age``) are served from memory; stale ones with ``ETag`` /
+  ``Last-Modified`` are revalidated with a conditional request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Callable, Dict, Mapping, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+from app.core.settings import settings
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+LOG_PREFIX = "[HttpNodeClient]"
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+_MAX_RETRIES = 10
+
+
+class ResponseTooLargeError(Exception):
+    """Response body exceeded the configured maximum size."""
+
+
+@dataclass
+class HttpResponseData:
+    """Fully read (size-bounded) HTTP response."""
+
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    encoding: Optional[str] = None
+    cached: bool = False
+    attempts: int = 1
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+
+# ==================== Response Cache ====================
+
+
+@dataclass
+class _CacheEntry:
+    response: HttpResponseData
+    fresh_until: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def _parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _freshness_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds the response stays fresh; None when it must not be stored."""
+    directives = _parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0.0, float(directives[name] or 0))
+            except ValueError:
+                return 0.0
+    expires = headers.get("expires")
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires).timestamp()
+            date = headers.get("date")
+            now = parsedate_to_datetime(date).timestamp() if date else time.time()
+            return max(0.0, expires_at - now)
+        except (TypeError, ValueError):
+            return 0.0
+    return 0.0
+
+
+class HttpResponseCache:
+    """In-process LRU cache of GET responses, bounded by entry count and entry size."""
+
+    def __init__(self, max_entries: int = 512, max_entry_bytes: int = 1024 * 1024):
+        self.max_entries = max(1, max_entries)
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: OrderedDict[Tuple, _CacheEntry] = OrderedDict()
+
+    @staticmethod
+    def key(url: str, headers: Mapping[str, str]) -> Tuple:
+        return (url, tuple(sorted((k.lower(), v) for k, v in headers.items())))
+
+    def get(self, key: Tuple) -> Optional[_CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def store(self, key: Tuple, response: HttpResponseData) -> None:
+        fresh_for = _freshness_seconds(response.headers)
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if (
+            response.status_code != 200
+            or fresh_for is None
+            or len(response.content) > self.max_entry_bytes
+            or (fresh_for <= 0 and not etag and not last_modified)
+        ):
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = _CacheEntry(
+            response=response,
+            fresh_until=time.monotonic() + fresh_for,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def refresh(self, key: Tuple, entry: _CacheEntry, headers: Mapping[str, str]) -> None:
+        """A 304 revalidated the entry: update freshness from the new headers."""
+        fresh_for = _freshness_seconds({**entry.response.headers, **headers})
+        if fresh_for is None:
+            self._entries.pop(key, None)
+            return
+        entry.fresh_until = time.monotonic() + fresh_for
+        entry.etag = headers.get("etag", entry.etag)
+        self._entries.move_to_end(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ==================== Connection Pool ====================
+
+
+def _new_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.http_node_http2_enabled and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=settings.http_node_max_connections_per_host,
+            max_keepalive_connections=settings.http_node_max_keepalive_per_host,
+        ),
+    )
+
+
+def _pool_key(url: httpx.URL) -> str:
+    return f"{url.scheme}://{url.host}:{url.port or ''}"
+
+
+@dataclass
+class _PooledClient:
+    client: httpx.AsyncClient
+    loop: asyncio.AbstractEventLoop  # connections cannot cross event loops
+    in_use: int = 0
+    evicted: bool = False
+
+
+class HttpClientPool:
+    """One ``httpx.AsyncClient`` per origin, LRU-bounded.
+
+    Evicted clients are closed as soon as no in-flight request is using them,
+    so user-controlled URLs cannot grow the pool (and its sockets) without bound.
+    """
+
+    def __init__(self, max_clients: int, client_factory: Callable[[], httpx.AsyncClient] = _new_client):
+        self.max_clients = max_clients
+        self._client_factory = client_factory
+        self._clients: OrderedDict[str, _PooledClient] = OrderedDict()
+        self._closing: set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def lease(self, url: httpx.URL) -> AsyncIterator[httpx.AsyncClient]:
+        """Borrow the client for the URL's origin for the duration of a request."""
+        pooled = self._get(url)
+        pooled.in_use += 1
+        try:
+            yield pooled.client
+        finally:
+            pooled.in_use -= 1
+            if pooled.evicted and not pooled.in_use and not pooled.client.is_closed:
+                await pooled.client.aclose()
+
+    def _get(self, url: httpx.URL) -> _PooledClient:
+        pool_key = _pool_key(url)
+        loop = asyncio.get_running_loop()
+        pooled = self._clients.get(pool_key)
+        if pooled is not None and pooled.loop is loop and not pooled.client.is_closed:
+            self._clients.move_to_end(pool_key)
+            return pooled
+        if pooled is not None:
+            self._retire(self._clients.pop(pool_key))
+        pooled = _PooledClient(client=self._client_factory(), loop=loop)
+        self._clients[pool_key] = pooled
+        while self.max_clients > 0 and len(self._clients) > self.max_clients:
+            _, evicted = self._clients.popitem(last=False)
+            self._retire(evicted)
+        return pooled
+
+    def _retire(self, pooled: _PooledClient) -> None:
+        pooled.evicted = True
+        if pooled.in_use or pooled.client.is_closed:
+            return  # closed by the last lease holder
+        if pooled.loop is asyncio.get_running_loop():
+            task = pooled.loop.create_task(pooled.client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def close_all(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        loop = asyncio.get_running_loop()
+        for pooled in clients:
+            pooled.evicted = True
+            if pooled.loop is loop and not pooled.in_use:
+                await pooled.client.aclose()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+
+client_pool = HttpClientPool(max_clients=settings.http_node_max_pooled_hosts)
+response_cache = HttpResponseCache(
+    max_entries=settings.http_node_cache_max_entries,
+    max_entry_bytes=settings.http_node_cache_max_entry_bytes,
+)
+
+
+async def close_all_clients() -> None:
+    """Close all pooled clients. Call on shutdown."""
+    await client_pool.close_all()
+
+
+# ==================== Request ====================
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    max_delay = settings.http_node_retry_max_delay
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(max(0.0, float(retry_after)), max_delay)
+            except ValueError:
+                try:
+                    return min(max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()), max_delay)
+                except (TypeError, ValueError):
+                    pass
+    # Full jitter exponential backoff
+    return random.uniform(0, min(max_delay, settings.http_node_retry_base_delay * (2**attempt)))
+
+
+async def _read_bounded(response: httpx.Response, max_bytes: int) -> bytes:
+    content_length = response.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise ResponseTooLargeError(f"Response of {content_length} bytes exceeds limit of {max_bytes} bytes")
+    chunks = []
+    received = 0
+    async for chunk in response.aiter_bytes():
+        received += len(chunk)
+        if received > max_bytes:
+            raise ResponseTooLargeError(f"Response exceeds limit of {max_bytes} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def send_request(
+    method: str,
+    url: str,
+    headers: Optional[Mapping[str, str]] = None,
+    content: Optional[str | bytes] = None,
+    timeout: float = 30.0,
+    max_retries: int = 3,
+    max_response_bytes: Optional[int] = None,
+    use_cache: bool = False,
+) -> HttpResponseData:
+    """Send a request through the pooled client with retries, size cutoff and optional caching.
+
+    Raises:
+        httpx.HTTPError: Transport error after the last retry.
+        ResponseTooLargeError: The body exceeded ``max_response_bytes``.
+    """
+    method = method.upper()
+    request_url = httpx.URL(url)
+    request_headers: Dict[str, str] = dict(headers or {})
+    max_bytes = max_response_bytes or settings.http_node_max_response_bytes
+    max_retries = min(max(0, max_retries), _MAX_RETRIES)
+
+    cache_key: Optional[Tuple] = None
+    entry: Optional[_CacheEntry] = None
+    if use_cache and method == "GET":
+        cache_key = HttpResponseCache.key(str(request_url), request_headers)
+        entry = response_cache.get(cache_key)
+        if entry is not None:
+            if entry.fresh_until > time.monotonic():
+                return replace(entry.response, cached=True, attempts=0)
+            if entry.etag:
+                request_headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request_headers["If-Modified-Since"] = entry.last_modified
+
+    async with client_pool.lease(request_url) as client:
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            try:
+                async with client.stream(
+                    method, request_url, headers=request_headers, content=content, timeout=timeout
+                ) as response:
+                    status = response.status_code
+                    retry_status = status in RETRYABLE_STATUS_CODES and (
+                        method in IDEMPOTENT_METHODS or status in (429, 503)
+                    )
+                    if retry_status and attempt < max_retries:
+                        await response.aclose()
+                    else:
+                        if status == 304 and entry is not None and cache_key is not None:
+                            response_cache.refresh(cache_key, entry, response.headers)
+                            return replace(entry.response, cached=True, attempts=attempt + 1)
+                        body = await _read_bounded(response, max_bytes)
+                        result = HttpResponseData(
+                            status_code=response.status_code,
+                            headers=dict(response.headers),
+                            content=body,
+                            encoding=response.encoding,
+                            attempts=attempt + 1,
+                        )
+                        if cache_key is not None:
+                            response_cache.store(cache_key, result)
+                        return result
+            except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+                # Non-idempotent requests may have reached the server: only retry connect failures
+                retryable = method in IDEMPOTENT_METHODS or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if not retryable or attempt >= max_retries:
+                    raise
+                logger.warning(f"{LOG_PREFIX} {method} {request_url} failed (attempt {attempt + 1}): {e}")
+                response = None
+            else:
+                logger.warning(
+                    f"{LOG_PREFIX} {method} {request_url} returned {response.status_code} (attempt {attempt + 1})"
+                )
+            await asyncio.sleep(_retry_delay(attempt, response))
+            attempt += 1
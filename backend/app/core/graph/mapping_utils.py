@@ -78,6 +78,10 @@ def apply_node_output_mapping(
     raw_payload = (
         result.dict() if hasattr(result, "dict") else (result if isinstance(result, dict) else {"value": result})
     )
+    if raw_payload is return_dict:
+        # The executor's result dict doubles as the state update: store a copy without
+        # node_outputs, otherwise the payload would contain itself (unserializable cycle)
+        raw_payload = {k: v for k, v in raw_payload.items() if k != "node_outputs"}
     return_dict["node_outputs"] = {node_id: raw_payload}
 
     if not output_mapping:
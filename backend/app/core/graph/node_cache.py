@@ -0,0 +1,134 @@
+"""
+Node Result Cache - Content-addressed memoization of deterministic node results.
+
+Nodes opt in with ``memoize: true`` in their config (optional
+``memoize_ttl_seconds``). Only executors that declare their inputs through
+``memo_inputs(state)`` can be memoized; the cache key is a SHA-256 over:
+
+- node type and node config
+- universal mapped inputs (``context.mapped_inputs``)
+- the executor's declared inputs (e.g. resolved tool args, referenced variables)
+
+Results are stored in a ``GenerationalCache`` scoped by node id (in-process
+LRU plus a shared Redis tier when available), so ``invalidate(node_ids)``
+makes every earlier result of those nodes unreachable in both tiers.
+"""
+
+import base64
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+from app.core.graph.expression_evaluator import StateWrapper
+from app.core.graph.state_channels import AppendOnlyList
+from app.core.settings import settings
+from app.utils.generational_cache import GenerationalCache
+
+LOG_PREFIX = "[NodeResultCache]"
+
+_REDIS_PREFIX = "node_cache"
+
+
+def _canonical(value: Any) -> Any:
+    """JSON fallback for state values (messages, append-only lists, wrappers)."""
+    if isinstance(value, AppendOnlyList):
+        return value.snapshot()
+    if isinstance(value, StateWrapper):
+        return dict(value.items())
+    if hasattr(value, "model_dump"):
+        return {"__type__": type(value).__name__, **value.model_dump()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(item) for item in value)
+    if isinstance(value, bytes):
+        return hashlib.sha256(value).hexdigest()
+    return repr(value)
+
+
+def compute_input_digest(
+    node_type: str,
+    node_config: Dict[str, Any],
+    mapped_inputs: Any,
+    inputs: Dict[str, Any],
+) -> str:
+    """Content hash of everything that determines a memoizable node's result."""
+    payload = {
+        "node_type": node_type,
+        "config": node_config,
+        "mapped_inputs": mapped_inputs,
+        "inputs": inputs,
+    }
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=_canonical)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+def is_cacheable_result(result: Any) -> bool:
+    """Only successful plain-dict results are stored (errors and Commands are not)."""
+    return isinstance(result, dict) and "result" in result and "error" not in result and "error_msg" not in result
+
+
+class NodeResultCache:
+    """Memoized node results, scoped per node id (see ``GenerationalCache``)."""
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 3600.0, redis_enabled: bool = True):
+        self._serde: Any = None
+        self._cache = GenerationalCache(
+            redis_prefix=_REDIS_PREFIX,
+            log_prefix=LOG_PREFIX,
+            max_entries=max_entries,
+            default_ttl=default_ttl,
+            redis_enabled=redis_enabled,
+            dumps=self._dumps,
+            loads=self._loads,
+        )
+
+    # ==================== Serialization (Redis tier) ====================
+
+    def _serializer(self) -> Any:
+        if self._serde is None:
+            from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+            self._serde = JsonPlusSerializer()
+        return self._serde
+
+    def _dumps(self, value: Any) -> str:
+        type_, data = self._serializer().dumps_typed(value)
+        return json.dumps({"t": type_, "d": base64.b64encode(data).decode("ascii")})
+
+    def _loads(self, raw: str) -> Any:
+        envelope = json.loads(raw)
+        return self._serializer().loads_typed((envelope["t"], base64.b64decode(envelope["d"])))
+
+    # ==================== Get / Set ====================
+
+    async def make_key(self, node_id: str, digest: str) -> str:
+        return await self._cache.make_key(node_id, digest)
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(hit, value)``; values are deep copies, safe for reducers to mutate."""
+        return await self._cache.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self._cache.set(key, value, ttl)
+
+    # ==================== Invalidation ====================
+
+    async def invalidate(self, node_ids: Iterable[str]) -> None:
+        """Drop every cached result of the given nodes."""
+        for node_id in node_ids:
+            generation = await self._cache.invalidate(str(node_id))
+            logger.info(f"{LOG_PREFIX} Invalidated node results | node_id={node_id} | generation={generation}")
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+node_cache = NodeResultCache(
+    max_entries=settings.node_cache_max_entries,
+    default_ttl=settings.node_cache_default_ttl_seconds,
+    redis_enabled=settings.node_cache_redis_enabled,
+)
@@ -27,13 +27,17 @@ from app.core.graph.executors.transform import (
     JSONParserNodeExecutor,
 )
 from app.core.graph.expression_evaluator import (
+    CompiledExpression,
     StateWrapper,
+    compile_condition_expression,
     resolve_variable_expressions,
     validate_condition_expression,
 )
 
 __all__ = [
     "validate_condition_expression",
+    "compile_condition_expression",
+    "CompiledExpression",
     "resolve_variable_expressions",
     "StateWrapper",
     "AgentNodeExecutor",
@@ -42,6 +42,7 @@ class NodeTypeMetadata:
         description: str = "",
         default_reads: Optional[List[str]] = None,
         default_writes: Optional[List[str]] = None,
+        concurrency_group: Optional[str] = None,
     ):
         self.executor_class = executor_class
         self.frontend_type = frontend_type
@@ -53,6 +54,8 @@ class NodeTypeMetadata:
         # ["*"] means all fields (wildcard) — backward-compatible default
         self.default_reads: List[str] = default_reads or ["*"]
         self.default_writes: List[str] = default_writes or ["*"]
+        # Shared concurrency pool for parallel branches of this type ("llm" / "tool"); None = unpooled
+        self.concurrency_group = concurrency_group
 
 
 class NodeTypeRegistry:
@@ -68,6 +71,7 @@ class NodeTypeRegistry:
             description="LLM Agent node with tools and middleware support",
             default_reads=["messages", "context"],
             default_writes=["messages", "current_node"],
+            concurrency_group="llm",
         ),
         "code_agent": NodeTypeMetadata(
             executor_class=CodeAgentNodeExecutor,
@@ -78,6 +82,7 @@ class NodeTypeRegistry:
             description="Python code execution agent with Thought-Code-Observation loop",
             default_reads=["messages", "context"],
             default_writes=["messages", "current_node", "context"],
+            concurrency_group="llm",
         ),
         "condition": NodeTypeMetadata(
             executor_class=ConditionNodeExecutor,
@@ -98,6 +103,7 @@ class NodeTypeRegistry:
             description="AI Decision Split routing node",
             default_reads=["*"],
             default_writes=["route_decision", "route_history"],
+            concurrency_group="llm",
         ),
         "router_node": NodeTypeMetadata(
             executor_class=RouterNodeExecutor,
@@ -148,6 +154,7 @@ class NodeTypeRegistry:
             description="Tool execution node",
             default_reads=["messages", "context"],
             default_writes=["messages", "context", "current_node"],
+            concurrency_group="tool",
         ),
         "function_node": NodeTypeMetadata(
             executor_class=FunctionNodeExecutor,
@@ -158,6 +165,7 @@ class NodeTypeRegistry:
             description="Custom function execution node (requires sandboxing)",
             default_reads=["messages", "context"],
             default_writes=["messages", "context", "current_node"],
+            concurrency_group="tool",
         ),
         "aggregator_node": NodeTypeMetadata(
             executor_class=AggregatorNodeExecutor,
@@ -188,6 +196,7 @@ class NodeTypeRegistry:
             description="Enhanced HTTP request node with retry and auth",
             default_reads=["messages", "context"],
             default_writes=["messages", "context", "current_node"],
+            concurrency_group="tool",
         ),
         "get_state_node": NodeTypeMetadata(
             executor_class=GetStateNodeExecutor,
@@ -218,6 +227,7 @@ class NodeTypeRegistry:
             description="Remote Agent-to-Agent node",
             default_reads=["messages", "context"],
             default_writes=["messages", "current_node"],
+            concurrency_group="llm",
         ),
     }
 
@@ -262,6 +272,12 @@ class NodeTypeRegistry:
         metadata = cls.get_metadata(node_type)
         return metadata.supports_parallel if metadata else True
 
+    @classmethod
+    def get_concurrency_group(cls, node_type: str) -> Optional[str]:
+        """Get the shared branch concurrency group of a node type."""
+        metadata = cls.get_metadata(node_type)
+        return metadata.concurrency_group if metadata else None
+
     @classmethod
     def requires_handle_mapping(cls, node_type: str) -> bool:
         """Check if node type requires Handle ID mapping."""
@@ -280,6 +296,7 @@ class NodeTypeRegistry:
         description: str = "",
         default_reads: Optional[List[str]] = None,
         default_writes: Optional[List[str]] = None,
+        concurrency_group: Optional[str] = None,
     ) -> None:
         """Register a new node type (for extension)."""
         cls._registry[node_type] = NodeTypeMetadata(
@@ -291,6 +308,7 @@ class NodeTypeRegistry:
             description=description,
             default_reads=default_reads,
             default_writes=default_writes,
+            concurrency_group=concurrency_group,
         )
         logger.info(f"[NodeTypeRegistry] Registered new node type: {node_type}")
 
@@ -4,6 +4,8 @@ Node Execution Wrapper - Provides unified node execution with hooks.
 Automatically handles:
 - Loop body state updates
 - Parallel execution result collection
+- Parallel branch concurrency limits
+- Opt-in result memoization (deterministic nodes)
 - Trace recording
 - Error handling
 - Command object support (optional)
@@ -11,6 +13,7 @@ Automatically handles:
 
 from typing import Any, Dict, Optional, Union, cast
 
+from langchain_core.callbacks.manager import adispatch_custom_event
 from langchain_core.runnables import RunnableConfig
 from loguru import logger
 
@@ -22,8 +25,11 @@ except ImportError:
     COMMAND_AVAILABLE = False
     Command = None  # type: ignore[assignment,misc]
 
+from app.core.graph.branch_scheduler import branch_scheduler
 from app.core.graph.expression_evaluator import resolve_variable_expressions
+from app.core.graph.graph_schema import ConcurrencySchema
 from app.core.graph.graph_state import GraphState
+from app.core.graph.node_cache import compute_input_digest, is_cacheable_result, node_cache
 from app.core.graph.node_executors import increment_loop_count
 from app.core.graph.trace_utils import create_node_trace, log_node_execution
 
@@ -34,6 +40,8 @@ class NodeExecutionWrapper:
     自动处理：
     - 循环体状态更新
     - 并行执行结果收集
+    - 并行分支并发限制（fan-out 分支节点执行前获取调度槽位）
+    - 节点结果缓存（config 中 memoize=true 且执行器声明 memo_inputs 时按输入内容 hash 复用结果）
     - Trace 记录
     - 错误处理
     """
@@ -46,6 +54,9 @@ class NodeExecutionWrapper:
         metadata: Optional[Dict[str, Any]] = None,
         fallback_node_name: Optional[str] = None,
         node_config: Optional[Dict[str, Any]] = None,
+        branch_index: Optional[int] = None,
+        concurrency_group: Optional[str] = None,
+        concurrency: Optional[ConcurrencySchema] = None,
     ):
         self.executor = executor
         self.node_id = node_id
@@ -53,6 +64,16 @@ class NodeExecutionWrapper:
         self.metadata = metadata or {}
         self.fallback_node_name = fallback_node_name
         self.node_config = node_config or {}
+        # fan-out 分支：branch_index 为分支序号（None 表示非并行分支节点）
+        self.branch_index = branch_index
+        self.concurrency_group = concurrency_group
+        self.concurrency = concurrency
+        # 结果缓存：节点显式开启，且执行器能声明决定结果的输入
+        self.memoize = bool(self.node_config.get("memoize")) and callable(getattr(executor, "memo_inputs", None))
+        try:
+            self.memoize_ttl: Optional[float] = float(self.node_config.get("memoize_ttl_seconds") or 0) or None
+        except (TypeError, ValueError):
+            self.memoize_ttl = None
 
     async def _before_execute(self, state: GraphState) -> GraphState:
         """执行前钩子：初始化状态 & 解析 Data Pill 变量表达式。"""
@@ -73,8 +94,10 @@ class NodeExecutionWrapper:
         try:
             context = state.get("context", {})
             if isinstance(context, dict):
-                resolved_context = resolve_variable_expressions(context, cast(Dict[str, Any], dict(state)))
-                if resolved_context != context:
+                # Templates are compiled once per string; contexts without references come back as the
+                # same object, and the state is read only for the referenced keys (no copy)
+                resolved_context = resolve_variable_expressions(context, state)
+                if resolved_context is not context:
                     state = {**state, "context": resolved_context}
                     logger.debug(
                         f"[NodeExecutionWrapper] Resolved Data Pill expressions in context | node_id={self.node_id}"
@@ -184,6 +207,9 @@ class NodeExecutionWrapper:
                 "result": result_value,
                 "task_id": self.node_id,
             }
+            if self.branch_index is not None:
+                # 聚合节点按分支序号排序，结果顺序与完成先后无关
+                task_result["branch_index"] = self.branch_index
 
             # 检查是否有错误
             if "error" in update_dict or "error_msg" in update_dict:
@@ -201,6 +227,10 @@ class NodeExecutionWrapper:
                 f"node_id={self.node_id} | status={task_result['status']}"
             )
 
+        # fan-out 分支在同一超步内执行：current_node 是单值通道，多个分支同时写入会触发 InvalidUpdateError
+        if self.branch_index is not None and isinstance(update_dict, dict) and "current_node" in update_dict:
+            update_dict = {k: v for k, v in update_dict.items() if k != "current_node"}
+
         # Apply Universal Output Mapping
         if self.node_config:
             try:
@@ -223,6 +253,52 @@ class NodeExecutionWrapper:
         # 返回更新后的字典
         return update_dict  # type: ignore[return-value]
 
+    async def _invoke(self, state: GraphState, config: Optional[RunnableConfig]) -> Any:
+        import inspect
+
+        sig = inspect.signature(self.executor)
+        if "config" in sig.parameters:
+            return await self.executor(state, config=config)
+        return await self.executor(state)
+
+    async def _memo_key(self, state: GraphState) -> Optional[str]:
+        """缓存 key：节点配置 + 映射输入 + 执行器声明的输入；None 表示本次不可缓存。"""
+        if not self.memoize:
+            return None
+        try:
+            inputs = self.executor.memo_inputs(state)
+            if inputs is None:
+                return None
+            context = state.get("context", {})
+            mapped_inputs = context.get("mapped_inputs") if isinstance(context, dict) else None
+            digest = compute_input_digest(self.node_type, self.node_config, mapped_inputs, inputs)
+            return await node_cache.make_key(self.node_id, digest)
+        except Exception as e:
+            logger.warning(
+                f"[NodeExecutionWrapper] Failed to compute memoization key | "
+                f"node_id={self.node_id} | error={type(e).__name__}: {e}"
+            )
+            return None
+
+    async def _report_cache(self, status: str, key: Optional[str], config: Optional[RunnableConfig]) -> None:
+        """缓存命中情况作为自定义事件上报，写入节点 observation 的 metadata。"""
+        if config is None:
+            return
+        try:
+            await adispatch_custom_event(
+                "node_cache",
+                {"node_id": self.node_id, "status": status, "key": key, "ttl": self.memoize_ttl},
+                config=config,
+            )
+        except Exception as e:
+            logger.debug(f"[NodeExecutionWrapper] Failed to report cache status | node_id={self.node_id} | error={e}")
+
+    @staticmethod
+    def _run_key(config: Optional[RunnableConfig]) -> str:
+        """调度使用的运行标识（同一线程同一时刻只有一个运行）"""
+        configurable = (config or {}).get("configurable") or {}
+        return str(configurable.get("thread_id") or "default")
+
     async def __call__(
         self, state: GraphState, config: Optional[RunnableConfig] = None
     ) -> Union[Dict[str, Any], Command]:
@@ -239,14 +315,30 @@ class NodeExecutionWrapper:
             # 执行前钩子
             state = await self._before_execute(state)
 
-            # 执行节点
-            import inspect
-
-            sig = inspect.signature(self.executor)
-            if "config" in sig.parameters:
-                result = await self.executor(state, config=config)
-            else:
-                result = await self.executor(state)
+            # 结果缓存查找（命中时跳过执行与调度）
+            cache_key = await self._memo_key(state)
+            cache_hit = False
+            if cache_key is not None:
+                cache_hit, result = await node_cache.get(cache_key)
+
+            if not cache_hit:
+                # 执行节点（并行分支先获取调度槽位）
+                if self.branch_index is not None:
+                    async with branch_scheduler.slot(
+                        self._run_key(config), self.node_type, self.concurrency_group, self.concurrency
+                    ):
+                        result = await self._invoke(state, config)
+                else:
+                    result = await self._invoke(state, config)
+
+                # 只缓存执行器的原始成功结果（循环计数 / task_results 等由后置钩子按当前状态生成）
+                if cache_key is not None and is_cacheable_result(result):
+                    await node_cache.set(cache_key, result, self.memoize_ttl)
+
+            if self.memoize:
+                cache_status = "bypass" if cache_key is None else ("hit" if cache_hit else "miss")
+                trace.metadata["cache"] = cache_status
+                await self._report_cache(cache_status, cache_key, config)
 
             # 执行后钩子（自动更新状态）
             result = await self._after_execute(state, result)
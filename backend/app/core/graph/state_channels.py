@@ -0,0 +1,206 @@
+"""
+State Channels - Append-only sequences and channels for list state fields.
+
+``left + right`` reducers copy the whole list on every node update, so a
+long-running loop that appends one message per step does O(n) work per step.
+``AppendOnlyList`` is a persistent sequence that shares one growing buffer
+between versions: extending the newest version is amortized O(len(items)),
+and older versions keep seeing only their own prefix. Branching from an older
+version (rare: only when two writers extend the same version) copies the
+prefix first.
+
+``AppendOnlyChannel`` stores the sequence in a LangGraph channel. Nodes read
+the sequence directly (no copy); checkpoints receive a plain ``list`` so
+checkpoint serializers see the same type as before.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+from typing import Any, Generic, Optional, TypeVar, overload
+
+from langgraph.channels.base import BaseChannel
+from typing_extensions import Self
+
+try:
+    from langgraph.types import Overwrite
+
+    OVERWRITE_AVAILABLE = True
+except ImportError:
+    OVERWRITE_AVAILABLE = False
+    Overwrite = None  # type: ignore[assignment,misc]
+
+T = TypeVar("T")
+
+
+class AppendOnlyList(Sequence[T], Generic[T]):
+    """Persistent append-only sequence that behaves as a read-only list."""
+
+    __slots__ = ("_buffer", "_length", "_snapshot")
+
+    def __init__(self, items: Iterable[T] = ()):
+        self._buffer: list[T] = list(items)
+        self._length = len(self._buffer)
+        self._snapshot: Optional[list[T]] = None
+
+    @classmethod
+    def of(cls, items: Optional[Iterable[T]]) -> "AppendOnlyList[T]":
+        """Wrap items (returned as-is when already an AppendOnlyList)."""
+        if isinstance(items, AppendOnlyList):
+            return items
+        return cls(items or ())
+
+    def extended(self, items: Iterable[T]) -> "AppendOnlyList[T]":
+        """Return a new version with items appended; this version is unchanged."""
+        if self._length == len(self._buffer):
+            buffer = self._buffer
+        else:
+            # Another version already extended the shared buffer: branch off
+            buffer = self._buffer[: self._length]
+        buffer.extend(items)
+        if buffer is self._buffer and len(buffer) == self._length:
+            return self
+        result = AppendOnlyList.__new__(AppendOnlyList)
+        result._buffer = buffer
+        result._length = len(buffer)
+        result._snapshot = None
+        return result
+
+    def tolist(self) -> list[T]:
+        return self._buffer[: self._length]
+
+    def snapshot(self) -> list[T]:
+        """Plain list of this version, built once and shared (callers must not mutate it)."""
+        if self._snapshot is None:
+            self._snapshot = self.tolist()
+        return self._snapshot
+
+    # ---- Sequence protocol ----
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> T: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[T]: ...
+
+    def __getitem__(self, index: int | slice) -> T | list[T]:
+        if isinstance(index, slice):
+            return self.tolist()[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("AppendOnlyList index out of range")
+        return self._buffer[index]
+
+    def __iter__(self) -> Iterator[T]:
+        buffer = self._buffer
+        for index in range(self._length):
+            yield buffer[index]
+
+    def __reversed__(self) -> Iterator[T]:
+        buffer = self._buffer
+        for index in range(self._length - 1, -1, -1):
+            yield buffer[index]
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    # ---- list compatibility ----
+
+    def __add__(self, other: Iterable[T]) -> list[T]:
+        return self.tolist() + list(other)
+
+    def __radd__(self, other: Iterable[T]) -> list[T]:
+        return list(other) + self.tolist()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, AppendOnlyList):
+            if other._buffer is self._buffer:
+                return other._length == self._length
+            return self.tolist() == other.tolist()
+        if isinstance(other, (list, tuple)):
+            return self._length == len(other) and self.tolist() == list(other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(self.tolist())
+
+    def __reduce__(self):
+        return (AppendOnlyList, (self.tolist(),))
+
+
+def append_items(left: Optional[Sequence[T]], right: Optional[Sequence[T]]) -> Sequence[T]:
+    """Append reducer backed by AppendOnlyList (amortized O(len(right)) per update).
+
+    The result is an AppendOnlyList, which checkpoint serializers reject: state fields
+    must use AppendOnlyChannel rather than this function as a plain reducer.
+    """
+    if not right:
+        return left if left is not None else []
+    return AppendOnlyList.of(left).extended(right)
+
+
+class AppendOnlyChannel(BaseChannel[Sequence[Any], Sequence[Any], list]):
+    """LangGraph channel that appends updates to an AppendOnlyList.
+
+    Usage::
+
+        task_results: Annotated[List[Dict[str, Any]], AppendOnlyChannel]
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, typ: Any, key: str = ""):
+        super().__init__(typ, key)
+        self.value: AppendOnlyList[Any] = AppendOnlyList()
+
+    def __eq__(self, value: object) -> bool:
+        return isinstance(value, AppendOnlyChannel)
+
+    @property
+    def ValueType(self) -> Any:
+        return self.typ
+
+    @property
+    def UpdateType(self) -> Any:
+        return self.typ
+
+    def copy(self) -> Self:
+        # Versions are persistent, so copies can share the sequence
+        empty = self.__class__(self.typ, self.key)
+        empty.value = self.value
+        return empty
+
+    def from_checkpoint(self, checkpoint: Any) -> Self:
+        empty = self.__class__(self.typ, self.key)
+        if isinstance(checkpoint, Sequence):
+            empty.value = AppendOnlyList.of(checkpoint)
+        return empty
+
+    def update(self, values: Sequence[Any]) -> bool:
+        if not values:
+            return False
+        value = self.value
+        for update in values:
+            if OVERWRITE_AVAILABLE and isinstance(update, Overwrite):
+                value = AppendOnlyList.of(update.value)
+            elif isinstance(update, (list, tuple, AppendOnlyList)):
+                if update:
+                    value = value.extended(update)
+            else:
+                value = value.extended((update,))
+        self.value = value
+        return True
+
+    def get(self) -> Sequence[Any]:
+        return self.value
+
+    def is_available(self) -> bool:
+        return True
+
+    def checkpoint(self) -> list:
+        # Unchanged channels reuse the same list across checkpoints
+        return self.value.snapshot()
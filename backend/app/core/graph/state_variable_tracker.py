@@ -8,9 +8,12 @@ Provides analysis of:
 - Variable scope (global vs scoped)
 """
 
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+from app.core.graph.graph_cache import compute_nodes_edges_hash
+from app.core.graph.graph_topology import GraphTopology
 from app.models.graph import GraphEdge, GraphNode
 
 
@@ -53,6 +56,15 @@ class VariableInfo:
     is_used: bool
 
 
+AnalysisResult = Tuple[
+    Dict[str, List["VariableDefinition"]], Dict[str, List["VariableUsage"]], Dict[str, "VariableInfo"]
+]
+
+# analyze_graph 结果按图内容 hash 缓存（保存 / 构建 / 变量面板反复分析同一个图）
+_ANALYSIS_CACHE_SIZE = 128
+_analysis_cache: "OrderedDict[str, AnalysisResult]" = OrderedDict()
+
+
 class StateVariableTracker:
     """状态变量追踪器。
 
@@ -67,13 +79,40 @@ class StateVariableTracker:
         self.edges = edges
         self.variable_definitions: Dict[str, List[VariableDefinition]] = {}
         self.variable_usages: Dict[str, List[VariableUsage]] = {}
+        self._analysis: Optional[Dict[str, VariableInfo]] = None
+        self._topology: Optional[GraphTopology] = None
+
+    @property
+    def topology(self) -> GraphTopology:
+        """邻接表只构建一次，上游查询 O(V + E) 且按节点缓存。"""
+        if self._topology is None:
+            self._topology = GraphTopology(
+                (str(node.id) for node in self.nodes),
+                ((str(edge.source_node_id), str(edge.target_node_id)) for edge in self.edges),
+            )
+        return self._topology
 
     def analyze_graph(self) -> Dict[str, VariableInfo]:
         """分析整个图，返回所有变量的信息。
 
+        结果按节点与边的内容 hash 进程内缓存，未修改的图不会重复分析。
+        缓存的对象在调用方之间共享，只读使用。
+
         Returns:
             Dict mapping variable_name -> VariableInfo
         """
+        if self._analysis is not None:
+            return dict(self._analysis)
+
+        cache_key = compute_nodes_edges_hash(self.nodes, self.edges)
+        cached = _analysis_cache.get(cache_key)
+        if cached is not None:
+            _analysis_cache.move_to_end(cache_key)
+            self.variable_definitions, self.variable_usages, self._analysis = cached
+            return dict(self._analysis)
+
+        self.variable_definitions = {}
+        self.variable_usages = {}
         # 分析所有节点
         for node in self.nodes:
             self._analyze_node(node)
@@ -101,7 +140,11 @@ class StateVariableTracker:
                 is_used=len(usages) > 0,
             )
 
-        return result
+        self._analysis = result
+        _analysis_cache[cache_key] = (self.variable_definitions, self.variable_usages, result)
+        while len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+        return dict(result)
 
     def _analyze_node(self, node: GraphNode) -> None:
         """分析单个节点的变量定义和使用。"""
@@ -428,6 +471,9 @@ class StateVariableTracker:
         Returns:
             变量列表，每个变量包含 name, path, source, scope 等信息
         """
+        # 上游节点定义的变量来自图分析（已缓存）
+        self.analyze_graph()
+
         # 找到节点在图中的位置（上游节点）
         upstream_nodes = self._get_upstream_nodes(node_id)
 
@@ -494,22 +540,24 @@ class StateVariableTracker:
         ]
         available_vars.extend(global_vars)
 
-        # 从上游节点收集定义的变量
+        # 从上游节点收集定义的变量（按来源节点建索引，避免对每个上游节点扫描全部定义）
+        definitions_by_node: Dict[str, List[VariableDefinition]] = {}
+        for definitions in self.variable_definitions.values():
+            for definition in definitions:
+                definitions_by_node.setdefault(definition.source_node_id, []).append(definition)
         for upstream_node_id in upstream_nodes:
-            for var_name, definitions in self.variable_definitions.items():
-                for definition in definitions:
-                    if definition.source_node_id == upstream_node_id:
-                        available_vars.append(
-                            {
-                                "name": var_name,
-                                "path": definition.path,
-                                "source": definition.source_node_label,
-                                "source_node_id": definition.source_node_id,
-                                "scope": definition.scope,
-                                "description": definition.description or "",
-                                "value_type": definition.value_type or "",
-                            }
-                        )
+            for definition in definitions_by_node.get(upstream_node_id, []):
+                available_vars.append(
+                    {
+                        "name": definition.name,
+                        "path": definition.path,
+                        "source": definition.source_node_label,
+                        "source_node_id": definition.source_node_id,
+                        "scope": definition.scope,
+                        "description": definition.description or "",
+                        "value_type": definition.value_type or "",
+                    }
+                )
 
         # 添加作用域变量（如果启用）
         if include_scoped:
@@ -531,22 +579,8 @@ class StateVariableTracker:
         return available_vars
 
     def _get_upstream_nodes(self, node_id: str) -> List[str]:
-        """获取节点的所有上游节点 ID。"""
-        upstream = []
-        visited = set()
-
-        def traverse(node_id: str):
-            if node_id in visited:
-                return
-            visited.add(node_id)
-
-            for edge in self.edges:
-                if str(edge.target_node_id) == node_id:
-                    upstream.append(str(edge.source_node_id))
-                    traverse(str(edge.source_node_id))
-
-        traverse(node_id)
-        return upstream
+        """获取节点的所有上游节点 ID（去重，深度优先顺序）。"""
+        return [str(upstream_id) for upstream_id in self.topology.ancestors(node_id)]
 
     def validate_variable_usage(self, node_id: str, expression: str) -> List[Dict[str, Any]]:
         """验证表达式中使用的变量是否可用。
@@ -5,6 +5,7 @@ Provides utilities to record node execution context, input/output snapshots,
 and state history for debugging complex graphs.
 """
 
+from collections.abc import Sequence
 from datetime import datetime
 from typing import Any, Dict, List, Optional, cast
 
@@ -35,6 +36,8 @@ class NodeExecutionTrace:
         self.output_snapshot = output_snapshot or {}
         self.error = error
         self.error_message: Optional[str] = None
+        # Extra execution facts (e.g. node result cache status)
+        self.metadata: Dict[str, Any] = {}
         if error:
             self.error_message = str(error)
 
@@ -56,6 +59,7 @@ class NodeExecutionTrace:
             "input_snapshot": self._sanitize_snapshot(self.input_snapshot),
             "output_snapshot": self._sanitize_snapshot(self.output_snapshot),
             "error": self.error_message,
+            "metadata": self.metadata,
         }
 
     def _sanitize_snapshot(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
@@ -63,7 +67,7 @@ class NodeExecutionTrace:
         sanitized: Dict[str, Any] = {}
         for key, value in snapshot.items():
             # Skip large messages lists (keep only count)
-            if key == "messages" and isinstance(value, list):
+            if key == "messages" and isinstance(value, Sequence) and not isinstance(value, str):
                 sanitized[key] = f"<{len(value)} messages>"
             # Limit string length
             elif isinstance(value, str) and len(value) > 500:
@@ -76,28 +80,111 @@ class NodeExecutionTrace:
         return sanitized
 
 
+def diff_snapshot(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Structural diff of two snapshots; ``apply_snapshot_diff(previous, diff) == current``.
+
+    Nested dicts are diffed recursively and lists that only grew store the appended tail,
+    so the diff size follows the changes rather than the snapshot size.
+    """
+    delta: Dict[str, Any] = {}
+    changed: Dict[str, Any] = {}
+    nested: Dict[str, Any] = {}
+    appended: Dict[str, List[Any]] = {}
+    for key, value in current.items():
+        if key not in previous:
+            changed[key] = value
+            continue
+        old = previous[key]
+        if old is value or (type(old) is type(value) and old == value):
+            continue
+        if isinstance(old, dict) and isinstance(value, dict):
+            nested[key] = diff_snapshot(old, value)
+        elif isinstance(old, list) and isinstance(value, list) and len(value) > len(old) and value[: len(old)] == old:
+            appended[key] = value[len(old) :]
+        else:
+            changed[key] = value
+    removed = [key for key in previous if key not in current]
+    if changed:
+        delta["set"] = changed
+    if nested:
+        delta["sub"] = nested
+    if appended:
+        delta["append"] = appended
+    if removed:
+        delta["del"] = removed
+    return delta
+
+
+def apply_snapshot_diff(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a ``diff_snapshot`` result to ``base`` (returns a new dict, base is unchanged)."""
+    result = dict(base)
+    for key in delta.get("del", ()):
+        result.pop(key, None)
+    for key, sub_delta in delta.get("sub", {}).items():
+        result[key] = apply_snapshot_diff(result.get(key) or {}, sub_delta)
+    for key, items in delta.get("append", {}).items():
+        result[key] = [*result.get(key, []), *items]
+    result.update(delta.get("set", {}))
+    return result
+
+
 class GraphExecutionTrace:
-    """Trace for entire graph execution."""
+    """Trace for entire graph execution.
 
-    def __init__(self, graph_id: str, graph_name: str):
+    State history is stored as diffs against the previous snapshot, with a full keyframe
+    every ``keyframe_interval`` snapshots; ``state_at(step)`` rebuilds any step from the
+    nearest keyframe.
+    """
+
+    DEFAULT_KEYFRAME_INTERVAL = 20
+
+    def __init__(self, graph_id: str, graph_name: str, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL):
         self.graph_id = graph_id
         self.graph_name = graph_name
         self.start_time = datetime.now().isoformat()
         self.node_traces: List[NodeExecutionTrace] = []
         self.state_history: List[Dict[str, Any]] = []
+        self.keyframe_interval = max(1, keyframe_interval)
+        # Latest full snapshot, kept to diff the next one against
+        self._last_state: Optional[Dict[str, Any]] = None
 
     def add_node_trace(self, trace: NodeExecutionTrace):
         """Add a node execution trace."""
         self.node_traces.append(trace)
 
     def add_state_snapshot(self, state: GraphState, node_id: Optional[str] = None):
-        """Add a state snapshot to history."""
-        snapshot = {
+        """Add a state snapshot to history (a keyframe or a diff against the previous snapshot)."""
+        current = self._sanitize_state(state)
+        step = len(self.state_history)
+        snapshot: Dict[str, Any] = {
+            "step": step,
             "timestamp": datetime.now().isoformat(),
             "node_id": node_id,
-            "state": self._sanitize_state(state),
         }
+        if self._last_state is None or step % self.keyframe_interval == 0:
+            snapshot["state"] = current
+        else:
+            snapshot["diff"] = diff_snapshot(self._last_state, current)
         self.state_history.append(snapshot)
+        self._last_state = current
+
+    def state_at(self, step: int) -> Dict[str, Any]:
+        """Reconstruct the sanitized state recorded at ``step`` (negative indexes count from the end).
+
+        Raises:
+            IndexError: If no snapshot exists at ``step``.
+        """
+        if step < 0:
+            step += len(self.state_history)
+        if not 0 <= step < len(self.state_history):
+            raise IndexError(f"No state snapshot at step {step}")
+        keyframe = step
+        while "state" not in self.state_history[keyframe]:
+            keyframe -= 1
+        state = self.state_history[keyframe]["state"]
+        for snapshot in self.state_history[keyframe + 1 : step + 1]:
+            state = apply_snapshot_diff(state, snapshot["diff"])
+        return state
 
     def _sanitize_state(self, state: GraphState) -> Dict[str, Any]:
         """Create a sanitized snapshot of state."""
@@ -118,6 +205,7 @@ class GraphExecutionTrace:
             "start_time": self.start_time,
             "node_traces": [trace.to_dict() for trace in self.node_traces],
             "state_history": self.state_history,
+            "keyframe_interval": self.keyframe_interval,
         }
 
 
@@ -179,4 +267,5 @@ def log_node_execution(
             f"[Trace] Node execution completed | "
             f"node_id={node_id} | node_type={node_type} | "
             f"duration={trace.duration_ms:.2f}ms"
+            + (f" | cache={trace.metadata['cache']}" if "cache" in trace.metadata else "")
         )
@@ -7,17 +7,24 @@ from contextlib import asynccontextmanager
 from typing import Any, Awaitable, Dict, Optional, cast
 
 import redis.asyncio as redis_async
-from redis.asyncio.connection import ConnectionPool
+from redis.asyncio.connection import BlockingConnectionPool, ConnectionPool
 from redis.exceptions import LockError
 
 from .settings import settings
 
+# Max wait for a free connection in the blocking-command pool before raising
+_BLOCKING_POOL_TIMEOUT_SECONDS = 30
+
 
 class RedisClient:
     """Redis Client Wrapper"""
 
     _pool: Optional[ConnectionPool] = None
     _client: Optional[redis_async.Redis] = None
+    # Separate pool for long blocking commands (XREAD BLOCK): they hold a connection for
+    # seconds at a time and must not starve regular commands in the shared pool
+    _blocking_pool: Optional[BlockingConnectionPool] = None
+    _blocking_client: Optional[redis_async.Redis] = None
     _is_available: bool = False
 
     @classmethod
@@ -31,6 +38,13 @@ class RedisClient:
                     decode_responses=True,
                 )
                 cls._client = redis_async.Redis(connection_pool=cls._pool)
+                cls._blocking_pool = BlockingConnectionPool.from_url(
+                    settings.redis_url,
+                    max_connections=settings.redis_blocking_pool_size,
+                    timeout=_BLOCKING_POOL_TIMEOUT_SECONDS,
+                    decode_responses=True,
+                )
+                cls._blocking_client = redis_async.Redis(connection_pool=cls._blocking_pool)
 
                 # Health check
                 await cls._client.ping()
@@ -51,6 +65,12 @@ class RedisClient:
         if cls._pool:
             await cls._pool.disconnect()
             cls._pool = None
+        if cls._blocking_client:
+            await cls._blocking_client.close()
+            cls._blocking_client = None
+        if cls._blocking_pool:
+            await cls._blocking_pool.disconnect()
+            cls._blocking_pool = None
         cls._is_available = False
 
     @classmethod
@@ -58,6 +78,11 @@ class RedisClient:
         """Get Redis client"""
         return cls._client
 
+    @classmethod
+    def get_blocking_client(cls) -> Optional[redis_async.Redis]:
+        """Get Redis client for blocking commands (waits for a free connection instead of failing)"""
+        return cls._blocking_client
+
     @classmethod
     def is_available(cls) -> bool:
         """Check if Redis is available"""
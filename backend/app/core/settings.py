@@ -144,6 +144,11 @@ class Settings(BaseSettings):
         validation_alias=AliasChoices("REDIS_POOL_SIZE", "REDIS_CONNECTION_POOL_SIZE"),
         description="Redis connection pool size",
     )
+    redis_blocking_pool_size: int = Field(
+        default=200,
+        validation_alias=AliasChoices("REDIS_BLOCKING_POOL_SIZE"),
+        description="Redis connection pool size for blocking reads (one connection per streaming SSE client)",
+    )
 
     # 限流配置
     rate_limit_rpm: int = Field(
@@ -169,6 +174,261 @@ class Settings(BaseSettings):
         description="Maximum concurrent requests per user",
     )
 
+    # Compiled graph cache (进程级已编译图缓存)
+    graph_cache_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("GRAPH_CACHE_ENABLED"),
+        description="Reuse compiled graphs across chat requests (keyed by graph content hash)",
+    )
+    graph_cache_max_size: int = Field(
+        default=128,
+        validation_alias=AliasChoices("GRAPH_CACHE_MAX_SIZE"),
+        description="Maximum number of compiled graphs kept per worker process",
+    )
+    graph_cache_ttl_seconds: int = Field(
+        default=600,
+        validation_alias=AliasChoices("GRAPH_CACHE_TTL_SECONDS", "GRAPH_CACHE_TTL"),
+        description="Compiled graph cache entry TTL in seconds",
+    )
+
+    # SSE content 增量合并（token micro-batching）
+    sse_coalesce_enabled: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("SSE_COALESCE_ENABLED"),
+        description="Merge consecutive content deltas of the same run into one SSE frame",
+    )
+    sse_coalesce_window_ms: int = Field(
+        default=40,
+        validation_alias=AliasChoices("SSE_COALESCE_WINDOW_MS"),
+        description="Max time a content delta may be buffered before it is flushed (ms)",
+    )
+    sse_coalesce_max_bytes: int = Field(
+        default=4096,
+        validation_alias=AliasChoices("SSE_COALESCE_MAX_BYTES"),
+        description="Flush buffered content deltas once they reach this many bytes",
+    )
+
+    sse_model_input_delta: bool = Field(
+        default=False,
+        validation_alias=AliasChoices("SSE_MODEL_INPUT_DELTA"),
+        description="Send only new messages in model_input events (plus a reference to the previous prefix)",
+    )
+
+    trace_write_behind_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("TRACE_WRITE_BEHIND_ENABLED"),
+        description="Persist trace observations incrementally while a run is streaming",
+    )
+    trace_flush_batch_size: int = Field(
+        default=200,
+        validation_alias=AliasChoices("TRACE_FLUSH_BATCH_SIZE"),
+        description="Observations per write-behind batch",
+    )
+    trace_flush_interval_ms: int = Field(
+        default=2000,
+        validation_alias=AliasChoices("TRACE_FLUSH_INTERVAL_MS"),
+        description="Max delay before queued observations are flushed",
+    )
+    trace_flush_max_queue: int = Field(
+        default=5000,
+        validation_alias=AliasChoices("TRACE_FLUSH_MAX_QUEUE"),
+        description="Queue bound per stream; when exceeded the run falls back to an end-of-stream write",
+    )
+
+    run_registry_ttl_seconds: int = Field(
+        default=60,
+        validation_alias=AliasChoices("RUN_REGISTRY_TTL_SECONDS"),
+        description="TTL of the Redis run-owner key (refreshed by each worker's heartbeat at TTL/3)",
+    )
+
+    sse_resumable_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("SSE_RESUMABLE_ENABLED"),
+        description="Run chat graphs detached from the HTTP connection; clients reconnect with Last-Event-ID",
+    )
+    sse_event_log_max_events: int = Field(
+        default=10000,
+        validation_alias=AliasChoices("SSE_EVENT_LOG_MAX_EVENTS"),
+        description="Max SSE events kept per thread for replay",
+    )
+    sse_event_log_retention_seconds: int = Field(
+        default=600,
+        validation_alias=AliasChoices("SSE_EVENT_LOG_RETENTION_SECONDS"),
+        description="How long a finished run's event log stays available for reconnects",
+    )
+    sse_event_log_active_ttl_seconds: int = Field(
+        default=3600,
+        validation_alias=AliasChoices("SSE_EVENT_LOG_ACTIVE_TTL_SECONDS"),
+        description="Expiry of a running run's event log, refreshed on every event (bounds leaks if a worker dies mid-run)",
+    )
+
+    run_max_concurrent: int = Field(
+        default=32,
+        validation_alias=AliasChoices("RUN_MAX_CONCURRENT"),
+        description="Max concurrent graph runs per worker (0 = unlimited)",
+    )
+    run_max_per_user: int = Field(
+        default=4,
+        validation_alias=AliasChoices("RUN_MAX_PER_USER"),
+        description="Max concurrent graph runs per user per worker (0 = unlimited)",
+    )
+    run_max_queue: int = Field(
+        default=256,
+        validation_alias=AliasChoices("RUN_MAX_QUEUE"),
+        description="Max runs waiting for a slot per worker; further runs are rejected with 429 (0 = unbounded)",
+    )
+
+    function_node_isolation_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("FUNCTION_NODE_ISOLATION_ENABLED"),
+        description="Run Function node custom code in worker subprocesses (false = in-process for all nodes)",
+    )
+    function_node_pool_size: int = Field(
+        default=2,
+        validation_alias=AliasChoices("FUNCTION_NODE_POOL_SIZE"),
+        description="Function node worker subprocesses per API worker",
+    )
+    function_node_timeout_seconds: float = Field(
+        default=10.0,
+        validation_alias=AliasChoices("FUNCTION_NODE_TIMEOUT_SECONDS"),
+        description="Max wall-clock seconds per isolated Function node call (nodes may set a lower timeout_seconds)",
+    )
+    function_node_cpu_seconds: float = Field(
+        default=5.0,
+        validation_alias=AliasChoices("FUNCTION_NODE_CPU_SECONDS"),
+        description="Max CPU seconds per isolated Function node call",
+    )
+    function_node_memory_limit_mb: int = Field(
+        default=256,
+        validation_alias=AliasChoices("FUNCTION_NODE_MEMORY_LIMIT_MB"),
+        description="Max additional memory per isolated Function node call (nodes may set a lower memory_limit_mb)",
+    )
+
+    graph_branch_llm_concurrency: int = Field(
+        default=16,
+        validation_alias=AliasChoices("GRAPH_BRANCH_LLM_CONCURRENCY"),
+        description="Max parallel LLM branch nodes running at once per worker, shared fairly across runs (0 = unlimited)",
+    )
+    graph_branch_tool_concurrency: int = Field(
+        default=32,
+        validation_alias=AliasChoices("GRAPH_BRANCH_TOOL_CONCURRENCY"),
+        description="Max parallel tool/function/HTTP branch nodes running at once per worker (0 = unlimited)",
+    )
+
+    http_node_http2_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("HTTP_NODE_HTTP2_ENABLED"),
+        description="Negotiate HTTP/2 for HTTP Request nodes (requires the h2 package)",
+    )
+    http_node_max_connections_per_host: int = Field(
+        default=20,
+        validation_alias=AliasChoices("HTTP_NODE_MAX_CONNECTIONS_PER_HOST"),
+        description="Max pooled connections per host for HTTP Request nodes",
+    )
+    http_node_max_keepalive_per_host: int = Field(
+        default=10,
+        validation_alias=AliasChoices("HTTP_NODE_MAX_KEEPALIVE_PER_HOST"),
+        description="Max idle keep-alive connections per host for HTTP Request nodes",
+    )
+    http_node_retry_base_delay: float = Field(
+        default=0.5,
+        validation_alias=AliasChoices("HTTP_NODE_RETRY_BASE_DELAY"),
+        description="Base delay (seconds) for HTTP Request node retry backoff",
+    )
+    http_node_retry_max_delay: float = Field(
+        default=10.0,
+        validation_alias=AliasChoices("HTTP_NODE_RETRY_MAX_DELAY"),
+        description="Max delay (seconds) between HTTP Request node retries, including Retry-After",
+    )
+    http_node_max_response_bytes: int = Field(
+        default=10 * 1024 * 1024,
+        validation_alias=AliasChoices("HTTP_NODE_MAX_RESPONSE_BYTES"),
+        description="HTTP Request node responses larger than this are aborted",
+    )
+    http_node_max_pooled_hosts: int = Field(
+        default=256,
+        validation_alias=AliasChoices("HTTP_NODE_MAX_POOLED_HOSTS"),
+        description="Max pooled HTTP Request node clients (one per origin, LRU-evicted; <= 0 = unbounded)",
+    )
+    http_node_cache_max_entries: int = Field(
+        default=512,
+        validation_alias=AliasChoices("HTTP_NODE_CACHE_MAX_ENTRIES"),
+        description="Max cached GET responses per worker (nodes opt in with cache_enabled)",
+    )
+    http_node_cache_max_entry_bytes: int = Field(
+        default=1024 * 1024,
+        validation_alias=AliasChoices("HTTP_NODE_CACHE_MAX_ENTRY_BYTES"),
+        description="Larger GET responses are not cached",
+    )
+
+    node_cache_max_entries: int = Field(
+        default=1024,
+        validation_alias=AliasChoices("NODE_CACHE_MAX_ENTRIES"),
+        description="Max memoized node results kept in memory per worker (nodes opt in with memoize)",
+    )
+    node_cache_default_ttl_seconds: float = Field(
+        default=3600.0,
+        validation_alias=AliasChoices("NODE_CACHE_DEFAULT_TTL_SECONDS"),
+        description="TTL for memoized node results when the node sets no memoize_ttl_seconds",
+    )
+    node_cache_redis_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("NODE_CACHE_REDIS_ENABLED"),
+        description="Share memoized node results across workers through Redis (when Redis is available)",
+    )
+
+    memory_index_max_users: int = Field(
+        default=1024,
+        validation_alias=AliasChoices("MEMORY_INDEX_MAX_USERS"),
+        description="Max users whose memories are kept in the in-process semantic index per worker",
+    )
+    memory_index_max_age_seconds: float = Field(
+        default=300.0,
+        validation_alias=AliasChoices("MEMORY_INDEX_MAX_AGE_SECONDS"),
+        description="A user's semantic memory index is rebuilt from the database after this age "
+        "(bounds staleness from writes made by other workers)",
+    )
+    memory_cache_max_users: int = Field(
+        default=1024,
+        validation_alias=AliasChoices("MEMORY_CACHE_MAX_USERS"),
+        description="Max cached memory reads per worker (one entry per user and query shape, LRU-evicted)",
+    )
+    memory_cache_ttl_seconds: float = Field(
+        default=60.0,
+        validation_alias=AliasChoices("MEMORY_CACHE_TTL_SECONDS"),
+        description="TTL for cached memory reads (writes invalidate them immediately)",
+    )
+    memory_cache_redis_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("MEMORY_CACHE_REDIS_ENABLED"),
+        description="Share cached memory reads across workers through Redis (when Redis is available)",
+    )
+    memory_extraction_async_enabled: bool = Field(
+        default=True,
+        validation_alias=AliasChoices("MEMORY_EXTRACTION_ASYNC_ENABLED"),
+        description="Extract memories in a background queue after the response instead of inside the model call",
+    )
+    memory_extraction_debounce_seconds: float = Field(
+        default=5.0,
+        validation_alias=AliasChoices("MEMORY_EXTRACTION_DEBOUNCE_SECONDS"),
+        description="Consecutive turns of the same thread within this window are extracted together",
+    )
+    memory_extraction_max_wait_seconds: float = Field(
+        default=30.0,
+        validation_alias=AliasChoices("MEMORY_EXTRACTION_MAX_WAIT_SECONDS"),
+        description="Upper bound on how long a turn may wait for extraction while its thread keeps talking",
+    )
+    memory_extraction_max_concurrency: int = Field(
+        default=4,
+        validation_alias=AliasChoices("MEMORY_EXTRACTION_MAX_CONCURRENCY"),
+        description="Max concurrent background memory extractions per worker",
+    )
+    memory_extraction_max_pending: int = Field(
+        default=1024,
+        validation_alias=AliasChoices("MEMORY_EXTRACTION_MAX_PENDING"),
+        description="Max debounced extractions waiting per worker (the oldest is started early when full)",
+    )
+
     # Auth
     secret_key: str = Field(
         ...,  # 强制要求配置，不提供默认值
@@ -91,6 +91,23 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     else:
         logger.info("   Redis not configured (caching/rate-limiting disabled)")
 
+    # Start distributed run registry (stop/cancel across workers; no-op without Redis)
+    try:
+        from app.utils.task_manager import task_manager
+
+        await task_manager.start()
+    except Exception as e:
+        logger.warning(f"   ⚠️  Run registry start failed: {e}")
+
+    # Pre-spawn Function node worker processes (isolated custom code execution)
+    if settings.function_node_isolation_enabled:
+        try:
+            from app.core.graph.function_runtime import function_pool
+
+            await function_pool.start()
+        except Exception as e:
+            logger.warning(f"   ⚠️  Function worker pool start failed: {e}")
+
     # Check database connection (regardless of environment)
     await _check_db_connection()
 
@@ -211,6 +228,35 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     except Exception:
         pass
 
+    try:
+        from app.utils.task_manager import task_manager
+
+        await task_manager.close()
+    except Exception:
+        pass
+
+    # Finish debounced memory extractions before the DB goes away
+    try:
+        from app.core.agent.memory.extraction_queue import memory_extraction_queue
+
+        await memory_extraction_queue.close()
+    except Exception:
+        pass
+
+    try:
+        from app.core.graph.function_runtime import function_pool
+
+        await function_pool.close()
+    except Exception:
+        pass
+
+    try:
+        from app.core.graph.http_node_client import close_all_clients
+
+        await close_all_clients()
+    except Exception:
+        pass
+
     try:
         await RedisClient.close()
     except Exception:
@@ -18,7 +18,7 @@ MEMORY_TABLE_SCHEMA = {
 
 from typing import Optional
 
-from sqlalchemy import JSON, BigInteger, String, Text
+from sqlalchemy import JSON, BigInteger, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -28,6 +28,10 @@ class Memory(Base):
     """记忆表模型"""
 
     __tablename__ = "memories"
+    __table_args__ = (
+        # last_n / first_n 检索：按用户取 updated_at 排序的前 N 条
+        Index("memories_user_id_updated_at_idx", "user_id", "updated_at"),
+    )
 
     # 主键为字符串类型的 memory_id
     memory_id: Mapped[str] = mapped_column(String, primary_key=True, nullable=False, comment="记忆ID")
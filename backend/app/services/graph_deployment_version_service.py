@@ -12,6 +12,7 @@ from typing import Any, Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.common.exceptions import ForbiddenException, NotFoundException
+from app.core.graph.graph_cache import compiled_graph_cache
 from app.models.auth import AuthUser
 from app.models.graph import AgentGraph
 from app.models.graph_deployment_version import GraphDeploymentVersion
@@ -214,6 +215,7 @@ class GraphDeploymentVersionService(BaseService):
         )
 
         await self.db.commit()
+        compiled_graph_cache.invalidate(graph_id)
 
         return GraphDeployResponse(
             success=True,
@@ -534,6 +536,7 @@ class GraphDeploymentVersionService(BaseService):
         )
 
         await self.db.commit()
+        compiled_graph_cache.invalidate(graph_id)
 
         return GraphRevertResponse(
             success=True,
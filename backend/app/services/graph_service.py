@@ -11,13 +11,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.common.exceptions import BadRequestException, ForbiddenException, NotFoundException
 from app.core.graph.graph_builder_factory import GraphBuilder
+from app.core.graph.graph_cache import compiled_graph_cache, compute_graph_content_hash, compute_llm_fingerprint
 from app.models.auth import AuthUser
 from app.models.graph import AgentGraph, GraphEdge, GraphNode
 from app.models.workspace import WorkspaceMemberRole
 from app.repositories.graph import GraphEdgeRepository, GraphNodeRepository, GraphRepository
 
 from .base import BaseService
-from .model_service import ModelService
+from .model_service import ModelService, ScopedModelService
 from .workspace_permission import check_workspace_access
 
 
@@ -457,6 +458,8 @@ class GraphService(BaseService):
         if update_data:
             await self.graph_repo.update(graph_id, update_data)
 
+        compiled_graph_cache.invalidate(graph_id)
+
         return {
             "graph_id": str(graph_id),
             "nodes_count": len(nodes),
@@ -713,7 +716,8 @@ class GraphService(BaseService):
             f"user_id={user_id} | llm_model={llm_model}"
         )
 
-        model_service = ModelService(self.db)
+        # 图可能在创建它的会话关闭后才运行（后台运行），模型解析不绑定 self.db
+        model_service = ScopedModelService()
         builder = GraphBuilder(
             graph=graph,
             nodes=nodes,
@@ -810,8 +814,9 @@ class GraphService(BaseService):
 
         # Build the graph
         logger.info("[GraphService] Starting GraphBuilder...")
-        # 为当前请求构建一个 ModelService，用于在图执行中按 model_name 解析模型
-        model_service = ModelService(self.db)
+        # 图执行中按 model_name 解析模型；编译结果可能被缓存并在之后的请求中使用，
+        # 因此不绑定当前请求的 session，每次解析使用独立会话
+        model_service = ScopedModelService()
         builder = GraphBuilder(
             graph=graph,
             nodes=nodes,
@@ -824,8 +829,24 @@ class GraphService(BaseService):
             model_service=model_service,
         )
 
-        # 异步构建
-        compiled_graph = await builder.build()
+        # 复用进程级已编译图缓存（key 包含内容 hash，图被修改后不会命中旧条目）
+        if compiled_graph_cache.enabled and builder.supports_compiled_cache():
+            cache_key = compiled_graph_cache.make_key(
+                graph_id,
+                compute_graph_content_hash(graph, nodes, edges),
+                user_id,
+                compute_llm_fingerprint(
+                    llm_model,
+                    api_key,
+                    base_url,
+                    max_tokens,
+                    model_config_version=await ModelService(self.db).get_config_version(),
+                ),
+            )
+            compiled_graph = await compiled_graph_cache.get_or_build(cache_key, builder.build)
+        else:
+            # 异步构建
+            compiled_graph = await builder.build()
 
         elapsed_ms = (time.time() - start_time) * 1000
         logger.info(
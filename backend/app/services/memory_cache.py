@@ -0,0 +1,73 @@
+"""
+Memory Read Cache - Per-user cache of memory table reads.
+
+``AgentMemoryIterationMiddleware`` retrieves memories before every model call,
+and each retrieval used to load all of the user's rows. ``MemoryService`` now
+serves repeated reads from this cache:
+
+- Entries are raw row dicts per ``(user_id, view)``; ``view`` identifies the
+  query shape (e.g. order + limit), so different reads of one user never mix.
+- Storage is a ``GenerationalCache`` scoped by user id (in-process LRU + TTL,
+  shared Redis tier when available). Every write path of ``MemoryService``
+  calls ``invalidate(user_id)``, so stale reads in either tier are never served.
+- A read records the generation before querying the database and is only
+  stored if no write happened meanwhile.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.settings import settings
+from app.utils.generational_cache import GenerationalCache
+
+LOG_PREFIX = "[MemoryReadCache]"
+
+_REDIS_PREFIX = "memory_cache"
+
+Rows = List[Dict[str, Any]]
+
+
+class MemoryReadCache:
+    """Per-user memory reads, scoped per user id (see ``GenerationalCache``)."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0, redis_enabled: bool = True):
+        self._cache = GenerationalCache(
+            redis_prefix=_REDIS_PREFIX,
+            log_prefix=LOG_PREFIX,
+            max_entries=max_entries,
+            default_ttl=ttl,
+            redis_enabled=redis_enabled,
+        )
+
+    async def get(self, user_id: str, view: str = "all") -> Tuple[Optional[Rows], str]:
+        """Return ``(rows, generation)``; rows is None on a miss. Pass the generation back to ``set``.
+
+        Rows are copies: callers may mutate them (and their ``topics`` / ``memory`` values).
+        """
+        generation = await self._cache.generation(user_id)
+        hit, rows = await self._cache.get(f"{user_id}:{generation}:{view}")
+        return (rows if hit else None), generation
+
+    async def set(self, user_id: str, generation: str, rows: Rows, view: str = "all") -> None:
+        """Store rows read under ``generation``; dropped if the user was written to since."""
+        if generation != await self._cache.generation(user_id):
+            return
+        await self._cache.set(f"{user_id}:{generation}:{view}", rows)
+
+    async def invalidate(self, user_id: str) -> None:
+        await self._cache.invalidate(user_id)
+
+    async def invalidate_all(self) -> None:
+        await self._cache.invalidate_all()
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+memory_read_cache = MemoryReadCache(
+    max_entries=settings.memory_cache_max_users,
+    ttl=settings.memory_cache_ttl_seconds,
+    redis_enabled=settings.memory_cache_redis_enabled,
+)
@@ -10,6 +10,7 @@ Async operations for Memory table:
 - clear_memories
 
 Designed to be SQLite-compatible (uses generic casts/LIKE for search).
+Unfiltered per-user reads go through ``memory_read_cache``; every write path invalidates it.
 """
 
 import json
@@ -29,6 +30,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal, engine
 from app.models.memory import Memory
 from app.schemas.memory import UserMemory
+from app.services.memory_cache import memory_read_cache
 
 
 def log_debug(msg: str) -> None:
@@ -43,6 +45,14 @@ def log_warning(msg: str) -> None:
     logger.warning(msg)
 
 
+def _memory_index():
+    """In-process semantic index kept current by the write paths below."""
+    # 延迟导入：app.core.agent.memory 包导入时依赖本模块
+    from app.core.agent.memory.semantic_index import memory_index
+
+    return memory_index
+
+
 def apply_sorting(
     stmt: sa.sql.Select, table: sa.Table, sort_by: Optional[str], sort_order: Optional[str]
 ) -> sa.sql.Select:
@@ -118,6 +128,8 @@ class MemoryService:
 
                 success = (result.rowcount or 0) > 0  # type: ignore[attr-defined]
                 if success:
+                    await memory_read_cache.invalidate(user_id)
+                    _memory_index().remove(user_id, [memory_id])
                     log_debug(f"Successfully deleted user memory id: {memory_id}")
                 else:
                     log_debug(f"No user memory found with id: {memory_id}")
@@ -148,6 +160,8 @@ class MemoryService:
                 await sess.commit()
 
                 deleted = result.rowcount or 0  # type: ignore[attr-defined]
+                await memory_read_cache.invalidate(user_id)
+                _memory_index().remove(user_id, memory_ids)
                 if deleted == 0:
                     log_debug(f"No user memories found with ids: {memory_ids}")
                 else:
@@ -262,11 +276,23 @@ class MemoryService:
             sort_order (Optional[str]): The order to sort by ("asc"/"desc").
             deserialize (Optional[bool]): Whether to serialize the memories. Defaults to True.
 
+        Ordering and limit run in SQL; ``sort_by="updated_at"`` for one user is served by the
+        ``(user_id, updated_at)`` index, so e.g. the newest 5 memories never load the rest.
+
         Returns:
             Union[List[UserMemory], Tuple[List[Dict[str, Any]], int]]:
                 - When deserialize=True: List of UserMemory objects
                 - When deserialize=False: Tuple of (memory dictionaries, total count)
         """
+        # Plain per-user reads (what MemoryManager retrieval issues every turn) are cached
+        cache_view: Optional[str] = None
+        cache_generation = ""
+        if deserialize and page is None and all(f is None for f in (agent_id, team_id, topics, search_content)):
+            cache_view = f"{sort_by}:{sort_order}:{limit}"
+            cached_rows, cache_generation = await memory_read_cache.get(user_id, cache_view)
+            if cached_rows is not None:
+                return [UserMemory.from_dict(record) for record in cached_rows]
+
         try:
             table = await self._get_table(table_type="memories")
 
@@ -303,9 +329,11 @@ class MemoryService:
                     # Search within JSON text by casting to String and using LIKE
                     stmt = stmt.where(cast(table.c.memory, String).like(f"%{search_content}%"))
 
-                # Get total count after applying filtering
-                count_stmt = select(func.count()).select_from(stmt.alias())
-                total_count = await sess.scalar(count_stmt) or 0
+                # Get total count after applying filtering (only returned when not deserializing)
+                total_count = 0
+                if not deserialize:
+                    count_stmt = select(func.count()).select_from(stmt.alias())
+                    total_count = await sess.scalar(count_stmt) or 0
 
                 # Sorting
                 stmt = apply_sorting(stmt, table, sort_by, sort_order)
@@ -318,10 +346,12 @@ class MemoryService:
 
                 result = await sess.execute(stmt)
                 records = result.fetchall()
+                memories_raw: List[Dict[str, Any]] = [dict(record._mapping) for record in records]
+                if cache_view is not None:
+                    await memory_read_cache.set(user_id, cache_generation, memories_raw, cache_view)
                 if not records:
                     return [] if deserialize else ([], 0)
 
-                memories_raw: List[Dict[str, Any]] = [dict(record._mapping) for record in records]
                 if not deserialize:
                     return memories_raw, total_count
 
@@ -435,14 +465,20 @@ class MemoryService:
 
                 await sess.commit()
 
+            owner_id = row._mapping["user_id"] if row else memory.user_id
+            if owner_id is not None:
+                await memory_read_cache.invalidate(owner_id)
+
             if not row:
                 return None
 
             memory_raw: Dict[str, Any] = dict(row._mapping)
-            if not memory_raw or not deserialize:
+            if not memory_raw:
                 return memory_raw
 
-            return UserMemory.from_dict(memory_raw)
+            upserted = UserMemory.from_dict(memory_raw)
+            _memory_index().upsert(upserted)
+            return upserted if deserialize else memory_raw
 
         except Exception as e:
             log_error(f"Exception upserting user memory: {e}")
@@ -457,7 +493,8 @@ class MemoryService:
         Args:
             memories (List[UserMemory]): The list of memories to upsert.
             deserialize (Optional[bool]): Whether to deserialize the memories. Defaults to True.
-            preserve_updated_at (bool): If True, preserve the updated_at from the memory object.
+            preserve_updated_at (bool): If True, preserve the updated_at from the memory object
+                                        (created_at when it has none).
                                         If False (default), set updated_at to current time.
 
         Returns:
@@ -480,8 +517,9 @@ class MemoryService:
                 if m.memory_id is None:
                     m.memory_id = str(uuid4())
 
-                # Use preserved updated_at if flag is set (even if None), otherwise use current time
-                updated_at = m.updated_at if preserve_updated_at else current_time
+                # Use preserved updated_at if flag is set, otherwise use current time.
+                # Never NULL: retrieval orders by updated_at through the (user_id, updated_at) index
+                updated_at = (m.updated_at or m.created_at) if preserve_updated_at else current_time
 
                 memory_records.append(
                     {
@@ -535,15 +573,14 @@ class MemoryService:
 
                 await sess.commit()
 
+                for user_id in {row._mapping["user_id"] for row in rows if row._mapping["user_id"] is not None}:
+                    await memory_read_cache.invalidate(user_id)
+                index = _memory_index()
                 for row in rows:
                     memory_dict = dict(row._mapping)
-                    if deserialize:
-                        deserialized_memory = UserMemory.from_dict(memory_dict)
-                        if deserialized_memory is None:
-                            continue
-                        results.append(deserialized_memory)
-                    else:
-                        results.append(memory_dict)
+                    deserialized_memory = UserMemory.from_dict(memory_dict)
+                    index.upsert(deserialized_memory)
+                    results.append(deserialized_memory if deserialize else memory_dict)
 
             return results
 
@@ -563,6 +600,8 @@ class MemoryService:
             async with self._session() as sess:
                 await sess.execute(table.delete())
                 await sess.commit()
+            await memory_read_cache.invalidate_all()
+            _memory_index().drop()
 
         except Exception as e:
             log_warning(f"Exception deleting all memories: {e}")
@@ -2,14 +2,20 @@
 模型服务
 """
 
+import hashlib
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+from sqlalchemy import func, literal, select, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.common.exceptions import BadRequestException, NotFoundException
+from app.core.database import async_session_factory
 from app.core.model import ModelType, create_model_instance
 from app.core.model.factory import get_factory
+from app.models.model_credential import ModelCredential
+from app.models.model_instance import ModelInstance
+from app.models.model_provider import ModelProvider
 from app.repositories.model_instance import ModelInstanceRepository
 from app.repositories.model_provider import ModelProviderRepository
 from app.services.model_credential_service import ModelCredentialService
@@ -26,6 +32,21 @@ class ModelService(BaseService):
         self.provider_repo = ModelProviderRepository(db)
         self.credential_service = ModelCredentialService(db)
 
+    async def get_config_version(self) -> str:
+        """
+        模型配置版本：供应商 / 模型实例 / 凭据任一增删改后变化
+
+        用于进程级已编译图缓存的 key，使凭据或模型参数变更后不再命中旧图。
+        """
+        stmt = union_all(
+            *(
+                select(literal(model.__tablename__), func.count(), func.max(model.updated_at))
+                for model in (ModelProvider, ModelInstance, ModelCredential)
+            )
+        )
+        rows = sorted((await self.db.execute(stmt)).all(), key=lambda row: row[0])
+        return hashlib.sha256(repr(rows).encode()).hexdigest()[:16]
+
     async def get_available_models(
         self,
         model_type: ModelType,
@@ -499,3 +520,23 @@ class ModelService(BaseService):
         if isinstance(content, list):
             return " ".join(str(item) for item in content)
         return str(content)
+
+
+class ScopedModelService:
+    """
+    每次调用使用独立会话的 ModelService（仅运行时模型解析接口）
+
+    供生命周期超过单个请求的持有者使用：进程级缓存的已编译图保留了 GraphBuilder，
+    节点首次运行时才解析中间件 / 模型，此时请求的 AsyncSession 可能已关闭或被并发请求共享。
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Any]] = None):
+        self._session_factory = session_factory or async_session_factory
+
+    async def get_model_instance(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._session_factory() as session:
+            return await ModelService(session).get_model_instance(*args, **kwargs)
+
+    async def get_runtime_model_by_name(self, *args: Any, **kwargs: Any) -> Any:
+        async with self._session_factory() as session:
+            return await ModelService(session).get_runtime_model_by_name(*args, **kwargs)
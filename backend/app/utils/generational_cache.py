@@ -0,0 +1,158 @@
+"""
+Generational Cache - In-process LRU + optional Redis tier with generation-based invalidation.
+
+Shared by the node result cache and the memory read cache:
+
+- Keys are ``{scope}:{generation}:{name}``. ``invalidate(scope)`` bumps the
+  scope's generation and ``invalidate_all()`` bumps a global epoch; both are part
+  of the generation, so stale entries in either tier are never read again and
+  simply expire.
+- Local tier: LRU over keys plus TTL. When Redis is available, values are also
+  shared across workers (serialized with the ``dumps`` / ``loads`` pair).
+- Values are deep-copied in and out, so callers may mutate what they get.
+"""
+
+import copy
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.core.redis import RedisClient
+
+# How long a locally known generation is trusted before re-reading it from Redis
+_GENERATION_REFRESH_SECONDS = 2.0
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+class GenerationalCache:
+    """In-process LRU + optional Redis tier, invalidated per scope by generation bumps."""
+
+    def __init__(
+        self,
+        redis_prefix: str,
+        log_prefix: str,
+        max_entries: int = 1024,
+        default_ttl: float = 60.0,
+        redis_enabled: bool = True,
+        dumps: Callable[[Any], str] = _json_dumps,
+        loads: Callable[[str], Any] = json.loads,
+    ):
+        self.redis_prefix = redis_prefix
+        self.log_prefix = log_prefix
+        self.max_entries = max(1, max_entries)
+        self.default_ttl = default_ttl
+        self.redis_enabled = redis_enabled
+        self._dumps = dumps
+        self._loads = loads
+        # key -> (expires_at, value)
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # scope -> (generation, checked_at)
+        self._generations: Dict[str, Tuple[int, float]] = {}
+        self._epoch: Tuple[int, float] = (0, 0.0)
+
+    def _use_redis(self) -> bool:
+        return self.redis_enabled and RedisClient.is_available()
+
+    # ==================== Generations ====================
+
+    async def generation(self, scope: str) -> str:
+        """Current generation of a scope (global epoch + per-scope counter)."""
+        cached = self._generations.get(scope)
+        now = time.monotonic()
+        if not self._use_redis():
+            return f"{self._epoch[0]}.{cached[0] if cached else 0}"
+        fresh = now - self._epoch[1] < _GENERATION_REFRESH_SECONDS
+        if cached is not None and fresh and now - cached[1] < _GENERATION_REFRESH_SECONDS:
+            return f"{self._epoch[0]}.{cached[0]}"
+        try:
+            epoch_raw = await RedisClient.get(f"{self.redis_prefix}:epoch")
+            raw = await RedisClient.get(f"{self.redis_prefix}:gen:{scope}")
+            self._epoch = (int(epoch_raw) if epoch_raw else 0, now)
+            scope_generation = int(raw) if raw else 0
+        except Exception as e:
+            logger.debug(f"{self.log_prefix} Failed to read generation | scope={scope} | error={e}")
+            scope_generation = cached[0] if cached else 0
+        self._generations[scope] = (scope_generation, now)
+        return f"{self._epoch[0]}.{scope_generation}"
+
+    async def make_key(self, scope: str, name: str) -> str:
+        return f"{scope}:{await self.generation(scope)}:{name}"
+
+    # ==================== Get / Set ====================
+
+    async def get(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(hit, value)``; values are deep copies."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                return True, copy.deepcopy(entry[1])
+            del self._entries[key]
+
+        if self._use_redis():
+            try:
+                raw = await RedisClient.get(f"{self.redis_prefix}:{key}")
+                if raw is not None:
+                    value = self._loads(raw)
+                    client = RedisClient.get_client()
+                    ttl = await client.ttl(f"{self.redis_prefix}:{key}") if client is not None else -1
+                    self._store_local(key, value, float(ttl) if ttl and ttl > 0 else self.default_ttl)
+                    return True, copy.deepcopy(value)
+            except Exception as e:
+                logger.warning(f"{self.log_prefix} Redis lookup failed | key={key} | error={type(e).__name__}: {e}")
+        return False, None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None or ttl <= 0 else ttl
+        value = copy.deepcopy(value)
+        self._store_local(key, value, ttl)
+        if self._use_redis():
+            try:
+                await RedisClient.set(f"{self.redis_prefix}:{key}", self._dumps(value), expire=max(1, int(ttl)))
+            except Exception as e:
+                logger.warning(f"{self.log_prefix} Redis store failed | key={key} | error={type(e).__name__}: {e}")
+
+    def _store_local(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ==================== Invalidation ====================
+
+    async def invalidate(self, scope: str) -> int:
+        """Drop every cached entry of a scope (both tiers, via generation bump); returns the new generation."""
+        prefix = f"{scope}:"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            del self._entries[key]
+        generation = (self._generations.get(scope) or (0, 0.0))[0] + 1
+        if self._use_redis():
+            try:
+                generation = await RedisClient.incr(f"{self.redis_prefix}:gen:{scope}")
+            except Exception as e:
+                logger.warning(f"{self.log_prefix} Failed to bump generation | scope={scope} | error={e}")
+        self._generations[scope] = (generation, time.monotonic())
+        return generation
+
+    async def invalidate_all(self) -> None:
+        self._entries.clear()
+        epoch = self._epoch[0] + 1
+        if self._use_redis():
+            try:
+                epoch = await RedisClient.incr(f"{self.redis_prefix}:epoch")
+            except Exception as e:
+                logger.warning(f"{self.log_prefix} Failed to bump epoch | error={e}")
+        self._epoch = (epoch, time.monotonic())
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._generations.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -5,6 +5,8 @@ LangChain Message Serializer
 将 LangChain BaseMessage 对象序列化为可存储的 dict 格式。
 """
 
+from collections.abc import Sequence
+from dataclasses import dataclass
 from typing import Any
 
 from loguru import logger
@@ -75,15 +77,15 @@ def serialize_message(msg: Any) -> dict:
     return result
 
 
-def serialize_messages(messages: Any) -> list[dict]:
+def flatten_messages(messages: Any) -> list:
     """
-    序列化消息列表。支持嵌套列表（LangChain 有时会传递 list[list[BaseMessage]]）。
+    展开一层嵌套的消息列表（LangChain 有时会传递 list[list[BaseMessage]]）。
 
     Args:
         messages: BaseMessage 列表或嵌套列表
 
     Returns:
-        扁平化的 dict 列表
+        扁平化的消息列表（不做序列化）
     """
     if not messages:
         return []
@@ -91,14 +93,43 @@ def serialize_messages(messages: Any) -> list[dict]:
     result = []
     for msg in messages:
         if isinstance(msg, list):
-            # 处理嵌套列表
-            for sub_msg in msg:
-                result.append(serialize_message(sub_msg))
+            result.extend(msg)
         else:
-            result.append(serialize_message(msg))
+            result.append(msg)
     return result
 
 
+def serialize_messages(messages: Any) -> list[dict]:
+    """
+    序列化消息列表。支持嵌套列表（LangChain 有时会传递 list[list[BaseMessage]]）。
+
+    Args:
+        messages: BaseMessage 列表或嵌套列表
+
+    Returns:
+        扁平化的 dict 列表
+    """
+    return [serialize_message(msg) for msg in flatten_messages(messages)]
+
+
+def message_fingerprint(msg: Any) -> str:
+    """
+    消息指纹，用于判断两次 LLM 调用的输入是否共享前缀。
+
+    指纹由 id 与内容 hash（含 tool_calls）组成，同 id 消息被改写（即使长度不变）也不会被当作相同前缀。
+    字符串内容的 hash 由 str 对象缓存，同一条消息在后续调用中重复计算几乎没有开销。
+    """
+    if isinstance(msg, dict):
+        return f"dict:{hash(repr(sorted(msg.items(), key=lambda kv: str(kv[0]))))}"
+    msg_type = type(msg).__name__
+    msg_id = getattr(msg, "id", None) or ""
+    content = getattr(msg, "content", None)
+    content_hash = hash(content) if isinstance(content, str) else hash(str(content if content is not None else msg))
+    tool_calls = getattr(msg, "tool_calls", None)
+    tool_calls_hash = hash(repr(tool_calls)) if tool_calls else 0
+    return f"{msg_type}:{msg_id}:{content_hash}:{tool_calls_hash}"
+
+
 def _extract_content(msg: Any) -> Any:
     """提取消息内容，处理多模态内容"""
     content = getattr(msg, "content", None)
@@ -141,40 +172,193 @@ def _serialize_tool_calls(tool_calls: list) -> list[dict]:
     return result
 
 
+# ============ 有界序列化 ============
+
+TRUNCATED_SUFFIX = "... [truncated]"
+
+# 超出预算后仅统计大小时最多访问的节点数（超过后 original_size 为下界）
+_SIZE_SCAN_LIMIT = 100_000
+
+
+@dataclass
+class BoundedText:
+    """有界序列化结果"""
+
+    text: str
+    original_size: int  # 完整 str() 形式的长度（字符数，近似值）
+    truncated: bool
+    size_exact: bool = True  # False 表示节点过多、original_size 只是下界
+
+
+class BoundedSerializer:
+    """
+    预算感知的 str() 替代实现。
+
+    按 str() 的格式遍历结构（dict / list / tuple / set / pydantic 模型 / 字符串），
+    输出达到预算后不再生成文本，只继续统计原始大小；大字符串只做切片，不会被完整复制。
+    无法遍历的对象（自定义类型）仍调用一次 str()。
+    """
+
+    __slots__ = ("limit", "_parts", "_written", "size", "_nodes")
+
+    def __init__(self, limit: int):
+        self.limit = max(0, limit)
+        self._parts: list[str] = []
+        self._written = 0
+        self.size = 0
+        self._nodes = 0
+
+    @property
+    def full(self) -> bool:
+        return self._written >= self.limit
+
+    @property
+    def size_exact(self) -> bool:
+        return self._nodes <= _SIZE_SCAN_LIMIT
+
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def _emit(self, chunk: str) -> None:
+        self.size += len(chunk)
+        if self._written < self.limit:
+            piece = chunk[: self.limit - self._written]
+            self._parts.append(piece)
+            self._written += len(piece)
+
+    def write(self, data: Any, nested: bool = False) -> None:
+        """按 str(data) 的格式写入（nested=True 时字符串按 repr 加引号，与容器的 str() 一致）"""
+        self._nodes += 1
+        if self._nodes > _SIZE_SCAN_LIMIT and self.full:
+            return
+
+        if isinstance(data, str):
+            if nested:
+                self._emit("'")
+                self._emit(data)
+                self._emit("'")
+            else:
+                self._emit(data)
+        elif data is None or isinstance(data, (bool, int, float)):
+            self._emit(str(data))
+        elif isinstance(data, dict):
+            self._emit("{")
+            for index, (key, value) in enumerate(data.items()):
+                if index:
+                    self._emit(", ")
+                self.write(key, nested=True)
+                self._emit(": ")
+                self.write(value, nested=True)
+            self._emit("}")
+        elif isinstance(data, (list, tuple, set, frozenset)) or (
+            isinstance(data, Sequence) and not isinstance(data, (bytes, bytearray))
+        ):
+            opening, closing = (
+                ("(", ")")
+                if isinstance(data, tuple)
+                else ("{", "}")
+                if isinstance(data, (set, frozenset))
+                else ("[", "]")
+            )
+            self._emit(opening)
+            for index, item in enumerate(data):
+                if index:
+                    self._emit(", ")
+                self.write(item, nested=True)
+            self._emit(closing)
+        elif isinstance(data, (bytes, bytearray)):
+            self.size += len(data) + 3
+            if not self.full:
+                remaining = self.limit - self._written
+                piece = repr(bytes(data[:remaining]))[:remaining]
+                self._parts.append(piece)
+                self._written += len(piece)
+        elif callable(getattr(data, "__repr_args__", None)):
+            # pydantic 模型（含 LangChain 消息）：str() 为 "field=value field=value"
+            if nested:
+                self._emit(f"{type(data).__name__}(")
+            separator = ", " if nested else " "
+            for index, (name, value) in enumerate(data.__repr_args__()):
+                if index:
+                    self._emit(separator)
+                if name is not None:
+                    self._emit(f"{name}=")
+                self.write(value, nested=True)
+            if nested:
+                self._emit(")")
+        else:
+            self._emit(str(data) if not nested else repr(data))
+
+
+def bounded_serialize(data: Any, max_length: int) -> BoundedText:
+    """
+    生成 data 的 str() 形式，最多 max_length 个字符，同时记录完整形式的长度（不生成完整文本）。
+    """
+    serializer = BoundedSerializer(max_length + 1)
+    serializer.write(data)
+    truncated = serializer.size > max_length
+    text = serializer.text()
+    return BoundedText(
+        text=text[:max_length] if truncated else text,
+        original_size=serializer.size,
+        truncated=truncated,
+        size_exact=serializer.size_exact,
+    )
+
+
+def bounded_str(data: Any, max_length: int) -> str:
+    """str(data) 的有界版本：超出 max_length 时截断并追加截断标记"""
+    bounded = bounded_serialize(data, max_length)
+    return bounded.text + TRUNCATED_SUFFIX if bounded.truncated else bounded.text
+
+
+def measure_data(data: Any) -> int:
+    """str(data) 的长度（不生成文本）"""
+    serializer = BoundedSerializer(0)
+    serializer.write(data)
+    return serializer.size
+
+
 def truncate_data(data: Any, max_length: int = 10000) -> Any:
     """
     截断数据到指定长度，记录 warning。
 
+    使用 BoundedSerializer 测量和截断，不对整个对象做 str()。
+
     Args:
         data: 要截断的数据
         max_length: 最大字符数
 
     Returns:
-        截断后的数据
+        截断后的数据（未超出时原样返回）
     """
     if data is None:
         return None
 
-    serialized = str(data)
-    if len(serialized) <= max_length:
+    if isinstance(data, str):
+        if len(data) <= max_length:
+            return data
+        logger.warning(f"Data truncated from {len(data)} to {max_length} chars (type=str)")
+        return data[:max_length] + TRUNCATED_SUFFIX
+
+    bounded = bounded_serialize(data, max_length)
+    if not bounded.truncated:
         return data
 
-    logger.warning(f"Data truncated from {len(serialized)} to {max_length} chars (type={type(data).__name__})")
+    size = bounded.original_size if bounded.size_exact else f">={bounded.original_size}"
+    logger.warning(f"Data truncated from {size} to {max_length} chars (type={type(data).__name__})")
 
-    if isinstance(data, str):
-        return data[:max_length] + "... [truncated]"
-    elif isinstance(data, dict):
+    if isinstance(data, dict):
         # 逐个截断 value
         result = {}
         current_len = 0
         for k, v in data.items():
-            v_str = str(v)
-            if current_len + len(v_str) > max_length:
-                remaining = max(0, max_length - current_len)
-                result[k] = v_str[:remaining] + "... [truncated]"
+            remaining = max(0, max_length - current_len)
+            value = bounded_serialize(v, remaining)
+            if value.truncated:
+                result[k] = value.text + TRUNCATED_SUFFIX
                 break
             result[k] = v
-            current_len += len(v_str)
+            current_len += value.original_size
         return result
-    else:
-        return serialized[:max_length] + "... [truncated]"
+    return bounded.text + TRUNCATED_SUFFIX
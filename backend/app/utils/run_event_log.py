@@ -0,0 +1,370 @@
+"""
+Run Event Log - 有界的按线程 SSE 事件日志（支持断线重连回放）
+
+图执行与 HTTP 连接解耦后，执行协程把每个 SSE 帧追加到该线程的事件日志中，
+HTTP 响应只是日志的一个读者：
+- 首次连接：从头读取并跟随实时事件
+- 断线重连：根据 Last-Event-ID 回放之后的事件，再继续跟随
+
+实现：
+- RedisRunEventLog：Redis Streams（XADD MAXLEN ~ / XREAD BLOCK），多 worker 共享
+- InMemoryRunEventLog：进程内环形缓冲区，Redis 不可用时的本地替代（仅同一 worker 可重连）
+
+运行中的日志在每次追加时刷新 active TTL（worker 中途崩溃也不会永久残留）；
+运行结束后追加结束标记，日志保留 retention 秒供晚到的重连读取。
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from app.core.redis import RedisClient
+from app.core.settings import settings
+
+_STREAM_KEY_PREFIX = "run:events:"
+_FRAME_FIELD = "f"
+_START_FIELD = "start"
+_END_FIELD = "end"
+_REDIS_BLOCK_MS = 5000
+_REDIS_READ_COUNT = 200
+# 追加失败后的重试间隔（秒）；全部失败则停止运行，而不是丢弃帧
+_APPEND_RETRY_DELAYS = (0.05, 0.2, 1.0)
+# 写日志与事件生成解耦：生成器把帧放入队列，写入协程每次把已排队的帧合并为一次批量写入
+_PUMP_QUEUE_MAX_FRAMES = 1000
+_PUMP_BATCH_MAX_FRAMES = 200
+
+
+class RunEventLog(ABC):
+    """事件日志接口"""
+
+    def __init__(self, max_events: int = 10000, retention_seconds: int = 600, active_ttl_seconds: int = 3600):
+        self.max_events = max(1, max_events)
+        self.retention_seconds = max(1, retention_seconds)
+        # 运行中日志的过期时间（每次追加时刷新）：worker 中途崩溃、未调用 finish 时日志也会过期
+        self.active_ttl_seconds = max(1, active_ttl_seconds)
+
+    @abstractmethod
+    async def reset(self, thread_id: str) -> None:
+        """新一次运行开始：清空该线程之前的事件"""
+
+    @abstractmethod
+    async def append(self, thread_id: str, frame: bytes) -> str:
+        """追加一个 SSE 帧，返回事件 ID"""
+
+    async def append_many(self, thread_id: str, frames: list[bytes]) -> list[str]:
+        """按顺序追加多个 SSE 帧，返回事件 ID 列表（实现可合并为一次往返）"""
+        return [await self.append(thread_id, frame) for frame in frames]
+
+    @abstractmethod
+    async def finish(self, thread_id: str) -> None:
+        """标记运行结束（读者读完剩余事件后退出）"""
+
+    @abstractmethod
+    async def exists(self, thread_id: str) -> bool:
+        """该线程是否有进行中或最近结束的运行日志"""
+
+    @abstractmethod
+    def read(self, thread_id: str, after: Optional[str] = None) -> AsyncIterator[tuple[str, bytes]]:
+        """读取 after 之后的事件（after 为 None 时从头读取），并跟随直到运行结束"""
+
+
+# ============ In-Memory ============
+
+
+class _RunChannel:
+    __slots__ = ("events", "next_seq", "finished_at", "touched_at", "changed")
+
+    def __init__(self, max_events: int):
+        self.events: deque[tuple[int, bytes]] = deque(maxlen=max_events)
+        self.next_seq = 1
+        self.finished_at: Optional[float] = None
+        self.touched_at = time.monotonic()
+        self.changed = asyncio.Event()
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class InMemoryRunEventLog(RunEventLog):
+    """进程内环形缓冲区实现"""
+
+    def __init__(self, max_events: int = 10000, retention_seconds: int = 600, active_ttl_seconds: int = 3600):
+        super().__init__(max_events, retention_seconds, active_ttl_seconds)
+        self._channels: dict[str, _RunChannel] = {}
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            thread_id
+            for thread_id, channel in self._channels.items()
+            if (channel.finished_at is not None and channel.finished_at < now - self.retention_seconds)
+            or (channel.finished_at is None and channel.touched_at < now - self.active_ttl_seconds)
+        ]
+        for thread_id in expired:
+            del self._channels[thread_id]
+
+    async def reset(self, thread_id: str) -> None:
+        self._purge_expired()
+        previous = self._channels.get(thread_id)
+        self._channels[thread_id] = _RunChannel(self.max_events)
+        if previous is not None:
+            # 唤醒仍在读取旧运行的读者，让其退出
+            previous.finished_at = time.monotonic()
+            previous.notify()
+
+    async def append(self, thread_id: str, frame: bytes) -> str:
+        channel = self._channels.get(thread_id)
+        if channel is None:
+            channel = self._channels[thread_id] = _RunChannel(self.max_events)
+        seq = channel.next_seq
+        channel.next_seq += 1
+        channel.events.append((seq, frame))
+        channel.touched_at = time.monotonic()
+        channel.notify()
+        return str(seq)
+
+    async def finish(self, thread_id: str) -> None:
+        channel = self._channels.get(thread_id)
+        if channel is not None:
+            channel.finished_at = time.monotonic()
+            channel.notify()
+
+    async def exists(self, thread_id: str) -> bool:
+        self._purge_expired()
+        return thread_id in self._channels
+
+    async def read(self, thread_id: str, after: Optional[str] = None) -> AsyncIterator[tuple[str, bytes]]:
+        channel = self._channels.get(thread_id)
+        if channel is None:
+            return
+        try:
+            after_seq = int(after) if after else 0
+        except ValueError:
+            after_seq = 0
+
+        while True:
+            waiter = channel.changed
+            # 读者通常在尾部，从右向左收集新事件，开销与新事件数成正比
+            new_events: list[tuple[int, bytes]] = []
+            for seq, frame in reversed(channel.events):
+                if seq <= after_seq:
+                    break
+                new_events.append((seq, frame))
+            for seq, frame in reversed(new_events):
+                after_seq = seq
+                yield str(seq), frame
+            if channel.finished_at is not None:
+                return
+            if not new_events:
+                await waiter.wait()
+
+
+# ============ Redis Streams ============
+
+
+class RedisRunEventLog(RunEventLog):
+    """Redis Streams 实现（多 worker 共享，重连可落到任意 worker）"""
+
+    @staticmethod
+    def _key(thread_id: str) -> str:
+        return f"{_STREAM_KEY_PREFIX}{thread_id}"
+
+    async def reset(self, thread_id: str) -> None:
+        client = RedisClient.get_client()
+        if client is None:
+            return
+        key = self._key(thread_id)
+        # 写入开始标记并设置过期：日志从运行开始即存在（可重连），worker 崩溃时也不会永久残留
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.xadd(key, {_START_FIELD: "1"}, maxlen=self.max_events, approximate=True)
+        pipe.expire(key, self.active_ttl_seconds)
+        await pipe.execute()
+
+    async def append(self, thread_id: str, frame: bytes) -> str:
+        client = RedisClient.get_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        key = self._key(thread_id)
+        pipe = client.pipeline(transaction=False)
+        pipe.xadd(key, {_FRAME_FIELD: frame.decode("utf-8")}, maxlen=self.max_events, approximate=True)
+        pipe.expire(key, self.active_ttl_seconds)
+        event_id, _ = await pipe.execute()
+        return str(event_id)
+
+    async def append_many(self, thread_id: str, frames: list[bytes]) -> list[str]:
+        client = RedisClient.get_client()
+        if client is None:
+            raise RuntimeError("Redis client is not initialized")
+        key = self._key(thread_id)
+        # 一次往返写入整批；MULTI/EXEC 保证失败重试时不会重复写入部分帧
+        pipe = client.pipeline(transaction=True)
+        for frame in frames:
+            pipe.xadd(key, {_FRAME_FIELD: frame.decode("utf-8")}, maxlen=self.max_events, approximate=True)
+        pipe.expire(key, self.active_ttl_seconds)
+        results = await pipe.execute()
+        return [str(event_id) for event_id in results[:-1]]
+
+    async def finish(self, thread_id: str) -> None:
+        client = RedisClient.get_client()
+        if client is None:
+            return
+        key = self._key(thread_id)
+        pipe = client.pipeline(transaction=False)
+        pipe.xadd(key, {_END_FIELD: "1"}, maxlen=self.max_events, approximate=True)
+        pipe.expire(key, self.retention_seconds)
+        await pipe.execute()
+
+    async def exists(self, thread_id: str) -> bool:
+        return await RedisClient.exists(self._key(thread_id))
+
+    async def read(self, thread_id: str, after: Optional[str] = None) -> AsyncIterator[tuple[str, bytes]]:
+        client = RedisClient.get_client()
+        # XREAD BLOCK 占用连接直到有新事件或超时：使用独立的阻塞连接池，不挤占共享连接池
+        blocking_client = RedisClient.get_blocking_client()
+        if client is None or blocking_client is None:
+            return
+        key = self._key(thread_id)
+        last_id = after or "0-0"
+        while True:
+            response = await blocking_client.xread({key: last_id}, count=_REDIS_READ_COUNT, block=_REDIS_BLOCK_MS)
+            if not response:
+                # 超时无新事件：日志已过期 / 被删除时退出
+                if not await client.exists(key):
+                    return
+                continue
+            for _stream, entries in response:
+                for event_id, fields in entries:
+                    last_id = event_id
+                    if _END_FIELD in fields:
+                        return
+                    frame = fields.get(_FRAME_FIELD)
+                    if frame is not None:
+                        yield str(event_id), frame.encode("utf-8")
+
+
+# ============ Factory ============
+
+_memory_log = InMemoryRunEventLog(
+    max_events=settings.sse_event_log_max_events,
+    retention_seconds=settings.sse_event_log_retention_seconds,
+    active_ttl_seconds=settings.sse_event_log_active_ttl_seconds,
+)
+_redis_log = RedisRunEventLog(
+    max_events=settings.sse_event_log_max_events,
+    retention_seconds=settings.sse_event_log_retention_seconds,
+    active_ttl_seconds=settings.sse_event_log_active_ttl_seconds,
+)
+
+
+def get_run_event_log() -> RunEventLog:
+    """Redis 可用时使用 Redis Streams，否则使用进程内环形缓冲区"""
+    if RedisClient.is_available():
+        return _redis_log
+    return _memory_log
+
+
+async def cancel_event_stream(events: AsyncIterator[bytes]) -> None:
+    """把取消传入挂起在 yield 处的事件生成器（使其执行 CancelledError 分支与 finally），然后关闭"""
+    athrow = getattr(events, "athrow", None)
+    if athrow is None:
+        return
+    try:
+        await athrow(asyncio.CancelledError())
+    except (StopAsyncIteration, asyncio.CancelledError):
+        pass
+    finally:
+        aclose = getattr(events, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+async def _append_with_retry(event_log: RunEventLog, thread_id: str, frames: list[bytes]) -> list[str]:
+    for delay in _APPEND_RETRY_DELAYS:
+        try:
+            return await event_log.append_many(thread_id, frames)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to append run events, retrying in {delay}s | thread_id={thread_id} | error={e}")
+            await asyncio.sleep(delay)
+    return await event_log.append_many(thread_id, frames)
+
+
+async def _write_batches(thread_id: str, pending: "asyncio.Queue[Optional[bytes]]", event_log: RunEventLog) -> None:
+    """写入协程：等待第一帧，再取走此期间排队的所有帧，整批写入（None 表示运行结束）"""
+    while True:
+        frames = [await pending.get()]
+        while not pending.empty() and len(frames) < _PUMP_BATCH_MAX_FRAMES:
+            frames.append(pending.get_nowait())
+        done = frames[-1] is None
+        batch = [frame for frame in frames if frame is not None]
+        if batch:
+            await _append_with_retry(event_log, thread_id, batch)
+        if done:
+            return
+
+
+async def pump_run_events(
+    thread_id: str,
+    events: AsyncIterator[bytes],
+    event_log: RunEventLog,
+) -> None:
+    """
+    后台执行：把事件生成器产生的每个 SSE 帧写入事件日志。
+
+    帧先进入有界队列，由写入协程按批写入（一次往返写入写日志期间产生的所有帧），
+    生成 token 不必逐帧等待 Redis。生成器内部自行处理停止 / 异常 / 持久化；
+    若取消恰好发生在写日志时（而非生成器内部），将取消传入生成器，使其走与断线相同的
+    停止与持久化流程；写日志重试后仍失败时，在下一帧到来时同样停止运行。
+    """
+    pending: asyncio.Queue[Optional[bytes]] = asyncio.Queue(maxsize=_PUMP_QUEUE_MAX_FRAMES)
+    writer = asyncio.create_task(_write_batches(thread_id, pending, event_log))
+    try:
+        async for frame in events:
+            if not writer.done() and pending.full():
+                # 写入跟不上：等待队列腾出空间（或写入失败）
+                put = asyncio.ensure_future(pending.put(frame))
+                try:
+                    await asyncio.wait({put, writer}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    put.cancel()
+            elif not writer.done():
+                pending.put_nowait(frame)
+            if writer.done():
+                break
+        else:
+            if not writer.done():
+                await pending.put(None)
+        try:
+            await writer
+        except Exception as e:
+            # 读者无法拿到这些帧：停止运行（走与断线相同的停止与持久化流程），而不是静默跳过
+            logger.error(f"Failed to append run events, stopping run | thread_id={thread_id} | error={e}")
+            await cancel_event_stream(events)
+    except asyncio.CancelledError:
+        writer.cancel()
+        await cancel_event_stream(events)
+        raise
+    finally:
+        if not writer.done():
+            writer.cancel()
+        try:
+            await event_log.finish(thread_id)
+        except Exception as e:
+            logger.warning(f"Failed to finish run event log | thread_id={thread_id} | error={e}")
+
+
+async def tail_run_events(
+    thread_id: str,
+    event_log: RunEventLog,
+    last_event_id: Optional[str] = None,
+) -> AsyncIterator[bytes]:
+    """HTTP 读者：为每个帧加上 SSE id 行，断线后可用 Last-Event-ID 续读"""
+    async for event_id, frame in event_log.read(thread_id, last_event_id):
+        yield b"id: " + event_id.encode() + b"\n" + frame
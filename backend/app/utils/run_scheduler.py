@@ -0,0 +1,204 @@
+"""
+运行调度器
+
+图执行（chat / resume / copilot）的准入控制：
+- 全局并发上限与单用户并发上限
+- 有界等待队列（队列满时拒绝新运行）
+- 优先级（同优先级先到先服务；用户已达上限时跳过其排队项，不阻塞其他用户）
+- 排队位置变化通知（用于向客户端推送 queued 状态）
+
+上限按进程计算（每个 worker 独立），与 TaskManager 一样为模块级单例。
+"""
+
+import asyncio
+import bisect
+import itertools
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from app.common.exceptions import TooManyRequestsException
+from app.core.settings import settings
+
+
+class RunPriority(IntEnum):
+    """运行优先级（数值越大越先执行）"""
+
+    LOW = -10
+    NORMAL = 0
+    # 恢复中断的运行：用户正在等待已开始的工作
+    HIGH = 10
+
+
+@dataclass(eq=False)
+class RunTicket:
+    """一次排队中的运行"""
+
+    user_id: str
+    priority: int
+    seq: int
+    kind: str = "run"
+    admitted: bool = False
+    released: bool = False
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (-self.priority, self.seq)
+
+
+class RunScheduler:
+    """有界队列 + 全局 / 单用户并发上限的运行调度器"""
+
+    def __init__(self, max_concurrent: int = 32, max_per_user: int = 4, max_queue: int = 256):
+        # <= 0 表示不限制
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+
+        self._waiting: list[RunTicket] = []
+        self._waiting_keys: list[tuple[int, int]] = []
+        self._running: dict[str, int] = {}
+        self._running_total = 0
+        self._seq = itertools.count()
+        self._changed = asyncio.Event()
+
+    # ==================== Queue ====================
+
+    def submit(self, user_id: str, priority: int = RunPriority.NORMAL, kind: str = "run") -> RunTicket:
+        """
+        提交一次运行。可立即执行时直接准入，否则进入等待队列。
+
+        Raises:
+            TooManyRequestsException: 等待队列已满
+        """
+        ticket = RunTicket(user_id=str(user_id), priority=int(priority), seq=next(self._seq), kind=kind)
+        if self._can_run(ticket.user_id) and not self._waiting:
+            self._admit(ticket)
+            return ticket
+
+        if self.max_queue > 0 and len(self._waiting) >= self.max_queue:
+            logger.warning(f"[RunScheduler] Queue full, rejecting {kind} | user_id={user_id}")
+            raise TooManyRequestsException("Too many runs in progress, please retry later.")
+
+        index = bisect.bisect(self._waiting_keys, ticket.sort_key)
+        self._waiting.insert(index, ticket)
+        self._waiting_keys.insert(index, ticket.sort_key)
+        self._dispatch()
+        return ticket
+
+    def position(self, ticket: RunTicket) -> int:
+        """排队位置（1 起始；已准入为 0）"""
+        if ticket.admitted or ticket.released:
+            return 0
+        try:
+            return self._waiting.index(ticket) + 1
+        except ValueError:
+            return 0
+
+    async def wait(self, ticket: RunTicket) -> AsyncIterator[int]:
+        """
+        等待准入，排队位置变化时产出新位置。
+
+        用法：
+            async for position in scheduler.wait(ticket):
+                notify(position)
+        """
+        last_position: Optional[int] = None
+        while not ticket.admitted:
+            if ticket.released:
+                return
+            changed = self._changed
+            position = self.position(ticket)
+            if position != last_position:
+                last_position = position
+                yield position
+            if ticket.admitted:
+                return
+            await changed.wait()
+
+    def release(self, ticket: RunTicket) -> None:
+        """运行结束（或排队中取消）：释放名额并调度下一个"""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket.admitted:
+            self._running_total -= 1
+            remaining = self._running.get(ticket.user_id, 1) - 1
+            if remaining > 0:
+                self._running[ticket.user_id] = remaining
+            else:
+                self._running.pop(ticket.user_id, None)
+        else:
+            self._remove_waiting(ticket)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, priority: int = RunPriority.NORMAL, kind: str = "run"):
+        """提交并等待准入，退出时释放名额（不需要排队位置通知时使用）"""
+        ticket = self.submit(user_id, priority, kind)
+        try:
+            async for _position in self.wait(ticket):
+                pass
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running_total,
+            "waiting": len(self._waiting),
+            "running_users": len(self._running),
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "max_queue": self.max_queue,
+        }
+
+    # ==================== Internal ====================
+
+    def _can_run(self, user_id: str) -> bool:
+        if self.max_concurrent > 0 and self._running_total >= self.max_concurrent:
+            return False
+        if self.max_per_user > 0 and self._running.get(user_id, 0) >= self.max_per_user:
+            return False
+        return True
+
+    def _admit(self, ticket: RunTicket) -> None:
+        ticket.admitted = True
+        self._running_total += 1
+        self._running[ticket.user_id] = self._running.get(ticket.user_id, 0) + 1
+
+    def _remove_waiting(self, ticket: RunTicket) -> None:
+        try:
+            index = self._waiting.index(ticket)
+        except ValueError:
+            return
+        del self._waiting[index]
+        del self._waiting_keys[index]
+
+    def _dispatch(self) -> None:
+        """按优先级准入可运行的排队项（已达单用户上限的用户被跳过），并通知等待者"""
+        index = 0
+        while index < len(self._waiting):
+            if self.max_concurrent > 0 and self._running_total >= self.max_concurrent:
+                break
+            ticket = self._waiting[index]
+            if self._can_run(ticket.user_id):
+                del self._waiting[index]
+                del self._waiting_keys[index]
+                self._admit(ticket)
+            else:
+                index += 1
+
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+
+# 全局运行调度器实例
+run_scheduler = RunScheduler(
+    max_concurrent=settings.run_max_concurrent,
+    max_per_user=settings.run_max_per_user,
+    max_queue=settings.run_max_queue,
+)
@@ -0,0 +1,151 @@
+"""
+SSE Envelope Encoder
+
+基于 orjson 的 SSE 事件编码器，直接输出 bytes 给 StreamingResponse。
+
+- 每个流（thread）创建一个 SSEEncoder，thread_id / trace_id 等不变字段预先编码为字节片段
+- 每个事件只编码变化的字段（type / run_id / data ...），然后按模板拼接
+- 序列化失败时按字段降级（单个字段替换为 _serialization_error），而不是丢弃整个事件
+"""
+
+import time
+from collections.abc import Sequence
+from enum import Enum
+from typing import Any, Optional
+
+import orjson
+from langchain_core.messages.base import BaseMessage
+from loguru import logger
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+_EMPTY_STR = b'""'
+_EMPTY_LIST = b"[]"
+
+
+def sse_default(obj: Any) -> Any:
+    """orjson 无法原生序列化的对象的降级处理"""
+    if isinstance(obj, BaseMessage):
+        return {
+            "type": obj.__class__.__name__,
+            "content": str(obj.content) if hasattr(obj, "content") else str(obj),
+        }
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, Sequence) and not isinstance(obj, (str, bytes)):
+        # 非 list 的序列（如 append-only 状态通道的值）
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        try:
+            return obj.model_dump()
+        except Exception:
+            pass
+    if hasattr(obj, "dict"):
+        try:
+            return obj.dict()
+        except Exception:
+            pass
+    return str(obj)
+
+
+def dumps(value: Any) -> bytes:
+    """orjson 序列化（带 sse_default 降级）"""
+    return orjson.dumps(value, default=sse_default, option=_ORJSON_OPTIONS)
+
+
+def _dumps_field(value: Any) -> bytes:
+    """单个字段序列化，失败时替换为错误占位符"""
+    try:
+        return dumps(value)
+    except (orjson.JSONEncodeError, TypeError, ValueError, OverflowError) as e:
+        return dumps({"_serialization_error": str(e)[:200]})
+
+
+def _dumps_payload(event_type: str, payload: dict) -> bytes:
+    """序列化 data 字段：整体失败时逐字段降级"""
+    try:
+        return dumps(payload)
+    except (orjson.JSONEncodeError, TypeError, ValueError, OverflowError) as e:
+        logger.warning(f"SSE serialization failed for {event_type}, falling back per field: {e}")
+        parts = [dumps(str(key)) + b":" + _dumps_field(value) for key, value in payload.items()]
+        return b"{" + b",".join(parts) + b"}"
+
+
+class SSEEncoder:
+    """
+    单个流的 SSE envelope 编码器。
+
+    Envelope 字段顺序与协议保持一致：
+    type, thread_id, run_id, node_name, timestamp, tags, trace_id,
+    observation_id, parent_observation_id, data
+    """
+
+    def __init__(self, thread_id: str, trace_id: str = ""):
+        self.thread_id = thread_id
+        self.trace_id = trace_id
+        self._thread_fragment = b',"thread_id":' + dumps(thread_id)
+        self._trace_bytes = dumps(trace_id)
+        self._type_cache: dict[str, bytes] = {}
+        # tags 通常在同一节点的连续事件中不变（同一个 list 对象），缓存最近一次的编码结果
+        self._last_tags: Any = None
+        self._last_tags_bytes: bytes = _EMPTY_LIST
+
+    def _encode_type(self, event_type: str) -> bytes:
+        encoded = self._type_cache.get(event_type)
+        if encoded is None:
+            encoded = dumps(event_type)
+            self._type_cache[event_type] = encoded
+        return encoded
+
+    def _encode_tags(self, tags: Any) -> bytes:
+        if not tags:
+            return _EMPTY_LIST
+        if tags is self._last_tags or tags == self._last_tags:
+            return self._last_tags_bytes
+        encoded = _dumps_field(tags)
+        self._last_tags = tags
+        self._last_tags_bytes = encoded
+        return encoded
+
+    def _encode_trace_id(self, trace_id: Optional[str]) -> bytes:
+        if trace_id is None or trace_id == self.trace_id:
+            return self._trace_bytes
+        return _dumps_field(trace_id)
+
+    @staticmethod
+    def _encode_optional_str(value: Any) -> bytes:
+        if not value:
+            return _EMPTY_STR
+        return _dumps_field(value)
+
+    def encode(self, event_type: str, payload: dict, meta: Optional[dict] = None) -> bytes:
+        """将事件编码为完整的 SSE 帧（``data: {...}\\n\\n``）"""
+        meta = meta or {}
+        timestamp = meta.get("timestamp")
+        if not isinstance(timestamp, int):
+            timestamp = int(time.time() * 1000)
+
+        return b"".join(
+            (
+                b'data: {"type":',
+                self._encode_type(event_type),
+                self._thread_fragment,
+                b',"run_id":',
+                self._encode_optional_str(meta.get("run_id")),
+                b',"node_name":',
+                _dumps_field(meta.get("node_name", "system")),
+                b',"timestamp":',
+                str(timestamp).encode(),
+                b',"tags":',
+                self._encode_tags(meta.get("tags")),
+                b',"trace_id":',
+                self._encode_trace_id(meta.get("trace_id")),
+                b',"observation_id":',
+                self._encode_optional_str(meta.get("observation_id")),
+                b',"parent_observation_id":',
+                self._encode_optional_str(meta.get("parent_observation_id")),
+                b',"data":',
+                _dumps_payload(event_type, payload),
+                b"}\n\n",
+            )
+        )
@@ -9,20 +9,29 @@ Stream Event Handler (Production)
 - StreamState: Map-based observation 管理（替代 stack）
 - ObservationRecord: 增强的内存 observation 记录
 - StreamEventHandler: 事件 -> SSE 转换，所有 handler 接收 run_id/parent_run_id
-- format_sse: 安全序列化，降级处理
+- format_sse: orjson 编码为 bytes，按字段降级处理
 """
 
-import json
+import itertools
 import time
 import uuid
+from collections.abc import Sequence
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 from langchain_core.messages.base import BaseMessage
 from loguru import logger
 
-from app.utils.message_serializer import serialize_messages, truncate_data
+from app.utils.message_serializer import (
+    bounded_serialize,
+    bounded_str,
+    flatten_messages,
+    message_fingerprint,
+    serialize_messages,
+    truncate_data,
+)
+from app.utils.sse_encoder import SSEEncoder
 from app.utils.token_usage import extract_usage_from_output
 
 # ============ LangGraph 控制流异常（不标记为 ERROR） ============
@@ -67,7 +76,7 @@ class ObsStatus(str, Enum):
 class ObservationRecord:
     """
     内存中的 Observation 记录。
-    SSE 流结束后批量写入数据库。
+    由 TraceWriter 在流式执行期间增量写入数据库（或在流结束后批量写入）。
     """
 
     id: str
@@ -112,7 +121,7 @@ class StreamState:
     而非 stack-based 方式，正确支持并发事件和乱序到达。
     """
 
-    def __init__(self, thread_id: str):
+    def __init__(self, thread_id: str, model_input_delta: bool = False):
         self.thread_id = thread_id
         self.all_messages: list[BaseMessage] = []
         self.assistant_content = ""
@@ -124,6 +133,14 @@ class StreamState:
         self.interrupt_node: str | None = None
         self.interrupt_state: dict | None = None
 
+        # 根图最终状态（从事件流捕获，避免运行结束后再读 checkpoint）
+        self.final_values: dict | None = None
+        self.root_ended = False
+        self.interrupt_signaled = False
+        self.interrupt_values: list[Any] = []
+        # 根图直接子节点：run_id -> 节点名（已开始但未结束）
+        self._root_nodes_running: dict[str, str] = {}
+
         # ============ Trace / Observation 追踪 ============
         self.trace_id: str = str(uuid.uuid4())
         self.trace_start_time: float = time.time() * 1000  # epoch ms
@@ -133,8 +150,13 @@ class StreamState:
         self._active: dict[str, ObservationRecord] = {}
         # run_id -> parent_run_id (层级关系)
         self._parent_map: dict[str, Optional[str]] = {}
-        # 所有已完成的 observation (用于持久化)
+        # 已完成但尚未交给写入器的 observation (用于持久化)
         self._completed: list[ObservationRecord] = []
+        self._last_completed: Optional[ObservationRecord] = None
+        # write-behind 写入器（TraceWriter.submit），接收后 observation 不再保留在内存中
+        self._observation_sink: Optional[Callable[[ObservationRecord], bool]] = None
+        # GENERATION token 累计（observation 写出后仍可得到 trace 总量）
+        self.total_tokens = 0
         # run_id -> observation_id (映射)
         self._run_to_obs: dict[str, str] = {}
         # observation_id -> run_id (反向映射)
@@ -142,10 +164,66 @@ class StreamState:
         # 首 token 标记追踪
         self._completion_start_tracked: set[str] = set()
 
+        # SSE 编码器（thread_id / trace_id 预编码）
+        self.sse_encoder = SSEEncoder(thread_id, self.trace_id)
+
+        # model_input 增量模式：chain_key -> (上一次 model_input 的 observation_id, 消息指纹列表)
+        self.model_input_delta = model_input_delta
+        self._model_input_chains: dict[str, tuple[str, list[str]]] = {}
+
     def append_content(self, chunk: str):
         """追加内容块"""
         self.assistant_content += chunk
 
+    # ============ 根图状态捕获 ============
+
+    def observe_graph_event(self, event: dict) -> None:
+        """
+        从 astream_events (v2) 事件中捕获根图的最终状态与中断信号。
+
+        - 根图 on_chain_stream 的 __interrupt__ 块：图在中断点暂停
+        - 根图 on_chain_end：output 即最终 state values
+        - 根图直接子节点的 start / end：interrupt() 暂停的节点只有 start 没有 end
+        """
+        parent_ids = event.get("parent_ids")
+        if parent_ids is None:
+            return
+        event_type = event.get("event")
+
+        if not parent_ids:
+            data = event.get("data")
+            if not isinstance(data, dict):
+                return
+            if event_type == "on_chain_stream":
+                chunk = data.get("chunk")
+                if isinstance(chunk, dict) and "__interrupt__" in chunk:
+                    self.interrupt_signaled = True
+                    self.interrupt_values.extend(chunk["__interrupt__"] or ())
+            elif event_type == "on_chain_end":
+                output = data.get("output")
+                if isinstance(output, dict):
+                    self.final_values = output
+                self.root_ended = True
+            return
+
+        if len(parent_ids) == 1 and event_type in ("on_chain_start", "on_chain_end"):
+            metadata = event.get("metadata")
+            node = metadata.get("langgraph_node") if isinstance(metadata, dict) else None
+            run_id = str(event.get("run_id", ""))
+            if not node or event.get("name") != node:
+                return
+            if event_type == "on_chain_start":
+                self._root_nodes_running[run_id] = node
+            else:
+                self._root_nodes_running.pop(run_id, None)
+
+    @property
+    def pending_root_node(self) -> str | None:
+        """已开始但未结束的根图节点（interrupt() 暂停的节点）"""
+        for node in self._root_nodes_running.values():
+            return node
+        return None
+
     # ============ Observation 生命周期 ============
 
     def create_observation(
@@ -197,6 +275,10 @@ class StreamState:
         self._run_to_obs[run_id] = obs_id
         self._obs_to_run[obs_id] = run_id
 
+        # 以 RUNNING 状态提前写出，执行中即可查询
+        if self._observation_sink is not None:
+            self._observation_sink(record)
+
         return obs_id
 
     def end_observation(
@@ -247,7 +329,12 @@ class StreamState:
         if total_tokens is not None:
             record.total_tokens = total_tokens
 
-        self._completed.append(record)
+        if record.type == ObsType.GENERATION and record.total_tokens:
+            self.total_tokens += record.total_tokens
+
+        self._last_completed = record
+        if self._observation_sink is None or not self._observation_sink(record):
+            self._completed.append(record)
 
         # 清理映射
         del self._run_to_obs[run_id]
@@ -255,6 +342,36 @@ class StreamState:
 
         return obs_id
 
+    def annotate_observation(self, run_id: str, metadata: dict) -> bool:
+        """合并 metadata 到进行中的 observation（如节点结果缓存命中情况）。"""
+        obs_id = self._run_to_obs.get(run_id)
+        record = self._active.get(obs_id) if obs_id else None
+        if record is None:
+            return False
+        record.metadata = {**(record.metadata or {}), **metadata}
+        return True
+
+    def get_completed_duration(self, obs_id: Optional[str]) -> Optional[int]:
+        """获取已完成 observation 的时长（毫秒）"""
+        if not obs_id:
+            return None
+        record = self._last_completed
+        if record is not None and record.id == obs_id:
+            return record.duration_ms
+        for rec in reversed(self._completed):
+            if rec.id == obs_id:
+                return rec.duration_ms
+        return None
+
+    def set_observation_sink(self, sink: Optional[Callable[[ObservationRecord], bool]]) -> None:
+        """挂载 / 卸载 write-behind 写入器"""
+        self._observation_sink = sink
+
+    def clear_completed(self) -> None:
+        """已持久化后释放内存中的 observation"""
+        self._completed = []
+        self._last_completed = None
+
     def get_observation_id(self, run_id: str) -> Optional[str]:
         """获取 run_id 对应的 observation_id"""
         return self._run_to_obs.get(run_id)
@@ -275,6 +392,29 @@ class StreamState:
                 record.completion_start_time = time.time() * 1000
                 self._completion_start_tracked.add(obs_id)
 
+    def diff_model_input(self, chain_key: str, messages: list) -> tuple[Optional[str], int]:
+        """
+        与同一调用链上一次 model_input 比较，返回 (prefix_observation_id, prefix_length)。
+
+        只有上一次发送的消息恰好是本次消息的前缀时才复用；否则返回 (None, 0)，发送完整列表。
+        """
+        previous = self._model_input_chains.get(chain_key)
+        if previous is None:
+            return None, 0
+
+        prev_obs_id, prev_fingerprints = previous
+        prefix_length = len(prev_fingerprints)
+        if prefix_length == 0 or prefix_length > len(messages):
+            return None, 0
+        for msg, fingerprint in zip(messages, prev_fingerprints):
+            if message_fingerprint(msg) != fingerprint:
+                return None, 0
+        return prev_obs_id, prefix_length
+
+    def record_model_input(self, chain_key: str, obs_id: str, messages: list) -> None:
+        """记录某条调用链最近一次发送的完整输入（仅保存指纹）"""
+        self._model_input_chains[chain_key] = (obs_id, [message_fingerprint(m) for m in messages])
+
     def get_all_observations(self) -> list[ObservationRecord]:
         """
         获取所有 observations（已完成 + 未完成）。
@@ -289,6 +429,65 @@ class StreamState:
         return all_obs
 
 
+# ============ Content Coalescing ============
+
+
+class ContentCoalescer:
+    """
+    content 增量合并缓冲区（token micro-batching）。
+
+    同一 run_id / observation 的连续 content 增量合并为一帧，在以下情况下 flush：
+    - 距离缓冲区第一个增量超过时间预算（window_ms）
+    - 缓冲字节数超过字节预算（max_bytes）
+    - 事件类型或 run_id 发生变化（由 StreamEventHandler 触发）
+
+    每个 run 的首个增量总是立即发送，保证首 token 延迟不变。
+    """
+
+    def __init__(self, window_ms: int, max_bytes: int):
+        self.window_s = window_ms / 1000
+        self.max_bytes = max_bytes
+        self.key: Optional[tuple[str, str]] = None
+        self.deltas: list[str] = []
+        self.size = 0
+        self.meta: dict = {}
+        self.started_at = 0.0
+        self._started_runs: set[str] = set()
+
+    def is_first_chunk(self, run_id: str) -> bool:
+        if run_id in self._started_runs:
+            return False
+        self._started_runs.add(run_id)
+        return True
+
+    def append(self, key: tuple[str, str], delta: str, meta: dict) -> None:
+        if not self.deltas:
+            self.started_at = time.monotonic()
+        self.key = key
+        self.deltas.append(delta)
+        self.size += len(delta.encode())
+        self.meta = meta
+
+    def is_due(self) -> bool:
+        return bool(self.deltas) and (
+            self.size >= self.max_bytes or time.monotonic() - self.started_at >= self.window_s
+        )
+
+    def seconds_until_due(self) -> Optional[float]:
+        """距离时间预算到期的秒数；缓冲区为空时返回 None"""
+        if not self.deltas:
+            return None
+        return max(0.0, self.window_s - (time.monotonic() - self.started_at))
+
+    def drain(self) -> tuple[str, dict]:
+        delta, meta = "".join(self.deltas), self.meta
+        self.key = None
+        self.deltas = []
+        self.size = 0
+        self.meta = {}
+        return delta, meta
+
+
 # ============ StreamEventHandler ============
 
 
@@ -298,8 +497,16 @@ class StreamEventHandler:
 
     所有 handle_* 方法签名统一接收 run_id 和 parent_run_id，
     使用 StreamState 的 map-based observation 管理。
+
+    coalesce_window_ms > 0 时启用 content 增量合并（见 ContentCoalescer），
+    调用方需要在发送其他事件之前以及流结束时调用 flush_content()。
     """
 
+    def __init__(self, coalesce_window_ms: int = 0, coalesce_max_bytes: int = 4096):
+        self._coalescer: Optional[ContentCoalescer] = (
+            ContentCoalescer(coalesce_window_ms, coalesce_max_bytes) if coalesce_window_ms > 0 else None
+        )
+
     @staticmethod
     def _extract_metadata(event: dict) -> dict:
         """提取标准化元数据"""
@@ -349,6 +556,19 @@ class StreamEventHandler:
             "node_type": config.get("node_type") or metadata.get("node_type"),
         }
 
+    @staticmethod
+    def _model_input_chain_key(metadata: dict) -> str:
+        """
+        model_input 增量模式的调用链标识。
+
+        使用 checkpoint_ns 的第一段（外层图节点的 task），同一个 agent 节点内的多轮 LLM 调用属于同一条链。
+        链标识只影响去重效果，前缀是否可复用始终由消息指纹校验。
+        """
+        checkpoint_ns = metadata.get("langgraph_checkpoint_ns") or metadata.get("checkpoint_ns") or ""
+        if checkpoint_ns:
+            return str(checkpoint_ns).split("|", 1)[0]
+        return str(metadata.get("langgraph_node") or "default")
+
     @staticmethod
     def _extract_model_parameters(event: dict) -> Optional[dict]:
         """从 LangGraph 事件中提取模型参数（temperature, max_tokens 等）"""
@@ -381,73 +601,30 @@ class StreamEventHandler:
         payload: dict,
         thread_id: str,
         state: Optional["StreamState"] = None,
-    ) -> str:
+    ) -> bytes:
         """
-        构造标准 SSE Envelope。
+        构造标准 SSE Envelope（orjson 编码，直接返回 bytes）。
 
         包含 trace / observation 层级信息。
-        序列化失败时降级为简化事件。
+        序列化失败时按字段降级，见 SSEEncoder。
         """
         meta = payload.pop("_meta", {})
-
-        def _default(obj: Any) -> Any:
-            if isinstance(obj, BaseMessage):
-                return {
-                    "type": obj.__class__.__name__,
-                    "content": str(obj.content) if hasattr(obj, "content") else str(obj),
-                }
-            if isinstance(obj, Enum):
-                return obj.value
-            if hasattr(obj, "model_dump"):
-                try:
-                    return obj.model_dump()
-                except Exception:
-                    pass
-            if hasattr(obj, "dict"):
-                try:
-                    return obj.dict()
-                except Exception:
-                    pass
-            return str(obj)
-
-        envelope = {
-            "type": event_type,
-            "thread_id": thread_id,
-            "run_id": meta.get("run_id", ""),
-            "node_name": meta.get("node_name", "system"),
-            "timestamp": meta.get("timestamp", int(time.time() * 1000)),
-            "tags": meta.get("tags", []),
-            "trace_id": meta.get("trace_id", state.trace_id if state else ""),
-            "observation_id": meta.get("observation_id", ""),
-            "parent_observation_id": meta.get("parent_observation_id", ""),
-            "data": payload,
-        }
-
-        try:
-            return f"data: {json.dumps(envelope, ensure_ascii=False, default=_default)}\n\n"
-        except (TypeError, ValueError, OverflowError) as e:
-            logger.warning(f"SSE serialization failed for {event_type}: {e}")
-            fallback = {
-                "type": event_type,
-                "thread_id": thread_id,
-                "timestamp": int(time.time() * 1000),
-                "trace_id": state.trace_id if state else "",
-                "data": {"_serialization_error": str(e)[:200]},
-            }
-            return f"data: {json.dumps(fallback)}\n\n"
+        if state is not None and state.thread_id == thread_id:
+            encoder = state.sse_encoder
+        else:
+            encoder = SSEEncoder(thread_id, state.trace_id if state else "")
+        return encoder.encode(event_type, payload, meta)
 
     # ==================== Handler Methods ====================
 
     async def handle_chat_model_start(
         self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
-    ) -> str:
+    ) -> bytes:
         """处理模型开始事件。创建 GENERATION observation。"""
         try:
             event_data = event.get("data", {})
             input_data = event_data.get("input", {})
-            raw_messages = input_data.get("messages", [])
-
-            serialized_messages = serialize_messages(raw_messages)
+            raw_messages = flatten_messages(input_data.get("messages", []))
 
             metadata = event.get("metadata", {})
             if not isinstance(metadata, dict):
@@ -456,16 +633,31 @@ class StreamEventHandler:
             model_provider = metadata.get("ls_provider") or "unknown"
             model_parameters = self._extract_model_parameters(event)
 
+            # 增量模式：同一调用链上已发送过的前缀只发送引用，仅序列化新增消息
+            prefix_obs_id: Optional[str] = None
+            prefix_length = 0
+            chain_key = self._model_input_chain_key(metadata) if state.model_input_delta else ""
+            if state.model_input_delta:
+                prefix_obs_id, prefix_length = state.diff_model_input(chain_key, raw_messages)
+
+            serialized_messages = serialize_messages(raw_messages[prefix_length:])
+            input_payload: dict[str, Any] = {"messages": serialized_messages}
+            if prefix_obs_id:
+                input_payload["prefix_observation_id"] = prefix_obs_id
+                input_payload["prefix_length"] = prefix_length
+
             obs_id = state.create_observation(
                 run_id=run_id,
                 parent_run_id=parent_run_id,
                 obs_type=ObsType.GENERATION,
                 name=model_name,
-                input_data=truncate_data({"messages": serialized_messages}),
+                input_data=truncate_data(input_payload),
                 model_name=model_name,
                 model_provider=model_provider,
                 model_parameters=model_parameters,
             )
+            if state.model_input_delta:
+                state.record_model_input(chain_key, obs_id, raw_messages)
 
             meta = self._extract_metadata(event)
             meta["trace_id"] = state.trace_id
@@ -475,7 +667,8 @@ class StreamEventHandler:
             return self.format_sse(
                 "model_input",
                 {
-                    "messages": serialized_messages,
+                    **input_payload,
+                    "total_messages": len(raw_messages),
                     "model_name": model_name,
                     "model_provider": model_provider,
                     "_meta": meta,
@@ -499,7 +692,7 @@ class StreamEventHandler:
 
     async def handle_chat_model_stream(
         self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
-    ) -> Optional[str]:
+    ) -> Optional[bytes]:
         """处理文本流事件。记录首 token 时间。"""
         try:
             chunk = event.get("data", {}).get("chunk")
@@ -519,14 +712,51 @@ class StreamEventHandler:
             meta["observation_id"] = obs_id
             meta["parent_observation_id"] = state.get_parent_observation_id(run_id) or ""
 
-            return self.format_sse("content", {"delta": content, "_meta": meta}, state.thread_id, state)
+            if self._coalescer is None or not isinstance(content, str):
+                return self._prepend_pending(
+                    state, self.format_sse("content", {"delta": content, "_meta": meta}, state.thread_id, state)
+                )
+            return self._coalesce_content(state, (run_id, obs_id), content, meta)
         except Exception as e:
             logger.exception(f"handle_chat_model_stream failed: {e}")
             return None
 
+    def _coalesce_content(self, state: StreamState, key: tuple[str, str], content: str, meta: dict) -> Optional[bytes]:
+        """合并 content 增量；返回需要立即发送的帧（可能是多帧拼接），或 None"""
+        coalescer = self._coalescer
+        assert coalescer is not None
+
+        frames: list[bytes] = []
+        if coalescer.key not in (None, key) and (pending := self.flush_content(state)):
+            frames.append(pending)
+
+        if coalescer.is_first_chunk(key[0]):
+            frames.append(self.format_sse("content", {"delta": content, "_meta": meta}, state.thread_id, state))
+        else:
+            coalescer.append(key, content, meta)
+            if coalescer.is_due() and (due := self.flush_content(state)):
+                frames.append(due)
+
+        return b"".join(frames) if frames else None
+
+    def _prepend_pending(self, state: StreamState, frame: bytes) -> bytes:
+        pending = self.flush_content(state)
+        return pending + frame if pending else frame
+
+    def flush_content(self, state: StreamState) -> Optional[bytes]:
+        """发送缓冲中的 content 增量（未启用合并或缓冲为空时返回 None）"""
+        if self._coalescer is None or not self._coalescer.deltas:
+            return None
+        delta, meta = self._coalescer.drain()
+        return self.format_sse("content", {"delta": delta, "_meta": meta}, state.thread_id, state)
+
+    def content_flush_timeout(self) -> Optional[float]:
+        """距离缓冲 content 必须 flush 的秒数；无缓冲时返回 None"""
+        return self._coalescer.seconds_until_due() if self._coalescer else None
+
     async def handle_chat_model_end(
         self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
-    ) -> str:
+    ) -> bytes:
         """处理模型结束事件。精确解析 token usage（多厂商兼容）。"""
         try:
             event_data = event.get("data", {})
@@ -554,7 +784,7 @@ class StreamEventHandler:
                     usage_metadata = um
 
             # 完成 GENERATION observation
-            output_summary = truncate_data(str(output), max_length=2000) if output else None
+            output_summary = bounded_str(output, 2000) if output else None
             obs_id = state.end_observation(
                 run_id,
                 output_data={"output": output_summary} if output_summary else None,
@@ -599,7 +829,7 @@ class StreamEventHandler:
 
     async def handle_tool_start(
         self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
-    ) -> str:
+    ) -> bytes:
         """处理工具开始事件。创建 TOOL observation。"""
         try:
             tool_input = event.get("data", {}).get("input", {})
@@ -636,7 +866,9 @@ class StreamEventHandler:
                 state,
             )
 
-    async def handle_tool_end(self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]) -> str:
+    async def handle_tool_end(
+        self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
+    ) -> bytes:
         """处理工具结束事件。完成 TOOL observation。"""
         try:
             raw_output = event.get("data", {}).get("output")
@@ -646,22 +878,16 @@ class StreamEventHandler:
             # 检测错误
             has_error = _detect_error(output)
 
-            output_summary = truncate_data(str(output), max_length=2000) if output else None
+            output_summary = bounded_str(output, 2000) if output else None
             obs_id = state.end_observation(
                 run_id,
                 output_data={"tool_output": output_summary} if output_summary else None,
                 level=ObsLevel.ERROR if has_error else ObsLevel.DEFAULT,
-                status_message=str(output)[:500] if has_error else None,
+                status_message=bounded_serialize(output, 500).text if has_error else None,
                 status=ObsStatus.FAILED if has_error else ObsStatus.COMPLETED,
             )
 
-            # 计算时长
-            record = None
-            for rec in state._completed:
-                if rec.id == obs_id:
-                    record = rec
-                    break
-            duration = record.duration_ms if record else None
+            duration = state.get_completed_duration(obs_id)
 
             meta = self._extract_metadata(event)
             meta["trace_id"] = state.trace_id
@@ -696,7 +922,7 @@ class StreamEventHandler:
 
     async def handle_node_start(
         self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
-    ) -> str:
+    ) -> bytes:
         """处理节点开始事件。创建 SPAN observation。"""
         try:
             node_info = self._extract_node_info(event)
@@ -738,7 +964,7 @@ class StreamEventHandler:
 
     async def handle_node_end(
         self, event: dict, state: StreamState, run_id: str, parent_run_id: Optional[str]
-    ) -> list[str]:
+    ) -> list[bytes]:
         """处理节点结束事件。返回多个 SSE 事件。"""
         try:
             node_info = self._extract_node_info(event)
@@ -752,7 +978,7 @@ class StreamEventHandler:
             output_summary = None
             if output and isinstance(output, dict):
                 output_summary = truncate_data(
-                    {k: str(v)[:500] for k, v in list(output.items())[:10]},
+                    {k: bounded_serialize(v, 500).text for k, v in itertools.islice(output.items(), 10)},
                     max_length=5000,
                 )
 
@@ -760,17 +986,11 @@ class StreamEventHandler:
                 run_id,
                 output_data=output_summary,
                 level=ObsLevel.ERROR if has_error else ObsLevel.DEFAULT,
-                status_message=str(output)[:500] if has_error else None,
+                status_message=bounded_serialize(output, 500).text if has_error else None,
                 status=ObsStatus.FAILED if has_error else ObsStatus.COMPLETED,
             )
 
-            # 计算时长
-            record = None
-            for rec in state._completed:
-                if rec.id == obs_id:
-                    record = rec
-                    break
-            duration = record.duration_ms if record else None
+            duration = state.get_completed_duration(obs_id)
 
             meta = self._extract_metadata(event)
             meta.update(node_info)
@@ -778,7 +998,7 @@ class StreamEventHandler:
             meta["observation_id"] = obs_id or ""
             meta["parent_observation_id"] = state.get_parent_observation_id(run_id) or ""
 
-            events: list[str] = []
+            events: list[bytes] = []
 
             # 0. CodeAgent 事件
             if output and isinstance(output, dict):
@@ -830,11 +1050,21 @@ class StreamEventHandler:
                 )
             ]
 
+    def handle_custom_event(self, event: dict, state: StreamState, run_id: str) -> None:
+        """处理自定义事件。节点结果缓存（node_cache）状态写入节点 observation 的 metadata，不产生 SSE。"""
+        if event.get("name") != "node_cache":
+            return
+        data = event.get("data")
+        if isinstance(data, dict):
+            state.annotate_observation(
+                run_id, {"cache": data.get("status"), "cache_key": data.get("key"), "cache_ttl": data.get("ttl")}
+            )
+
     # ==================== Private Helpers ====================
 
     def _process_code_agent_events(
         self, code_agent_events: list, node_name: str, meta: dict, state: StreamState
-    ) -> list[str]:
+    ) -> list[bytes]:
         """处理 CodeAgent 事件列表"""
         events = []
         type_map = {
@@ -879,7 +1109,7 @@ class StreamEventHandler:
 
     def _process_output_events(
         self, output: dict, node_info: dict, node_type: str, meta: dict, state: StreamState
-    ) -> list[str]:
+    ) -> list[bytes]:
         """处理节点 output 中的 Command / route / loop / parallel 事件"""
         events = []
         node_name = node_info["node_name"]
@@ -908,7 +1138,7 @@ class StreamEventHandler:
         for k, v in output.items():
             if k in ["route_decision", "route_reason"]:
                 continue
-            if k == "task_results" and isinstance(v, list):
+            if k == "task_results" and isinstance(v, Sequence) and not isinstance(v, str):
                 cleaned_update[k] = _clean_task_results(v)
             else:
                 cleaned_update[k] = v
@@ -988,7 +1218,7 @@ def _detect_error(output: Any) -> bool:
     return False
 
 
-def _clean_task_results(task_results: list) -> list:
+def _clean_task_results(task_results: Sequence) -> list:
     """清理 task_results 中的循环引用"""
     cleaned = []
     for tr in task_results:
@@ -1,22 +1,153 @@
 """
 任务管理器
 
-用于跟踪和管理正在运行的对话任务，支持停止操作
+用于跟踪和管理正在运行的对话任务，支持停止操作。
+
+多 worker 部署时，停止请求可能落到不持有该任务的 worker 上：
+- 注册任务时在 Redis 中写入 run owner 键（带 TTL，由后台心跳续期）
+- 本地不持有的任务，stop / cancel 通过 Redis Pub/Sub 广播给持有者
+- 每个 worker 的订阅协程收到消息后更新本地停止标志 / 取消本地任务
+
+停止检查（is_stop_requested）只是一次本地 set 查询，不加锁、不访问 Redis。
+Redis 不可用时退化为纯进程内实现。
 """
 
 import asyncio
+import json
+import os
+import socket
+import uuid
+from typing import Optional
 
 from loguru import logger
 
+from app.core.redis import RedisClient
+from app.core.settings import settings
+
+_OWNER_KEY_PREFIX = "run:owner:"
+_CONTROL_CHANNEL = "run:control"
+
 
 class TaskManager:
     """任务管理器，用于跟踪和管理正在运行的对话任务"""
 
-    def __init__(self):
+    def __init__(self, owner_ttl: int = 60):
         """初始化任务管理器"""
         self._running_tasks: dict[str, asyncio.Task] = {}
         self._stop_flags: set[str] = set()
-        self._lock = asyncio.Lock()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.owner_ttl = max(3, owner_ttl)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    # ==================== Distributed Registry ====================
+
+    @staticmethod
+    def _owner_key(thread_id: str) -> str:
+        return f"{_OWNER_KEY_PREFIX}{thread_id}"
+
+    async def start(self) -> None:
+        """启动 Redis 控制通道订阅与 owner 键心跳（Redis 不可用时不启动）"""
+        if self._listener_task is not None or not RedisClient.is_available():
+            return
+        self._listener_task = asyncio.create_task(self._listen(), name="task-manager-control")
+        logger.info(f"Distributed run registry started | worker_id={self.worker_id}")
+
+    async def close(self) -> None:
+        """停止订阅协程"""
+        if self._listener_task is None:
+            return
+        self._listener_task.cancel()
+        try:
+            await self._listener_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._listener_task = None
+
+    async def _listen(self) -> None:
+        heartbeat_interval = self.owner_ttl / 3
+        while True:
+            client = RedisClient.get_client()
+            if client is None:
+                return
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(_CONTROL_CHANNEL)
+                loop = asyncio.get_running_loop()
+                next_heartbeat = loop.time()
+                while True:
+                    if loop.time() >= next_heartbeat:
+                        await self._refresh_owner_keys()
+                        next_heartbeat = loop.time() + heartbeat_interval
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=heartbeat_interval)
+                    if message and message.get("type") == "message":
+                        self._handle_control_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Run control subscriber error, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _handle_control_message(self, data: Optional[str]) -> None:
+        try:
+            payload = json.loads(data or "")
+        except (TypeError, ValueError):
+            return
+        thread_id = payload.get("thread_id")
+        if not thread_id or thread_id not in self._running_tasks:
+            return
+        if payload.get("action") == "cancel":
+            self._cancel_local(thread_id)
+        else:
+            self._stop_local(thread_id)
+
+    async def _refresh_owner_keys(self) -> None:
+        client = RedisClient.get_client()
+        if client is None or not self._running_tasks:
+            return
+        pipe = client.pipeline(transaction=False)
+        for thread_id in list(self._running_tasks):
+            pipe.set(self._owner_key(thread_id), self.worker_id, ex=self.owner_ttl)
+        await pipe.execute()
+
+    async def _publish_control(self, action: str, thread_id: str) -> bool:
+        """把 stop / cancel 转发给持有该任务的 worker；任务不在任何 worker 上运行时返回 False"""
+        if not RedisClient.is_available():
+            return False
+        try:
+            owner = await RedisClient.get(self._owner_key(thread_id))
+            if not owner or owner == self.worker_id:
+                return False
+            client = RedisClient.get_client()
+            if client is None:
+                return False
+            message = json.dumps({"action": action, "thread_id": thread_id, "origin": self.worker_id})
+            await client.publish(_CONTROL_CHANNEL, message)
+            logger.info(f"Forwarded {action} for thread_id: {thread_id} to worker {owner}")
+            return True
+        except Exception as e:
+            logger.warning(f"Failed to forward {action} for thread_id {thread_id}: {e}")
+            return False
+
+    # ==================== Local Operations ====================
+
+    def _stop_local(self, thread_id: str) -> None:
+        self._stop_flags.add(thread_id)
+        logger.info(f"Stop flag set for thread_id: {thread_id}")
+
+    def _cancel_local(self, thread_id: str) -> bool:
+        task = self._running_tasks.get(thread_id)
+        if task and not task.done():
+            task.cancel()
+            self._running_tasks.pop(thread_id, None)
+            self._stop_flags.discard(thread_id)
+            logger.info(f"Cancelled task for thread_id: {thread_id}")
+            return True
+        return False
 
     async def register_task(self, thread_id: str, task: asyncio.Task) -> None:
         """
@@ -26,11 +157,16 @@ class TaskManager:
             thread_id: 会话线程ID
             task: 异步任务对象
         """
-        async with self._lock:
-            self._running_tasks[thread_id] = task
-            # 清除之前的停止标志（如果有）
-            self._stop_flags.discard(thread_id)
-            logger.debug(f"Registered task for thread_id: {thread_id}")
+        self._running_tasks[thread_id] = task
+        # 清除之前的停止标志（如果有）
+        self._stop_flags.discard(thread_id)
+        logger.debug(f"Registered task for thread_id: {thread_id}")
+
+        if RedisClient.is_available():
+            try:
+                await RedisClient.set(self._owner_key(thread_id), self.worker_id, expire=self.owner_ttl)
+            except Exception as e:
+                logger.warning(f"Failed to register run owner for thread_id {thread_id}: {e}")
 
     async def unregister_task(self, thread_id: str) -> None:
         """
@@ -39,14 +175,24 @@ class TaskManager:
         Args:
             thread_id: 会话线程ID
         """
-        async with self._lock:
-            self._running_tasks.pop(thread_id, None)
-            self._stop_flags.discard(thread_id)
-            logger.debug(f"Unregistered task for thread_id: {thread_id}")
+        self._running_tasks.pop(thread_id, None)
+        self._stop_flags.discard(thread_id)
+        logger.debug(f"Unregistered task for thread_id: {thread_id}")
+
+        if RedisClient.is_available():
+            try:
+                client = RedisClient.get_client()
+                if client is not None:
+                    # 仅删除本 worker 持有的 owner 键（同一 thread 可能已在其他 worker 上重新运行）
+                    owner_key = self._owner_key(thread_id)
+                    if await client.get(owner_key) == self.worker_id:
+                        await client.delete(owner_key)
+            except Exception as e:
+                logger.warning(f"Failed to unregister run owner for thread_id {thread_id}: {e}")
 
     async def stop_task(self, thread_id: str) -> bool:
         """
-        停止指定线程的任务
+        停止指定线程的任务（本地持有则直接标记，否则转发给持有该任务的 worker）
 
         Args:
             thread_id: 会话线程ID
@@ -54,12 +200,22 @@ class TaskManager:
         Returns:
             bool: 是否成功停止（True表示任务存在且已标记停止，False表示任务不存在）
         """
-        async with self._lock:
-            if thread_id in self._running_tasks:
-                self._stop_flags.add(thread_id)
-                logger.info(f"Stop flag set for thread_id: {thread_id}")
-                return True
-            return False
+        if thread_id in self._running_tasks:
+            self._stop_local(thread_id)
+            return True
+        return await self._publish_control("stop", thread_id)
+
+    def is_stop_requested(self, thread_id: str) -> bool:
+        """
+        检查指定线程的任务是否已被标记为停止（本地标志读取，无锁、无 I/O，适合每个事件调用）
+
+        Args:
+            thread_id: 会话线程ID
+
+        Returns:
+            bool: 是否已停止
+        """
+        return thread_id in self._stop_flags
 
     async def is_stopped(self, thread_id: str) -> bool:
         """
@@ -71,12 +227,11 @@ class TaskManager:
         Returns:
             bool: 是否已停止
         """
-        async with self._lock:
-            return thread_id in self._stop_flags
+        return self.is_stop_requested(thread_id)
 
     async def cancel_task(self, thread_id: str) -> bool:
         """
-        取消指定线程的任务（强制取消）
+        取消指定线程的任务（强制取消；本地不持有时转发给持有该任务的 worker）
 
         Args:
             thread_id: 会话线程ID
@@ -84,26 +239,19 @@ class TaskManager:
         Returns:
             bool: 是否成功取消
         """
-        async with self._lock:
-            task = self._running_tasks.get(thread_id)
-            if task and not task.done():
-                task.cancel()
-                self._running_tasks.pop(thread_id, None)
-                self._stop_flags.discard(thread_id)
-                logger.info(f"Cancelled task for thread_id: {thread_id}")
-                return True
-            return False
+        if thread_id in self._running_tasks:
+            return self._cancel_local(thread_id)
+        return await self._publish_control("cancel", thread_id)
 
     async def get_running_threads(self) -> set[str]:
         """
-        获取所有正在运行的线程ID
+        获取本 worker 上所有正在运行的线程ID
 
         Returns:
             Set[str]: 正在运行的线程ID集合
         """
-        async with self._lock:
-            return set(self._running_tasks.keys())
+        return set(self._running_tasks.keys())
 
 
 # 全局任务管理器实例
-task_manager = TaskManager()
+task_manager = TaskManager(owner_ttl=settings.run_registry_ttl_seconds)
@@ -0,0 +1,306 @@
+"""
+Trace Writer - Write-behind persistence of execution traces.
+
+流式执行期间，Observation 在创建（RUNNING）和完成时被放入有界队列，由后台 flusher
+按数量 / 时间批量 upsert 到 execution_observations，trace 行在首次 flush 时以 RUNNING
+状态创建，流结束时 upsert 最终状态。这样：
+
+- 每个流的内存占用保持平稳（已写入的 observation 不再保留在 StreamState 中）
+- 长时间运行的 trace 在执行过程中即可查询
+- worker 崩溃时只丢失最近一个 flush 周期的数据
+
+写入顺序：父 observation 总是先于子 observation 创建，队列按 FIFO 写入，
+因此 parent_observation_id 外键在每个批次中都能满足。
+
+降级：队列满或写入失败时停止增量写入，剩余数据保留在 StreamState 中，
+由 close() 在流结束时一次性写入（与原先的批量持久化行为一致）。
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from loguru import logger
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.database import AsyncSessionLocal
+from app.models.execution_trace import (
+    ExecutionObservation,
+    ExecutionTrace,
+    ObservationLevel,
+    ObservationStatus,
+    ObservationType,
+    TraceStatus,
+)
+from app.utils.message_serializer import truncate_data
+from app.utils.stream_event_handler import ObservationRecord, ObsLevel, ObsStatus, ObsType, StreamState
+
+# Enum 映射
+_TYPE_MAP = {
+    ObsType.SPAN: ObservationType.SPAN,
+    ObsType.GENERATION: ObservationType.GENERATION,
+    ObsType.TOOL: ObservationType.TOOL,
+    ObsType.EVENT: ObservationType.EVENT,
+}
+_LEVEL_MAP = {
+    ObsLevel.DEBUG: ObservationLevel.DEBUG,
+    ObsLevel.DEFAULT: ObservationLevel.DEFAULT,
+    ObsLevel.WARNING: ObservationLevel.WARNING,
+    ObsLevel.ERROR: ObservationLevel.ERROR,
+}
+_STATUS_MAP = {
+    ObsStatus.RUNNING: ObservationStatus.RUNNING,
+    ObsStatus.COMPLETED: ObservationStatus.COMPLETED,
+    ObsStatus.FAILED: ObservationStatus.FAILED,
+    ObsStatus.INTERRUPTED: ObservationStatus.INTERRUPTED,
+}
+
+# observation 行在冲突（已以 RUNNING 状态写入过）时不更新的列
+_OBSERVATION_IMMUTABLE_COLUMNS = frozenset({"id", "trace_id", "created_at", "input"})
+# 单个 observation input / output 的字符上限（兜底，事件处理阶段通常已截断）
+_MAX_PAYLOAD_CHARS = 20000
+# trace 行在最终 upsert 时更新的列
+_TRACE_FINAL_COLUMNS = (
+    "workspace_id",
+    "graph_id",
+    "user_id",
+    "name",
+    "status",
+    "end_time",
+    "duration_ms",
+    "total_tokens",
+)
+
+
+def _ms_to_datetime(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc) if value else None
+
+
+def observation_row(rec: ObservationRecord) -> dict[str, Any]:
+    """ObservationRecord -> execution_observations 行（按列名）"""
+    return {
+        "id": uuid.UUID(rec.id),
+        "trace_id": uuid.UUID(rec.trace_id),
+        "parent_observation_id": uuid.UUID(rec.parent_observation_id) if rec.parent_observation_id else None,
+        "type": _TYPE_MAP.get(rec.type, ObservationType.EVENT),
+        "name": rec.name,
+        "level": _LEVEL_MAP.get(rec.level, ObservationLevel.DEFAULT),
+        "status": _STATUS_MAP.get(rec.status, ObservationStatus.COMPLETED),
+        "status_message": rec.status_message,
+        "start_time": _ms_to_datetime(rec.start_time),
+        "end_time": _ms_to_datetime(rec.end_time),
+        "duration_ms": rec.duration_ms,
+        "completion_start_time": _ms_to_datetime(rec.completion_start_time),
+        "input": truncate_data(rec.input_data, _MAX_PAYLOAD_CHARS),
+        "output": truncate_data(rec.output_data, _MAX_PAYLOAD_CHARS),
+        "model_name": rec.model_name,
+        "model_provider": rec.model_provider,
+        "model_parameters": rec.model_parameters,
+        "prompt_tokens": rec.prompt_tokens,
+        "completion_tokens": rec.completion_tokens,
+        "total_tokens": rec.total_tokens,
+        "metadata": rec.metadata,
+        "version": rec.version,
+    }
+
+
+def trace_status_for(state: StreamState) -> TraceStatus:
+    """根据 StreamState 的结束状态确定 trace 状态"""
+    if state.has_error:
+        return TraceStatus.FAILED
+    if state.interrupted:
+        return TraceStatus.INTERRUPTED
+    if state.stopped:
+        return TraceStatus.FAILED
+    return TraceStatus.COMPLETED
+
+
+class TraceWriter:
+    """
+    单个流的 write-behind trace 写入器。
+
+    用法：
+        writer = TraceWriter(state, graph_id=..., user_id=...)
+        writer.start()          # 可选：不调用时所有数据在 close() 时一次性写入
+        ...
+        await writer.close()    # 写入剩余 observation 并 upsert trace 最终状态
+    """
+
+    def __init__(
+        self,
+        state: StreamState,
+        *,
+        graph_id: Optional[str] = None,
+        workspace_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+        graph_name: Optional[str] = None,
+        batch_size: int = 200,
+        flush_interval_ms: int = 2000,
+        max_queue: int = 5000,
+    ):
+        self.state = state
+        self.graph_id = graph_id
+        self.workspace_id = workspace_id
+        self.user_id = user_id
+        self.graph_name = graph_name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_s = max(1, flush_interval_ms) / 1000
+        self.max_queue = max(self.batch_size, max_queue)
+
+        self._pending: deque[ObservationRecord] = deque()
+        # 写入失败的批次，留待 close() 时重写
+        self._failed: list[ObservationRecord] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._degraded = False
+        self._closed = False
+        self._trace_created = False
+        self.rows_written = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closed and not self._degraded
+
+    def start(self) -> None:
+        """挂载到 StreamState 并启动后台 flusher"""
+        if self._task is not None:
+            return
+        self.state.set_observation_sink(self.submit)
+        self._task = asyncio.create_task(self._run(), name=f"trace-writer-{self.state.trace_id[:8]}")
+
+    def submit(self, record: ObservationRecord) -> bool:
+        """
+        放入写入队列（observation 创建和完成时各调用一次）。
+
+        Returns:
+            False 表示未被接收（未启动 / 已降级 / 队列已满），调用方需自行保留该记录
+        """
+        if not self.running:
+            return False
+        if len(self._pending) >= self.max_queue:
+            self._degrade(f"queue full ({self.max_queue})")
+            return False
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    def _degrade(self, reason: str) -> None:
+        if not self._degraded:
+            self._degraded = True
+            logger.warning(
+                f"[TraceWriter] Incremental trace writes disabled, falling back to end-of-stream write | "
+                f"trace_id={self.state.trace_id} | reason={reason}"
+            )
+
+    async def _run(self) -> None:
+        while not self._closed and not self._degraded:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._closed:
+                break
+            while self._pending and not self._degraded:
+                await self._flush_batch()
+                if len(self._pending) < self.batch_size:
+                    break
+
+    async def _flush_batch(self) -> None:
+        batch: list[ObservationRecord] = []
+        while self._pending and len(batch) < self.batch_size:
+            batch.append(self._pending.popleft())
+        if not batch:
+            return
+        try:
+            await self._write(batch, final=False)
+        except asyncio.CancelledError:
+            self._failed.extend(batch)
+            raise
+        except Exception as e:
+            self._failed.extend(batch)
+            self._degrade(f"flush failed: {e}")
+
+    async def close(self) -> int:
+        """停止 flusher，写入剩余 observation（未完成的标记为 INTERRUPTED）并 upsert trace 最终状态"""
+        self._closed = True
+        self.state.set_observation_sink(None)
+        if self._task is not None:
+            self._wakeup.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[TraceWriter] Flusher exited with error | trace_id={self.state.trace_id} | {e}")
+
+        remaining = self._failed + list(self._pending) + self.state.get_all_observations()
+        self._failed = []
+        self._pending.clear()
+        if not remaining and not self._trace_created:
+            return 0
+
+        await self._write(remaining, final=True)
+        self.state.clear_completed()
+        return self.rows_written
+
+    # ==================== DB ====================
+
+    def _trace_row(self, final: bool) -> dict[str, Any]:
+        now_ms = time.time() * 1000
+        return {
+            "id": uuid.UUID(self.state.trace_id),
+            "workspace_id": uuid.UUID(self.workspace_id) if self.workspace_id else None,
+            "graph_id": uuid.UUID(self.graph_id) if self.graph_id else None,
+            "thread_id": self.state.thread_id,
+            "user_id": self.user_id,
+            "name": self.graph_name or "graph_execution",
+            "status": trace_status_for(self.state) if final else TraceStatus.RUNNING,
+            "start_time": _ms_to_datetime(self.state.trace_start_time),
+            "end_time": _ms_to_datetime(now_ms) if final else None,
+            "duration_ms": int(now_ms - self.state.trace_start_time) if final else None,
+            "total_tokens": (self.state.total_tokens or None) if final else None,
+        }
+
+    async def _write(self, records: list[ObservationRecord], *, final: bool) -> None:
+        # 同一批次内同一 observation 只写一次（记录对象是可变的，取当前状态即可）
+        rows_by_id: dict[str, dict[str, Any]] = {}
+        for rec in records:
+            rows_by_id[rec.id] = observation_row(rec)
+        rows = list(rows_by_id.values())
+
+        trace_table = ExecutionTrace.__table__
+        obs_table = ExecutionObservation.__table__
+
+        async with AsyncSessionLocal() as session:
+            async with session.begin():
+                if final or not self._trace_created:
+                    trace_stmt: Any = pg_insert(trace_table).values(**self._trace_row(final))
+                    if final:
+                        trace_stmt = trace_stmt.on_conflict_do_update(
+                            index_elements=["id"],
+                            set_={col: trace_stmt.excluded[col] for col in _TRACE_FINAL_COLUMNS},
+                        )
+                    else:
+                        trace_stmt = trace_stmt.on_conflict_do_nothing(index_elements=["id"])
+                    await session.execute(trace_stmt)
+
+                if rows:
+                    obs_stmt: Any = pg_insert(obs_table)
+                    obs_stmt = obs_stmt.on_conflict_do_update(
+                        index_elements=["id"],
+                        set_={
+                            col.name: obs_stmt.excluded[col.name]
+                            for col in obs_table.columns
+                            if col.name not in _OBSERVATION_IMMUTABLE_COLUMNS
+                        },
+                    )
+                    await session.execute(obs_stmt, rows)
+
+        self._trace_created = True
+        self.rows_written += len(rows)
+        logger.debug(f"[TraceWriter] Flushed {len(rows)} observations | trace_id={self.state.trace_id} | final={final}")
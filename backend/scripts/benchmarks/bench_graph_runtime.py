@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+图运行时微基准：测量引擎本身（而非 LLM / 工具）的每节点开销
+
+合成图（GraphSchema → compile_from_schema）：
+1. linear：agent / function / direct_reply 交替的链
+2. fanout：start → N 个并行 agent 分支 → aggregator → reply
+3. loop：do-while 循环体执行 N 次（loop_condition_node + loop_back 边）
+4. router：N 级 router，每级按 context 选择 3 个分支之一
+
+运行方式与线上一致：astream_events(v2) + StreamEventHandler，InMemorySaver 作为
+checkpointer。agent 节点使用确定性的 fake chat model（GenericFakeChatModel，流式输出），
+完全离线。
+
+输出指标：
+- overhead/node：每次节点执行的引擎开销（总耗时 - 执行器与流处理耗时的区间并集）/ 节点执行次数
+  其中 before / after 为 NodeExecutionWrapper 前后钩子（Data Pill 解析、输入映射、reducer 前处理等）
+- handler/event：StreamEventHandler 处理单个事件的耗时
+- events/s：astream_events 事件吞吐
+- peak MB：tracemalloc 统计的单次运行峰值内存（单独一轮，避免影响计时）
+
+使用方法:
+    uv run python scripts/benchmarks/bench_graph_runtime.py
+    uv run python scripts/benchmarks/bench_graph_runtime.py --shapes linear fanout --sizes 10 100 300
+    uv run python scripts/benchmarks/bench_graph_runtime.py --json results.json
+    uv run python scripts/benchmarks/bench_graph_runtime.py --baseline results.json --threshold 0.25
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Add backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from loguru import logger
+
+from app.core.graph.graph_compiler import compile_from_schema
+from app.core.graph.graph_schema import EdgeSchema, EdgeType, GraphSchema, NodeSchema
+from app.core.graph.node_type_registry import NodeTypeRegistry
+from app.core.graph.node_wrapper import NodeExecutionWrapper
+from app.utils.stream_event_handler import StreamEventHandler, StreamState
+
+SHAPES = ("linear", "fanout", "loop", "router")
+
+# 每个节点都带一个输入映射，初始 context 中带一个 Data Pill 表达式，覆盖前置钩子的真实路径
+_INPUT_MAPPING = [{"key": "topic", "type": "variable", "value": "context.topic"}]
+_INITIAL_CONTEXT = {"topic": "benchmark", "route": "r1", "previous": "state.get('current_node')"}
+
+
+# ==================== Fake LLM ====================
+
+
+class FakeLLMNodeExecutor:
+    """Agent 节点替身：与 AgentNodeExecutor 相同的输入窗口与返回结构，模型为确定性 fake chat model。
+
+    真实 AgentNodeExecutor 会构建完整的 create_agent 图（工具、中间件），那部分属于 agent
+    本身而非图引擎，这里不计入。
+    """
+
+    STATE_READS: tuple = ("messages", "context")
+    STATE_WRITES: tuple = ("messages", "current_node")
+
+    def __init__(self, node_id: str, reply: str, messages_window: int = 10):
+        self.node_id = node_id
+        self.messages_window = messages_window
+        self.model = GenericFakeChatModel(messages=itertools.cycle([AIMessage(content=reply)]))
+
+    async def __call__(self, state: Any, config: Any = None) -> Dict[str, Any]:
+        messages = list(state.get("messages") or [])[-self.messages_window :]
+        reply = await self.model.ainvoke(messages or [HumanMessage(content="start")], config=config)
+        return {"messages": [reply], "current_node": self.node_id, "result": {"content": reply.content}}
+
+
+class BenchBuilder:
+    """compile_from_schema 使用的最小 builder：非 LLM 节点使用真实执行器。"""
+
+    def __init__(self, schema: GraphSchema, reply: str):
+        self.reply = reply
+        self.nodes = [
+            SimpleNamespace(
+                id=node.id, type=node.type, data={"config": node.config}, prompt=None, tools=None, memory=None
+            )
+            for node in schema.nodes
+        ]
+        self._node_id_to_name: Dict[Any, str] = {}
+
+    async def _get_or_create_executor(self, db_node: Any, name: str) -> Any:
+        if db_node.type == "agent":
+            return FakeLLMNodeExecutor(name, self.reply)
+        executor_class = NodeTypeRegistry.get_executor_class(db_node.type)
+        return executor_class(db_node, name)
+
+
+# ==================== Synthetic graphs ====================
+
+
+def _node(node_id: str, node_type: str, **config: Any) -> NodeSchema:
+    return NodeSchema(id=node_id, type=node_type, label=node_id, config={"input_mapping": _INPUT_MAPPING, **config})
+
+
+def _worker(node_id: str, index: int) -> NodeSchema:
+    kind = index % 3
+    if kind == 0:
+        return _node(node_id, "agent")
+    if kind == 1:
+        return _node(
+            node_id,
+            "function_node",
+            execution_mode="custom",
+            in_process=True,
+            function_code="result = {'topic': topic, 'step': context.get('topic')}",
+        )
+    return _node(node_id, "direct_reply", template="{{topic}} reply")
+
+
+def build_linear(size: int) -> Tuple[GraphSchema, int]:
+    nodes = [_worker(f"n{i:04d}", i) for i in range(size)]
+    edges = [EdgeSchema(source=a.id, target=b.id) for a, b in zip(nodes, nodes[1:])]
+    return GraphSchema(name=f"linear-{size}", nodes=nodes, edges=edges), size
+
+
+def build_fanout(size: int) -> Tuple[GraphSchema, int]:
+    branches = [_node(f"b{i:04d}", "agent") for i in range(size)]
+    nodes = [
+        _node("start", "direct_reply", template="start"),
+        *branches,
+        _node("agg", "aggregator_node", error_strategy="best_effort"),
+        _node("reply", "direct_reply", template="done"),
+    ]
+    edges = [
+        *[EdgeSchema(source="start", target=b.id) for b in branches],
+        *[EdgeSchema(source=b.id, target="agg") for b in branches],
+        EdgeSchema(source="agg", target="reply"),
+    ]
+    return GraphSchema(name=f"fanout-{size}", nodes=nodes, edges=edges), size + 3
+
+
+def build_loop(size: int) -> Tuple[GraphSchema, int]:
+    nodes = [
+        _node("prev", "direct_reply", template="begin"),
+        _node("body", "agent"),
+        _node(
+            "loop", "loop_condition_node", conditionType="while", condition=f"loop_count < {size}", maxIterations=size
+        ),
+        _node("reply", "direct_reply", template="done"),
+    ]
+    edges = [
+        EdgeSchema(source="prev", target="body"),
+        EdgeSchema(source="body", target="loop"),
+        EdgeSchema(source="loop", target="body", edge_type=EdgeType.LOOP_BACK, route_key="continue_loop"),
+        EdgeSchema(source="loop", target="reply", edge_type=EdgeType.CONDITIONAL, route_key="exit_loop"),
+    ]
+    # prev + size 次循环体（body + loop）+ 最后一次 body/loop 退出 + reply
+    return GraphSchema(name=f"loop-{size}", nodes=nodes, edges=edges), 2 * (size + 1) + 2
+
+
+def build_router(size: int) -> Tuple[GraphSchema, int]:
+    stages = max(1, size // 2)
+    routes = [
+        {"id": f"r{k}", "label": f"r{k}", "condition": f"context.get('route') == 'r{k}'", "targetEdgeKey": f"r{k}"}
+        for k in range(3)
+    ]
+    nodes: List[NodeSchema] = []
+    edges: List[EdgeSchema] = []
+    for stage in range(stages):
+        router_id = f"router{stage:04d}"
+        nodes.append(_node(router_id, "router_node", routes=routes, defaultRoute="r0"))
+        if stage:
+            edges.extend(EdgeSchema(source=f"s{stage - 1:04d}_r{k}", target=router_id) for k in range(3))
+        for k in range(3):
+            target_id = f"s{stage:04d}_r{k}"
+            nodes.append(_worker(target_id, k))
+            edges.append(
+                EdgeSchema(source=router_id, target=target_id, edge_type=EdgeType.CONDITIONAL, route_key=f"r{k}")
+            )
+    return GraphSchema(name=f"router-{size}", nodes=nodes, edges=edges), 2 * stages
+
+
+BUILDERS = {"linear": build_linear, "fanout": build_fanout, "loop": build_loop, "router": build_router}
+
+
+# ==================== Instrumentation ====================
+
+
+class Timers:
+    def __init__(self) -> None:
+        self.before = 0.0
+        self.after = 0.0
+        self.invoke = 0.0
+        # 执行器 / 事件处理区间：并行分支的执行器彼此重叠，且事件在执行器 await 期间被处理，
+        # 扣除时按区间并集计算
+        self.spans: List[Tuple[float, float]] = []
+        self.handler = 0.0
+        self.node_runs = 0
+        self.events = 0
+
+
+@contextmanager
+def instrument(timers: Timers) -> Iterator[None]:
+    """给 NodeExecutionWrapper 的钩子和执行器调用计时（退出时恢复原方法）。"""
+    originals = {name: getattr(NodeExecutionWrapper, name) for name in ("_before_execute", "_after_execute", "_invoke")}
+    fields = {"_before_execute": "before", "_after_execute": "after", "_invoke": "invoke"}
+
+    def timed(name: str) -> Any:
+        original = originals[name]
+
+        async def wrapper(self: Any, *args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await original(self, *args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                setattr(timers, fields[name], getattr(timers, fields[name]) + end - start)
+                if name == "_invoke":
+                    timers.node_runs += 1
+                    timers.spans.append((start, end))
+
+        return wrapper
+
+    for name in originals:
+        setattr(NodeExecutionWrapper, name, timed(name))
+    try:
+        yield
+    finally:
+        for name, original in originals.items():
+            setattr(NodeExecutionWrapper, name, original)
+
+
+def _span_union(spans: List[Tuple[float, float]]) -> float:
+    total = 0.0
+    current_start = current_end = None
+    for start, end in sorted(spans):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total
+
+
+def _run_ids(event: dict) -> Tuple[str, Optional[str]]:
+    run_id = str(event.get("run_id") or "")
+    parent_ids = event.get("parent_ids") or []
+    return run_id, str(parent_ids[-1]) if parent_ids else None
+
+
+async def _handle_event(handler: StreamEventHandler, state: StreamState, event: dict) -> None:
+    """与 chat.py 事件循环相同的分发逻辑（只处理，不发送）。"""
+    event_type = event.get("event")
+    metadata = event.get("metadata") if isinstance(event.get("metadata"), dict) else {}
+    is_node_event = metadata.get("langgraph_node") is not None
+    run_id, parent_run_id = _run_ids(event)
+
+    if event_type != "on_chat_model_stream":
+        handler.flush_content(state)
+    if event_type == "on_chat_model_start":
+        await handler.handle_chat_model_start(event, state, run_id, parent_run_id)
+    elif event_type == "on_chat_model_stream":
+        await handler.handle_chat_model_stream(event, state, run_id, parent_run_id)
+    elif event_type == "on_chat_model_end":
+        await handler.handle_chat_model_end(event, state, run_id, parent_run_id)
+    elif event_type == "on_chain_start" and is_node_event:
+        await handler.handle_node_start(event, state, run_id, parent_run_id)
+    elif event_type == "on_custom_event":
+        handler.handle_custom_event(event, state, run_id)
+    elif event_type == "on_chain_end" and is_node_event:
+        await handler.handle_node_end(event, state, run_id, parent_run_id)
+
+
+async def run_once(graph: Any, node_runs: int, timers: Timers) -> float:
+    thread_id = str(uuid.uuid4())
+    config = {"configurable": {"thread_id": thread_id}, "recursion_limit": node_runs * 2 + 50}
+    handler = StreamEventHandler()
+    state = StreamState(thread_id)
+    inputs = {"messages": [HumanMessage(content="benchmark")], "context": dict(_INITIAL_CONTEXT)}
+
+    start = time.perf_counter()
+    async for event in graph.astream_events(inputs, config=config, version="v2"):
+        timers.events += 1
+        handler_start = time.perf_counter()
+        await _handle_event(handler, state, event)
+        handler_end = time.perf_counter()
+        timers.handler += handler_end - handler_start
+        timers.spans.append((handler_start, handler_end))
+    return time.perf_counter() - start
+
+
+# ==================== Scenarios ====================
+
+
+async def bench_scenario(shape: str, size: int, repeat: int, reply: str) -> Dict[str, Any]:
+    schema, expected_runs = BUILDERS[shape](size)
+    build_start = time.perf_counter()
+    compiled = await compile_from_schema(
+        schema, builder=BenchBuilder(schema, reply), checkpointer=InMemorySaver(), validate=False
+    )
+    build_ms = (time.perf_counter() - build_start) * 1000
+    graph = compiled.compiled_graph
+
+    # 预热（导入、首次编译的正则 / 表达式缓存等）
+    await run_once(graph, expected_runs, Timers())
+
+    samples: List[Dict[str, float]] = []
+    for _ in range(repeat):
+        timers = Timers()
+        with instrument(timers):
+            wall = await run_once(graph, expected_runs, timers)
+        runs = max(1, timers.node_runs)
+        samples.append(
+            {
+                "wall_ms": wall * 1000,
+                "node_runs": timers.node_runs,
+                "events": timers.events,
+                "overhead_us": (wall - _span_union(timers.spans)) / runs * 1e6,
+                "before_us": timers.before / runs * 1e6,
+                "after_us": timers.after / runs * 1e6,
+                "executor_us": timers.invoke / runs * 1e6,
+                "handler_us": timers.handler / max(1, timers.events) * 1e6,
+                "events_per_s": timers.events / wall if wall else 0.0,
+            }
+        )
+
+    tracemalloc.start()
+    await run_once(graph, expected_runs, Timers())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result: Dict[str, Any] = {"shape": shape, "size": size, "nodes": len(schema.nodes), "build_ms": build_ms}
+    for key in samples[0]:
+        result[key] = statistics.median(sample[key] for sample in samples)
+    result["peak_mb"] = peak / (1024 * 1024)
+    return result
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    header = (
+        f"{'scenario':<14} {'nodes':>5} {'runs':>5} {'build':>9} {'wall':>10} {'overhead/node':>14} "
+        f"{'before':>8} {'after':>8} {'handler/evt':>12} {'events/s':>10} {'peak MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['shape'] + '-' + str(r['size']):<14} {r['nodes']:>5} {int(r['node_runs']):>5} "
+            f"{r['build_ms']:>7.1f}ms {r['wall_ms']:>8.1f}ms {r['overhead_us']:>12.1f}us "
+            f"{r['before_us']:>6.1f}us {r['after_us']:>6.1f}us {r['handler_us']:>10.1f}us "
+            f"{r['events_per_s']:>10.0f} {r['peak_mb']:>8.2f}"
+        )
+
+
+def compare_baseline(results: List[Dict[str, Any]], baseline_path: str, threshold: float) -> List[str]:
+    """与基线比较：overhead/node 变慢或 events/s 下降超过阈值视为回归。"""
+    with open(baseline_path) as f:
+        baseline = {(r["shape"], r["size"]): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["shape"], r["size"]))
+        if base is None:
+            continue
+        name = f"{r['shape']}-{r['size']}"
+        if r["overhead_us"] > base["overhead_us"] * (1 + threshold):
+            regressions.append(f"{name}: overhead/node {base['overhead_us']:.1f}us -> {r['overhead_us']:.1f}us")
+        if r["events_per_s"] < base["events_per_s"] * (1 - threshold):
+            regressions.append(f"{name}: events/s {base['events_per_s']:.0f} -> {r['events_per_s']:.0f}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    # 引擎日志在 INFO 级别会主导耗时；默认只保留警告
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    results = []
+    for shape in args.shapes:
+        for size in args.sizes:
+            results.append(await bench_scenario(shape, size, args.repeat, args.reply))
+    print_results(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+    if args.baseline:
+        regressions = compare_baseline(results, args.baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions (> {args.threshold:.0%}):")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 300])
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario (median reported)")
+    parser.add_argument("--reply", default="deterministic fake model reply for benchmarking", help="Fake LLM reply")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previous --json result and fail on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression")
+    sys.exit(asyncio.run(main(parser.parse_args())))
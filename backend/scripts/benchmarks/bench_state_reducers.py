@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+状态 reducer 微基准：copy-on-append（left + right）与 append-only 通道对比
+
+场景：
+1. reducer：每步追加 1 条消息，共 N 步（只测 reducer 本身）
+2. graph：单节点自循环的 LangGraph 图，每次迭代追加 1 条消息（无 checkpointer）
+
+使用方法:
+    uv run python scripts/benchmarks/bench_state_reducers.py
+    uv run python scripts/benchmarks/bench_state_reducers.py --sizes 1000 5000 10000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Annotated, Any, Callable, List
+
+# Add backend directory to sys.path
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, START, StateGraph
+from typing_extensions import TypedDict
+
+from app.core.graph.state_channels import AppendOnlyChannel, append_items
+
+
+def _copy_append(left: List[Any], right: List[Any]) -> List[Any]:
+    return left + right
+
+
+def bench_reducer(reducer: Callable[[Any, Any], Any], steps: int) -> float:
+    value: Any = []
+    start = time.perf_counter()
+    for i in range(steps):
+        value = reducer(value, [i])
+    assert len(value) == steps
+    return time.perf_counter() - start
+
+
+def _loop_graph(annotation: Any, steps: int):
+    class LoopState(TypedDict):
+        messages: annotation  # type: ignore[valid-type]
+
+    message = AIMessage(content="step")
+
+    def step(state: LoopState) -> dict:
+        return {"messages": [message]}
+
+    def route(state: LoopState) -> str:
+        return END if len(state["messages"]) >= steps else "step"
+
+    builder = StateGraph(LoopState)
+    builder.add_node("step", step)
+    builder.add_edge(START, "step")
+    builder.add_conditional_edges("step", route)
+    return builder.compile()
+
+
+async def bench_graph(annotation: Any, steps: int) -> float:
+    graph = _loop_graph(annotation, steps)
+    start = time.perf_counter()
+    result = await graph.ainvoke({"messages": []}, config={"recursion_limit": steps + 10})
+    assert len(result["messages"]) == steps
+    return time.perf_counter() - start
+
+
+async def main(sizes: List[int]) -> None:
+    print(f"{'scenario':<10} {'steps':>7} {'left + right':>14} {'append-only':>14} {'speedup':>9}")
+    for steps in sizes:
+        copy_time = bench_reducer(_copy_append, steps)
+        append_time = bench_reducer(append_items, steps)
+        print(
+            f"{'reducer':<10} {steps:>7} {copy_time * 1000:>12.2f}ms {append_time * 1000:>12.2f}ms "
+            f"{copy_time / append_time:>8.1f}x"
+        )
+    for steps in sizes:
+        copy_time = await bench_graph(Annotated[list, _copy_append], steps)
+        append_time = await bench_graph(Annotated[list, AppendOnlyChannel], steps)
+        print(
+            f"{'graph':<10} {steps:>7} {copy_time * 1000:>12.2f}ms {append_time * 1000:>12.2f}ms "
+            f"{copy_time / append_time:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes))
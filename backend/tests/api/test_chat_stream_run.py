@@ -0,0 +1,57 @@
+"""
+Tests for starting chat stream runs under the run scheduler.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.api.v1 import chat
+from app.core.graph.state_channels import AppendOnlyList
+from app.utils.run_event_log import InMemoryRunEventLog
+from app.utils.run_scheduler import RunScheduler
+from app.utils.stream_event_handler import StreamState
+
+
+class BrokenLog(InMemoryRunEventLog):
+    async def reset(self, thread_id: str) -> None:
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+async def test_failed_start_releases_the_scheduler_slot(monkeypatch):
+    scheduler = RunScheduler(max_concurrent=1, max_per_user=1, max_queue=1)
+    monkeypatch.setattr(chat, "run_scheduler", scheduler)
+    monkeypatch.setattr(chat, "get_run_event_log", lambda: BrokenLog())
+    monkeypatch.setattr(chat.settings, "sse_resumable_enabled", True)
+    closed = []
+
+    async def events():
+        try:
+            yield b"data: 1\n\n"
+        finally:
+            closed.append(True)
+
+    stream = events()
+    await stream.asend(None)  # started, so aclose() runs its cleanup
+    with pytest.raises(ConnectionError):
+        await chat._start_stream_run("t", stream, user_id="u1")
+
+    assert closed == [True]
+    assert scheduler.submit("u1").admitted
+
+
+@pytest.mark.asyncio
+async def test_snapshot_fallback_collects_append_only_messages(monkeypatch):
+    messages = AppendOnlyList([HumanMessage(content="hi"), AIMessage(content="hello")])
+
+    async def snapshot(*args, **kwargs):
+        return SimpleNamespace(values={"messages": messages}, tasks=())
+
+    monkeypatch.setattr(chat, "safe_get_state", snapshot)
+    state = StreamState("t")  # root end never observed: falls back to the checkpoint
+
+    assert await chat.resolve_run_outcome(MagicMock(), {}, state, MagicMock()) is False
+    assert state.all_messages == list(messages) and isinstance(state.all_messages, list)
@@ -0,0 +1,43 @@
+"""
+Tests for the traces API helpers.
+"""
+
+from types import SimpleNamespace
+
+from app.api.v1.traces import _expand_model_inputs
+
+_FIELDS = (
+    "parent_observation_id completion_tokens duration_ms end_time input_cost metadata_ model_name model_parameters "
+    "model_provider name output output_cost prompt_tokens start_time status_message total_cost total_tokens version"
+)
+
+
+def _generation(obs_id: str, model_input: dict) -> SimpleNamespace:
+    return SimpleNamespace(
+        id=obs_id,
+        trace_id="t1",
+        type="GENERATION",
+        level="DEFAULT",
+        status="COMPLETED",
+        input=model_input,
+        **dict.fromkeys(_FIELDS.split()),
+    )
+
+
+def test_delta_encoded_model_inputs_are_rebuilt():
+    observations = [
+        _generation("o1", {"messages": ["m1", "m2"]}),
+        _generation("o2", {"messages": ["m3"], "prefix_observation_id": "o1", "prefix_length": 2}),
+        _generation("o3", {"messages": ["m4"], "prefix_observation_id": "o2", "prefix_length": 3}),
+        _generation("o4", {"messages": ["x"], "prefix_observation_id": "missing", "prefix_length": 1}),
+    ]
+
+    schemas = _expand_model_inputs(observations)
+
+    assert [schema.input for schema in schemas[:3]] == [
+        {"messages": ["m1", "m2"]},
+        {"messages": ["m1", "m2", "m3"]},
+        {"messages": ["m1", "m2", "m3", "m4"]},
+    ]
+    # an unresolvable reference keeps the stored delta
+    assert schemas[3].input == observations[3].input
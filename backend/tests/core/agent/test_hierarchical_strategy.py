@@ -0,0 +1,162 @@
+"""
+Tests for the hierarchical (clustered, map-reduce) memory optimization strategy.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app.services.memory_service  # noqa: F401  (loads services before the memory package, avoiding the import cycle)
+from app.core.agent.memory.strategies import (
+    HierarchicalSummarizeStrategy,
+    MemoryOptimizationStrategyFactory,
+    MemoryOptimizationStrategyType,
+    hierarchical,
+)
+from app.schemas.memory import UserMemory
+
+
+class FakeModel:
+    """Returns a short summary per call and records the user prompts."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages[-1].content)
+        return SimpleNamespace(content=f"summary {len(self.prompts)}")
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(0)
+        return self.invoke(messages)
+
+
+@pytest.fixture(autouse=True)
+def _clear_summary_cache():
+    hierarchical._summary_cache.clear()
+    yield
+    hierarchical._summary_cache.clear()
+
+
+def _memories():
+    food = [
+        UserMemory(memory_id=f"f{i}", memory=f"The user likes dish number {i} very much", topics=["food"], user_id="u1")
+        for i in range(4)
+    ]
+    work = [UserMemory(memory_id="w0", memory="The user works as an engineer", topics=["work"], user_id="u1")]
+    return food + work
+
+
+def test_factory_creates_hierarchical_strategy():
+    strategy = MemoryOptimizationStrategyFactory.create_strategy(
+        MemoryOptimizationStrategyType.HIERARCHICAL, max_input_tokens=500
+    )
+    assert isinstance(strategy, HierarchicalSummarizeStrategy)
+    assert strategy.max_input_tokens == 500
+
+
+def test_clusters_summarized_separately_and_singletons_kept():
+    model = FakeModel()
+    strategy = HierarchicalSummarizeStrategy()
+
+    optimized = strategy.optimize(_memories(), model)  # type: ignore[arg-type]
+
+    assert len(optimized) == 2
+    assert optimized[0].topics == ["food"] and optimized[0].memory == "summary 1"
+    assert optimized[1].memory_id == "w0"  # single-memory cluster passes through untouched
+    report = strategy.last_report
+    assert report is not None
+    assert (report.clusters, report.clusters_summarized, report.clusters_kept, report.clusters_reused) == (2, 1, 1, 0)
+    assert report.model_calls == 1
+    assert report.tokens_before == strategy.count_tokens(_memories())
+    assert report.compression_ratio < 1.0
+
+
+def test_large_cluster_is_map_reduced_within_budget():
+    model = FakeModel()
+    strategy = HierarchicalSummarizeStrategy(max_input_tokens=30)
+    memories = [
+        UserMemory(
+            memory_id=str(i), memory=f"The user visited city number {i} last summer", topics=["travel"], user_id="u1"
+        )
+        for i in range(8)
+    ]
+
+    optimized = asyncio.run(strategy.aoptimize(memories, model))  # type: ignore[arg-type]
+
+    assert len(optimized) == 1
+    # Several map calls, then at least one reduce call over their summaries
+    assert strategy.last_report.model_calls > 2  # type: ignore[union-attr]
+    assert any("summary" in prompt for prompt in model.prompts)
+
+
+def _count_words(text: str) -> int:
+    return len(text.split())
+
+
+def test_chunks_never_exceed_the_budget(monkeypatch):
+    monkeypatch.setattr(hierarchical, "count_text_tokens", _count_words)
+    strategy = HierarchicalSummarizeStrategy(max_input_tokens=20)
+    long_memory = " ".join(f"fact{i}" for i in range(60))
+    texts = ["The user likes tea", long_memory, "The user lives in Berlin", "The user owns a cat"]
+
+    chunks = strategy._chunk(texts)
+
+    assert all(sum(_count_words(text) for text in chunk) <= 20 for chunk in chunks)
+    assert " ".join(" ".join(chunk) for chunk in chunks).split() == " ".join(texts).split()
+
+
+def test_overlong_summaries_are_cut_so_reduce_converges(monkeypatch):
+    monkeypatch.setattr(hierarchical, "count_text_tokens", _count_words)
+
+    class VerboseModel(FakeModel):
+        def invoke(self, messages):
+            super().invoke(messages)
+            return SimpleNamespace(content="words " * 200)
+
+    strategy = HierarchicalSummarizeStrategy(max_input_tokens=30, max_summary_tokens=300)
+    memories = [
+        UserMemory(memory_id=str(i), memory=f"The user visited city number {i}", topics=["travel"], user_id="u1")
+        for i in range(8)
+    ]
+
+    optimized = strategy.optimize(memories, VerboseModel())  # type: ignore[arg-type]
+
+    assert len(optimized) == 1
+    assert _count_words(optimized[0].memory) <= strategy.max_summary_tokens == 15
+
+
+def test_unchanged_clusters_are_not_resummarized():
+    strategy = HierarchicalSummarizeStrategy()
+    strategy.optimize(_memories(), FakeModel())  # type: ignore[arg-type]
+
+    model = FakeModel()
+    strategy.optimize(_memories(), model)  # type: ignore[arg-type]
+    assert model.prompts == []
+    assert strategy.last_report.clusters_reused == 1  # type: ignore[union-attr]
+    assert strategy.last_report.clusters_kept == 1  # type: ignore[union-attr]
+
+    changed = _memories() + [
+        UserMemory(memory_id="w1", memory="The user leads a small team", topics=["work"], user_id="u1")
+    ]
+    strategy.optimize(changed, model)  # type: ignore[arg-type]
+    assert len(model.prompts) == 1 and "engineer" in model.prompts[0]
+
+
+def test_untagged_memories_cluster_by_similarity():
+    strategy = HierarchicalSummarizeStrategy()
+    memories = [
+        UserMemory(memory_id="a", memory="user enjoys hiking in the mountains", user_id="u1"),
+        UserMemory(memory_id="b", memory="user enjoys hiking in the alps", user_id="u1"),
+        UserMemory(memory_id="c", memory="prefers dark mode editors", user_id="u1"),
+    ]
+
+    clusters = strategy.cluster(memories)
+
+    assert sorted(len(cluster.memories) for cluster in clusters) == [1, 2]
+
+
+def test_empty_memories_raise():
+    with pytest.raises(ValueError):
+        HierarchicalSummarizeStrategy().optimize([], FakeModel())  # type: ignore[arg-type]
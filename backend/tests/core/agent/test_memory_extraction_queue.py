@@ -0,0 +1,94 @@
+"""
+Tests for the background, debounced memory extraction queue.
+"""
+
+import asyncio
+
+import pytest
+
+import app.services.memory_service  # noqa: F401  (loads services before the memory package, avoiding the import cycle)
+from app.core.agent.memory.extraction_queue import MemoryExtractionQueue
+
+
+class FakeManager:
+    def __init__(self, delay=0.0, fail_for=()):
+        self.calls = []
+        self.delay = delay
+        self.fail_for = set(fail_for)
+        self.running = 0
+        self.peak = 0
+
+    async def acreate_user_memories(self, messages=None, user_id=None, **kwargs):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+            if user_id in self.fail_for:
+                raise RuntimeError("model down")
+            self.calls.append((user_id, [m.content for m in messages]))
+        finally:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_turns_of_one_thread_are_coalesced_after_the_debounce_window():
+    queue = MemoryExtractionQueue(debounce_seconds=0.05)
+    manager = FakeManager()
+
+    queue.enqueue(manager, "u1", "I live in Paris", thread_id="t1")
+    # The same user input seen again in a tool loop is not duplicated
+    queue.enqueue(manager, "u1", "I live in Paris", thread_id="t1")
+    queue.enqueue(manager, "u1", "I have a cat", thread_id="t1")
+    queue.enqueue(manager, "u1", "I like tea", thread_id="t2")
+    assert manager.calls == [] and queue.pending_count == 2
+
+    await asyncio.sleep(0.15)
+    await queue.flush()
+
+    assert sorted(manager.calls) == [("u1", ["I like tea"]), ("u1", ["I live in Paris", "I have a cat"])]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_max_wait_bounds_debounce_for_a_busy_thread():
+    queue = MemoryExtractionQueue(debounce_seconds=0.05, max_wait_seconds=0.08)
+    manager = FakeManager()
+
+    for i in range(6):
+        queue.enqueue(manager, "u1", f"turn {i}", thread_id="t1")
+        await asyncio.sleep(0.03)
+    await asyncio.sleep(0.01)
+
+    # Extraction started while the thread was still active
+    assert len(manager.calls) >= 1
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_pool_limits_concurrency_and_isolates_failures():
+    queue = MemoryExtractionQueue(debounce_seconds=0.01, max_concurrency=2)
+    manager = FakeManager(delay=0.02, fail_for={"u0"})
+
+    for i in range(6):
+        queue.enqueue(manager, f"u{i}", "hello")
+    await asyncio.sleep(0.03)
+    await queue.flush()
+
+    assert manager.peak == 2
+    assert sorted(user for user, _ in manager.calls) == ["u1", "u2", "u3", "u4", "u5"]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_full_queue_starts_the_oldest_extraction_early():
+    queue = MemoryExtractionQueue(debounce_seconds=60, max_pending=2)
+    manager = FakeManager()
+
+    for i in range(3):
+        queue.enqueue(manager, f"u{i}", "hello")
+    await asyncio.sleep(0.01)
+
+    assert queue.pending_count == 2
+    assert manager.calls == [("u0", ["hello"])]
+    await queue.close()
+    assert len(manager.calls) == 3
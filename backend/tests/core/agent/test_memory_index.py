@@ -0,0 +1,111 @@
+"""
+Tests for the offline BM25 memory index and semantic memory retrieval.
+"""
+
+import pytest
+
+import app.services.memory_service  # noqa: F401  (loads services before the memory package, avoiding the import cycle)
+from app.core.agent.memory.manager import MemoryManager, MemorySearchResponse
+from app.core.agent.memory.semantic_index import MemoryIndex, memory_index, tokenize
+from app.schemas.memory import UserMemory
+
+
+def _memory(memory_id, text, topics=None, user_id="u1"):
+    return UserMemory(memory_id=memory_id, memory=text, topics=topics, user_id=user_id)
+
+
+class FakeDb:
+    """Sync stand-in exposing the only read the semantic path needs."""
+
+    def __init__(self, memories):
+        self.memories = memories
+        self.reads = 0
+
+    def get_user_memories(self, user_id=None):
+        self.reads += 1
+        return [m for m in self.memories if user_id is None or m.user_id == user_id]
+
+
+class FakeModel:
+    def __init__(self, memory_ids):
+        self.memory_ids = memory_ids
+        self.prompts = []
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, messages):
+        self.prompts.append(messages[0].content)
+        return MemorySearchResponse(memory_ids=self.memory_ids)
+
+
+def test_tokenize_splits_cjk_into_unigrams_and_bigrams():
+    assert tokenize("喜欢Python!") == ["喜", "欢", "喜欢", "python"]
+
+
+def test_index_ranks_by_bm25_and_updates_incrementally():
+    index = MemoryIndex()
+    index.load(
+        "u1",
+        [
+            _memory("a", "User likes hiking in the mountains", ["hobbies"]),
+            _memory("b", "User works as a backend engineer"),
+            _memory("c", "用户喜欢喝咖啡"),
+        ],
+    )
+
+    assert [m.memory_id for m in index.search("u1", "hiking hobbies", 2)] == ["a"]
+    assert [m.memory_id for m in index.search("u1", "咖啡", 5)] == ["c"]
+
+    index.upsert(_memory("b", "User enjoys hiking on weekends"))
+    index.remove("u1", ["a"])
+    assert [m.memory_id for m in index.search("u1", "hiking", 5)] == ["b"]
+
+    # Users without a loaded index are built lazily by the caller
+    assert index.search("u2", "hiking", 5) is None
+    index.upsert(_memory("x", "hiking", user_id="u2"))
+    assert not index.is_loaded("u2")
+
+
+def test_index_rebuilds_after_max_age_and_evicts_lru_users():
+    index = MemoryIndex(max_users=1, max_age=0.0001)
+    index.load("u1", [_memory("a", "hiking")])
+    index._users["u1"].built_at -= 1
+    assert index.search("u1", "hiking", 5) is None
+
+    index = MemoryIndex(max_users=1)
+    index.load("u1", [_memory("a", "hiking")])
+    index.load("u2", [_memory("b", "hiking", user_id="u2")])
+    assert not index.is_loaded("u1") and index.is_loaded("u2")
+
+
+def test_semantic_search_reads_db_once_and_skips_model():
+    memory_index.drop()
+    db = FakeDb([_memory(str(i), f"note {i} about topic{i}") for i in range(50)])
+    db.memories.append(_memory("tea", "User prefers green tea over coffee", ["drinks"]))
+    manager = MemoryManager(model=FakeModel([]), db=db)  # type: ignore[arg-type]
+
+    first = manager.search_user_memories(query="what tea", retrieval_method="semantic", user_id="u1", limit=3)
+    second = manager.search_user_memories(query="drinks", retrieval_method="semantic", user_id="u1", limit=3)
+
+    assert [m.memory_id for m in first] == ["tea"]
+    assert [m.memory_id for m in second] == ["tea"]
+    assert db.reads == 1
+    assert manager.model.prompts == []
+    with pytest.raises(ValueError):
+        manager.search_user_memories(retrieval_method="semantic", user_id="u1")
+    memory_index.drop()
+
+
+def test_semantic_rerank_only_sends_top_k_to_model():
+    memory_index.drop()
+    db = FakeDb([_memory(str(i), f"unrelated note {i}") for i in range(30)])
+    db.memories += [_memory("t1", "likes green tea"), _memory("t2", "drinks tea every morning")]
+    model = FakeModel(["t2", "t1"])
+    manager = MemoryManager(model=model, db=db)  # type: ignore[arg-type]
+
+    result = manager.search_user_memories(query="tea", retrieval_method="semantic", user_id="u1", limit=2, rerank=True)
+
+    assert [m.memory_id for m in result] == ["t2", "t1"]
+    assert model.prompts[0].count("ID: ") == 2
+    memory_index.drop()
@@ -0,0 +1,58 @@
+"""
+Tests for last_n / first_n memory retrieval pushed down to the database.
+"""
+
+import pytest
+
+import app.services.memory_service  # noqa: F401  (loads services before the memory package, avoiding the import cycle)
+from app.core.agent.memory.manager import MemoryManager
+from app.schemas.memory import UserMemory
+
+
+class OrderingDb:
+    """Sync stand-in applying sort/limit like MemoryService.get_user_memories and recording the calls."""
+
+    def __init__(self, memories):
+        self.memories = memories
+        self.calls = []
+
+    def get_user_memories(self, user_id, limit=None, sort_by=None, sort_order=None):
+        self.calls.append({"limit": limit, "sort_by": sort_by, "sort_order": sort_order})
+        rows = sorted(
+            (m for m in self.memories if m.user_id == user_id),
+            key=lambda m: getattr(m, sort_by),
+            reverse=sort_order == "desc",
+        )
+        return rows[:limit] if limit else rows
+
+
+def _db():
+    return OrderingDb([UserMemory(memory_id=str(i), memory=f"m{i}", user_id="u1", updated_at=i) for i in range(100)])
+
+
+def test_last_n_and_first_n_push_order_and_limit_to_db():
+    db = _db()
+    manager = MemoryManager(db=db)  # type: ignore[arg-type]
+
+    last = manager.search_user_memories(limit=3, retrieval_method="last_n", user_id="u1")
+    first = manager.search_user_memories(limit=3, retrieval_method="first_n", user_id="u1")
+
+    # Chronological order, as before the pushdown
+    assert [m.memory_id for m in last] == ["97", "98", "99"]
+    assert [m.memory_id for m in first] == ["0", "1", "2"]
+    # One bounded read per search
+    assert db.calls == [
+        {"limit": 3, "sort_by": "updated_at", "sort_order": "desc"},
+        {"limit": 3, "sort_by": "updated_at", "sort_order": "asc"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_last_n_reads_only_the_limit():
+    db = _db()
+    manager = MemoryManager(db=db)  # type: ignore[arg-type]
+
+    last = await manager.asearch_user_memories(limit=2, user_id="u1")
+
+    assert [m.memory_id for m in last] == ["98", "99"]
+    assert db.calls == [{"limit": 2, "sort_by": "updated_at", "sort_order": "desc"}]
@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.graph.branch_scheduler import FairPool
+from app.core.graph.graph_compiler import compile_from_schema
+from app.core.graph.graph_schema import ConcurrencySchema, EdgeSchema, GraphSchema, NodeSchema
+from app.core.graph.graph_state import GraphState
+from app.core.graph.node_executors import AggregatorNodeExecutor
+
+
+@pytest.mark.asyncio
+async def test_fair_pool_interleaves_runs_by_weight():
+    pool = FairPool("llm", capacity=1)
+    await pool.acquire("holder")
+    order = []
+
+    async def branch(run: str, weight: float):
+        await pool.acquire(run, weight)
+        order.append(run)
+        pool.release()
+
+    tasks = [asyncio.create_task(branch("big", 1.0)) for _ in range(4)]
+    tasks += [asyncio.create_task(branch("heavy", 2.0)) for _ in range(4)]
+    await asyncio.sleep(0)
+    pool.release()
+    await asyncio.gather(*tasks)
+
+    # The run queued later is not starved, and gets twice the share while both wait
+    assert order[:6].count("heavy") == 4
+    assert pool.active == 0 and pool.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_graph_limit_and_orders_task_results():
+    branch_ids = [f"b{i}" for i in range(5)]
+    running = 0
+    peak = 0
+
+    class MockNode:
+        def __init__(self, node_id):
+            self.id = node_id
+
+    class MockBuilder:
+        nodes = [MockNode(i) for i in ["start", *branch_ids, "agg"]]
+        _node_id_to_name: dict = {}
+
+        async def _get_or_create_executor(self, db_node, name):
+            if db_node.id == "agg":
+                node = MagicMock()
+                node.data = {"config": {"error_strategy": "best_effort"}}
+                return AggregatorNodeExecutor(node, "agg")
+            if db_node.id == "start":
+
+                async def start(state: GraphState):
+                    return {"current_node": "start"}
+
+                return start
+            delay = 0.01 * (len(branch_ids) - branch_ids.index(db_node.id))
+
+            async def branch(state: GraphState, _id: str = db_node.id, _delay: float = delay):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(_delay)
+                running -= 1
+                return {"result": _id}
+
+            return branch
+
+    schema = GraphSchema(
+        nodes=[
+            NodeSchema(id="start", type="function_node", label="start"),
+            *[NodeSchema(id=b, type="agent", label=b) for b in branch_ids],
+            NodeSchema(id="agg", type="aggregator_node", label="agg"),
+        ],
+        edges=[
+            *[EdgeSchema(source="start", target=b) for b in branch_ids],
+            *[EdgeSchema(source=b, target="agg") for b in branch_ids],
+        ],
+        concurrency=ConcurrencySchema(max_parallel_branches=2),
+    )
+    result = await compile_from_schema(schema, builder=MockBuilder(), checkpointer=False, validate=False)
+    final = await result.compiled_graph.ainvoke({"messages": []})
+
+    assert peak == 2
+    assert [r["result"] for r in final["task_results"]] == branch_ids
+
+
+@pytest.mark.asyncio
+async def test_fan_out_branches_writing_current_node():
+    branch_ids = ["b0", "b1", "b2"]
+
+    class MockNode:
+        def __init__(self, node_id):
+            self.id = node_id
+
+    class MockBuilder:
+        nodes = [MockNode(i) for i in ["start", *branch_ids]]
+        _node_id_to_name: dict = {}
+
+        async def _get_or_create_executor(self, db_node, name):
+            async def node(state: GraphState, _id: str = db_node.id):
+                # Like the real executors, every node reports itself as current_node
+                return {"current_node": _id, "result": _id}
+
+            return node
+
+    schema = GraphSchema(
+        nodes=[NodeSchema(id=i, type="agent", label=i) for i in ["start", *branch_ids]],
+        edges=[EdgeSchema(source="start", target=b) for b in branch_ids],
+    )
+    result = await compile_from_schema(schema, builder=MockBuilder(), checkpointer=False, validate=False)
+    final = await result.compiled_graph.ainvoke({"messages": []})
+
+    # Parallel branches would all write the single-value channel in one superstep
+    assert final["current_node"] == "start"
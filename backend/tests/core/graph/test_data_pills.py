@@ -0,0 +1,37 @@
+from app.core.graph import expression_evaluator
+from app.core.graph.expression_evaluator import compile_template, resolve_variable_expressions
+
+
+def test_templates_compile_once_and_keep_whole_expression_types():
+    assert compile_template("plain text") is None
+    assert compile_template("Hi {Agent.output}!") is compile_template("Hi {Agent.output}!")
+
+    state = {"count": 3, "node_outputs": {"Agent": {"output": "done"}}}
+    assert resolve_variable_expressions(" state.get('count') ", state) == 3
+    assert resolve_variable_expressions("{Agent.missing}", state) is None
+    assert resolve_variable_expressions("result.value", state) == "result.value"
+    assert resolve_variable_expressions("result.value", state, {"value": [1]}) == [1]
+    assert (
+        resolve_variable_expressions("n=state.count, out={Agent.output}, r=result.x, state.get", state)
+        == "n=3, out=done, r=result.x, state.get"
+    )
+
+
+def test_contexts_without_references_are_returned_unchanged():
+    context = {"topic": "x", "items": ["a", {"b": 1}], "nested": {"k": "v"}}
+    assert resolve_variable_expressions(context, {}) is context
+
+    context = {"topic": "x", "nested": {"k": "v"}, "count": "state.count"}
+    resolved = resolve_variable_expressions(context, {"count": 2})
+    assert resolved == {"topic": "x", "nested": {"k": "v"}, "count": 2}
+    assert resolved["nested"] is context["nested"]
+    assert context["count"] == "state.count"
+
+
+def test_large_strings_are_resolved_without_being_cached():
+    expression_evaluator._compile_template_cached.cache_clear()
+    tool_output = '{"items": [' + ", ".join(f'{{"id": {i}}}' for i in range(1000)) + "], out: {Agent.output}}"
+    state = {"node_outputs": {"Agent": {"output": "done"}}}
+
+    assert resolve_variable_expressions(tool_output, state).endswith("out: done}")
+    assert expression_evaluator._compile_template_cached.cache_info().currsize == 0
@@ -0,0 +1,101 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.core.graph.function_runtime import FunctionProcessPool, compile_function_code, function_pool
+from app.core.graph.graph_state import GraphState
+from app.core.graph.node_executors import FunctionNodeExecutor
+from app.core.graph.state_channels import AppendOnlyList
+
+
+def _node(config: dict) -> MagicMock:
+    node = MagicMock()
+    node.data = {"config": {"execution_mode": "custom", **config}}
+    return node
+
+
+def test_custom_code_is_compiled_once_and_rejected_at_build_time():
+    compiled = compile_function_code("result = {'total': x + state.context.bonus}")
+    assert compiled is compile_function_code("result = {'total': x + state.context.bonus}")
+    assert {"x", "state"} <= compiled.names
+
+    with pytest.raises(ValueError):
+        FunctionNodeExecutor(_node({"function_code": "result = ("}), "fn")
+
+
+@pytest.mark.asyncio
+async def test_isolated_and_in_process_paths_agree():
+    config = {
+        "function_code": "result = {'total': x + state.context.bonus, 'first': state.task_results[0]['id']}",
+        "input_mapping": [{"key": "x", "type": "static", "value": 2}],
+    }
+    state = GraphState(context={"bonus": 3}, messages=[], task_results=AppendOnlyList([{"id": 1}]))
+    try:
+        isolated = await FunctionNodeExecutor(_node(config), "fn")(state)
+        fast = await FunctionNodeExecutor(_node({**config, "in_process": True}), "fn")(state)
+        assert isolated["result"] == fast["result"] == {"total": 5, "first": 1}
+    finally:
+        await function_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_runaway_code_is_stopped_and_worker_reused():
+    try:
+        looping = FunctionNodeExecutor(_node({"function_code": "while True:\n    pass", "timeout_seconds": 0.5}), "fn")
+        result = await looping(GraphState(messages=[]))
+        assert "time limit" in result["messages"][0].content
+
+        ok = await FunctionNodeExecutor(_node({"function_code": "result = 42"}), "fn")(GraphState(messages=[]))
+        assert ok["result"] == 42
+    finally:
+        await function_pool.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "code",
+    [
+        "result = state.context",
+        "result = context",
+        "result = {'ctx': state.context, 'first': messages[0]}",
+        "result = messages[-1]",
+        "result = messages",
+        "result = state.messages[0].content",
+    ],
+)
+async def test_state_and_message_results_match_in_both_modes(code):
+    state = GraphState(
+        context={"bonus": 3, "nested": {"a": 1}},
+        messages=AppendOnlyList([HumanMessage(content="hi", id="m1"), AIMessage(content="hello", id="m2")]),
+    )
+    try:
+        isolated = await FunctionNodeExecutor(_node({"function_code": code}), "fn")(state)
+        fast = await FunctionNodeExecutor(_node({"function_code": code, "in_process": True}), "fn")(state)
+        assert "result" in isolated, isolated
+        assert isolated["result"] == fast["result"]
+    finally:
+        await function_pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_respawn_slot_is_refilled(monkeypatch):
+    pool = FunctionProcessPool(size=1)
+    compiled = compile_function_code("result = 1")
+    try:
+        await pool.start()
+        spawn = pool._spawn
+
+        async def failing_spawn():
+            raise OSError("fork failed")
+
+        monkeypatch.setattr(pool, "_spawn", failing_spawn)
+        worker = await pool._idle.get()  # type: ignore[union-attr]
+        pool._replace(worker)
+        await asyncio.gather(*pool._background)
+
+        monkeypatch.setattr(pool, "_spawn", spawn)
+        assert await asyncio.wait_for(pool.run(compiled, {}), 10) == 1
+    finally:
+        await pool.close()
@@ -0,0 +1,117 @@
+"""
+Tests for the process-wide compiled graph cache.
+"""
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.graph.graph_cache import CompiledGraphCache, compute_graph_content_hash, compute_llm_fingerprint
+from app.services.model_service import ModelService, ScopedModelService
+
+
+def _graph(variables=None):
+    return SimpleNamespace(name="G", variables=variables or {})
+
+
+def _node(node_id, prompt="", x=0.0):
+    return SimpleNamespace(
+        id=node_id, type="agent", prompt=prompt, tools={}, memory={}, data={"config": {}}, position_x=x
+    )
+
+
+def _edge(source, target):
+    return SimpleNamespace(source_node_id=source, target_node_id=target, data={})
+
+
+class TestContentHash:
+    def test_layout_changes_do_not_change_hash(self):
+        a, b = uuid.uuid4(), uuid.uuid4()
+        h1 = compute_graph_content_hash(_graph({"viewport": {"x": 1}}), [_node(a), _node(b)], [_edge(a, b)])
+        h2 = compute_graph_content_hash(_graph({"viewport": {"x": 99}}), [_node(b, x=50.0), _node(a)], [_edge(a, b)])
+        assert h1 == h2
+
+    def test_prompt_change_changes_hash(self):
+        a = uuid.uuid4()
+        h1 = compute_graph_content_hash(_graph(), [_node(a, prompt="v1")], [])
+        h2 = compute_graph_content_hash(_graph(), [_node(a, prompt="v2")], [])
+        assert h1 != h2
+
+    def test_model_config_change_changes_llm_fingerprint(self):
+        f1 = compute_llm_fingerprint("gpt", None, None, 4096, model_config_version="v1")
+        f2 = compute_llm_fingerprint("gpt", None, None, 4096, model_config_version="v2")
+        assert f1 != f2
+
+
+class TestScopedModelService:
+    @pytest.mark.asyncio
+    async def test_each_call_uses_its_own_session(self, monkeypatch):
+        opened, closed = [], []
+
+        class FakeSession:
+            async def __aenter__(self):
+                opened.append(self)
+                return self
+
+            async def __aexit__(self, *exc):
+                closed.append(self)
+
+        async def get_model_instance(self, user_id, **kwargs):
+            assert self.db is opened[-1] and self.db not in closed
+            return f"model-{len(opened)}"
+
+        monkeypatch.setattr(ModelService, "get_model_instance", get_model_instance)
+        service = ScopedModelService(FakeSession)
+
+        assert await service.get_model_instance("u1", model_name="m") == "model-1"
+        assert await service.get_model_instance("u1", model_name="m") == "model-2"
+        assert closed == opened and opened[0] is not opened[1]
+
+
+class TestCompiledGraphCache:
+    @pytest.mark.asyncio
+    async def test_concurrent_builds_are_single_flight(self):
+        cache = CompiledGraphCache(maxsize=8, ttl=60)
+        builds = 0
+
+        async def build():
+            nonlocal builds
+            builds += 1
+            await asyncio.sleep(0.01)
+            return object()
+
+        key = cache.make_key(uuid.uuid4(), "hash", "user-1", "llm")
+        results = await asyncio.gather(*(cache.get_or_build(key, build) for _ in range(5)))
+
+        assert builds == 1
+        assert all(r is results[0] for r in results)
+        assert await cache.get_or_build(key, build) is results[0]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_removes_all_entries_for_graph(self):
+        cache = CompiledGraphCache(maxsize=8, ttl=60)
+        graph_id = uuid.uuid4()
+
+        async def build():
+            return object()
+
+        await cache.get_or_build(cache.make_key(graph_id, "h1", "u1", "llm"), build)
+        await cache.get_or_build(cache.make_key(graph_id, "h1", "u2", "llm"), build)
+        await cache.get_or_build(cache.make_key(uuid.uuid4(), "h1", "u1", "llm"), build)
+
+        assert cache.invalidate(graph_id) == 2
+        assert cache.stats()["size"] == 1
+
+    @pytest.mark.asyncio
+    async def test_graph_with_per_run_backend_is_not_cached(self):
+        cache = CompiledGraphCache(maxsize=8, ttl=60)
+        compiled = SimpleNamespace(_cleanup_backend=lambda: None)
+
+        async def build():
+            return compiled
+
+        key = cache.make_key(uuid.uuid4(), "h", "u", "llm")
+        assert await cache.get_or_build(key, build) is compiled
+        assert cache.stats()["size"] == 0
@@ -70,6 +70,37 @@ class TestCompileFromSchema:
         assert result.build_time_ms > 0
         assert result.schema.name == "Timed"
 
+    @pytest.mark.asyncio
+    async def test_node_outputs_are_checkpointable(self):
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        class MockNode:
+            def __init__(self, node_id):
+                self.id = node_id
+
+        class MockBuilder:
+            nodes = [MockNode("a"), MockNode("b")]
+            _node_id_to_name: dict = {}
+
+            async def _get_or_create_executor(self, db_node, name):
+                async def node(state, _id: str = db_node.id):
+                    # Like the real executors: the result dict is returned as the state update
+                    return {"current_node": _id, "result": {"content": _id}}
+
+                return node
+
+        config = {"input_mapping": [{"key": "topic", "type": "static", "value": "x"}]}
+        schema = GraphSchema(
+            name="Checkpointed",
+            nodes=[NodeSchema(id=i, type="agent", label=i.upper(), config=config) for i in ["a", "b"]],
+            edges=[EdgeSchema(source="a", target="b")],
+        )
+        result = await compile_from_schema(schema, builder=MockBuilder(), checkpointer=InMemorySaver(), validate=False)
+        final = await result.compiled_graph.ainvoke({"messages": []}, config={"configurable": {"thread_id": "t"}})
+
+        assert final["node_outputs"]["b"]["result"] == {"content": "b"}
+        assert "node_outputs" not in final["node_outputs"]["a"]
+
 
 # ---------------------------------------------------------------------------
 # Code generator tests
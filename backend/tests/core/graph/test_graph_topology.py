@@ -0,0 +1,76 @@
+import time
+import uuid
+from types import SimpleNamespace
+
+from app.core.graph.base_graph_builder import BaseGraphBuilder
+from app.core.graph.graph_topology import GraphTopology
+from app.core.graph.state_variable_tracker import StateVariableTracker
+
+
+def _node(node_type: str, label: str, config: dict | None = None):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        type=node_type,
+        prompt=None,
+        tools=None,
+        memory=None,
+        data={"type": node_type, "label": label, "config": config or {}},
+    )
+
+
+def _edge(source, target, **data):
+    return SimpleNamespace(source_node_id=source.id, target_node_id=target.id, data=data)
+
+
+class _Builder(BaseGraphBuilder):
+    def build(self):
+        return None
+
+
+def test_scc_cycles_and_ancestors():
+    topology = GraphTopology("abcdef", [("a", "b"), ("b", "c"), ("c", "b"), ("d", "d"), ("e", "a"), ("f", "e")])
+
+    components = topology.strongly_connected_components()
+    assert sorted(sorted(c) for c in components) == [["a"], ["b", "c"], ["d"], ["e"], ["f"]]
+    # Reverse topological order: {b, c} before a, a before e
+    order = {node: i for i, c in enumerate(components) for node in c}
+    assert order["b"] < order["a"] < order["e"] < order["f"]
+
+    assert topology.cyclic_nodes() == {"b", "c", "d"}
+    assert topology.nodes_reaching_cycle() == {"a", "b", "c", "d", "e", "f"}
+    assert topology.ancestors("a") == ["e", "f"]
+    # A node on a cycle is its own ancestor
+    assert topology.ancestors("b") == ["a", "e", "f", "c", "b"]
+
+
+def test_loop_back_cycle_detection_uses_loop_condition_nodes_only():
+    loop_a, loop_b, body = _node("loop_condition_node", "A"), _node("loop_condition_node", "B"), _node("agent", "X")
+    edges = [
+        _edge(body, loop_a),
+        _edge(loop_a, body, edge_type="loop_back", route_key="continue_loop"),
+        _edge(loop_a, loop_b, edge_type="loop_back"),
+        _edge(loop_b, loop_a, edge_type="loop_back"),
+    ]
+    builder = _Builder(graph=SimpleNamespace(variables={}), nodes=[loop_a, loop_b, body], edges=edges)
+    assert builder._detect_potential_cycles(loop_a.id)
+    assert not builder._detect_potential_cycles(body.id)
+
+    builder = _Builder(graph=SimpleNamespace(variables={}), nodes=[loop_a, loop_b, body], edges=edges[:3])
+    assert not builder._detect_potential_cycles(loop_a.id)
+
+
+def test_variable_analysis_is_cached_and_linear_on_large_graphs():
+    nodes = [_node("function_node", f"f{i}", {"function_code": f"result = {{'v{i}': {i}}}"}) for i in range(600)]
+    edges = [_edge(a, b) for a, b in zip(nodes, nodes[1:])]
+
+    start = time.perf_counter()
+    tracker = StateVariableTracker(nodes, edges)
+    variables = tracker.analyze_graph()
+    available = tracker.get_available_variables_for_node(str(nodes[-1].id))
+    assert time.perf_counter() - start < 2
+    assert {"v0", "v598"} <= {v["name"] for v in available}
+    assert "v599" not in {v["name"] for v in available}
+
+    again = StateVariableTracker(nodes, edges)
+    assert again.analyze_graph() == variables
+    assert again.variable_definitions is tracker.variable_definitions
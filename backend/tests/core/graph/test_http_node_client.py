@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.graph import http_node_client
+from app.core.graph.http_node_client import HttpClientPool, ResponseTooLargeError, send_request
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    calls = []
+    responses = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return responses.pop(0)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(http_node_client, "client_pool", HttpClientPool(max_clients=8, client_factory=lambda: client))
+    http_node_client.response_cache.clear()
+    yield calls, responses
+    http_node_client.response_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_status_and_enforces_size_limit(transport):
+    calls, responses = transport
+    responses += [httpx.Response(503, headers={"Retry-After": "0"}), httpx.Response(200, json={"ok": True})]
+    response = await send_request("GET", "https://api.test/items", max_retries=2)
+    assert response.status_code == 200 and response.attempts == 2 and len(calls) == 2
+
+    # POST is not retried on 502: the server may have processed it
+    responses.append(httpx.Response(502))
+    assert (await send_request("POST", "https://api.test/items", content="x")).status_code == 502
+
+    responses.append(httpx.Response(200, content=b"x" * 2048))
+    with pytest.raises(ResponseTooLargeError):
+        await send_request("GET", "https://api.test/big", max_response_bytes=1024)
+
+
+@pytest.mark.asyncio
+async def test_get_cache_serves_fresh_and_revalidates_with_etag(transport):
+    calls, responses = transport
+    responses.append(httpx.Response(200, headers={"Cache-Control": "max-age=60"}, content=b"fresh"))
+    await send_request("GET", "https://api.test/fresh", use_cache=True)
+    cached = await send_request("GET", "https://api.test/fresh", use_cache=True)
+    assert cached.cached and cached.text == "fresh" and len(calls) == 1
+
+    responses += [
+        httpx.Response(200, headers={"Cache-Control": "no-cache", "ETag": '"v1"'}, content=b"body"),
+        httpx.Response(304, headers={"ETag": '"v1"'}),
+    ]
+    await send_request("GET", "https://api.test/etag", use_cache=True)
+    revalidated = await send_request("GET", "https://api.test/etag", use_cache=True)
+    assert calls[-1].headers["If-None-Match"] == '"v1"'
+    assert revalidated.cached and revalidated.text == "body"
+
+
+@pytest.mark.asyncio
+async def test_client_pool_evicts_least_recently_used_origin():
+    pool = HttpClientPool(max_clients=2, client_factory=lambda: httpx.AsyncClient())
+
+    async with pool.lease(httpx.URL("https://a.test/")) as a:
+        pass
+    async with pool.lease(httpx.URL("https://b.test/")) as b:
+        pass
+    async with pool.lease(httpx.URL("https://a.test/x")) as a_again:
+        assert a_again is a
+    async with pool.lease(httpx.URL("https://c.test/")) as c:
+        # b is idle and least recently used: evicted and closed
+        await asyncio.sleep(0)
+        assert b.is_closed and not a.is_closed
+        async with pool.lease(httpx.URL("https://a.test/")):
+            pass
+        async with pool.lease(httpx.URL("https://d.test/")) as d:
+            pass
+        # c is in use: evicted from the pool but only closed once released
+        assert not c.is_closed and len(pool) == 2
+    assert c.is_closed
+
+    await pool.close_all()
+    assert a.is_closed and d.is_closed and len(pool) == 0
@@ -0,0 +1,61 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.core.graph.graph_state import GraphState
+from app.core.graph.node_executors import (
+    ConditionNodeExecutor,
+    LoopConditionNodeExecutor,
+    RouterNodeExecutor,
+    compile_condition_expression,
+)
+
+
+def _node(config: dict) -> MagicMock:
+    node = MagicMock()
+    node.data = {"config": config}
+    return node
+
+
+def test_expressions_are_compiled_once_and_rejected_at_build_time():
+    assert compile_condition_expression("state.loop_count > 1") is compile_condition_expression("state.loop_count > 1")
+
+    with pytest.raises(ValueError):
+        ConditionNodeExecutor(_node({"expression": "__import__('os')"}), "cond")
+    with pytest.raises(ValueError):
+        LoopConditionNodeExecutor(_node({"conditionType": "while", "condition": "state.x >"}), "loop")
+
+
+@pytest.mark.asyncio
+async def test_condition_and_router_evaluate_against_state_view():
+    condition = ConditionNodeExecutor(_node({"expression": "state.context.score >= 5 and len(messages) == 0"}), "cond")
+    result = await condition(GraphState(context={"score": 7}, messages=[]))
+    assert result["route_decision"] == "true"
+
+    router = RouterNodeExecutor(
+        _node(
+            {
+                "routes": [
+                    {"id": "r1", "condition": "state.get('tier') == 'gold'", "targetEdgeKey": "gold", "priority": 1},
+                    {"id": "r2", "condition": "loop_count > 2", "targetEdgeKey": "many", "priority": 2},
+                ],
+                "defaultRoute": "other",
+            }
+        ),
+        "router",
+    )
+    assert (await router(GraphState(tier="gold")))["route_decision"] == "gold"
+    assert (await router(GraphState(loop_count=3)))["route_decision"] == "many"
+    assert (await router(GraphState()))["route_decision"] == "other"
+
+
+@pytest.mark.asyncio
+async def test_while_loop_uses_local_iteration_count():
+    loop = LoopConditionNodeExecutor(_node({"conditionType": "while", "condition": "loop_count < 2"}), "loop")
+    state = GraphState(loop_states={})
+    decisions = []
+    for _ in range(3):
+        update = await loop(state)
+        decisions.append(update["route_decision"])
+        state = GraphState(loop_states=update["loop_states"])
+    assert decisions == ["continue_loop", "continue_loop", "exit_loop"]
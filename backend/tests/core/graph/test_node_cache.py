@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Dict
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from app.core.graph.node_cache import NodeResultCache, node_cache
+from app.core.graph.node_wrapper import NodeExecutionWrapper
+
+
+class _CountingExecutor:
+    def __init__(self):
+        self.calls = 0
+
+    def memo_inputs(self, state) -> Dict[str, Any]:
+        return {"x": state.get("context", {}).get("x")}
+
+    async def __call__(self, state) -> Dict[str, Any]:
+        self.calls += 1
+        x = state["context"]["x"]
+        return {"messages": [AIMessage(content=str(x))], "current_node": "n1", "result": x * 2}
+
+
+@pytest.mark.asyncio
+async def test_cache_ttl_and_invalidation():
+    cache = NodeResultCache(max_entries=2, redis_enabled=False)
+    key = await cache.make_key("n1", "digest")
+    await cache.set(key, {"result": 1}, ttl=0.05)
+    assert await cache.get(key) == (True, {"result": 1})
+
+    await asyncio.sleep(0.06)
+    assert await cache.get(key) == (False, None)
+
+    await cache.set(key, {"result": 1})
+    await cache.invalidate(["n1"])
+    assert await cache.get(key) == (False, None)
+    assert await cache.make_key("n1", "digest") != key
+
+
+@pytest.mark.asyncio
+async def test_wrapper_memoizes_on_config_and_inputs():
+    node_cache.clear()
+    executor = _CountingExecutor()
+    wrapper = NodeExecutionWrapper(executor, node_id="n1", node_type="function_node", node_config={"memoize": True})
+
+    first = await wrapper({"context": {"x": 2}, "messages": []})
+    second = await wrapper({"context": {"x": 2}, "messages": []})
+    assert executor.calls == 1
+    assert first["result"] == second["result"] == 4
+    # Hits are copies: reducers assigning message ids must not leak into the cache
+    assert first["messages"][0] is not second["messages"][0]
+
+    await wrapper({"context": {"x": 3}, "messages": []})
+    assert executor.calls == 2
+
+    await node_cache.invalidate(["n1"])
+    await wrapper({"context": {"x": 2}, "messages": []})
+    assert executor.calls == 3
+
+    # Not opted in: always executes
+    plain = NodeExecutionWrapper(executor, node_id="n2", node_type="function_node", node_config={})
+    await plain({"context": {"x": 2}, "messages": []})
+    await plain({"context": {"x": 2}, "messages": []})
+    assert executor.calls == 5
+    node_cache.clear()
@@ -0,0 +1,64 @@
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from app.core.graph.graph_state import GraphState, add_task_results, merge_loop_states
+from app.core.graph.state_channels import AppendOnlyChannel, AppendOnlyList
+
+
+def test_append_only_versions_are_persistent():
+    base = AppendOnlyList([1, 2])
+    first = base.extended([3])
+    second = base.extended([4])  # branches from an older version
+
+    assert base == [1, 2]
+    assert first == [1, 2, 3]
+    assert second == [1, 2, 4]
+    assert first._buffer is base._buffer
+    assert first + [9] == [1, 2, 3, 9]
+    assert add_task_results([], []) == []
+
+
+def test_merge_loop_states_shares_untouched_entries():
+    untouched = {"iteration_count": 2}
+    left = {"a": untouched, "b": {"iteration_count": 1, "active": True}}
+    merged = merge_loop_states(left, {"b": {"active": False}})
+
+    assert merged["a"] is untouched
+    assert merged["b"] == {"iteration_count": 1, "active": False}
+    assert left["b"]["active"] is True
+
+
+@pytest.mark.asyncio
+async def test_task_results_channel_in_checkpointed_graph():
+    def worker(state: GraphState) -> dict:
+        return {
+            "task_results": [{"task_id": len(state.get("task_results", [])), "status": "success"}],
+            "messages": [AIMessage(content="step")],
+        }
+
+    def route(state: GraphState) -> str:
+        return END if len(state["task_results"]) >= 3 else "worker"
+
+    builder = StateGraph(GraphState)
+    builder.add_node("worker", worker)
+    builder.add_edge(START, "worker")
+    builder.add_conditional_edges("worker", route)
+    graph = builder.compile(checkpointer=InMemorySaver())
+
+    config = {"configurable": {"thread_id": "t"}}
+    result = await graph.ainvoke({"messages": []}, config=config)
+    assert [r["task_id"] for r in result["task_results"]] == [0, 1, 2]
+
+    assert isinstance(result["messages"], AppendOnlyList) and len(result["messages"]) == 3
+
+    snapshot = await graph.aget_state(config)
+    assert list(snapshot.values["task_results"]) == list(result["task_results"])
+    assert [m.content for m in snapshot.values["messages"]] == ["step"] * 3
+
+
+def test_graph_state_messages_use_append_only_channel():
+    graph = StateGraph(GraphState)
+    assert isinstance(graph.channels["messages"], AppendOnlyChannel)
+    assert isinstance(graph.channels["todos"], AppendOnlyChannel)
@@ -0,0 +1,47 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.core.graph.state_channels import AppendOnlyList
+from app.core.graph.trace_utils import GraphExecutionTrace, NodeExecutionTrace, apply_snapshot_diff, diff_snapshot
+
+
+def test_snapshot_diff_round_trips_nested_and_appended_values():
+    previous = {"a": 1, "keys": ["x"], "nested": {"k": 1, "keep": [1, 2]}, "gone": True}
+    current = {"a": 2, "keys": ["x", "y"], "nested": {"k": 1, "keep": [1, 2], "new": "v"}}
+
+    delta = diff_snapshot(previous, current)
+    assert delta == {
+        "set": {"a": 2},
+        "sub": {"nested": {"set": {"new": "v"}}},
+        "append": {"keys": ["y"]},
+        "del": ["gone"],
+    }
+    assert apply_snapshot_diff(previous, delta) == current
+    assert diff_snapshot(current, current) == {}
+
+
+def test_state_history_stores_diffs_between_keyframes():
+    trace = GraphExecutionTrace("g", "graph", keyframe_interval=3)
+    states = []
+    for i in range(7):
+        state = {"current_node": f"n{i % 2}", "messages": [None] * i, "context": {f"k{j}": j for j in range(i)}}
+        trace.add_state_snapshot(state, node_id=f"n{i % 2}")
+        states.append(trace._sanitize_state(state))
+
+    assert ["state" in s for s in trace.state_history] == [True, False, False, True, False, False, True]
+    assert trace.state_history[2]["diff"] == {
+        "set": {"current_node": "n0", "messages_count": 2},
+        "append": {"context_keys": ["k1"]},
+    }
+    assert [trace.state_at(step) for step in range(7)] == states
+    assert trace.state_at(-1) == states[-1]
+    with pytest.raises(IndexError):
+        trace.state_at(7)
+
+
+def test_node_trace_summarizes_append_only_messages():
+    trace = NodeExecutionTrace(
+        "n1", "agent", 0.0, input_snapshot={"messages": AppendOnlyList([HumanMessage(content="hi")])}
+    )
+
+    assert trace.to_dict()["input_snapshot"]["messages"] == "<1 messages>"
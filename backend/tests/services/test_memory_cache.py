@@ -0,0 +1,66 @@
+"""
+Tests for the per-user memory read cache.
+"""
+
+import pytest
+
+from app.services.memory_cache import MemoryReadCache
+
+
+@pytest.mark.asyncio
+async def test_hit_until_user_is_invalidated():
+    cache = MemoryReadCache(redis_enabled=False)
+    rows, generation = await cache.get("u1")
+    assert rows is None
+
+    await cache.set("u1", generation, [{"memory_id": "a"}])
+    assert (await cache.get("u1"))[0] == [{"memory_id": "a"}]
+    assert (await cache.get("u1", "None:None:5"))[0] is None
+
+    await cache.invalidate("u1")
+    assert (await cache.get("u1"))[0] is None
+
+
+@pytest.mark.asyncio
+async def test_read_racing_a_write_is_not_stored():
+    cache = MemoryReadCache(redis_enabled=False)
+    _, generation = await cache.get("u1")
+    # A write lands while the (now stale) read is in flight
+    await cache.invalidate("u1")
+    await cache.set("u1", generation, [{"memory_id": "stale"}])
+
+    assert (await cache.get("u1"))[0] is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_all_and_lru_and_ttl():
+    cache = MemoryReadCache(max_entries=2, redis_enabled=False)
+    for user_id in ("u1", "u2"):
+        _, generation = await cache.get(user_id)
+        await cache.set(user_id, generation, [])
+    await cache.invalidate_all()
+    assert (await cache.get("u1"))[0] is None and (await cache.get("u2"))[0] is None
+
+    for user_id in ("u1", "u2", "u3"):
+        _, generation = await cache.get(user_id)
+        await cache.set(user_id, generation, [])
+    assert len(cache) == 2 and (await cache.get("u1"))[0] is None
+
+    expired = MemoryReadCache(ttl=0, redis_enabled=False)
+    _, generation = await expired.get("u1")
+    await expired.set("u1", generation, [])
+    assert (await expired.get("u1"))[0] is None
+
+
+@pytest.mark.asyncio
+async def test_cached_rows_are_copies():
+    cache = MemoryReadCache(redis_enabled=False)
+    _, generation = await cache.get("u1")
+    rows = [{"memory_id": "a", "topics": ["food"]}]
+    await cache.set("u1", generation, rows)
+    rows[0]["topics"].append("leaked")
+
+    first, _ = await cache.get("u1")
+    first[0]["topics"].append("mutated")  # type: ignore[index]
+
+    assert (await cache.get("u1"))[0] == [{"memory_id": "a", "topics": ["food"]}]
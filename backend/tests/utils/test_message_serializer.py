@@ -0,0 +1,28 @@
+"""
+Tests for the bounded serializer behind truncate_data.
+"""
+
+from langchain_core.messages import AIMessage
+
+from app.utils.message_serializer import TRUNCATED_SUFFIX, bounded_serialize, measure_data, truncate_data
+
+
+def test_measure_matches_str_without_materializing():
+    data = {"a": 1, "b": [1, "x", None, (2, 3)], "c": {"d": "e"}, "m": [AIMessage(content="hi", id="1")]}
+    assert measure_data(data) == len(str(data))
+
+    bounded = bounded_serialize(data, 20)
+    assert bounded.truncated
+    assert bounded.text == str(data)[:20]
+    assert bounded.original_size == len(str(data))
+
+
+def test_truncate_data_keeps_small_values_and_cuts_the_overflowing_one():
+    small = {"a": "short"}
+    assert truncate_data(small, max_length=100) is small
+
+    big = {"name": "scan", "out": "x" * 1_000_000, "tail": "never reached"}
+    result = truncate_data(big, max_length=100)
+    assert result["name"] == "scan"
+    assert result["out"] == "x" * 96 + TRUNCATED_SUFFIX
+    assert "tail" not in result
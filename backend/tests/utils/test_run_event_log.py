@@ -0,0 +1,146 @@
+"""
+Tests for the in-memory run event log used by resumable SSE streams.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.utils.run_event_log import InMemoryRunEventLog, RunEventLog, pump_run_events, tail_run_events
+
+
+async def _collect(iterator) -> list:
+    return [item async for item in iterator]
+
+
+@pytest.mark.asyncio
+async def test_reader_replays_after_last_event_id_and_tails_until_finish():
+    log = InMemoryRunEventLog(max_events=100)
+    await log.reset("t")
+    for frame in (b"a", b"b", b"c"):
+        await log.append("t", frame)
+
+    reader = asyncio.create_task(_collect(log.read("t", after="1")))
+    await asyncio.sleep(0)
+    await log.append("t", b"d")
+    await log.finish("t")
+
+    assert await asyncio.wait_for(reader, 1) == [("2", b"b"), ("3", b"c"), ("4", b"d")]
+
+
+@pytest.mark.asyncio
+async def test_run_keeps_going_after_reader_disconnects():
+    log = InMemoryRunEventLog(max_events=100)
+    await log.reset("t")
+    release = asyncio.Event()
+
+    async def events():
+        yield b"data: 1\n\n"
+        await release.wait()
+        yield b"data: 2\n\n"
+
+    run = asyncio.create_task(pump_run_events("t", events(), log))
+    first_reader = tail_run_events("t", log)
+    assert await first_reader.__anext__() == b"id: 1\ndata: 1\n\n"
+    await first_reader.aclose()  # client drops
+
+    release.set()
+    await asyncio.wait_for(run, 1)
+
+    assert await _collect(tail_run_events("t", log, "1")) == [b"id: 2\ndata: 2\n\n"]
+
+
+class FlakyLog(InMemoryRunEventLog):
+    """Fails the first ``failures`` appends."""
+
+    def __init__(self, failures: int):
+        super().__init__(max_events=100)
+        self.failures = failures
+
+    async def append(self, thread_id: str, frame: bytes) -> str:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Too many connections")
+        return await super().append(thread_id, frame)
+
+
+@pytest.mark.asyncio
+async def test_failed_appends_are_retried_not_dropped(monkeypatch):
+    monkeypatch.setattr("app.utils.run_event_log._APPEND_RETRY_DELAYS", (0, 0, 0))
+    log = FlakyLog(failures=2)
+    await log.reset("t")
+
+    async def events():
+        yield b"a"
+        yield b"b"
+
+    await asyncio.wait_for(pump_run_events("t", events(), log), 1)
+
+    assert await _collect(log.read("t")) == [("1", b"a"), ("2", b"b")]
+
+
+@pytest.mark.asyncio
+async def test_run_is_stopped_when_appends_keep_failing(monkeypatch):
+    monkeypatch.setattr("app.utils.run_event_log._APPEND_RETRY_DELAYS", (0, 0, 0))
+    log = FlakyLog(failures=100)
+    await log.reset("t")
+    stopped = []
+
+    async def events():
+        try:
+            for _ in range(100):
+                yield b"a"
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            stopped.append(True)
+
+    await asyncio.wait_for(pump_run_events("t", events(), log), 1)
+
+    assert stopped == [True]
+    assert await _collect(log.read("t")) == []
+
+
+class RecordingLog(InMemoryRunEventLog):
+    def __init__(self):
+        super().__init__(max_events=100)
+        self.batches: list = []
+
+    async def append_many(self, thread_id: str, frames: list[bytes]) -> list[str]:
+        self.batches.append(list(frames))
+        return await super().append_many(thread_id, frames)
+
+
+@pytest.mark.asyncio
+async def test_frames_produced_while_writing_are_batched():
+    log = RecordingLog()
+    await log.reset("t")
+
+    async def events():
+        for frame in (b"a", b"b", b"c"):
+            yield frame
+        await asyncio.sleep(0.01)
+        yield b"d"
+
+    await asyncio.wait_for(pump_run_events("t", events(), log), 1)
+
+    assert log.batches == [[b"a", b"b", b"c"], [b"d"]]
+    assert [frame for _, frame in await _collect(log.read("t"))] == [b"a", b"b", b"c", b"d"]
+
+
+def test_run_event_log_is_abstract():
+    with pytest.raises(TypeError):
+        RunEventLog()  # type: ignore[abstract]
+
+
+@pytest.mark.asyncio
+async def test_abandoned_run_expires_after_active_ttl(monkeypatch):
+    log = InMemoryRunEventLog(max_events=100, active_ttl_seconds=5)
+    await log.reset("t")
+    await log.append("t", b"a")
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.utils.run_event_log.time.monotonic", lambda: now + 10)
+    await log.reset("other")
+
+    assert not await log.exists("t")
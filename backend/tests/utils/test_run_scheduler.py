@@ -0,0 +1,55 @@
+"""
+Tests for run admission control.
+"""
+
+import asyncio
+
+import pytest
+
+from app.common.exceptions import TooManyRequestsException
+from app.utils.run_scheduler import RunPriority, RunScheduler
+
+
+@pytest.mark.asyncio
+async def test_per_user_cap_does_not_block_other_users():
+    scheduler = RunScheduler(max_concurrent=10, max_per_user=1, max_queue=10)
+    first = scheduler.submit("alice")
+    queued = scheduler.submit("alice")
+    other = scheduler.submit("bob")
+
+    assert first.admitted and other.admitted
+    assert not queued.admitted
+    assert scheduler.position(queued) == 1
+
+    scheduler.release(first)
+    assert queued.admitted
+
+
+@pytest.mark.asyncio
+async def test_priority_order_queue_positions_and_bound():
+    scheduler = RunScheduler(max_concurrent=1, max_per_user=0, max_queue=2)
+    running = scheduler.submit("u1")
+    normal = scheduler.submit("u2")
+    high = scheduler.submit("u3", RunPriority.HIGH)
+
+    assert scheduler.position(high) == 1
+    assert scheduler.position(normal) == 2
+    with pytest.raises(TooManyRequestsException):
+        scheduler.submit("u4")
+
+    positions: list[int] = []
+
+    async def wait_normal():
+        async for position in scheduler.wait(normal):
+            positions.append(position)
+
+    waiter = asyncio.create_task(wait_normal())
+    await asyncio.sleep(0)
+    scheduler.release(running)  # high runs, normal moves to the front
+    await asyncio.sleep(0)
+    scheduler.release(high)
+    await asyncio.wait_for(waiter, 1)
+
+    assert positions == [2, 1]
+    assert normal.admitted
+    assert scheduler.stats()["running"] == 1
@@ -0,0 +1,61 @@
+"""
+Tests for the orjson-based SSE envelope encoder.
+"""
+
+import json
+
+from langchain_core.messages import AIMessage
+
+from app.utils.sse_encoder import SSEEncoder
+from app.utils.stream_event_handler import StreamEventHandler, StreamState
+
+
+def _parse(frame: bytes) -> dict:
+    assert frame.startswith(b"data: ")
+    assert frame.endswith(b"\n\n")
+    return json.loads(frame[len(b"data: ") : -2])
+
+
+def test_envelope_matches_protocol():
+    state = StreamState("thread-1")
+    frame = StreamEventHandler.format_sse(
+        "content",
+        {"delta": "你好", "_meta": {"run_id": "r1", "node_name": "agent", "tags": ["a"], "timestamp": 1}},
+        "thread-1",
+        state,
+    )
+
+    envelope = _parse(frame)
+    assert list(envelope) == [
+        "type",
+        "thread_id",
+        "run_id",
+        "node_name",
+        "timestamp",
+        "tags",
+        "trace_id",
+        "observation_id",
+        "parent_observation_id",
+        "data",
+    ]
+    assert envelope["type"] == "content"
+    assert envelope["thread_id"] == "thread-1"
+    assert envelope["trace_id"] == state.trace_id
+    assert envelope["tags"] == ["a"]
+    assert envelope["data"] == {"delta": "你好"}
+
+
+def test_non_json_values_use_default():
+    encoder = SSEEncoder("t")
+    envelope = _parse(encoder.encode("model_output", {"output": AIMessage(content="hi"), "obj": object()}))
+
+    assert envelope["data"]["output"] == {"type": "AIMessage", "content": "hi"}
+    assert isinstance(envelope["data"]["obj"], str)
+
+
+def test_serialization_error_falls_back_per_field():
+    encoder = SSEEncoder("t")
+    envelope = _parse(encoder.encode("tool_end", {"tool_name": "scan", "tool_output": 2**70}))
+
+    assert envelope["data"]["tool_name"] == "scan"
+    assert "_serialization_error" in envelope["data"]["tool_output"]
@@ -0,0 +1,139 @@
+"""
+Tests for StreamEventHandler content coalescing.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils.stream_event_handler import StreamEventHandler, StreamState
+
+
+def _chunk_event(text: str, run_id: str = "run-1") -> dict:
+    return {"event": "on_chat_model_stream", "run_id": run_id, "data": {"chunk": SimpleNamespace(content=text)}}
+
+
+def _deltas(frames: bytes | None) -> list[str]:
+    if not frames:
+        return []
+    return [json.loads(part[len(b"data: ") :])["data"]["delta"] for part in frames.split(b"\n\n") if part.strip()]
+
+
+@pytest.mark.asyncio
+async def test_without_coalescing_every_chunk_is_a_frame():
+    handler = StreamEventHandler()
+    state = StreamState("t")
+
+    for text in ["a", "b", "c"]:
+        assert _deltas(await handler.handle_chat_model_stream(_chunk_event(text), state, "run-1", None)) == [text]
+    assert handler.flush_content(state) is None
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_is_sent_immediately_and_rest_are_merged():
+    handler = StreamEventHandler(coalesce_window_ms=60_000, coalesce_max_bytes=1024)
+    state = StreamState("t")
+
+    assert _deltas(await handler.handle_chat_model_stream(_chunk_event("He"), state, "run-1", None)) == ["He"]
+    assert await handler.handle_chat_model_stream(_chunk_event("ll"), state, "run-1", None) is None
+    assert await handler.handle_chat_model_stream(_chunk_event("o"), state, "run-1", None) is None
+    assert handler.content_flush_timeout() is not None
+
+    assert _deltas(handler.flush_content(state)) == ["llo"]
+    assert handler.content_flush_timeout() is None
+    assert state.assistant_content == "Hello"
+
+
+@pytest.mark.asyncio
+async def test_byte_budget_and_run_change_flush():
+    handler = StreamEventHandler(coalesce_window_ms=60_000, coalesce_max_bytes=4)
+    state = StreamState("t")
+
+    await handler.handle_chat_model_stream(_chunk_event("first"), state, "run-1", None)
+    assert await handler.handle_chat_model_stream(_chunk_event("ab"), state, "run-1", None) is None
+    assert _deltas(await handler.handle_chat_model_stream(_chunk_event("cd"), state, "run-1", None)) == ["abcd"]
+
+    await handler.handle_chat_model_stream(_chunk_event("x"), state, "run-1", None)
+    # a different run flushes the pending batch, then sends its own first chunk right away
+    frames = await handler.handle_chat_model_stream(_chunk_event("y", "run-2"), state, "run-2", None)
+    assert _deltas(frames) == ["x", "y"]
+
+
+def _model_start_event(messages: list, run_id: str) -> dict:
+    return {
+        "event": "on_chat_model_start",
+        "run_id": run_id,
+        "name": "fake",
+        "metadata": {"langgraph_node": "agent", "langgraph_checkpoint_ns": "agent:task-1|model:x"},
+        "data": {"input": {"messages": [messages]}},
+    }
+
+
+def _payload(frame: bytes) -> dict:
+    return json.loads(frame[len(b"data: ") :])["data"]
+
+
+@pytest.mark.asyncio
+async def test_model_input_delta_sends_only_new_messages():
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    handler = StreamEventHandler()
+    state = StreamState("t", model_input_delta=True)
+    history = [HumanMessage(content="hi", id="m1"), AIMessage(content="hello", id="m2")]
+
+    first = _payload(await handler.handle_chat_model_start(_model_start_event(history, "r1"), state, "r1", None))
+    assert len(first["messages"]) == 2
+    assert "prefix_observation_id" not in first
+
+    history = history + [HumanMessage(content="again", id="m3")]
+    second = _payload(await handler.handle_chat_model_start(_model_start_event(history, "r2"), state, "r2", None))
+    assert [m["content"] for m in second["messages"]] == ["again"]
+    assert second["prefix_length"] == 2
+    assert second["total_messages"] == 3
+    assert second["prefix_observation_id"] == state.get_observation_id("r1")
+
+    # a rewritten history is not a prefix match and is sent in full
+    edited = [HumanMessage(content="changed", id="m1")] + history[1:]
+    third = _payload(await handler.handle_chat_model_start(_model_start_event(edited, "r3"), state, "r3", None))
+    assert len(third["messages"]) == 3
+    assert "prefix_observation_id" not in third
+
+    # an edit that keeps the content length is still detected
+    same_length = [HumanMessage(content="chXnged", id="m1")] + history[1:]
+    fourth = _payload(await handler.handle_chat_model_start(_model_start_event(same_length, "r4"), state, "r4", None))
+    assert len(fourth["messages"]) == 3
+    assert "prefix_observation_id" not in fourth
+
+
+def _graph_event(event: str, parent_ids: list[str], name: str, run_id: str, data: dict | None = None) -> dict:
+    metadata = {"langgraph_node": name} if parent_ids else {}
+    return {
+        "event": event,
+        "name": name,
+        "run_id": run_id,
+        "parent_ids": parent_ids,
+        "metadata": metadata,
+        "data": data or {},
+    }
+
+
+def test_observe_graph_event_captures_final_values_and_interrupted_node():
+    state = StreamState("t")
+    events = [
+        _graph_event("on_chain_start", [], "LangGraph", "root"),
+        _graph_event("on_chain_start", ["root"], "a", "a1"),
+        _graph_event("on_chain_end", ["root"], "a", "a1", {"output": {"x": 2}}),
+        _graph_event("on_chain_start", ["root"], "b", "b1"),
+        _graph_event("on_chain_start", ["root", "b1"], "b", "inner"),
+        _graph_event("on_chain_stream", [], "LangGraph", "root", {"chunk": {"__interrupt__": ("need input",)}}),
+        _graph_event("on_chain_end", [], "LangGraph", "root", {"output": {"x": 2, "messages": []}}),
+    ]
+    for event in events:
+        state.observe_graph_event(event)
+
+    assert state.root_ended
+    assert state.final_values == {"x": 2, "messages": []}
+    assert state.interrupt_signaled
+    assert state.interrupt_values == ["need input"]
+    assert state.pending_root_node == "b"
@@ -0,0 +1,47 @@
+"""
+Tests for the run registry (local path; Redis is not configured in tests).
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.utils.task_manager import TaskManager
+
+
+@pytest.mark.asyncio
+async def test_stop_sets_local_flag_without_redis():
+    manager = TaskManager()
+    task = asyncio.create_task(asyncio.sleep(10))
+    try:
+        await manager.register_task("t1", task)
+        assert not manager.is_stop_requested("t1")
+
+        assert await manager.stop_task("t1")
+        assert manager.is_stop_requested("t1")
+        assert await manager.is_stopped("t1")
+
+        assert not await manager.stop_task("unknown")
+        await manager.unregister_task("t1")
+        assert not manager.is_stop_requested("t1")
+    finally:
+        task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_control_messages_only_affect_locally_owned_runs():
+    manager = TaskManager()
+    task = asyncio.create_task(asyncio.sleep(10))
+    await manager.register_task("t1", task)
+
+    manager._handle_control_message(json.dumps({"action": "stop", "thread_id": "other"}))
+    assert not manager.is_stop_requested("other")
+
+    manager._handle_control_message(json.dumps({"action": "stop", "thread_id": "t1"}))
+    assert manager.is_stop_requested("t1")
+
+    manager._handle_control_message(json.dumps({"action": "cancel", "thread_id": "t1"}))
+    await asyncio.sleep(0)
+    assert task.cancelled()
+    assert await manager.get_running_threads() == set()
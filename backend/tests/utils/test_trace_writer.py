@@ -0,0 +1,74 @@
+"""
+Tests for write-behind trace persistence.
+"""
+
+import asyncio
+
+import pytest
+
+from app.utils.stream_event_handler import ObsStatus, ObsType, StreamState
+from app.utils.trace_writer import TraceWriter
+
+
+class RecordingTraceWriter(TraceWriter):
+    """Captures batches instead of writing to the database."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches: list[tuple[list[tuple[str, ObsStatus]], bool]] = []
+
+    async def _write(self, records, *, final):
+        latest = {rec.id: rec.status for rec in records}
+        self.batches.append((list(latest.items()), final))
+        self._trace_created = True
+        self.rows_written += len(latest)
+
+
+def _run(state: StreamState, run_id: str, parent: str | None = None) -> str:
+    return state.create_observation(run_id=run_id, parent_run_id=parent, obs_type=ObsType.SPAN, name=run_id)
+
+
+@pytest.mark.asyncio
+async def test_completed_observations_are_flushed_and_released():
+    state = StreamState("t")
+    writer = RecordingTraceWriter(state, batch_size=4, flush_interval_ms=10)
+    writer.start()
+
+    parent = _run(state, "p")
+    child = _run(state, "c", parent="p")
+    state.end_observation("c")
+    state.end_observation("p")
+    await asyncio.sleep(0.05)
+
+    assert state._completed == []
+    assert writer.batches and not writer.batches[0][1]
+    written_order = [obs_id for batch, _ in writer.batches for obs_id, _ in batch]
+    assert written_order.index(parent) < written_order.index(child)
+
+    _run(state, "dangling")
+    await writer.close()
+    final_batch, final = writer.batches[-1]
+    assert final
+    assert [status for _, status in final_batch] == [ObsStatus.INTERRUPTED]
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_falls_back_to_end_of_stream_write():
+    state = StreamState("t")
+    writer = RecordingTraceWriter(state, batch_size=2, flush_interval_ms=60_000, max_queue=2)
+    writer.start()
+
+    for i in range(3):
+        _run(state, f"r{i}")
+    for i in range(3):
+        state.end_observation(f"r{i}")
+
+    assert not writer.running
+    assert len(state._completed) == 3
+
+    await writer.close()
+    final_batch, final = writer.batches[-1]
+    assert final
+    assert {status for _, status in final_batch} == {ObsStatus.COMPLETED}
+    assert len(final_batch) == 3
+    assert state._completed == []
@@ -309,7 +309,18 @@ function handleModelEvents(evt: ChatStreamEvent, ctx: EventAdapterContext, trace
     const modelData = data as ModelInputEventData
     const modelName = modelData?.model_name || 'unknown'
     const modelProvider = modelData?.model_provider || 'unknown'
-    const messages = modelData?.messages || []
+    let messages = modelData?.messages || []
+
+    // Delta mode: rebuild the full input from the referenced earlier model_input step
+    if (modelData?.prefix_observation_id && modelData.prefix_length) {
+      const prefixStep = ctx
+        .getSteps()
+        .find((s) => s.stepType === 'model_io' && s.observationId === modelData.prefix_observation_id)
+      const prefixMessages = prefixStep?.data?.messages
+      if (Array.isArray(prefixMessages)) {
+        messages = [...prefixMessages.slice(0, modelData.prefix_length), ...messages]
+      }
+    }
 
     const stepId = ctx.genId('model_io')
 
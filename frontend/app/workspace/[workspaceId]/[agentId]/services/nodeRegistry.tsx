@@ -436,6 +436,20 @@ const REGISTRY: NodeDefinition[] = [
         placeholder: 'Map tool arguments to state variables',
         description: 'Define how state variables map to tool parameters',
       },
+      {
+        key: 'memoize',
+        label: 'Memoize Results',
+        type: 'boolean',
+        description: 'Reuse the previous result when config and inputs are unchanged (only for deterministic tools)',
+      },
+      {
+        key: 'memoize_ttl_seconds',
+        label: 'Memoize TTL (seconds)',
+        type: 'number',
+        placeholder: '3600',
+        description: 'How long memoized results are reused',
+        showWhen: { field: 'memoize', values: [true] },
+      },
     ],
   },
   {
@@ -484,6 +498,43 @@ const REGISTRY: NodeDefinition[] = [
         description: 'Python code to execute (sandboxed). Use "result" variable for output.',
         showWhen: { field: 'execution_mode', values: ['custom'] },
       },
+      {
+        key: 'in_process',
+        label: 'Run In-Process',
+        type: 'boolean',
+        description: 'Skip the isolated worker for lightweight code (faster, but no timeout or memory limit).',
+        showWhen: { field: 'execution_mode', values: ['custom'] },
+      },
+      {
+        key: 'timeout_seconds',
+        label: 'Timeout (seconds)',
+        type: 'number',
+        placeholder: '10',
+        description: 'Wall-clock limit for isolated execution (capped by the server limit)',
+        showWhen: { field: 'execution_mode', values: ['custom'] },
+      },
+      {
+        key: 'memory_limit_mb',
+        label: 'Memory Limit (MB)',
+        type: 'number',
+        placeholder: '256',
+        description: 'Memory limit for isolated execution (capped by the server limit)',
+        showWhen: { field: 'execution_mode', values: ['custom'] },
+      },
+      {
+        key: 'memoize',
+        label: 'Memoize Results',
+        type: 'boolean',
+        description: 'Reuse the previous result when config and inputs are unchanged (only for deterministic functions)',
+      },
+      {
+        key: 'memoize_ttl_seconds',
+        label: 'Memoize TTL (seconds)',
+        type: 'number',
+        placeholder: '3600',
+        description: 'How long memoized results are reused',
+        showWhen: { field: 'memoize', values: [true] },
+      },
       {
         key: 'output_mapping',
         label: 'Output Mapping',
@@ -624,6 +675,28 @@ const REGISTRY: NodeDefinition[] = [
         placeholder: '30.0',
         description: 'Request timeout in seconds',
       },
+      {
+        key: 'cache_enabled',
+        label: 'Cache GET Responses',
+        type: 'boolean',
+        description: 'Reuse GET responses according to Cache-Control / ETag (useful when polling in loops)',
+        showWhen: { field: 'method', values: ['GET'] },
+      },
+      {
+        key: 'memoize',
+        label: 'Memoize Results',
+        type: 'boolean',
+        description: 'Reuse the previous result when config and inputs are unchanged (only for deterministic endpoints)',
+        showWhen: { field: 'method', values: ['GET'] },
+      },
+      {
+        key: 'memoize_ttl_seconds',
+        label: 'Memoize TTL (seconds)',
+        type: 'number',
+        placeholder: '3600',
+        description: 'How long memoized results are reused',
+        showWhen: { field: 'memoize', values: [true] },
+      },
     ],
   },
   // ==================== State Management Nodes ====================
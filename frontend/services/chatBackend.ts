@@ -137,9 +137,12 @@ export interface StatusEventData {
  * Model Input event data structure
  */
 export interface ModelInputEventData {
-  messages: any[]; // Input message list
+  messages: any[]; // Input message list (only new messages when prefix_observation_id is set)
   model_name: string;
   model_provider: string;
+  prefix_observation_id?: string; // Delta mode: earlier model_input observation holding the shared prefix
+  prefix_length?: number; // Delta mode: number of messages reused from that observation
+  total_messages?: number;
 }
 
 /**